@@ -101,6 +101,9 @@ def create_app(config_name=None):
     from routes.chat import chat_bp
     from routes.notifications import notifications_bp
     from routes.admin import admin_bp
+    from routes.events import events_bp
+    from services.mongodb_service import mongodb_service
+    from services.event_bus import event_bus
     # from routes.geneilink import geneilink_bp  # TODO: Enable in future
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -112,6 +115,8 @@ def create_app(config_name=None):
     app.register_blueprint(chat_bp)  # Already has url_prefix in blueprint
     app.register_blueprint(notifications_bp)  # Already has url_prefix in blueprint
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(events_bp)  # Already has url_prefix in blueprint
+    event_bus.init_app(app)  # background threads publish without an app context
     # app.register_blueprint(geneilink_bp, url_prefix='/api/geneilink')  # TODO: Enable in future
     
     # Health check endpoint
@@ -121,7 +126,8 @@ def create_app(config_name=None):
             'status': 'healthy',
             'message': 'ContentGenie API is running',
             'version': '1.0.0',
-            'environment': config_name
+            'environment': config_name,
+            'mongodb': mongodb_service.health()
         })
     
     # Root endpoint
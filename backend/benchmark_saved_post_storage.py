@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark the LinkoGenei storage backends with the same workload.
+Each backend gets a fresh database and serves, per user: single saves,
+batch saves (with some already-saved URLs, as extension retries send),
+paged post listings and stats reads. Reports throughput and p95 latency
+per operation.
+
+Backends:
+  - sql: SQL repository on a SQLite file (BENCH_DATABASE_URL to use another database)
+  - embedded: MongoDB repository on the embedded document store
+  - mongodb: MongoDB repository on the server from BENCH_MONGODB_URI (skipped when not set)
+
+Usage: python benchmark_saved_post_storage.py [posts_per_user] [users]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from flask import Flask
+from models import db
+from services.document_store import DocumentStore
+from services.mongodb_service import MongoDBService
+from services.saved_post_repository import SQLSavedPostRepository, MongoSavedPostRepository
+
+BATCH_SIZE = 25
+PAGE_SIZE = 50
+PLATFORMS = ('YouTube', 'LinkedIn', 'Instagram', 'Twitter')
+CATEGORIES = ('Uncategorized', 'Work', 'Ideas')
+
+
+@contextmanager
+def sql_backend(directory):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('BENCH_DATABASE_URL') or f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['POST_ENRICHMENT_ENABLED'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        try:
+            yield SQLSavedPostRepository()
+        finally:
+            db.session.remove()
+            db.drop_all()
+
+
+@contextmanager
+def embedded_backend(directory):
+    store = DocumentStore(os.path.join(directory, 'bench_documents.db'))
+    try:
+        yield MongoSavedPostRepository(MongoDBService(store))
+    finally:
+        store.close()
+
+
+@contextmanager
+def mongodb_backend(directory):
+    from pymongo import MongoClient
+    client = MongoClient(os.environ['BENCH_MONGODB_URI'], serverSelectionTimeoutMS=3000)
+    database = client[f'bench_{uuid.uuid4().hex[:12]}']
+    try:
+        yield MongoSavedPostRepository(MongoDBService(database))
+    finally:
+        client.drop_database(database.name)
+        client.close()
+
+
+BACKENDS = [
+    ('sql', sql_backend, True),
+    ('embedded', embedded_backend, True),
+    ('mongodb', mongodb_backend, bool(os.environ.get('BENCH_MONGODB_URI'))),
+]
+
+
+def _post(user_id, n):
+    return {
+        'url': f'https://example.com/{user_id}/posts/{n}?utm_source=bench',
+        'platform': PLATFORMS[n % len(PLATFORMS)],
+        'title': f'Benchmark post {n}',
+        'category': CATEGORIES[n % len(CATEGORIES)],
+        'tags': ['bench', f'tag{n % 7}']
+    }
+
+
+def run_workload(repo, posts_per_user, users):
+    """Latencies in seconds per operation"""
+    timings = {'save': [], 'save_batch': [], 'list': [], 'stats': []}
+
+    def timed(operation, call, *args, **kwargs):
+        start = time.perf_counter()
+        result = call(*args, **kwargs)
+        timings[operation].append(time.perf_counter() - start)
+        assert result.get('success'), result
+        return result
+
+    single = posts_per_user // 5
+    for user in range(users):
+        user_id = f'bench-user-{user}'
+        for n in range(single):
+            timed('save', repo.save_post, user_id, _post(user_id, n))
+
+        # Each batch starts with a few posts the previous request already saved
+        n = single
+        while n < posts_per_user:
+            batch = [_post(user_id, i) for i in range(max(n - 3, 0), min(n + BATCH_SIZE, posts_per_user))]
+            timed('save_batch', repo.save_posts_batch, user_id, batch)
+            n += BATCH_SIZE
+
+        for skip in range(0, posts_per_user, PAGE_SIZE):
+            timed('list', repo.get_posts, user_id, limit=PAGE_SIZE, skip=skip)
+            timed('list', repo.get_posts, user_id, category='Work', limit=PAGE_SIZE, skip=skip)
+            timed('stats', repo.get_stats, user_id)
+
+        total = repo.get_stats(user_id)['stats']['total_posts']
+        assert total == posts_per_user, f'{user_id} has {total} posts, expected {posts_per_user}'
+    return timings
+
+
+def p95(values):
+    values = sorted(values)
+    return values[min(int(len(values) * 0.95), len(values) - 1)]
+
+
+def main():
+    posts_per_user = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    print(f"🧪 Saved post storage ({users} users x {posts_per_user} posts, batches of {BATCH_SIZE})\n")
+    print(f"   {'backend':<10} {'operation':<12} {'calls':>7} {'ops/s':>10} {'p95':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, backend, enabled in BACKENDS:
+            if not enabled:
+                print(f"   {name:<10} skipped (BENCH_MONGODB_URI not set)")
+                continue
+            with backend(directory) as repo:
+                timings = run_workload(repo, posts_per_user, users)
+            for operation, values in timings.items():
+                if not values:
+                    continue
+                throughput = len(values) / sum(values)
+                print(f"   {name:<10} {operation:<12} {len(values):>7} {throughput:>10.1f} {p95(values) * 1000:>8.2f}ms")
+    print("\nops/s counts calls per second of time spent in them (a batch save is one call).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold worker startup against MongoDB.
+Each run starts a fresh interpreter (like a new gunicorn worker), imports the
+modules a worker loads and then serves one LinkoGenei stats call. Reports how
+long the import took and how long the first MongoDB-backed call took.
+
+Scenarios:
+  - unreachable: MONGODB_URI points at a blackholed address, so every connect waits out its timeout
+  - refused: nothing listens on the port
+  - available: the server from BENCH_MONGODB_URI (skipped when not set)
+
+Usage: python benchmark_worker_startup.py [runs]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+WORKER_SCRIPT = '''
+import json, time
+start = time.perf_counter()
+from services.mongodb_service import mongodb_service
+import services.profile_service
+import routes.notifications
+import routes.chat
+imported = time.perf_counter()
+mongodb_service.get_stats('benchmark-user')
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'first_call_ms': (served - imported) * 1000,
+    'backend': mongodb_service.health()['backend']
+}))
+'''
+
+SCENARIOS = [
+    ('unreachable', 'mongodb://10.255.255.1:27017/'),
+    ('refused', 'mongodb://127.0.0.1:1/'),
+    ('available', os.environ.get('BENCH_MONGODB_URI')),
+]
+
+
+def run_worker(mongo_uri, store_path):
+    env = dict(os.environ, MONGODB_URI=mongo_uri, DOCUMENT_STORE_PATH=store_path, MONGODB_RECONNECT_INTERVAL='0')
+    output = subprocess.run(
+        [sys.executable, '-c', WORKER_SCRIPT],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print(f"🧪 Cold worker startup ({runs} runs per scenario, median)\n")
+    print(f"   {'scenario':<12} {'backend':<10} {'import':>10} {'first call':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, mongo_uri in SCENARIOS:
+            if not mongo_uri:
+                print(f"   {name:<12} skipped (BENCH_MONGODB_URI not set)")
+                continue
+            results = [run_worker(mongo_uri, os.path.join(directory, f'{name}.db')) for _ in range(runs)]
+            import_ms = sorted(r['import_ms'] for r in results)[runs // 2]
+            first_call_ms = sorted(r['first_call_ms'] for r in results)[runs // 2]
+            print(f"   {name:<12} {results[-1]['backend']:<10} {import_ms:>8.0f}ms {first_call_ms:>10.0f}ms")
+    print("\nImport time is what gunicorn waits for before a worker can accept requests;")
+    print("the first call pays the connection attempt instead.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Compact the team activity log.
+Folds events older than TEAM_ACTIVITY_COMPACT_AFTER_DAYS into one summary per
+user, type and day. Safe to run repeatedly (e.g. from a daily cron job).
+"""
+
+import sys
+from app import create_app
+from services.team_activity_service import team_activity_service
+
+def compact_team_activity(older_than_days=None):
+    """Compact team activity events past the horizon"""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("🗜️  Compacting team activity log...")
+            stats = team_activity_service.compact(older_than_days)
+            print(f"✅ {stats['removed']} events from {stats['users']} users folded into {stats['summaries']} daily summaries")
+
+        except Exception as e:
+            print(f"❌ Compaction failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    compact_team_activity(int(sys.argv[1]) if len(sys.argv) > 1 else None)
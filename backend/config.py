@@ -20,6 +20,59 @@ class Config:
     # Groq config (for AI content generation)
     GROQ_API_KEY = os.environ.get('GROQ_API_KEY')
     
+    # Maximum concurrent Groq completions per worker process (batch generation fans out up to this)
+    GROQ_MAX_CONCURRENCY = int(os.environ.get('GROQ_MAX_CONCURRENCY') or 8)
+    
+    # AI model routing table override (JSON list of routes, see services/model_router.py)
+    AI_MODEL_ROUTES = os.environ.get('AI_MODEL_ROUTES')
+    
+    # Offline template generator: seconds before ContentTemplate rows are reloaded, and
+    # how often buffered usage_count increments are written
+    TEMPLATE_CACHE_TTL = int(os.environ.get('TEMPLATE_CACHE_TTL') or 300)
+    TEMPLATE_USAGE_FLUSH_SECONDS = int(os.environ.get('TEMPLATE_USAGE_FLUSH_SECONDS') or 30)
+    
+    # Alex chat context window (tokens sent per turn, and size of the running summary of older turns)
+    CHAT_CONTEXT_TOKEN_BUDGET = int(os.environ.get('CHAT_CONTEXT_TOKEN_BUDGET') or 3000)
+    CHAT_SUMMARY_MAX_TOKENS = int(os.environ.get('CHAT_SUMMARY_MAX_TOKENS') or 400)
+    
+    # Real-time events (SSE). REDIS_URL enables cross-worker pub/sub; streams close after
+    # EVENT_STREAM_MAX_SECONDS (keep it below the gunicorn --timeout) and clients resume with
+    # Last-Event-ID from the replay history. Streams are opened with a ticket valid for
+    # EVENT_STREAM_TICKET_SECONDS rather than the access token
+    REDIS_URL = os.environ.get('REDIS_URL')
+    EVENT_STREAM_HEARTBEAT_SECONDS = int(os.environ.get('EVENT_STREAM_HEARTBEAT_SECONDS') or 15)
+    EVENT_STREAM_MAX_SECONDS = int(os.environ.get('EVENT_STREAM_MAX_SECONDS') or 55)
+    EVENT_STREAM_TICKET_SECONDS = int(os.environ.get('EVENT_STREAM_TICKET_SECONDS') or 30)
+    EVENT_HISTORY_SIZE = int(os.environ.get('EVENT_HISTORY_SIZE') or 100)
+    
+    # Insert project-wide notifications (chat, daily updates) on a background thread
+    NOTIFICATION_FANOUT_ASYNC = os.environ.get('NOTIFICATION_FANOUT_ASYNC', 'true').lower() == 'true'
+    
+    # Team activity events older than this are folded into daily summaries by compact_team_activity.py
+    TEAM_ACTIVITY_COMPACT_AFTER_DAYS = int(os.environ.get('TEAM_ACTIVITY_COMPACT_AFTER_DAYS') or 90)
+    
+    # Project invitation links; sweep_project_invitations.py removes expired and used-up ones
+    PROJECT_INVITATION_TTL_DAYS = int(os.environ.get('PROJECT_INVITATION_TTL_DAYS') or 7)
+    PROJECT_INVITATION_MAX_USES = int(os.environ.get('PROJECT_INVITATION_MAX_USES') or 10)
+    
+    # Where LinkoGenei saved posts, categories and extension tokens live: 'sql' (the app database) or 'mongodb'
+    LINKOGENEI_STORAGE_BACKEND = os.environ.get('LINKOGENEI_STORAGE_BACKEND', 'sql').lower()
+    
+    # Largest batch the LinkoGenei extension may send to /api/linkogenei/save-posts
+    LINKOGENEI_BATCH_MAX_POSTS = int(os.environ.get('LINKOGENEI_BATCH_MAX_POSTS') or 100)
+    
+    # Verified extension tokens are cached per worker for at most this many seconds (0 disables)
+    EXTENSION_TOKEN_CACHE_TTL = int(os.environ.get('EXTENSION_TOKEN_CACHE_TTL') or 300)
+    EXTENSION_TOKEN_CACHE_SIZE = int(os.environ.get('EXTENSION_TOKEN_CACHE_SIZE') or 10000)
+    
+    # Fetch titles/images for saved posts that arrive without them (off the request thread when async)
+    POST_ENRICHMENT_ENABLED = os.environ.get('POST_ENRICHMENT_ENABLED', 'true').lower() == 'true'
+    POST_ENRICHMENT_ASYNC = os.environ.get('POST_ENRICHMENT_ASYNC', 'true').lower() == 'true'
+    POST_ENRICHMENT_CONCURRENCY = int(os.environ.get('POST_ENRICHMENT_CONCURRENCY') or 4)
+    # Fetched page metadata is shared across users for this long; failed fetches are retried after URL_METADATA_RETRY_AFTER
+    URL_METADATA_TTL = int(os.environ.get('URL_METADATA_TTL') or 7 * 86400)
+    URL_METADATA_RETRY_AFTER = int(os.environ.get('URL_METADATA_RETRY_AFTER') or 3600)
+    
     # Apify config (for social analytics)
     APIFY_API_KEY = os.environ.get('APIFY_API_KEY')
     
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Fill in missing titles and images of saved posts.
+Creates the shared url_metadata cache table if needed, then enriches every
+saved post without a title or image in batches (posts skipped while the
+background queue was full, or saved before enrichment existed).
+Safe to run repeatedly; pages already in the cache are not fetched again.
+"""
+
+from app import create_app
+from models import db, SavedPost, UrlMetadata
+from services.metadata_enricher import post_metadata_enricher
+from sqlalchemy import or_
+
+def enrich_saved_posts(batch_size=100):
+    """Enrich saved posts missing a title or image"""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("📊 Creating url_metadata table...")
+            UrlMetadata.__table__.create(db.engine, checkfirst=True)
+
+            print("🖼️ Enriching saved posts...")
+            totals = {'posts': 0, 'cache_hits': 0, 'fetched': 0, 'updated': 0}
+            last_id = ''
+            while True:
+                rows = db.session.query(SavedPost.id, SavedPost.url).filter(
+                    SavedPost.id > last_id,
+                    or_(SavedPost.title.is_(None), SavedPost.title == '',
+                        SavedPost.image_url.is_(None), SavedPost.image_url == '')
+                ).order_by(SavedPost.id).limit(batch_size).all()
+                if not rows:
+                    break
+                result = post_metadata_enricher.enrich([(row.id, row.url) for row in rows])
+                for key in totals:
+                    totals[key] += result[key]
+                last_id = rows[-1].id
+                print(f"   {totals['posts']} posts checked, {totals['updated']} updated")
+
+            print(f"✅ {totals['updated']} of {totals['posts']} posts enriched "
+                  f"({totals['fetched']} pages fetched, {totals['cache_hits']} from cache)")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Enrichment failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    enrich_saved_posts()
@@ -7,6 +7,7 @@ from app import create_app
 from models import db, User, ContentItem, Analytics, ContentTemplate, UserSession
 from services.analytics_service import AnalyticsService
 import os
+import json
 from datetime import datetime, timezone
 
 def init_database():
@@ -80,7 +81,7 @@ def create_sample_templates():
                 description=template_data['description'],
                 content_type=template_data['content_type'],
                 template=template_data['template'],
-                variables=str(template_data['variables'])  # Convert to JSON string
+                variables=json.dumps(template_data['variables'])
             )
             db.session.add(template)
     
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Migration script to key saved posts by canonical URL.
+Run this script to add saved_posts.url_hash, backfill it, merge posts that
+turn out to be the same post saved through different URLs, and replace the
+unique (user_id, url) index with (user_id, url_hash) in both backends.
+"""
+
+from app import create_app
+from models import db
+from services.linkogenei_service import linkogenei_service
+from services.mongodb_service import mongodb_service
+from sqlalchemy import inspect
+
+def migrate_canonical_urls():
+    """Add and backfill url_hash, merging duplicates"""
+    app = create_app()
+    
+    with app.app_context():
+        try:
+            print("🔄 Starting migration for canonical saved post URLs...")
+            
+            # Add column
+            columns = [column['name'] for column in inspect(db.engine).get_columns('saved_posts')]
+            if 'url_hash' not in columns:
+                print("📊 Adding url_hash column to saved_posts...")
+                db.session.execute(db.text("ALTER TABLE saved_posts ADD COLUMN url_hash VARCHAR(64)"))
+                db.session.commit()
+            else:
+                print("ℹ️ url_hash column already exists")
+            
+            # Backfill before the unique index, merging duplicates
+            print("🔗 Hashing canonical URLs and merging duplicates...")
+            result = linkogenei_service.backfill_url_hashes()
+            print(f"   {result['hashed']} posts hashed, {result['merged']} duplicates merged")
+            
+            print("🔑 Creating unique (user_id, url_hash) index...")
+            db.session.execute(db.text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS unique_saved_post_url_hash ON saved_posts (user_id, url_hash)"
+            ))
+            if db.engine.dialect.name == 'postgresql':
+                db.session.execute(db.text("ALTER TABLE saved_posts DROP CONSTRAINT IF EXISTS unique_saved_post"))
+            else:
+                # SQLite cannot drop a table constraint in place; the old one is now redundant
+                print("ℹ️ Keeping the old unique (user_id, url) constraint on SQLite")
+            db.session.commit()
+            
+            print("🍃 Migrating MongoDB saved posts...")
+            result = mongodb_service.backfill_url_hashes()
+            try:
+                mongodb_service.posts_collection.drop_index('user_id_1_url_1')
+            except Exception as e:
+                print(f"ℹ️ Old MongoDB url index not dropped: {str(e)}")
+            print(f"   {result['hashed']} posts hashed, {result['merged']} duplicates merged")
+            
+            print("✅ Migration completed successfully!")
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Migration failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    migrate_canonical_urls()
@@ -19,9 +19,15 @@ def migrate_chat_table():
             print("📊 Creating team_chats table...")
             TeamChat.__table__.create(db.engine, checkfirst=True)
             
+            # Indexes added after the table (no-op when they already exist)
+            print("📇 Creating team_chats indexes...")
+            for index in TeamChat.__table__.indexes:
+                index.create(db.engine, checkfirst=True)
+            
             print("✅ Migration completed successfully!")
             print("\nNew table created:")
             print("  - team_chats")
+            print("  - idx_team_chat_pair_created (sender_id, receiver_id, created_at)")
             
         except Exception as e:
             print(f"❌ Migration failed: {str(e)}")
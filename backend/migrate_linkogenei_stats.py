@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Migration script to add maintained LinkoGenei stats counters.
+Run this script to create the saved_post_stats table and build counters for existing users.
+"""
+
+from app import create_app
+from models import db, SavedPostStat
+from services.linkogenei_service import linkogenei_service
+
+def migrate_linkogenei_stats():
+    """Create saved_post_stats and backfill it from saved_posts"""
+    app = create_app()
+    
+    with app.app_context():
+        try:
+            print("🔄 Starting migration for LinkoGenei stats...")
+            
+            # Create table
+            print("📊 Creating saved_post_stats table...")
+            SavedPostStat.__table__.create(db.engine, checkfirst=True)
+            
+            # Backfill counters (users without them would otherwise be built on first read)
+            print("🔢 Building counters for existing users...")
+            result = linkogenei_service.reconcile_stats()
+            
+            print("✅ Migration completed successfully!")
+            print(f"\nCounters built for {result['users']} users in:")
+            print("  - saved_post_stats")
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Migration failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    migrate_linkogenei_stats()
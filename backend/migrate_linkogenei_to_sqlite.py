@@ -29,7 +29,8 @@ def migrate():
         print("\nTable: saved_posts")
         print("  - id (primary key)")
         print("  - user_id (foreign key to users)")
-        print("  - url (unique per user)")
+        print("  - url")
+        print("  - url_hash (canonical URL hash, unique per user)")
         print("  - platform (linkedin, instagram, twitter, etc.)")
         print("  - title")
         print("  - image_url")
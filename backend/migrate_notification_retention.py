@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Migration script for notification retention and cached unread counters.
+Run this script once after deploying notification coalescing.
+"""
+
+from datetime import datetime
+from services.mongodb_service import mongodb_service
+
+def migrate_notification_retention():
+    """Backfill read_at on read notifications and rebuild unread counters"""
+    try:
+        print("🔄 Starting migration for notification retention...")
+
+        # Notifications read before read_at existed would never expire
+        print("📅 Setting read_at on previously read notifications...")
+        result = mongodb_service.notifications_collection.update_many(
+            {'read': True, 'read_at': {'$exists': False}},
+            {'$set': {'read_at': datetime.utcnow()}}
+        )
+        print(f"   {result.modified_count} notifications updated")
+
+        # Counters are only created by writes, so backfill them for existing notifications
+        print("🔢 Rebuilding cached unread counters...")
+        result = mongodb_service.reconcile_unread_counters()
+        print(f"   {result['repaired']} of {result['users']} counters rebuilt")
+
+        print("✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        raise
+
+if __name__ == '__main__':
+    migrate_notification_retention()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the project invitation table.
+Run this script to create the table and move invitation links out of the
+project description JSON (tokens are stored hashed; existing links keep working).
+"""
+
+from datetime import datetime, timezone
+from app import create_app
+from models import db, TeamProject, ProjectInvitation
+from services.project_invitation_service import project_invitation_service
+import json
+
+def migrate_project_invitations():
+    """Create project_invitations table and move existing invitations into it"""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("🔄 Starting migration for project invitations...")
+
+            # Create table
+            print("📊 Creating project_invitations table...")
+            ProjectInvitation.__table__.create(db.engine, checkfirst=True)
+
+            print("📥 Moving invitations out of project data...")
+            moved = 0
+            for project in TeamProject.query.filter(TeamProject.description.like('%"invitations"%')).all():
+                try:
+                    project_data = json.loads(project.description)
+                except ValueError:
+                    continue
+                invitations = project_data.pop('invitations', None) or {}
+                for token, invitation in invitations.items():
+                    token_hash = project_invitation_service.hash_token(token)
+                    if ProjectInvitation.query.filter_by(token_hash=token_hash).first():
+                        continue
+                    db.session.add(ProjectInvitation(
+                        project_id=project.id,
+                        token_hash=token_hash,
+                        created_by_email=invitation.get('created_by'),
+                        uses=invitation.get('uses', 0),
+                        max_uses=invitation.get('max_uses', 10),
+                        created_at=datetime.fromisoformat(invitation['created_at']) if invitation.get('created_at') else datetime.now(timezone.utc),
+                        expires_at=datetime.fromisoformat(invitation['expires_at'].replace('Z', '+00:00'))
+                    ))
+                    moved += 1
+                project.description = json.dumps(project_data)
+            db.session.commit()
+            print(f"   {moved} invitations moved")
+
+            print("🧹 Sweeping expired invitations...")
+            removed = project_invitation_service.sweep()
+            print(f"   {removed} invitations removed")
+
+            print("✅ Migration completed successfully!")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Migration failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    migrate_project_invitations()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Migration script to add project task counters and cached reports.
+Run this script to create the tables and build counters for existing projects.
+"""
+
+from app import create_app
+from models import db, TeamProject, ProjectTaskCounter, ProjectReport
+from services.project_stats_service import project_stats_service
+import json
+
+def migrate_project_stats():
+    """Create project_task_counters and project_reports tables and backfill counters"""
+    app = create_app()
+    
+    with app.app_context():
+        try:
+            print("🔄 Starting migration for project stats...")
+            
+            # Create tables
+            print("📊 Creating project_task_counters and project_reports tables...")
+            ProjectTaskCounter.__table__.create(db.engine, checkfirst=True)
+            
+            # project_reports is only a cache: recreate it when it predates counters_version
+            inspector = db.inspect(db.engine)
+            if inspector.has_table('project_reports') and \
+                    'counters_version' not in {column['name'] for column in inspector.get_columns('project_reports')}:
+                print("♻️  Recreating project_reports with counters_version...")
+                ProjectReport.__table__.drop(db.engine)
+            ProjectReport.__table__.create(db.engine, checkfirst=True)
+            
+            # Backfill counters from each project's task list
+            print("🔢 Building task counters for existing projects...")
+            count = 0
+            for project in TeamProject.query.yield_per(100):
+                try:
+                    project_data = json.loads(project.description) if project.description and project.description.startswith('{') else {}
+                except ValueError:
+                    project_data = {}
+                project_stats_service.rebuild(project.id, project_data.get('tasks', []))
+                count += 1
+            db.session.commit()
+            
+            print("✅ Migration completed successfully!")
+            print(f"\nCounters built for {count} projects in:")
+            print("  - project_task_counters")
+            print("  - project_reports")
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Migration failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    migrate_project_stats()
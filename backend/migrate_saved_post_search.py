@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Migration script to add LinkoGenei saved post search.
+Run this script to create the saved_post_tags table and the SQLite FTS5 index,
+and to index existing posts (in both the SQL and MongoDB backends).
+"""
+
+from app import create_app
+from models import db, SavedPostTag
+from services.post_search_service import post_search_service
+from services.mongodb_service import mongodb_service
+
+def migrate_saved_post_search():
+    """Create the search tables and index existing saved posts"""
+    app = create_app()
+    
+    with app.app_context():
+        try:
+            print("🔄 Starting migration for saved post search...")
+            
+            # Create tables
+            print("📊 Creating saved_post_tags table...")
+            SavedPostTag.__table__.create(db.engine, checkfirst=True)
+            if db.engine.dialect.name == 'sqlite':
+                print("📊 Creating saved_posts_fts index...")
+                post_search_service.ensure_fts()
+                db.session.commit()
+            
+            # Index existing posts (new and edited posts are indexed as they are saved)
+            print("🔍 Indexing existing saved posts...")
+            indexed = post_search_service.rebuild_index()
+            
+            # MongoDB posts need url_host for the text index
+            print("🍃 Backfilling MongoDB search fields...")
+            backfilled = mongodb_service.backfill_post_search_fields()
+            
+            print("✅ Migration completed successfully!")
+            print(f"\nIndexed {indexed} posts in:")
+            print("  - saved_post_tags")
+            if db.engine.dialect.name == 'sqlite':
+                print("  - saved_posts_fts")
+            print(f"Backfilled {backfilled} MongoDB posts")
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Migration failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    migrate_saved_post_search()
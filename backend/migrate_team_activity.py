@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the team activity log table.
+Run this script to create the table and seed it from existing team data,
+then compact events older than TEAM_ACTIVITY_COMPACT_AFTER_DAYS.
+"""
+
+from app import create_app
+from models import db, User, TeamActivity, TeamMember, TeamProject, CollaborationRequest, TeamChat
+from services.team_activity_service import team_activity_service, ACTIVITY_ICONS
+import json
+
+# Request types that are invitations rather than notifications
+INVITATION_TYPES = ('join_team', 'project_invitation')
+REQUEST_TITLES = {'pending': 'Request Sent', 'accepted': 'Request Accepted', 'rejected': 'Request Rejected'}
+
+
+def _event(user_id, actor, activity_type, title, description, created_at, metadata):
+    return TeamActivity(
+        user_id=user_id,
+        actor_id=actor.id if actor else None,
+        actor_name=(actor.display_name or actor.email) if actor else None,
+        activity_type=activity_type,
+        icon=ACTIVITY_ICONS.get(activity_type),
+        title=title,
+        description=description,
+        details=json.dumps(metadata),
+        created_at=created_at
+    )
+
+
+def migrate_team_activity():
+    """Create team_activities table and seed it from projects, members, invitations and chats"""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("🔄 Starting migration for team activity log...")
+
+            # Create table
+            print("📊 Creating team_activities table...")
+            TeamActivity.__table__.create(db.engine, checkfirst=True)
+
+            if TeamActivity.query.first():
+                print("ℹ️  team_activities already has events, skipping backfill")
+            else:
+                users = {user.id: user for user in User.query.all()}
+                seeded = 0
+
+                print("📥 Seeding from projects and team members...")
+                for project in TeamProject.query.yield_per(500):
+                    db.session.add(_event(
+                        project.owner_id, users.get(project.owner_id), 'project_created', 'Project Created',
+                        f'Created project "{project.name}"', project.created_at,
+                        {'project_id': project.id, 'project_name': project.name}
+                    ))
+                    seeded += 1
+                for member in TeamMember.query.yield_per(500):
+                    db.session.add(_event(
+                        member.owner_id, users.get(member.owner_id), 'member_added', 'Team Member Added',
+                        f'Added {member.member_email} to the team', member.created_at,
+                        {'member_email': member.member_email, 'role': member.role}
+                    ))
+                    seeded += 1
+
+                print("📥 Seeding from invitations...")
+                invitations = CollaborationRequest.query.filter(
+                    CollaborationRequest.request_type.in_(INVITATION_TYPES)
+                ).yield_per(500)
+                for req in invitations:
+                    status = req.status if req.status in ('accepted', 'rejected') else 'pending'
+                    for user_id in filter(None, {req.from_user_id, req.to_user_id}):
+                        db.session.add(_event(
+                            user_id, users.get(req.from_user_id), f'request_{status}', REQUEST_TITLES[status],
+                            req.message or 'Collaboration request', req.responded_at or req.created_at,
+                            {'request_type': req.request_type, 'status': status, 'project_id': req.project_id}
+                        ))
+                        seeded += 1
+
+                print("📥 Seeding from team chats...")
+                for chat in TeamChat.query.yield_per(500):
+                    sender, receiver = users.get(chat.sender_id), users.get(chat.receiver_id)
+                    if not sender or not receiver:
+                        continue
+                    preview = (chat.message or '')[:50]
+                    for owner, other in ((sender, receiver), (receiver, sender)):
+                        db.session.add(_event(
+                            owner.id, sender, 'chat_message', 'Chat Message',
+                            f'Message with {other.display_name or other.email}', chat.created_at,
+                            {'other_user': other.email, 'message_preview': preview}
+                        ))
+                        seeded += 1
+                db.session.commit()
+                print(f"   {seeded} events seeded")
+
+            print("🗜️  Compacting old events...")
+            stats = team_activity_service.compact()
+            print(f"   {stats['removed']} events folded into {stats['summaries']} daily summaries")
+
+            print("✅ Migration completed successfully!")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Migration failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    migrate_team_activity()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the team conversation summary table.
+Run this script to create the table and backfill it from existing team chats.
+"""
+
+from app import create_app
+from models import db, TeamConversation
+from services.team_chat_service import team_chat_service
+
+def migrate_team_conversations():
+    """Create team_conversations table and backfill summaries"""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("🔄 Starting migration for team conversation summaries...")
+
+            # Create table
+            print("📊 Creating team_conversations table...")
+            TeamConversation.__table__.create(db.engine, checkfirst=True)
+
+            # Backfill from team_chats
+            print("📥 Backfilling conversation summaries from team_chats...")
+            result = team_chat_service.backfill_conversations()
+
+            print("✅ Migration completed successfully!")
+            print(f"\nBackfilled {result['conversations']} conversations into:")
+            print("  - team_conversations")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Migration failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    migrate_team_conversations()
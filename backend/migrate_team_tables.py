@@ -25,6 +25,11 @@ def migrate_team_tables():
             print("📊 Creating collaboration_requests table...")
             CollaborationRequest.__table__.create(db.engine, checkfirst=True)
             
+            # Tables created before the composite indexes existed need them added
+            print("📇 Creating collaboration_requests indexes...")
+            for index in CollaborationRequest.__table__.indexes:
+                index.create(db.engine, checkfirst=True)
+            
             print("✅ Migration completed successfully!")
             print("\nNew tables created:")
             print("  - team_members")
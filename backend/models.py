@@ -292,6 +292,66 @@ class TeamProject(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class ProjectInvitation(db.Model):
+    """Shareable project invitation link; only the SHA-256 of the token is stored"""
+    __tablename__ = 'project_invitations'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    project_id = db.Column(db.String(36), db.ForeignKey('team_projects.id'), nullable=False, index=True)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)
+    created_by = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=True)
+    created_by_email = db.Column(db.String(120), nullable=True)
+    
+    uses = db.Column(db.Integer, default=0, nullable=False)
+    max_uses = db.Column(db.Integer, default=10, nullable=False)
+    
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'project_id': self.project_id,
+            'created_by': self.created_by_email,
+            'uses': self.uses,
+            'max_uses': self.max_uses,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
+
+class ProjectTaskCounter(db.Model):
+    """Task counts for a project (member_email '') and for each assignee, kept in step with task writes"""
+    __tablename__ = 'project_task_counters'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    project_id = db.Column(db.String(36), db.ForeignKey('team_projects.id'), nullable=False)
+    member_email = db.Column(db.String(120), nullable=False, default='')
+    
+    todo = db.Column(db.Integer, default=0, nullable=False)
+    doing = db.Column(db.Integer, default=0, nullable=False)
+    done = db.Column(db.Integer, default=0, nullable=False)
+    submitted = db.Column(db.Integer, default=0, nullable=False)
+    reviewed = db.Column(db.Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('project_id', 'member_email', name='unique_project_member_counter'),
+    )
+    
+    COUNTER_FIELDS = ('todo', 'doing', 'done', 'submitted', 'reviewed')
+    
+    def to_dict(self):
+        return {field: getattr(self, field) or 0 for field in self.COUNTER_FIELDS}
+
+class ProjectReport(db.Model):
+    """Cached task counts of the leader report; valid while source_version matches counters_version"""
+    __tablename__ = 'project_reports'
+    
+    project_id = db.Column(db.String(36), db.ForeignKey('team_projects.id'), primary_key=True)
+    counters_version = db.Column(db.Integer, default=0, nullable=False)  # Bumped by every task counter change
+    report = db.Column(db.Text, nullable=True)  # JSON summary and per-member counts
+    source_version = db.Column(db.Integer, nullable=True)  # counters_version the report was built from
+    generated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
 class CollaborationRequest(db.Model):
     __tablename__ = 'collaboration_requests'
     
@@ -308,6 +368,12 @@ class CollaborationRequest(db.Model):
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     responded_at = db.Column(db.DateTime, nullable=True)
     
+    __table_args__ = (
+        # Inbox (pending requests/notifications, newest first) and sent-requests listings
+        db.Index('idx_collab_request_to_status_created', 'to_email', 'status', 'created_at'),
+        db.Index('idx_collab_request_from_created', 'from_user_id', 'created_at'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -333,7 +399,12 @@ class TeamChat(db.Model):
     is_read = db.Column(db.Boolean, default=False)
     
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
-    
+
+    __table_args__ = (
+        # Serves per-pair history pages and cursors ordered by time
+        db.Index('idx_team_chat_pair_created', 'sender_id', 'receiver_id', 'created_at'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -344,6 +415,87 @@ class TeamChat(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class TeamConversation(db.Model):
+    """Per-pair summary of a team direct-message thread, maintained when messages are sent or read"""
+    __tablename__ = 'team_conversations'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    # The pair is stored in sorted order: user_a_id < user_b_id
+    user_a_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    user_b_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    
+    last_message = db.Column(db.Text, nullable=True)
+    last_sender_id = db.Column(db.String(36), nullable=True)
+    last_message_at = db.Column(db.DateTime, nullable=True)
+    
+    # Unread messages waiting for each side
+    unread_a = db.Column(db.Integer, default=0, nullable=False)
+    unread_b = db.Column(db.Integer, default=0, nullable=False)
+    
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_a_id', 'user_b_id', name='unique_team_conversation'),
+        db.Index('idx_team_conversation_user_b', 'user_b_id'),
+    )
+    
+    @staticmethod
+    def pair(user_id: str, other_user_id: str):
+        """Return the (user_a_id, user_b_id) ordering used for a pair of users"""
+        return (user_id, other_user_id) if user_id < other_user_id else (other_user_id, user_id)
+    
+    def unread_for(self, user_id: str) -> int:
+        return self.unread_a if user_id == self.user_a_id else self.unread_b
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_a_id': self.user_a_id,
+            'user_b_id': self.user_b_id,
+            'last_message': self.last_message,
+            'last_sender_id': self.last_sender_id,
+            'last_message_at': self.last_message_at.isoformat() if self.last_message_at else None,
+            'unread_a': self.unread_a,
+            'unread_b': self.unread_b
+        }
+
+class TeamActivity(db.Model):
+    """Append-only team activity feed; one row per user whose feed shows the event"""
+    __tablename__ = 'team_activities'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)  # Feed owner
+    actor_id = db.Column(db.String(36), nullable=True)
+    actor_name = db.Column(db.String(200), nullable=True)
+    
+    activity_type = db.Column(db.String(50), nullable=False)  # project_created, member_added, request_*, chat_message
+    icon = db.Column(db.String(10), nullable=True)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    details = db.Column(db.Text, nullable=True)  # JSON metadata
+    count = db.Column(db.Integer, default=1, nullable=False)  # Events folded into this row by compaction
+    
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    
+    __table_args__ = (
+        # The feed is a range scan over one user's rows, newest first
+        db.Index('idx_team_activity_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('idx_team_activity_created', 'created_at'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'type': self.activity_type,
+            'icon': self.icon,
+            'title': self.title,
+            'description': self.description,
+            'user': self.actor_name,
+            'timestamp': self.created_at.isoformat() if self.created_at else None,
+            'count': self.count,
+            'metadata': json.loads(self.details) if self.details else {}
+        }
+
 
 # ==================== GENEILINK MODELS ====================
 
@@ -537,150 +689,202 @@ class PostCategoryAssignment(db.Model):
         }
 
 
-    class SocialAccount(db.Model):
-        """Connected social media accounts for analytics"""
-        __tablename__ = 'social_accounts'
-
-        id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-        user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
-
-        # Platform details
-        platform = db.Column(db.String(20), nullable=False, index=True)  # instagram, linkedin, twitter, youtube
-        username = db.Column(db.String(255), nullable=False)
-        profile_url = db.Column(db.String(500), nullable=False)
-
-        # Profile information
-        full_name = db.Column(db.String(255), nullable=True)
-        bio = db.Column(db.Text, nullable=True)
-        profile_pic = db.Column(db.String(500), nullable=True)
-        is_verified = db.Column(db.Boolean, default=False)
-        is_private = db.Column(db.Boolean, default=False)
-
-        # Metrics (stored as JSON)
-        metrics = db.Column(db.Text, nullable=True)  # JSON object with followers, following, posts, etc.
-
-        # Additional data
-        extra_data = db.Column(db.Text, nullable=True)  # JSON for platform-specific data
-
-        # Timestamps
-        last_updated = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
-        connected_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
-
-        # Unique constraint: one user can't connect the same account twice
-        __table_args__ = (
-            db.UniqueConstraint('user_id', 'platform', 'username', name='unique_social_account'),
-            db.Index('idx_user_platform_social', 'user_id', 'platform'),
-        )
-
-        def to_dict(self):
-            return {
-                '_id': self.id,  # Use _id for frontend compatibility
-                'id': self.id,
-                'user_id': self.user_id,
-                'platform': self.platform,
-                'username': self.username,
-                'profile_url': self.profile_url,
-                'full_name': self.full_name,
-                'bio': self.bio,
-                'profile_pic': self.profile_pic,
-                'is_verified': self.is_verified,
-                'is_private': self.is_private,
-                'metrics': json.loads(self.metrics) if self.metrics else {},
-                'extra_data': json.loads(self.extra_data) if self.extra_data else {},
-                'last_updated': self.last_updated.isoformat() if self.last_updated else None,
-                'connected_at': self.connected_at.isoformat() if self.connected_at else None
-            }
-
-
-        class ExtensionToken(db.Model):
-            """Extension tokens for LinkoGenei Chrome extension"""
-            __tablename__ = 'extension_tokens'
-
-            id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-            user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
-            token = db.Column(db.String(255), nullable=False, unique=True, index=True)
-            expires_at = db.Column(db.DateTime, nullable=False, index=True)
-            created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
-
-            def to_dict(self):
-                return {
-                    'id': self.id,
-                    'user_id': self.user_id,
-                    'token': self.token,
-                    'expires_at': self.expires_at.isoformat() if self.expires_at else None,
-                    'created_at': self.created_at.isoformat() if self.created_at else None
-                }
-
-
-        class SavedPost(db.Model):
-            """Saved posts from LinkoGenei extension"""
-            __tablename__ = 'saved_posts'
-
-            id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-            user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
-
-            # Post details
-            url = db.Column(db.String(500), nullable=False)
-            platform = db.Column(db.String(20), nullable=False, index=True)  # linkedin, instagram, twitter, etc.
-            title = db.Column(db.String(500), nullable=True)
-            image_url = db.Column(db.String(500), nullable=True)
-
-            # Organization
-            category = db.Column(db.String(50), default='Uncategorized', index=True)
-            notes = db.Column(db.Text, nullable=True)
-            tags = db.Column(db.Text, nullable=True)  # JSON array
-
-            # Timestamps
-            created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
-            updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
-
-            # Unique constraint: one user can't save the same URL twice
-            __table_args__ = (
-                db.UniqueConstraint('user_id', 'url', name='unique_saved_post'),
-                db.Index('idx_user_category', 'user_id', 'category'),
-                db.Index('idx_user_platform', 'user_id', 'platform'),
-            )
-
-            def to_dict(self):
-                return {
-                    'id': self.id,
-                    'user_id': self.user_id,
-                    'url': self.url,
-                    'platform': self.platform,
-                    'title': self.title,
-                    'image_url': self.image_url,
-                    'category': self.category,
-                    'notes': self.notes,
-                    'tags': json.loads(self.tags) if self.tags else [],
-                    'created_at': self.created_at.isoformat() if self.created_at else None,
-                    'updated_at': self.updated_at.isoformat() if self.updated_at else None
-                }
-
-
-        class SavedPostCategory(db.Model):
-            """Categories for organizing saved posts"""
-            __tablename__ = 'saved_post_categories'
-
-            id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-            user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
-            name = db.Column(db.String(50), nullable=False)
-            color = db.Column(db.String(7), default='#667eea')
-            post_count = db.Column(db.Integer, default=0)
-            created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
-
-            # Unique constraint: category names must be unique per user
-            __table_args__ = (
-                db.UniqueConstraint('user_id', 'name', name='unique_saved_post_category'),
-            )
-
-            def to_dict(self):
-                return {
-                    'id': self.id,
-                    'user_id': self.user_id,
-                    'name': self.name,
-                    'color': self.color,
-                    'post_count': self.post_count,
-                    'created_at': self.created_at.isoformat() if self.created_at else None
-                }
+class SocialAccount(db.Model):
+    """Connected social media accounts for analytics"""
+    __tablename__ = 'social_accounts'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+
+    # Platform details
+    platform = db.Column(db.String(20), nullable=False, index=True)  # instagram, linkedin, twitter, youtube
+    username = db.Column(db.String(255), nullable=False)
+    profile_url = db.Column(db.String(500), nullable=False)
+
+    # Profile information
+    full_name = db.Column(db.String(255), nullable=True)
+    bio = db.Column(db.Text, nullable=True)
+    profile_pic = db.Column(db.String(500), nullable=True)
+    is_verified = db.Column(db.Boolean, default=False)
+    is_private = db.Column(db.Boolean, default=False)
+
+    # Metrics (stored as JSON)
+    metrics = db.Column(db.Text, nullable=True)  # JSON object with followers, following, posts, etc.
+
+    # Additional data
+    extra_data = db.Column(db.Text, nullable=True)  # JSON for platform-specific data
+
+    # Timestamps
+    last_updated = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    connected_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # Unique constraint: one user can't connect the same account twice
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'platform', 'username', name='unique_social_account'),
+        db.Index('idx_user_platform_social', 'user_id', 'platform'),
+    )
+
+    def to_dict(self):
+        return {
+            '_id': self.id,  # Use _id for frontend compatibility
+            'id': self.id,
+            'user_id': self.user_id,
+            'platform': self.platform,
+            'username': self.username,
+            'profile_url': self.profile_url,
+            'full_name': self.full_name,
+            'bio': self.bio,
+            'profile_pic': self.profile_pic,
+            'is_verified': self.is_verified,
+            'is_private': self.is_private,
+            'metrics': json.loads(self.metrics) if self.metrics else {},
+            'extra_data': json.loads(self.extra_data) if self.extra_data else {},
+            'last_updated': self.last_updated.isoformat() if self.last_updated else None,
+            'connected_at': self.connected_at.isoformat() if self.connected_at else None
+        }
+
+
+class ExtensionToken(db.Model):
+    """Extension tokens for LinkoGenei Chrome extension"""
+    __tablename__ = 'extension_tokens'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+    token = db.Column(db.String(255), nullable=False, unique=True, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'token': self.token,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class SavedPost(db.Model):
+    """Saved posts from LinkoGenei extension"""
+    __tablename__ = 'saved_posts'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+
+    # Post details
+    url = db.Column(db.String(500), nullable=False)
+    url_hash = db.Column(db.String(64), nullable=True)  # sha256 of the canonical URL (utils/canonical_url.py)
+    platform = db.Column(db.String(20), nullable=False, index=True)  # linkedin, instagram, twitter, etc.
+    title = db.Column(db.String(500), nullable=True)
+    image_url = db.Column(db.String(500), nullable=True)
+
+    # Organization
+    category = db.Column(db.String(50), default='Uncategorized', index=True)
+    notes = db.Column(db.Text, nullable=True)
+    tags = db.Column(db.Text, nullable=True)  # JSON array
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    # Unique constraint: one user can't save the same post twice, under any form of its URL
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'url_hash', name='unique_saved_post_url_hash'),
+        db.Index('idx_user_category', 'user_id', 'category'),
+        db.Index('idx_saved_post_user_platform', 'user_id', 'platform'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'url': self.url,
+            'platform': self.platform,
+            'title': self.title,
+            'image_url': self.image_url,
+            'category': self.category,
+            'notes': self.notes,
+            'tags': json.loads(self.tags) if self.tags else [],
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class SavedPostTag(db.Model):
+    """One row per (post, tag) so tag filters use an index instead of parsing the JSON tags"""
+    __tablename__ = 'saved_post_tags'
 
+    post_id = db.Column(db.String(36), db.ForeignKey('saved_posts.id', ondelete='CASCADE'), primary_key=True)
+    tag = db.Column(db.String(50), primary_key=True)  # normalized: trimmed, lowercase
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
 
+    __table_args__ = (
+        db.Index('idx_saved_post_tag_user_tag', 'user_id', 'tag'),
+    )
+
+
+class SavedPostCategory(db.Model):
+    """Categories for organizing saved posts"""
+    __tablename__ = 'saved_post_categories'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+    name = db.Column(db.String(50), nullable=False)
+    color = db.Column(db.String(7), default='#667eea')
+    post_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # Unique constraint: category names must be unique per user
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'name', name='unique_saved_post_category'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'name': self.name,
+            'color': self.color,
+            'post_count': self.post_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+
+
+class SavedPostStat(db.Model):
+    """Saved post counts per user: the total (dimension 'total'), per platform and per category"""
+    __tablename__ = 'saved_post_stats'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    dimension = db.Column(db.String(20), nullable=False)  # total, platform, category
+    name = db.Column(db.String(50), nullable=False, default='')
+    count = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'dimension', 'name', name='unique_saved_post_stat'),
+    )
+
+
+class UrlMetadata(db.Model):
+    """Page preview metadata per canonical URL, shared by every user who saves that URL"""
+    __tablename__ = 'url_metadata'
+
+    url_hash = db.Column(db.String(64), primary_key=True)  # same hash as SavedPost.url_hash
+    url = db.Column(db.String(500), nullable=False)  # canonical URL that was fetched
+    title = db.Column(db.String(500), nullable=True)
+    description = db.Column(db.Text, nullable=True)
+    image_url = db.Column(db.String(500), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='ok')  # ok, failed
+    fetched_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
+    def to_dict(self):
+        return {
+            'url': self.url,
+            'title': self.title,
+            'description': self.description,
+            'image_url': self.image_url,
+            'status': self.status,
+            'fetched_at': self.fetched_at.isoformat() if self.fetched_at else None
+        }
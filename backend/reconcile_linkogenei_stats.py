@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Repair drift in the maintained LinkoGenei stats counters.
+Recounts each user's saved posts and rewrites the SQL counters, the MongoDB
+stats documents and category post counts that no longer match.
+Safe to run repeatedly (e.g. from a nightly cron job).
+"""
+
+from app import create_app
+from services.linkogenei_service import linkogenei_service
+from services.mongodb_service import mongodb_service
+
+def reconcile_linkogenei_stats():
+    """Recount stats for every user on both backends"""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("🔢 Reconciling LinkoGenei stats...")
+            result = linkogenei_service.reconcile_stats()
+            print(f"✅ Database: {result['repaired']} of {result['users']} users repaired, "
+                  f"{result['categories_repaired']} category counts fixed")
+
+            result = mongodb_service.reconcile_post_stats()
+            print(f"✅ MongoDB: {result['repaired']} of {result['users']} users repaired, "
+                  f"{result['categories_repaired']} category counts fixed")
+
+        except Exception as e:
+            print(f"❌ Reconciliation failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    reconcile_linkogenei_stats()
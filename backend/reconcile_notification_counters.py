@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Repair drift in the cached unread notification counters.
+Recounts each user's unread notifications and rewrites the counters that no
+longer match, creating the missing ones.
+Safe to run repeatedly (e.g. from a nightly cron job).
+"""
+
+from app import create_app
+from services.mongodb_service import mongodb_service
+
+def reconcile_notification_counters():
+    """Recount unread notifications for every user"""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("🔢 Reconciling unread notification counters...")
+            result = mongodb_service.reconcile_unread_counters()
+            print(f"✅ {result['repaired']} of {result['users']} counters repaired")
+
+        except Exception as e:
+            print(f"❌ Reconciliation failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    reconcile_notification_counters()
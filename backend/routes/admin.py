@@ -4,6 +4,7 @@ Admin Routes - Admin panel endpoints for managing the application
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, User, ContentItem, GeneratedContent, TeamProject, TeamMember, CollaborationRequest
+from services.model_router import model_router
 from functools import wraps
 from datetime import datetime, timezone, timedelta
 from sqlalchemy import func
@@ -418,3 +419,45 @@ def get_activity_logs():
     except Exception as e:
         logger.error(f"Error getting activity logs: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
+
+# ==================== AI MODEL ROUTING ====================
+
+@admin_bp.route('/ai/routes', methods=['GET'])
+@admin_required
+def get_ai_routes():
+    """Get the AI model routing table with observed latency and token usage"""
+    try:
+        return jsonify({
+            'success': True,
+            'routes': model_router.routes,
+            'stats': model_router.get_stats()
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error getting AI routes: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/ai/routes/<route_name>', methods=['PUT'])
+@admin_required
+def update_ai_route(route_name):
+    """Shift a route to another model, effort or token budget (per worker, until restart)"""
+    try:
+        data = request.get_json() or {}
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'Expected a JSON object'}), 400
+        
+        try:
+            route = model_router.update_route(route_name, data)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        if not route:
+            return jsonify({'success': False, 'error': 'Route not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'route': route
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error updating AI route: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
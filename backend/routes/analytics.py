@@ -1,14 +1,18 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, User, SocialAccount
 from services.analytics_service import AnalyticsService
 from services.apify_service import apify_service
+from utils.export import EXPORT_FORMATS, csv_stream
 from datetime import datetime, timezone
 import re
 import json
 
 analytics_bp = Blueprint('analytics', __name__)
 
+# Columns of the CSV analytics export (one row per content item)
+ANALYTICS_EXPORT_FIELDS = ['id', 'title', 'content_type', 'created_at', 'total_views', 'avg_engagement']
+
 @analytics_bp.route('/overview', methods=['GET'])
 @jwt_required()
 def get_analytics_overview():
@@ -212,13 +216,10 @@ def export_analytics():
         }
         
         if format_type == 'csv':
-            # For CSV format, you would implement CSV conversion here
-            # For now, return JSON with a note
-            return jsonify({
-                'success': True,
-                'message': 'CSV export not implemented yet',
-                'data': export_data
-            })
+            # The per-item performance table is the tabular part of the export
+            response = Response(csv_stream(content_performance, ANALYTICS_EXPORT_FIELDS), content_type=EXPORT_FORMATS['csv'][0])
+            response.headers['Content-Disposition'] = f'attachment; filename="analytics-{days}d.csv"'
+            return response
         
         return jsonify({
             'success': True,
@@ -3,6 +3,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from services.mongodb_service import mongodb_service
+from services.chat_context_service import chat_context_service
+from services.ai_service import AIContentGenerator
 from datetime import datetime
 import logging
 
@@ -10,6 +12,8 @@ logger = logging.getLogger(__name__)
 
 chat_bp = Blueprint('chat', __name__, url_prefix='/api/chat')
 
+ai_generator = AIContentGenerator()
+
 @chat_bp.route('/conversations', methods=['GET'])
 @jwt_required()
 def get_conversations():
@@ -110,6 +114,69 @@ def send_message(conversation_id):
             'error': 'Failed to send message'
         }), 500
 
+@chat_bp.route('/conversations/<conversation_id>/turn', methods=['POST'])
+@jwt_required()
+def chat_turn(conversation_id):
+    """Send a user message and get Alex's reply, with context assembled server-side"""
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        
+        content = (data.get('content') or '').strip()
+        if not content:
+            return jsonify({
+                'success': False,
+                'error': 'Message content is required'
+            }), 400
+        
+        conversation = mongodb_service.get_chat_conversation(user_id, conversation_id)
+        if not conversation:
+            return jsonify({
+                'success': False,
+                'error': 'Conversation not found'
+            }), 404
+        
+        context = chat_context_service.build_context(user_id, conversation, content, ai_generator)
+        
+        result = ai_generator.generate_chat_reply(
+            context['messages'],
+            tone=data.get('tone', 'conversational')
+        )
+        
+        if not result['success']:
+            return jsonify({
+                'success': False,
+                'error': result.get('error', 'Failed to generate reply')
+            }), 500
+        
+        saved = mongodb_service.save_chat_turn(
+            user_id=user_id,
+            conversation_id=conversation_id,
+            user_content=content,
+            assistant_content=result['content'],
+            summary=context['summary'] if context['summary_changed'] else None,
+            summarized_count=context['summarized_count'] if context['summary_changed'] else None
+        )
+        
+        if not saved['success']:
+            return jsonify(saved), 500
+        
+        return jsonify({
+            'success': True,
+            'user_message': saved['user_message'],
+            'assistant_message': saved['assistant_message'],
+            'ai_model_used': result['model_used'],
+            'generation_time': result['generation_time'],
+            'context_tokens': context['context_tokens']
+        }), 201
+        
+    except Exception as e:
+        logger.error(f"Chat turn error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to send message'
+        }), 500
+
 @chat_bp.route('/conversations/<conversation_id>', methods=['DELETE'])
 @jwt_required()
 def delete_conversation(conversation_id):
@@ -1,16 +1,29 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, ContentItem, User, GeneratedContent
-from services.ai_service import AIContentGenerator
+from services.ai_service import AIContentGenerator, get_groq_concurrency
 from services.ocr_service import ocr_service
 from services.video_service import video_service
 from services.url_service import url_service
+from utils.export import EXPORT_FORMATS, CONTENT_EXPORT_FIELDS, export_response, content_item_markdown
 from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
 import base64
+import math
+import uuid
 
 content_bp = Blueprint('content', __name__)
 
+# Rows read per round trip when streaming exports
+EXPORT_BATCH_SIZE = 500
+
+# Upper bound on targets x variants for a single batch generation request
+MAX_BATCH_GENERATIONS = 12
+
+# Highest sampling temperature used for batch generations (variants step up towards it)
+MAX_BATCH_TEMPERATURE = 1.2
+
 # Initialize AI generator at module level to avoid repeated initialization
 ai_generator = AIContentGenerator()
 
@@ -61,8 +74,10 @@ def generate_content():
             target_audience=data.get('target_audience'),
             platform=data.get('platform'),
             word_count=data.get('word_count'),
-            max_tokens=data.get('max_tokens', 16000),
-            temperature=data.get('temperature', 0.7)
+            max_tokens=data.get('max_tokens'),
+            temperature=data.get('temperature', 0.7),
+            user_tier='premium' if user.is_premium else 'free',
+            template_variables=data.get('template_variables')
         )
         
         if not result['success']:
@@ -136,6 +151,258 @@ def generate_content():
         current_app.logger.error(f"Traceback: {traceback.format_exc()}")
         return jsonify({'error': f'Content generation failed: {str(e)}'}), 500
 
+@content_bp.route('/generate/batch', methods=['POST'])
+@jwt_required()
+def generate_content_batch():
+    """
+    Generate one prompt for several targets (content type, tone, platform) and/or variants
+    
+    Generations run concurrently and each result is streamed as a JSON line as soon as it
+    finishes. Usage for every requested generation is reserved before any job starts;
+    when the stream ends (or the client goes away) the successful GeneratedContent rows
+    are committed and the reservation of the failed or cancelled ones is given back.
+    The final line reports the commit and updated usage.
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        
+        # Find user by firebase_uid
+        user = User.query.filter_by(firebase_uid=current_user_id).first()
+        if not user:
+            user = User.query.get(current_user_id)
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        data = request.get_json() or {}
+        prompt = data.get('prompt', '').strip()
+        
+        if not prompt:
+            return jsonify({'error': 'Prompt is required'}), 400
+        
+        targets = data.get('targets') or [{
+            'type': data.get('type', 'article'),
+            'tone': data.get('tone', 'professional'),
+            'platform': data.get('platform')
+        }]
+        
+        try:
+            variants = max(1, int(data.get('variants', 1)))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'variants must be a number'}), 400
+        
+        jobs = []
+        for target in targets:
+            if not isinstance(target, dict):
+                return jsonify({'error': 'Each target must be an object'}), 400
+            if target.get('type') == 'chat':
+                return jsonify({'error': 'Chat is not supported in batch generation'}), 400
+            for variant in range(variants):
+                jobs.append({
+                    'index': len(jobs),
+                    'variant': variant,
+                    'type': target.get('type', 'article'),
+                    'tone': target.get('tone', 'professional'),
+                    'platform': target.get('platform'),
+                    'target_audience': target.get('target_audience', data.get('target_audience')),
+                    'word_count': target.get('word_count', data.get('word_count'))
+                })
+        
+        if len(jobs) > MAX_BATCH_GENERATIONS:
+            return jsonify({
+                'error': f'Too many generations requested (max {MAX_BATCH_GENERATIONS})',
+                'requested': len(jobs)
+            }), 400
+        
+        try:
+            base_temperature = float(data.get('temperature', 0.7))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'temperature must be a number'}), 400
+        if not math.isfinite(base_temperature):
+            return jsonify({'error': 'temperature must be a number'}), 400
+        base_temperature = min(max(base_temperature, 0.0), MAX_BATCH_TEMPERATURE)
+        
+        # Reserve usage for the whole batch in one conditional update, so concurrent
+        # requests cannot both pass the limit check
+        reserved = User.query.filter(
+            User.id == user.id,
+            db.or_(
+                User.is_premium.is_(True),
+                User.content_generated_count + len(jobs) <= User.monthly_content_limit
+            )
+        ).update({User.content_generated_count: User.content_generated_count + len(jobs)}, synchronize_session=False)
+        db.session.commit()
+        
+        if not reserved:
+            db.session.refresh(user)
+            return jsonify({
+                'error': 'Monthly content limit reached',
+                'limit': user.monthly_content_limit,
+                'current_count': user.content_generated_count,
+                'requested': len(jobs)
+            }), 429
+        
+        app = current_app._get_current_object()
+        ai_generator = get_ai_generator()
+        user_id = user.id
+        user_tier = 'premium' if user.is_premium else 'free'
+        
+        def run_job(job):
+            with app.app_context():
+                return job, ai_generator.generate_content(
+                    prompt=prompt,
+                    content_type=job['type'],
+                    tone=job['tone'],
+                    target_audience=job['target_audience'],
+                    platform=job['platform'],
+                    word_count=job['word_count'],
+                    # Spread variants out a little so they are not near-identical
+                    temperature=min(base_temperature + 0.1 * job['variant'], MAX_BATCH_TEMPERATURE),
+                    user_tier=user_tier
+                )
+        
+        def generated_row(job, result):
+            return GeneratedContent(
+                id=str(uuid.uuid4()),
+                user_id=user_id,
+                content_type=job['type'],
+                tone=job['tone'],
+                prompt=prompt,
+                word_count=result['word_count'],
+                ai_model_used=result['model_used'],
+                generation_time=result['generation_time'],
+                was_saved=False
+            )
+        
+        def record(generated_rows):
+            """Commit the generated rows and give back the reservation of the jobs that produced nothing"""
+            done = {'event': 'done', 'generated': len(generated_rows), 'failed': len(jobs) - len(generated_rows)}
+            try:
+                db.session.add_all(generated_rows)
+                unused = len(jobs) - len(generated_rows)
+                if unused:
+                    User.query.filter_by(id=user_id).update({
+                        User.content_generated_count: User.content_generated_count - unused
+                    }, synchronize_session=False)
+                db.session.commit()
+                
+                batch_user = User.query.get(user_id)
+                done['success'] = True
+                done['usage'] = {
+                    'current_count': batch_user.content_generated_count,
+                    'monthly_limit': batch_user.monthly_content_limit,
+                    'remaining': batch_user.monthly_content_limit - batch_user.content_generated_count
+                }
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Batch generation commit error: {str(e)}")
+                done['success'] = False
+                done['error'] = 'Failed to record generated content'
+            return done
+        
+        def generate():
+            generated_rows = []
+            reported = set()
+            executor = ThreadPoolExecutor(max_workers=min(len(jobs), get_groq_concurrency()))
+            futures = [executor.submit(run_job, job) for job in jobs]
+            
+            try:
+                for future in as_completed(futures):
+                    reported.add(future)
+                    job, result = future.result()
+                    event = {
+                        'event': 'result',
+                        'index': job['index'],
+                        'target': {
+                            'type': job['type'],
+                            'tone': job['tone'],
+                            'platform': job['platform'],
+                            'variant': job['variant']
+                        },
+                        'success': result['success']
+                    }
+                    
+                    if result['success']:
+                        row = generated_row(job, result)
+                        generated_rows.append(row)
+                        event['content'] = {
+                            'content': result['content'],
+                            'word_count': result['word_count'],
+                            'character_count': result['character_count'],
+                            'ai_model_used': result['model_used'],
+                            'generation_time': result['generation_time'],
+                            'generated_content_id': row.id
+                        }
+                    else:
+                        event['error'] = result.get('error', 'Content generation failed')
+                    
+                    yield json.dumps(event) + '\n'
+            finally:
+                # Also runs when the client disconnects: queued jobs are dropped, and the
+                # ones already running still count once they finish
+                executor.shutdown(wait=True, cancel_futures=True)
+                for future in futures:
+                    if future in reported or future.cancelled() or future.exception() is not None:
+                        continue
+                    job, result = future.result()
+                    if result['success']:
+                        generated_rows.append(generated_row(job, result))
+                done = record(generated_rows)
+            
+            yield json.dumps(done) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+    except Exception as e:
+        current_app.logger.error(f"Batch generation error: {str(e)}")
+        import traceback
+        current_app.logger.error(f"Traceback: {traceback.format_exc()}")
+        return jsonify({'error': f'Batch generation failed: {str(e)}'}), 500
+
+def _filtered_content_query(user_id, args):
+    """Content items of a user filtered and sorted by the list endpoint's query parameters"""
+    content_type = args.get('type')
+    status = args.get('status')
+    search = args.get('search')
+    sort_by = args.get('sort_by', 'created_at')
+    sort_order = args.get('sort_order', 'desc')
+    
+    query = ContentItem.query.filter_by(user_id=user_id)
+    
+    if content_type:
+        query = query.filter_by(content_type=content_type)
+    
+    if status:
+        query = query.filter_by(status=status)
+    
+    if search:
+        query = query.filter(
+            db.or_(
+                ContentItem.title.contains(search),
+                ContentItem.content.contains(search),
+                ContentItem.prompt.contains(search)
+            )
+        )
+    
+    # Apply sorting
+    if sort_by == 'created_at':
+        if sort_order == 'desc':
+            query = query.order_by(ContentItem.created_at.desc())
+        else:
+            query = query.order_by(ContentItem.created_at.asc())
+    elif sort_by == 'title':
+        if sort_order == 'desc':
+            query = query.order_by(ContentItem.title.desc())
+        else:
+            query = query.order_by(ContentItem.title.asc())
+    elif sort_by == 'word_count':
+        if sort_order == 'desc':
+            query = query.order_by(ContentItem.word_count.desc())
+        else:
+            query = query.order_by(ContentItem.word_count.asc())
+    
+    return query
+
 @content_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_user_content():
@@ -191,50 +458,13 @@ def get_user_content():
         # Query parameters
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
-        content_type = request.args.get('type')
-        status = request.args.get('status')
-        search = request.args.get('search')
-        sort_by = request.args.get('sort_by', 'created_at')
-        sort_order = request.args.get('sort_order', 'desc')
-        
-        # Build query using user.id
-        query = ContentItem.query.filter_by(user_id=user.id)
         
         # Count before filtering
-        total_for_user = query.count()
+        total_for_user = ContentItem.query.filter_by(user_id=user.id).count()
         current_app.logger.info(f"Total content items for user {user.id}: {total_for_user}")
         
-        if content_type:
-            query = query.filter_by(content_type=content_type)
-        
-        if status:
-            query = query.filter_by(status=status)
-        
-        if search:
-            query = query.filter(
-                db.or_(
-                    ContentItem.title.contains(search),
-                    ContentItem.content.contains(search),
-                    ContentItem.prompt.contains(search)
-                )
-            )
-        
-        # Apply sorting
-        if sort_by == 'created_at':
-            if sort_order == 'desc':
-                query = query.order_by(ContentItem.created_at.desc())
-            else:
-                query = query.order_by(ContentItem.created_at.asc())
-        elif sort_by == 'title':
-            if sort_order == 'desc':
-                query = query.order_by(ContentItem.title.desc())
-            else:
-                query = query.order_by(ContentItem.title.asc())
-        elif sort_by == 'word_count':
-            if sort_order == 'desc':
-                query = query.order_by(ContentItem.word_count.desc())
-            else:
-                query = query.order_by(ContentItem.word_count.asc())
+        # Build query using user.id
+        query = _filtered_content_query(user.id, request.args)
         
         # Count before pagination
         count_before_pagination = query.count()
@@ -279,6 +509,42 @@ def get_user_content():
         return jsonify({'error': 'Failed to get content'}), 500
 
 
+@content_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_content():
+    """Download the content library as ?format=ndjson|csv|markdown (a ZIP of .md files)
+    
+    Takes the same type/status/search/sort_by/sort_order parameters as the
+    list endpoint. Items are streamed from a server-side cursor as they are
+    read, so large libraries export in constant memory.
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        
+        user = User.query.filter_by(firebase_uid=current_user_id).first()
+        if not user:
+            user = User.query.get(current_user_id)
+        
+        if not user:
+            return jsonify({'success': False, 'error': 'User not found'}), 404
+        
+        export_format = request.args.get('format', 'ndjson').lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({
+                'success': False,
+                'error': f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}"
+            }), 400
+        
+        query = _filtered_content_query(user.id, request.args).order_by(ContentItem.id)
+        items = (item.to_dict() for item in query.yield_per(EXPORT_BATCH_SIZE))
+        filename = f"content-library-{datetime.now(timezone.utc).strftime('%Y%m%d')}"
+        return export_response(items, export_format, filename, CONTENT_EXPORT_FIELDS, content_item_markdown)
+        
+    except Exception as e:
+        current_app.logger.error(f"Export content error: {str(e)}")
+        return jsonify({'error': 'Failed to export content'}), 500
+
+
 @content_bp.route('/debug', methods=['GET'])
 @jwt_required()
 def debug_content():
@@ -533,11 +799,45 @@ def improve_content(content_id):
         if not content_item:
             return jsonify({'error': 'Content not found'}), 404
         
-        data = request.get_json()
+        data = request.get_json() or {}
         improvement_type = data.get('type', 'readability')  # seo, readability, engagement
         
-        # Improve content using AI service
         ai_generator = get_ai_generator()
+        
+        # Section mode: rewrite only selected (or heuristically flagged) sections and return a patch
+        if data.get('mode') == 'sections':
+            section_indexes = data.get('sections')
+            if section_indexes is not None and (
+                    not isinstance(section_indexes, list) or not all(isinstance(i, int) for i in section_indexes)):
+                return jsonify({'error': 'sections must be a list of section indexes'}), 400
+            
+            result = ai_generator.improve_sections(
+                content_item.content,
+                improvement_type,
+                section_indexes=section_indexes,
+                user_tier='premium' if user.is_premium else 'free'
+            )
+            
+            if not result['success']:
+                return jsonify({'error': result.get('error', 'Content improvement failed')}), 500
+            
+            response = {
+                'success': True,
+                'mode': 'sections',
+                'improvement_type': improvement_type,
+                'sections_total': result['sections_total'],
+                'sections_selected': result['sections_selected'],
+                'sections_changed': result['sections_changed'],
+                'changes': result['changes'],
+                'ai_model_used': result['model_used'],
+                'generation_time': result['generation_time']
+            }
+            if data.get('include_content'):
+                response['improved_content'] = result['improved_content']
+            
+            return jsonify(response)
+        
+        # Improve content using AI service
         result = ai_generator.improve_content(content_item.content, improvement_type)
         
         if not result['success']:
@@ -554,6 +854,45 @@ def improve_content(content_id):
         current_app.logger.error(f"Improve content error: {str(e)}")
         return jsonify({'error': 'Content improvement failed'}), 500
 
+@content_bp.route('/<content_id>/sections', methods=['GET'])
+@jwt_required()
+def get_content_sections(content_id):
+    """Get the sections of a content item, with the ones the heuristic would improve"""
+    try:
+        current_user_id = get_jwt_identity()
+        user = User.query.filter_by(firebase_uid=current_user_id).first()
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        content_item = ContentItem.query.filter_by(
+            id=content_id,
+            user_id=user.id
+        ).first()
+        
+        if not content_item:
+            return jsonify({'error': 'Content not found'}), 404
+        
+        improvement_type = request.args.get('type', 'readability')
+        
+        ai_generator = get_ai_generator()
+        sections = ai_generator.split_sections(content_item.content)
+        flagged = ai_generator.flag_sections(sections, improvement_type)
+        
+        for section in sections:
+            section['flagged'] = section['index'] in flagged
+            section['reason'] = flagged.get(section['index'])
+        
+        return jsonify({
+            'success': True,
+            'improvement_type': improvement_type,
+            'sections': sections
+        })
+        
+    except Exception as e:
+        current_app.logger.error(f"Get content sections error: {str(e)}")
+        return jsonify({'error': 'Failed to get content sections'}), 500
+
 @content_bp.route('/stats', methods=['GET'])
 @jwt_required()
 def get_content_stats():
@@ -0,0 +1,94 @@
+"""Event Stream Routes - Server-Sent Events for chat messages and notifications"""
+
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+from models import User
+from services.event_bus import event_bus, user_channel
+import logging
+
+logger = logging.getLogger(__name__)
+
+events_bp = Blueprint('events', __name__, url_prefix='/api/events')
+
+TICKET_SALT = 'event-stream-ticket'
+
+
+def _ticket_serializer():
+    return URLSafeTimedSerializer(current_app.config['JWT_SECRET_KEY'], salt=TICKET_SALT)
+
+
+@events_bp.route('/ticket', methods=['POST'])
+@jwt_required()
+def create_stream_ticket():
+    """
+    Issue a short-lived ticket for opening the event stream
+
+    EventSource cannot set headers, so the stream URL carries this ticket instead
+    of the access token; URLs end up in access and proxy logs, and a ticket is only
+    good for opening a stream within EVENT_STREAM_TICKET_SECONDS.
+    """
+    try:
+        ticket = _ticket_serializer().dumps(get_jwt_identity())
+        return jsonify({
+            'success': True,
+            'ticket': ticket,
+            'expires_in': current_app.config.get('EVENT_STREAM_TICKET_SECONDS', 30)
+        })
+
+    except Exception as e:
+        logger.error(f"Event stream ticket error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@events_bp.route('/stream', methods=['GET'])
+def stream_events():
+    """
+    Stream real-time events for the current user
+
+    Authenticated with ?ticket=<ticket> from POST /api/events/ticket. Streams close
+    after EVENT_STREAM_MAX_SECONDS; clients fetch a new ticket and reconnect with
+    Last-Event-ID (or ?last_event_id=) to receive missed events.
+    """
+    ticket = request.args.get('ticket')
+    if not ticket:
+        return jsonify({'success': False, 'error': 'Stream ticket is required'}), 401
+    try:
+        current_user_id = _ticket_serializer().loads(
+            ticket, max_age=current_app.config.get('EVENT_STREAM_TICKET_SECONDS', 30)
+        )
+    except BadSignature:
+        # Also covers SignatureExpired
+        return jsonify({'success': False, 'error': 'Invalid or expired stream ticket'}), 401
+
+    try:
+        user = User.query.get(current_user_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        # Notifications are addressed by firebase_uid, chat events by user id
+        channels = [user_channel(user.id)]
+        if user.firebase_uid and user.firebase_uid != user.id:
+            channels.append(user_channel(user.firebase_uid))
+
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+
+        events = event_bus.stream(
+            channels,
+            last_event_id=last_event_id,
+            heartbeat=current_app.config.get('EVENT_STREAM_HEARTBEAT_SECONDS', 15),
+            max_duration=current_app.config.get('EVENT_STREAM_MAX_SECONDS', 55)
+        )
+
+        return Response(
+            stream_with_context(events),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+
+    except Exception as e:
+        logger.error(f"Event stream error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
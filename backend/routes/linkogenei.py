@@ -1,8 +1,10 @@
 """LinkoGenei API Routes - Chrome Extension Backend"""
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from services.linkogenei_service import linkogenei_service
+from services.saved_post_repository import get_saved_post_repository
+from utils.search import search_terms, decode_search_cursor
+from utils.export import EXPORT_FORMATS, SAVED_POST_EXPORT_FIELDS, export_response, saved_post_markdown
 from datetime import datetime, timedelta
 import secrets
 import logging
@@ -11,11 +13,11 @@ logger = logging.getLogger(__name__)
 
 linkogenei_bp = Blueprint('linkogenei', __name__, url_prefix='/api/linkogenei')
 
-# Helper function to verify token from SQLite
+# Helper function to verify token against the configured storage backend
 def verify_extension_token(token):
     """Verify token exists in database and return user_id"""
     try:
-        result = linkogenei_service.verify_extension_token(token)
+        result = get_saved_post_repository().verify_extension_token(token)
         if result and result.get('success'):
             return result.get('user_id')
         return None
@@ -45,14 +47,14 @@ def generate_token():
         # Generate a secure random token
         token = secrets.token_urlsafe(32)
         
-        # Store token in SQLite database (expires in 30 days)
+        # Store token (expires in 30 days)
         expires_at = datetime.utcnow() + timedelta(days=30)
-        linkogenei_service.store_extension_token(user_id, token, expires_at)
+        get_saved_post_repository().store_extension_token(user_id, token, expires_at)
         
         logger.info(f"Generated extension token for user: {user_id}")
         
         # Get existing post count to inform user
-        stats = linkogenei_service.get_stats(user_id)
+        stats = get_saved_post_repository().get_stats(user_id)
         post_count = stats.get('stats', {}).get('total_posts', 0)
         
         message = 'Token generated successfully. Copy this token to your Chrome extension.'
@@ -110,6 +112,29 @@ def verify_token():
             'error': 'Token verification failed'
         }), 500
 
+@linkogenei_bp.route('/token', methods=['DELETE'])
+def revoke_token():
+    """Revoke the extension token sent in the Authorization header"""
+    try:
+        auth_header = request.headers.get('Authorization', '')
+        if not auth_header.startswith('Bearer '):
+            return jsonify({
+                'success': False,
+                'error': 'Invalid authorization header'
+            }), 401
+        
+        result = get_saved_post_repository().delete_extension_token(auth_header.split(' ')[1])
+        if result['success']:
+            return jsonify(result), 200
+        return jsonify(result), 404
+        
+    except Exception as e:
+        logger.error(f"Token revocation error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Token revocation failed'
+        }), 500
+
 @linkogenei_bp.route('/save-post', methods=['POST'])
 def save_post():
     """Save a post from social media"""
@@ -150,8 +175,8 @@ def save_post():
                 'error': 'URL is required'
             }), 400
         
-        # Save post to SQLite database
-        result = linkogenei_service.save_post(user_id, data)
+        # Save post
+        result = get_saved_post_repository().save_post(user_id, data)
         logger.info(f'Save result: {result}')
         
         if result['success']:
@@ -168,6 +193,98 @@ def save_post():
             'error': 'Failed to save post'
         }), 500
 
+@linkogenei_bp.route('/save-posts', methods=['POST'])
+def save_posts():
+    """Save a batch of posts (the extension's offline queue flush)
+    
+    Body: {"posts": [{"url": ..., "client_id": ..., ...}, ...]}
+    Returns one result per post (saved / duplicate / error) and a sync cursor
+    for GET /sync.
+    """
+    try:
+        auth_header = request.headers.get('Authorization', '')
+        if not auth_header.startswith('Bearer '):
+            return jsonify({
+                'success': False,
+                'error': 'Unauthorized'
+            }), 401
+        
+        user_id = verify_extension_token(auth_header.split(' ')[1])
+        if not user_id:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid or expired token'
+            }), 401
+        
+        data = request.get_json(silent=True) or {}
+        posts = data.get('posts')
+        if not isinstance(posts, list) or not posts:
+            return jsonify({
+                'success': False,
+                'error': 'posts must be a non-empty list'
+            }), 400
+        
+        max_posts = current_app.config.get('LINKOGENEI_BATCH_MAX_POSTS', 100)
+        if len(posts) > max_posts:
+            return jsonify({
+                'success': False,
+                'error': f'At most {max_posts} posts per batch',
+                'max_posts': max_posts
+            }), 413
+        
+        result = get_saved_post_repository().save_posts_batch(user_id, posts)
+        logger.info(f"Batch save for {user_id}: {result.get('saved')} saved, "
+                    f"{result.get('duplicates')} duplicates, {result.get('failed')} failed")
+        
+        if result['success']:
+            return jsonify(result), 200
+        return jsonify(result), 500
+        
+    except Exception as e:
+        logger.error(f"Batch save error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to save posts'
+        }), 500
+
+@linkogenei_bp.route('/sync', methods=['GET'])
+def sync_posts():
+    """Posts saved after ?cursor= (oldest first), so the extension can prune its offline queue"""
+    try:
+        auth_header = request.headers.get('Authorization', '')
+        if not auth_header.startswith('Bearer '):
+            return jsonify({
+                'success': False,
+                'error': 'Unauthorized'
+            }), 401
+        
+        user_id = verify_extension_token(auth_header.split(' ')[1])
+        if not user_id:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid or expired token'
+            }), 401
+        
+        cursor = request.args.get('cursor') or None
+        try:
+            limit = min(max(int(request.args.get('limit', 200)), 1), 500)
+            if cursor:
+                get_saved_post_repository().decode_cursor(cursor)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid cursor or limit'
+            }), 400
+        
+        return jsonify(get_saved_post_repository().get_changes(user_id, cursor, limit)), 200
+        
+    except Exception as e:
+        logger.error(f"Sync error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to sync posts'
+        }), 500
+
 @linkogenei_bp.route('/posts', methods=['GET'])
 def get_posts():
     """Get saved posts"""
@@ -207,8 +324,8 @@ def get_posts():
         
         logger.info(f'Query params: category={category}, platform={platform}, limit={limit}, skip={skip}')
         
-        # Get posts from SQLite database
-        result = linkogenei_service.get_posts(
+        # Get posts
+        result = get_saved_post_repository().get_posts(
             user_id=user_id,
             category=category,
             platform=platform,
@@ -229,6 +346,100 @@ def get_posts():
             'error': 'Failed to get posts'
         }), 500
 
+@linkogenei_bp.route('/export', methods=['GET'])
+def export_posts():
+    """Download saved posts as ?format=ndjson|csv|markdown (a ZIP of .md files)
+    
+    Takes the same category/platform filters as /posts. Posts are streamed
+    from a server-side cursor as they are read, so large libraries export
+    in constant memory.
+    """
+    try:
+        auth_header = request.headers.get('Authorization', '')
+        if not auth_header.startswith('Bearer '):
+            return jsonify({
+                'success': False,
+                'error': 'Unauthorized'
+            }), 401
+        
+        user_id = verify_extension_token(auth_header.split(' ')[1])
+        if not user_id:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid or expired token'
+            }), 401
+        
+        export_format = request.args.get('format', 'ndjson').lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({
+                'success': False,
+                'error': f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}"
+            }), 400
+        
+        posts = get_saved_post_repository().iter_posts(
+            user_id,
+            category=request.args.get('category'),
+            platform=request.args.get('platform')
+        )
+        filename = f"linkogenei-posts-{datetime.utcnow().strftime('%Y%m%d')}"
+        return export_response(posts, export_format, filename, SAVED_POST_EXPORT_FIELDS, saved_post_markdown)
+        
+    except Exception as e:
+        logger.error(f"Export posts error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to export posts'
+        }), 500
+
+@linkogenei_bp.route('/search', methods=['GET'])
+def search_posts():
+    """Search saved posts by ?q= (title, notes, tags, URL host) and/or ?tags=a,b
+    
+    Results are ranked best match first (newest first when only tags are
+    given); pass the returned cursor as ?cursor= for the next page.
+    """
+    try:
+        auth_header = request.headers.get('Authorization', '')
+        if not auth_header.startswith('Bearer '):
+            return jsonify({
+                'success': False,
+                'error': 'Unauthorized'
+            }), 401
+        
+        user_id = verify_extension_token(auth_header.split(' ')[1])
+        if not user_id:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid or expired token'
+            }), 401
+        
+        query = request.args.get('q', '')
+        tags = [tag for tag in request.args.get('tags', '').split(',') if tag.strip()]
+        cursor = request.args.get('cursor') or None
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+            if cursor:
+                # Ranked pages use score cursors, tag-only pages use date cursors
+                if search_terms(query):
+                    decode_search_cursor(cursor)
+                else:
+                    get_saved_post_repository().decode_cursor(cursor)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid cursor or limit'
+            }), 400
+        
+        result = get_saved_post_repository().search_posts(user_id, query, tags, limit, cursor)
+        return jsonify(result), 200 if result.get('success') else 500
+        
+    except Exception as e:
+        logger.error(f"Search error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to search posts'
+        }), 500
+
 @linkogenei_bp.route('/posts/<post_id>', methods=['GET'])
 def get_post(post_id):
     """Get a single post"""
@@ -251,8 +462,8 @@ def get_post(post_id):
                 'error': 'Invalid or expired token'
             }), 401
         
-        # Get post from SQLite database
-        post = linkogenei_service.get_post_by_id(user_id, post_id)
+        # Get post
+        post = get_saved_post_repository().get_post_by_id(user_id, post_id)
         
         if post:
             return jsonify({
@@ -297,8 +508,8 @@ def update_post(post_id):
         # Get update data
         data = request.get_json()
         
-        # Update post in SQLite database
-        result = linkogenei_service.update_post(user_id, post_id, data)
+        # Update post
+        result = get_saved_post_repository().update_post(user_id, post_id, data)
         
         return jsonify(result), 200 if result['success'] else 400
         
@@ -331,8 +542,8 @@ def delete_post(post_id):
                 'error': 'Invalid or expired token'
             }), 401
         
-        # Delete post from SQLite database
-        result = linkogenei_service.delete_post(user_id, post_id)
+        # Delete post
+        result = get_saved_post_repository().delete_post(user_id, post_id)
         
         return jsonify(result), 200 if result['success'] else 404
         
@@ -365,8 +576,8 @@ def get_categories():
                 'error': 'Invalid or expired token'
             }), 401
         
-        # Get categories from SQLite database
-        categories = linkogenei_service.get_categories(user_id)
+        # Get categories
+        categories = get_saved_post_repository().get_categories(user_id)
         
         return jsonify({
             'success': True,
@@ -411,8 +622,8 @@ def create_category():
                 'error': 'Category name is required'
             }), 400
         
-        # Create category in SQLite database
-        result = linkogenei_service.create_category(
+        # Create category
+        result = get_saved_post_repository().create_category(
             user_id=user_id,
             name=data['name'],
             color=data.get('color', '#667eea')
@@ -449,8 +660,8 @@ def get_stats():
                 'error': 'Invalid or expired token'
             }), 401
         
-        # Get stats from SQLite database
-        result = linkogenei_service.get_stats(user_id)
+        # Get stats
+        result = get_saved_post_repository().get_stats(user_id)
         
         return jsonify(result), 200
         
@@ -1,7 +1,14 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, TeamMember, TeamProject, CollaborationRequest, TeamChat
+from models import db, User, TeamMember, TeamProject, CollaborationRequest, TeamChat, TeamConversation
+from sqlalchemy.orm import defer
 from services.mongodb_service import mongodb_service
+from services.team_chat_service import team_chat_service
+from services.event_bus import event_bus
+from services.notification_dispatcher import notification_dispatcher
+from services.project_stats_service import project_stats_service
+from services.team_activity_service import team_activity_service
+from services.project_invitation_service import project_invitation_service
 from datetime import datetime, timezone, timedelta
 from sqlalchemy import or_, and_
 import json
@@ -10,6 +17,264 @@ import uuid
 
 team_bp = Blueprint('team', __name__)
 
+# Direct-message history page sizes
+ACTIVITY_PAGE_SIZE = 50
+MAX_ACTIVITY_PAGE_SIZE = 200
+CHAT_PAGE_SIZE = 50
+MAX_CHAT_PAGE_SIZE = 200
+
+
+def _pending_requests_query(email):
+    """Pending requests addressed to an email, newest first, with sender details (served by the inbox index)"""
+    return db.session.query(CollaborationRequest, User.email, User.display_name).outerjoin(
+        User, User.id == CollaborationRequest.from_user_id
+    ).filter(
+        CollaborationRequest.to_email == email,
+        CollaborationRequest.status == 'pending'
+    ).order_by(CollaborationRequest.created_at.desc())
+
+
+def _sent_requests_query(user_id):
+    """Requests sent by a user, newest first (served by the sender index)"""
+    return CollaborationRequest.query.filter_by(from_user_id=user_id).order_by(
+        CollaborationRequest.created_at.desc()
+    )
+
+
+def _pending_requests_for(user):
+    """Pending requests/notifications addressed to a user, with sender details in one query"""
+    rows = _pending_requests_query(user.email).all()
+    result = []
+    for req, sender_email, sender_name in rows:
+        req_dict = req.to_dict()
+        if sender_email:
+            req_dict['from_email'] = sender_email
+            req_dict['from_name'] = sender_name or sender_email
+        result.append(req_dict)
+    return result
+
+
+def _project_recipients(project, members_list, exclude_user_id):
+    """Project members and owner resolved with one IN query, excluding the acting user"""
+    recipients = User.query.filter(
+        or_(User.email.in_(members_list), User.id == project.owner_id)
+    ).all()
+    return [recipient for recipient in recipients if recipient.id != exclude_user_id]
+
+
+def _load_project_data(project):
+    """Parse the JSON blob kept in project.description (plain-text descriptions become {'description': ...})"""
+    try:
+        if project.description and project.description.startswith('{'):
+            return json.loads(project.description)
+    except ValueError:
+        pass
+    return {'description': project.description or ''}
+
+
+def _save_project_data(project, project_data):
+    """Write the blob back whole, so keys the caller did not touch (roles, updates, chat) survive"""
+    project.description = json.dumps(project_data)
+
+
+# Task fields managed by the server; clients cannot set them through task ops
+PROTECTED_TASK_FIELDS = ('id', 'version', 'submission', 'review', 'createdBy', 'createdAt')
+MAX_TASK_OPS = 100
+
+
+def _without_version(task):
+    return {key: value for key, value in task.items() if key != 'version'}
+
+
+def _find_task_index(tasks, task_id):
+    # Older boards stored numeric ids, so compare as strings
+    for index, task in enumerate(tasks):
+        if str(task.get('id')) == str(task_id):
+            return index
+    return None
+
+
+def _place_task(tasks, task, position):
+    """Insert a task at a position within its status column (end of list when omitted)"""
+    if position is None:
+        tasks.append(task)
+        return
+    column = [index for index, other in enumerate(tasks) if other.get('status', 'todo') == task.get('status', 'todo')]
+    position = max(int(position), 0)
+    tasks.insert(column[position] if position < len(column) else (column[-1] + 1 if column else len(tasks)), task)
+
+
+def _apply_task_op(tasks, op, user):
+    """
+    Apply one task operation to the task list in place
+
+    Returns:
+        (old_task, new_task, error) - error is (status, message, current_task) or None
+    """
+    action = op.get('op')
+    now = datetime.now(timezone.utc).isoformat()
+
+    if action == 'create':
+        fields = {k: v for k, v in (op.get('task') or {}).items() if k not in PROTECTED_TASK_FIELDS}
+        if not str(fields.get('title', '')).strip():
+            return None, None, (400, 'Task title is required', None)
+        task_id = (op.get('task') or {}).get('id') or str(uuid.uuid4())
+        existing = _find_task_index(tasks, task_id)
+        if existing is not None:
+            return None, None, (409, 'A task with this id already exists', tasks[existing])
+        task = {
+            'id': task_id,
+            'status': 'todo',
+            **fields,
+            'createdBy': user.email,
+            'createdAt': now,
+            'updatedAt': now,
+            'version': 1
+        }
+        _place_task(tasks, task, op.get('position'))
+        return None, task, None
+
+    if action not in ('update', 'move', 'delete'):
+        return None, None, (400, f'Unknown task op: {action}', None)
+
+    index = _find_task_index(tasks, op.get('task_id'))
+    if index is None:
+        return None, None, (404, 'Task not found', None)
+    current = tasks[index]
+
+    # Optimistic concurrency: the client must name the version it last saw
+    if op.get('version') is None:
+        return None, None, (400, 'version is required', current)
+    if op.get('version') != current.get('version', 0):
+        return None, None, (409, 'Task was changed by someone else', current)
+
+    if action == 'delete':
+        tasks.pop(index)
+        return current, None, None
+
+    changes = (op.get('changes') or {}) if action == 'update' else {}
+    if action == 'move' and op.get('status'):
+        changes = {'status': op['status']}
+    task = {**current, **{k: v for k, v in changes.items() if k not in PROTECTED_TASK_FIELDS}}
+    if task.get('status') == 'done' and current.get('status') != 'done':
+        task['completedBy'] = user.email
+        task['completedAt'] = now
+    task['updatedAt'] = now
+    task['version'] = current.get('version', 0) + 1
+
+    if action == 'move' and op.get('position') is not None:
+        tasks.pop(index)
+        _place_task(tasks, task, op['position'])
+    else:
+        tasks[index] = task
+    return current, task, None
+
+
+def _queue_task_notifications(user, project, is_owner, old_task, new_task, users_by_email, owner):
+    """Add CollaborationRequest notifications for an assignment or a member completing a task"""
+    if not new_task:
+        return
+
+    # Task newly assigned or reassigned (only owner can assign tasks)
+    new_assignee = new_task.get('assignee')
+    if new_assignee and is_owner and new_assignee != (old_task or {}).get('assignee'):
+        assignee_user = users_by_email.get(new_assignee)
+        if assignee_user:
+            db.session.add(CollaborationRequest(
+                from_user_id=user.id,
+                to_email=new_assignee,
+                to_user_id=assignee_user.id,
+                project_id=project.id,
+                message=f'{user.email} assigned you task "{new_task.get("title", "Untitled")}" in project "{project.name}"',
+                request_type='task_assignment',
+                status='pending'
+            ))
+
+    # Member completed a task, notify owner
+    if old_task and not is_owner and owner and old_task.get('status', 'todo') != 'done' and new_task.get('status', 'todo') == 'done':
+        db.session.add(CollaborationRequest(
+            from_user_id=user.id,
+            to_email=owner.email,
+            to_user_id=owner.id,
+            project_id=project.id,
+            message=f'{user.email} completed task "{new_task.get("title", "Untitled")}" in project "{project.name}"',
+            request_type='task_completed',
+            status='pending'
+        ))
+
+
+def _run_task_ops(project_id, ops):
+    """
+    Apply a list of task operations atomically under a row lock on the project
+
+    Returns:
+        (payload, status_code) - nothing is written if any op fails
+    """
+    current_user_id = get_jwt_identity()
+    if not current_user_id:
+        return {'error': 'Authorization required'}, 401
+    user = User.query.get(current_user_id)
+    if not user:
+        return {'error': 'User not found'}, 404
+    project = TeamProject.query.filter_by(id=project_id).with_for_update().first()
+    if not project:
+        return {'success': False, 'error': 'Project not found'}, 404
+    is_owner = project.owner_id == user.id
+    try:
+        members_list = json.loads(project.members) if project.members else []
+    except ValueError:
+        members_list = []
+    if not is_owner and user.email not in members_list:
+        return {'success': False, 'error': 'Not authorized'}, 403
+    if not isinstance(ops, list) or not ops:
+        return {'success': False, 'error': 'ops must be a non-empty list'}, 400
+    if len(ops) > MAX_TASK_OPS:
+        return {'success': False, 'error': f'At most {MAX_TASK_OPS} ops per request'}, 400
+
+    project_data = _load_project_data(project)
+    tasks = project_data.get('tasks', [])
+
+    results = []
+    net_changes = {}  # task id -> [state before the batch, state after it]
+    for op in ops:
+        old_task, new_task, error = _apply_task_op(tasks, op or {}, user)
+        if error:
+            db.session.rollback()
+            status, message, current = error
+            return {'success': False, 'error': message, 'op': op, 'task': current}, status
+        task_id = (new_task or old_task)['id']
+        net_changes.setdefault(task_id, [old_task, None])[1] = new_task
+        results.append({'task_id': task_id, 'task': new_task})
+
+    # Notifications come from the net delta, resolved with one IN query
+    assignee_emails = {new['assignee'] for _, new in net_changes.values() if new and new.get('assignee')}
+    users_by_email = {
+        u.email: u for u in User.query.filter(User.email.in_(assignee_emails)).all()
+    } if assignee_emails else {}
+    owner = User.query.get(project.owner_id) if not is_owner else user
+    for old_task, new_task in net_changes.values():
+        _queue_task_notifications(user, project, is_owner, old_task, new_task, users_by_email, owner)
+
+    project_stats_service.apply_task_changes(
+        project_id,
+        [old for old, _ in net_changes.values() if old],
+        [new for _, new in net_changes.values() if new],
+        all_tasks=tasks
+    )
+    project_data['tasks'] = tasks
+    _save_project_data(project, project_data)
+    db.session.commit()
+
+    return {'success': True, 'results': results}, 200
+
+
+def _run_single_task_op(project_id, op, success_status=200):
+    payload, status = _run_task_ops(project_id, [op])
+    if payload.get('success'):
+        payload = {'success': True, 'task': payload['results'][0]['task']}
+        status = success_status
+    return jsonify(payload), status
+
 # ==================== TEAM MEMBERS ====================
 
 @team_bp.route('/members', methods=['GET'])
@@ -93,6 +358,15 @@ def invite_member():
                 status='pending'
             )
             db.session.add(request_obj)
+            team_activity_service.record(
+                [invited_user.id], 'request_pending', 'Team Invitation',
+                f'{user.display_name or user.email} invited you to join their team', actor=user,
+                metadata={'request_type': 'join_team', 'status': 'pending'}
+            )
+        team_activity_service.record(
+            [user.id], 'member_added', 'Team Member Added', f'Added {email} to the team', actor=user,
+            metadata={'member_email': email, 'role': 'member'}
+        )
         db.session.commit()
         return jsonify({'success': True, 'message': 'Invitation sent successfully', 'member': member.to_dict()}), 201
     except Exception as e:
@@ -189,6 +463,11 @@ def create_project():
             members=json.dumps([user.email])
         )
         db.session.add(project)
+        db.session.flush()
+        team_activity_service.record(
+            [user.id], 'project_created', 'Project Created', f'Created project "{name}"', actor=user,
+            metadata={'project_id': project.id, 'project_name': name}
+        )
         db.session.commit()
         
         # Add leader info to response
@@ -222,6 +501,8 @@ def delete_project(project_id):
         project = TeamProject.query.filter_by(id=project_id, owner_id=user.id).first()
         if not project:
             return jsonify({'success': False, 'error': 'Project not found'}), 404
+        project_stats_service.delete_project(project.id)
+        project_invitation_service.delete_project(project.id)
         db.session.delete(project)
         db.session.commit()
         return jsonify({'success': True, 'message': 'Project deleted'}), 200
@@ -293,6 +574,11 @@ def add_project_member(project_id):
             status='pending'
         )
         db.session.add(notification)
+        team_activity_service.record(
+            [user.id, invited_user.id], 'request_pending', 'Project Invitation',
+            f'{user.display_name or user.email} invited {member_email} to project "{project.name}"', actor=user,
+            metadata={'request_type': 'project_invitation', 'status': 'pending', 'project_id': project_id}
+        )
         
         # Create MongoDB notification
         mongodb_service.create_notification(
@@ -371,7 +657,7 @@ def update_project_tasks(project_id):
         user = User.query.get(current_user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
-        project = TeamProject.query.get(project_id)
+        project = TeamProject.query.filter_by(id=project_id).with_for_update().first()
         if not project:
             return jsonify({'success': False, 'error': 'Project not found'}), 404
         is_owner = project.owner_id == user.id
@@ -387,85 +673,111 @@ def update_project_tasks(project_id):
         tasks = data.get('tasks', [])
         
         # Get old tasks to compare
-        try:
-            existing = json.loads(project.description) if project.description and project.description.startswith('{') else {}
-            desc_text = existing.get('description', project.description or '')
-            old_tasks = existing.get('tasks', [])
-        except:
-            desc_text = project.description or ''
-            old_tasks = []
+        project_data = _load_project_data(project)
+        old_tasks = project_data.get('tasks', [])
         
         # Check for newly assigned tasks and completed tasks
         old_tasks_dict = {task.get('id'): task for task in old_tasks if task.get('id')}
         
+        # Resolve every assignee (and the owner) up front instead of one query per task
+        assignee_emails = {task.get('assignee') for task in tasks if task.get('assignee')}
+        users_by_email = {
+            u.email: u for u in User.query.filter(User.email.in_(assignee_emails)).all()
+        } if assignee_emails else {}
+        owner = User.query.get(project.owner_id) if not is_owner else user
+        
         for task in tasks:
             task_id = task.get('id')
             if not task_id:
                 continue
-                
+            
             old_task = old_tasks_dict.get(task_id)
             
-            # Check if task was newly assigned
-            if old_task:
-                old_assignee = old_task.get('assignee')
-                new_assignee = task.get('assignee')
-                
-                # Task newly assigned or reassigned
-                if new_assignee and new_assignee != old_assignee:
-                    assignee_user = User.query.filter_by(email=new_assignee).first()
-                    if assignee_user and is_owner:  # Only owner can assign tasks
-                        notification = CollaborationRequest(
-                            from_user_id=user.id,
-                            to_email=new_assignee,
-                            to_user_id=assignee_user.id,
-                            project_id=project_id,
-                            message=f'{user.email} assigned you task "{task.get("title", "Untitled")}" in project "{project.name}"',
-                            request_type='task_assignment',
-                            status='pending'
-                        )
-                        db.session.add(notification)
-                
-                # Task marked as completed
-                old_status = old_task.get('status', 'todo')
-                new_status = task.get('status', 'todo')
-                if old_status != 'done' and new_status == 'done' and not is_owner:
-                    # Member completed a task, notify owner
-                    owner = User.query.get(project.owner_id)
-                    if owner:
-                        notification = CollaborationRequest(
-                            from_user_id=user.id,
-                            to_email=owner.email,
-                            to_user_id=owner.id,
-                            project_id=project_id,
-                            message=f'{user.email} completed task "{task.get("title", "Untitled")}" in project "{project.name}"',
-                            request_type='task_completed',
-                            status='pending'
-                        )
-                        db.session.add(notification)
-            else:
-                # New task created with assignee
-                new_assignee = task.get('assignee')
-                if new_assignee and is_owner:
-                    assignee_user = User.query.filter_by(email=new_assignee).first()
-                    if assignee_user:
-                        notification = CollaborationRequest(
-                            from_user_id=user.id,
-                            to_email=new_assignee,
-                            to_user_id=assignee_user.id,
-                            project_id=project_id,
-                            message=f'{user.email} assigned you task "{task.get("title", "Untitled")}" in project "{project.name}"',
-                            request_type='task_assignment',
-                            status='pending'
-                        )
-                        db.session.add(notification)
+            # Whole-list writes are last-writer-wins; still bump versions so delta clients see the change
+            base_version = old_task.get('version', 0) if old_task else 0
+            unchanged = old_task is not None and _without_version(task) == _without_version(old_task)
+            task['version'] = base_version if unchanged else base_version + 1
+            
+            _queue_task_notifications(user, project, is_owner, old_task, task, users_by_email, owner)
         
-        project.description = json.dumps({'description': desc_text, 'tasks': tasks})
+        project_stats_service.apply_task_changes(project_id, old_tasks, tasks)
+        project_data['tasks'] = tasks
+        _save_project_data(project, project_data)
         db.session.commit()
         return jsonify({'success': True, 'message': 'Tasks updated successfully'}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@team_bp.route('/projects/<project_id>/tasks', methods=['POST'])
+@jwt_required()
+def create_project_task(project_id):
+    """Create one task; body is the task fields plus an optional column position"""
+    try:
+        data = request.get_json() or {}
+        op = {'op': 'create', 'task': data.get('task', data), 'position': data.get('position')}
+        return _run_single_task_op(project_id, op, success_status=201)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@team_bp.route('/projects/<project_id>/tasks/<task_id>', methods=['PUT', 'DELETE', 'OPTIONS'])
+@jwt_required(optional=True)
+def update_project_task(project_id, task_id):
+    """Update or delete one task; the version last seen by the client is required"""
+    # Handle OPTIONS preflight
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'ok'}), 200
+    
+    try:
+        if request.method == 'DELETE':
+            version = request.args.get('version', type=int)
+            return _run_single_task_op(project_id, {'op': 'delete', 'task_id': task_id, 'version': version})
+        data = request.get_json() or {}
+        op = {'op': 'update', 'task_id': task_id, 'version': data.get('version'), 'changes': data.get('changes', {})}
+        return _run_single_task_op(project_id, op)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@team_bp.route('/projects/<project_id>/tasks/<task_id>/move', methods=['POST', 'OPTIONS'])
+@jwt_required(optional=True)
+def move_project_task(project_id, task_id):
+    """Move a task to a status column and/or a position within it"""
+    # Handle OPTIONS preflight
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'ok'}), 200
+    
+    try:
+        data = request.get_json() or {}
+        op = {
+            'op': 'move',
+            'task_id': task_id,
+            'version': data.get('version'),
+            'status': data.get('status'),
+            'position': data.get('position')
+        }
+        return _run_single_task_op(project_id, op)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@team_bp.route('/projects/<project_id>/tasks/ops', methods=['POST', 'OPTIONS'])
+@jwt_required(optional=True)
+def apply_project_task_ops(project_id):
+    """Apply a batch of create/update/move/delete ops; all or nothing"""
+    # Handle OPTIONS preflight
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'ok'}), 200
+    
+    try:
+        data = request.get_json() or {}
+        payload, status = _run_task_ops(project_id, data.get('ops'))
+        return jsonify(payload), status
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # ==================== COLLABORATION REQUESTS ====================
 
 @team_bp.route('/requests', methods=['GET'])
@@ -476,16 +788,7 @@ def get_requests():
         user = User.query.get(current_user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
-        requests = CollaborationRequest.query.filter_by(to_email=user.email, status='pending').all()
-        result = []
-        for req in requests:
-            req_dict = req.to_dict()
-            sender = User.query.get(req.from_user_id)
-            if sender:
-                req_dict['from_email'] = sender.email
-                req_dict['from_name'] = sender.display_name or sender.email
-            result.append(req_dict)
-        return jsonify({'success': True, 'requests': result}), 200
+        return jsonify({'success': True, 'requests': _pending_requests_for(user)}), 200
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -497,7 +800,7 @@ def get_sent_requests():
         user = User.query.get(current_user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
-        requests = CollaborationRequest.query.filter_by(from_user_id=user.id).all()
+        requests = _sent_requests_query(user.id).all()
         return jsonify({'success': True, 'requests': [r.to_dict() for r in requests]}), 200
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -523,22 +826,42 @@ def accept_request(request_id):
         req = CollaborationRequest.query.filter_by(id=request_id, to_email=user.email, status='pending').first()
         if not req:
             return jsonify({'success': False, 'error': 'Request not found'}), 404
-        req.status = 'accepted'
-        req.responded_at = datetime.now(timezone.utc)
-        req.to_user_id = user.id
+        # Accept this request together with duplicate pending invites to the same team or
+        # project in one UPDATE; the status condition turns a concurrent double accept into a no-op
+        if req.request_type == 'join_team':
+            scope = CollaborationRequest.from_user_id == req.from_user_id
+        elif req.request_type == 'project_invitation' and req.project_id:
+            scope = CollaborationRequest.project_id == req.project_id
+        else:
+            scope = CollaborationRequest.id == req.id
+        now = datetime.now(timezone.utc)
+        accepted = CollaborationRequest.query.filter(
+            CollaborationRequest.to_email == user.email,
+            CollaborationRequest.status == 'pending',
+            CollaborationRequest.request_type == req.request_type,
+            scope
+        ).update({
+            CollaborationRequest.status: 'accepted',
+            CollaborationRequest.responded_at: now,
+            CollaborationRequest.updated_at: now,
+            CollaborationRequest.to_user_id: user.id
+        }, synchronize_session=False)
+        if not accepted:
+            return jsonify({'success': False, 'error': 'Request not found'}), 404
         if req.request_type == 'join_team':
-            member = TeamMember.query.filter_by(owner_id=req.from_user_id, member_email=user.email).first()
-            if member:
-                member.status = 'active'
-                member.member_id = user.id
+            TeamMember.query.filter_by(owner_id=req.from_user_id, member_email=user.email).update(
+                {TeamMember.status: 'active', TeamMember.member_id: user.id}, synchronize_session=False
+            )
         elif req.request_type == 'project_invitation':
             # Use project_id from the request object
             if req.project_id:
-                project = TeamProject.query.get(req.project_id)
+                project = TeamProject.query.options(defer(TeamProject.description)).filter_by(
+                    id=req.project_id
+                ).with_for_update().first()
                 if project:
                     try:
                         members_list = json.loads(project.members) if project.members else []
-                    except:
+                    except ValueError:
                         members_list = []
                     if user.email not in members_list:
                         members_list.append(user.email)
@@ -555,6 +878,11 @@ def accept_request(request_id):
                             status='pending'
                         )
                         db.session.add(leader_notification)
+        team_activity_service.record(
+            [req.from_user_id, user.id], 'request_accepted', 'Request Accepted',
+            f'{user.display_name or user.email} accepted the invitation', actor=user,
+            metadata={'request_type': req.request_type, 'status': 'accepted', 'project_id': req.project_id}
+        )
         db.session.commit()
         return jsonify({'success': True, 'message': 'Request accepted successfully', 'request_type': req.request_type}), 200
     except Exception as e:
@@ -588,6 +916,11 @@ def reject_request(request_id):
         member = TeamMember.query.filter_by(owner_id=req.from_user_id, member_email=user.email).first()
         if member:
             db.session.delete(member)
+        team_activity_service.record(
+            [req.from_user_id, user.id], 'request_rejected', 'Request Rejected',
+            f'{user.display_name or user.email} declined the invitation', actor=user,
+            metadata={'request_type': req.request_type, 'status': 'rejected', 'project_id': req.project_id}
+        )
         db.session.commit()
         return jsonify({'success': True, 'message': 'Request rejected'}), 200
     except Exception as e:
@@ -671,18 +1004,7 @@ def get_notifications():
         user = User.query.get(current_user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
-        notifications = CollaborationRequest.query.filter_by(
-            to_email=user.email, status='pending'
-        ).order_by(CollaborationRequest.created_at.desc()).all()
-        result = []
-        for notif in notifications:
-            notif_dict = notif.to_dict()
-            sender = User.query.get(notif.from_user_id)
-            if sender:
-                notif_dict['from_email'] = sender.email
-                notif_dict['from_name'] = sender.display_name or sender.email
-            result.append(notif_dict)
-        return jsonify({'success': True, 'notifications': result}), 200
+        return jsonify({'success': True, 'notifications': _pending_requests_for(user)}), 200
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -761,7 +1083,7 @@ def review_task(project_id, task_id):
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        project = TeamProject.query.get(project_id)
+        project = TeamProject.query.filter_by(id=project_id).with_for_update().first()
         if not project:
             return jsonify({'success': False, 'error': 'Project not found'}), 404
         
@@ -776,19 +1098,21 @@ def review_task(project_id, task_id):
             return jsonify({'success': False, 'error': 'Invalid action'}), 400
         
         # Get current tasks
-        try:
-            existing = json.loads(project.description) if project.description and project.description.startswith('{') else {}
-            desc_text = existing.get('description', project.description or '')
-            tasks = existing.get('tasks', [])
-        except:
-            desc_text = project.description or ''
-            tasks = []
+        project_data = _load_project_data(project)
+        tasks = project_data.get('tasks', [])
+        old_tasks = [dict(task) for task in tasks]
         
         # Find the task
         task_found = False
         for task in tasks:
-            if task.get('id') == task_id:
+            if str(task.get('id')) == str(task_id):
                 task_found = True
+                task['version'] = task.get('version', 0) + 1
+                task['review'] = {
+                    'action': action,
+                    'reviewed_by': user.email,
+                    'reviewed_at': datetime.now(timezone.utc).isoformat()
+                }
                 assignee_email = task.get('assignee')
                 task_title = task.get('title', 'Untitled')
                 
@@ -834,7 +1158,9 @@ def review_task(project_id, task_id):
             return jsonify({'success': False, 'error': 'Task not found'}), 404
         
         # Save updated tasks
-        project.description = json.dumps({'description': desc_text, 'tasks': tasks})
+        project_stats_service.apply_task_changes(project_id, old_tasks, tasks)
+        project_data['tasks'] = tasks
+        _save_project_data(project, project_data)
         db.session.commit()
         
         return jsonify({
@@ -857,53 +1183,57 @@ def get_conversations():
         user = User.query.get(current_user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
-        owned_members = TeamMember.query.filter_by(owner_id=user.id, status='active').all()
-        member_of = TeamMember.query.filter_by(member_id=user.id, status='active').all()
+        # One query: every active teammate (either direction) with its materialized conversation summary
+        rows = db.session.query(User, TeamConversation).join(
+            TeamMember,
+            or_(
+                and_(TeamMember.owner_id == user.id, TeamMember.member_id == User.id),
+                and_(TeamMember.member_id == user.id, TeamMember.owner_id == User.id)
+            )
+        ).outerjoin(
+            TeamConversation,
+            or_(
+                and_(TeamConversation.user_a_id == user.id, TeamConversation.user_b_id == User.id),
+                and_(TeamConversation.user_a_id == User.id, TeamConversation.user_b_id == user.id)
+            )
+        ).filter(
+            TeamMember.status == 'active'
+        ).order_by(
+            TeamConversation.last_message_at.is_(None), TeamConversation.last_message_at.desc()
+        ).all()
         conversations = []
-        for member in owned_members:
-            if member.member_id:
-                other_user = User.query.get(member.member_id)
-                if other_user:
-                    last_message = TeamChat.query.filter(
-                        or_(
-                            and_(TeamChat.sender_id == user.id, TeamChat.receiver_id == other_user.id),
-                            and_(TeamChat.sender_id == other_user.id, TeamChat.receiver_id == user.id)
-                        )
-                    ).order_by(TeamChat.created_at.desc()).first()
-                    unread_count = TeamChat.query.filter_by(sender_id=other_user.id, receiver_id=user.id, is_read=False).count()
-                    conversations.append({
-                        'user_id': other_user.id,
-                        'user_email': other_user.email,
-                        'user_name': other_user.display_name or other_user.email,
-                        'last_message': last_message.message if last_message else None,
-                        'last_message_time': last_message.created_at.isoformat() if last_message else None,
-                        'unread_count': unread_count
-                    })
-        for membership in member_of:
-            owner = User.query.get(membership.owner_id)
-            if owner:
-                last_message = TeamChat.query.filter(
-                    or_(
-                        and_(TeamChat.sender_id == user.id, TeamChat.receiver_id == owner.id),
-                        and_(TeamChat.sender_id == owner.id, TeamChat.receiver_id == user.id)
-                    )
-                ).order_by(TeamChat.created_at.desc()).first()
-                unread_count = TeamChat.query.filter_by(sender_id=owner.id, receiver_id=user.id, is_read=False).count()
-                conversations.append({
-                    'user_id': owner.id,
-                    'user_email': owner.email,
-                    'user_name': owner.display_name or owner.email,
-                    'last_message': last_message.message if last_message else None,
-                    'last_message_time': last_message.created_at.isoformat() if last_message else None,
-                    'unread_count': unread_count
-                })
+        for other_user, conversation in rows:
+            conversations.append({
+                'user_id': other_user.id,
+                'user_email': other_user.email,
+                'user_name': other_user.display_name or other_user.email,
+                'last_message': conversation.last_message if conversation else None,
+                'last_message_time': conversation.last_message_at.isoformat() if conversation and conversation.last_message_at else None,
+                'unread_count': conversation.unread_for(user.id) if conversation else 0
+            })
         return jsonify({'success': True, 'conversations': conversations}), 200
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _chat_between(user_id, other_user_id):
+    """Filter matching the direct messages exchanged by two users (served by idx_team_chat_pair_created)"""
+    return or_(
+        and_(TeamChat.sender_id == user_id, TeamChat.receiver_id == other_user_id),
+        and_(TeamChat.sender_id == other_user_id, TeamChat.receiver_id == user_id)
+    )
+
 @team_bp.route('/chat/<other_user_id>', methods=['GET'])
 @jwt_required()
 def get_chat_messages(other_user_id):
+    """
+    Get a page of direct messages, oldest first
+
+    Query params (message ids as cursors, at most one):
+        before: messages older than this one (loading history)
+        after / since: messages newer than this one (incremental polling)
+        limit: page size (default 50, max 200)
+    Without a cursor the latest page is returned.
+    """
     try:
         current_user_id = get_jwt_identity()
         user = User.query.get(current_user_id)
@@ -918,18 +1248,68 @@ def get_chat_messages(other_user_id):
         ).first()
         if not is_team_member:
             return jsonify({'success': False, 'error': 'Not team members'}), 403
-        messages = TeamChat.query.filter(
-            or_(
-                and_(TeamChat.sender_id == user.id, TeamChat.receiver_id == other_user_id),
-                and_(TeamChat.sender_id == other_user_id, TeamChat.receiver_id == user.id)
-            )
-        ).order_by(TeamChat.created_at.asc()).all()
-        TeamChat.query.filter_by(sender_id=other_user_id, receiver_id=user.id, is_read=False).update({'is_read': True})
-        db.session.commit()
+
+        try:
+            limit = min(max(int(request.args.get('limit', CHAT_PAGE_SIZE)), 1), MAX_CHAT_PAGE_SIZE)
+        except ValueError:
+            return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+
+        before_id = request.args.get('before')
+        after_id = request.args.get('after') or request.args.get('since')
+        if before_id and after_id:
+            return jsonify({'success': False, 'error': 'Use either before or after/since, not both'}), 400
+
+        query = TeamChat.query.filter(_chat_between(user.id, other_user_id))
+        cursor_id = before_id or after_id
+        reset = False
+        cursor = None
+        if cursor_id:
+            cursor = TeamChat.query.filter(
+                TeamChat.id == cursor_id, _chat_between(user.id, other_user_id)
+            ).with_entities(TeamChat.created_at).first()
+            if not cursor and before_id:
+                return jsonify({'success': False, 'error': 'Cursor message not found'}), 400
+            if not cursor:
+                # The poll cursor was deleted; send the latest page and tell the client to replace its list
+                after_id = cursor_id = None
+                reset = True
+        if cursor:
+            # (created_at, id) keeps the order stable when timestamps collide
+            if after_id:
+                query = query.filter(or_(
+                    TeamChat.created_at > cursor.created_at,
+                    and_(TeamChat.created_at == cursor.created_at, TeamChat.id > cursor_id)
+                ))
+            else:
+                query = query.filter(or_(
+                    TeamChat.created_at < cursor.created_at,
+                    and_(TeamChat.created_at == cursor.created_at, TeamChat.id < cursor_id)
+                ))
+
+        if after_id:
+            messages = query.order_by(TeamChat.created_at.asc(), TeamChat.id.asc()).limit(limit + 1).all()
+            has_more = len(messages) > limit
+            messages = messages[:limit]
+        else:
+            messages = query.order_by(TeamChat.created_at.desc(), TeamChat.id.desc()).limit(limit + 1).all()
+            has_more = len(messages) > limit
+            messages = list(reversed(messages[:limit]))
+
+        # Only touch team_chats when the summary says something is unread
+        if not before_id and team_chat_service.mark_read(user.id, other_user_id):
+            TeamChat.query.filter_by(sender_id=other_user_id, receiver_id=user.id, is_read=False).update({'is_read': True})
+            db.session.commit()
+
         other_user = User.query.get(other_user_id)
         return jsonify({
             'success': True,
             'messages': [m.to_dict() for m in messages],
+            'has_more': has_more,
+            'reset': reset,
+            'cursors': {
+                'before': messages[0].id if messages else before_id,
+                'after': messages[-1].id if messages else after_id
+            },
             'other_user': {
                 'id': other_user.id,
                 'email': other_user.email,
@@ -937,6 +1317,7 @@ def get_chat_messages(other_user_id):
             } if other_user else None
         }), 200
     except Exception as e:
+        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @team_bp.route('/chat/<other_user_id>', methods=['POST'])
@@ -960,10 +1341,26 @@ def send_chat_message(other_user_id):
         message_text = data.get('message', '').strip()
         if not message_text:
             return jsonify({'success': False, 'error': 'Message is required'}), 400
-        message = TeamChat(sender_id=user.id, receiver_id=other_user_id, message=message_text, is_read=False)
+        message = TeamChat(sender_id=user.id, receiver_id=other_user_id, message=message_text, is_read=False,
+                           created_at=datetime.now(timezone.utc))
         db.session.add(message)
+        team_chat_service.record_message(user.id, other_user_id, message_text, message.created_at)
+        other_user = User.query.get(other_user_id)
+        if other_user:
+            preview = {'message_preview': message_text[:50]}
+            team_activity_service.record(
+                [user.id], 'chat_message', 'Chat Message', f'Message with {other_user.display_name or other_user.email}',
+                actor=user, metadata={'other_user': other_user.email, **preview}
+            )
+            team_activity_service.record(
+                [other_user_id], 'chat_message', 'Chat Message', f'Message with {user.display_name or user.email}',
+                actor=user, metadata={'other_user': user.email, **preview}
+            )
         db.session.commit()
-        return jsonify({'success': True, 'message': message.to_dict()}), 201
+        message_data = message.to_dict()
+        # Sender is included so their other open tabs update too
+        event_bus.publish_to_users([other_user_id, user.id], 'team_chat.message', message_data)
+        return jsonify({'success': True, 'message': message_data}), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -976,12 +1373,8 @@ def clear_chat(other_user_id):
         user = User.query.get(current_user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
-        TeamChat.query.filter(
-            or_(
-                and_(TeamChat.sender_id == user.id, TeamChat.receiver_id == other_user_id),
-                and_(TeamChat.sender_id == other_user_id, TeamChat.receiver_id == user.id)
-            )
-        ).delete()
+        TeamChat.query.filter(_chat_between(user.id, other_user_id)).delete(synchronize_session=False)
+        team_chat_service.clear(user.id, other_user_id)
         db.session.commit()
         return jsonify({'success': True, 'message': 'Chat cleared successfully'}), 200
     except Exception as e:
@@ -996,18 +1389,17 @@ def export_chat(other_user_id):
         user = User.query.get(current_user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
-        messages = TeamChat.query.filter(
-            or_(
-                and_(TeamChat.sender_id == user.id, TeamChat.receiver_id == other_user_id),
-                and_(TeamChat.sender_id == other_user_id, TeamChat.receiver_id == user.id)
-            )
-        ).order_by(TeamChat.created_at.asc()).all()
+        # Stream rows in batches instead of materializing every ORM object at once
+        messages = [
+            m.to_dict() for m in TeamChat.query.filter(_chat_between(user.id, other_user_id))
+            .order_by(TeamChat.created_at.asc(), TeamChat.id.asc()).yield_per(500)
+        ]
         other_user = User.query.get(other_user_id)
         export_data = {
             'conversation_with': other_user.email if other_user else 'Unknown',
             'exported_at': datetime.now(timezone.utc).isoformat(),
             'message_count': len(messages),
-            'messages': [m.to_dict() for m in messages]
+            'messages': messages
         }
         return jsonify({'success': True, 'data': export_data}), 200
     except Exception as e:
@@ -1038,32 +1430,18 @@ def update_member_role(project_id, member_email):
             return jsonify({'error': 'User not found'}), 404
         
         # Verify project ownership
-        project = TeamProject.query.filter_by(id=project_id, owner_id=user.id).first()
+        project = TeamProject.query.filter_by(id=project_id, owner_id=user.id).with_for_update().first()
         if not project:
             return jsonify({'success': False, 'error': 'Project not found or not authorized'}), 404
         
         data = request.get_json()
         new_role = data.get('role', 'member')  # 'leader', 'member'
         
-        # Parse project description to get member roles
-        try:
-            project_data = json.loads(project.description) if project.description and project.description.startswith('{') else {}
-            member_roles = project_data.get('member_roles', {})
-            desc_text = project_data.get('description', '')
-            tasks = project_data.get('tasks', [])
-        except:
-            member_roles = {}
-            desc_text = project.description or ''
-            tasks = []
-        
-        # Update role
+        # Update role; the row lock keeps concurrent task, chat and update writes from being lost
+        project_data = _load_project_data(project)
+        member_roles = project_data.setdefault('member_roles', {})
         member_roles[member_email] = new_role
-        project_data = {
-            'description': desc_text,
-            'tasks': tasks,
-            'member_roles': member_roles
-        }
-        project.description = json.dumps(project_data)
+        _save_project_data(project, project_data)
         
         # Notify member about role change
         member_user = User.query.filter_by(email=member_email).first()
@@ -1304,7 +1682,7 @@ def submit_task(project_id, task_id):
             return jsonify({'error': 'User not found'}), 404
         
         # Get project
-        project = TeamProject.query.get(project_id)
+        project = TeamProject.query.filter_by(id=project_id).with_for_update().first()
         if not project:
             return jsonify({'success': False, 'error': 'Project not found'}), 404
         
@@ -1316,20 +1694,15 @@ def submit_task(project_id, task_id):
             return jsonify({'success': False, 'error': 'Please provide submission details or link'}), 400
         
         # Get tasks from project
-        try:
-            project_data = json.loads(project.description) if project.description and project.description.startswith('{') else {}
-            tasks = project_data.get('tasks', [])
-            desc_text = project_data.get('description', '')
-            member_roles = project_data.get('member_roles', {})
-        except:
-            tasks = []
-            desc_text = project.description or ''
-            member_roles = {}
+        project_data = _load_project_data(project)
+        tasks = project_data.get('tasks', [])
+        old_tasks = [dict(task) for task in tasks]
         
         # Find and update task
         task_found = False
         for task in tasks:
-            if task.get('id') == task_id:
+            if str(task.get('id')) == str(task_id):
+                task['version'] = task.get('version', 0) + 1
                 task['submission'] = {
                     'text': submission_text,
                     'link': submission_link,
@@ -1337,6 +1710,7 @@ def submit_task(project_id, task_id):
                     'submitted_by': user.email
                 }
                 task['status'] = 'done'
+                task.pop('review', None)  # A new submission awaits a fresh review
                 task['completedBy'] = user.email
                 task['completedAt'] = datetime.now(timezone.utc).isoformat()
                 task_found = True
@@ -1347,11 +1721,9 @@ def submit_task(project_id, task_id):
             return jsonify({'success': False, 'error': 'Task not found'}), 404
         
         # Save updated tasks
-        project.description = json.dumps({
-            'description': desc_text,
-            'tasks': tasks,
-            'member_roles': member_roles
-        })
+        project_stats_service.apply_task_changes(project_id, old_tasks, tasks)
+        project_data['tasks'] = tasks
+        _save_project_data(project, project_data)
         
         # Notify project owner
         owner = User.query.get(project.owner_id)
@@ -1423,7 +1795,7 @@ def post_daily_update(project_id):
             return jsonify({'error': 'User not found'}), 404
         
         # Get project
-        project = TeamProject.query.get(project_id)
+        project = TeamProject.query.filter_by(id=project_id).with_for_update().first()
         if not project:
             return jsonify({'success': False, 'error': 'Project not found'}), 404
         
@@ -1442,18 +1814,9 @@ def post_daily_update(project_id):
         if not update_text:
             return jsonify({'success': False, 'error': 'Update text is required'}), 400
         
-        # Get project data
-        try:
-            project_data = json.loads(project.description) if project.description and project.description.startswith('{') else {}
-            daily_updates = project_data.get('daily_updates', [])
-            desc_text = project_data.get('description', '')
-            tasks = project_data.get('tasks', [])
-            member_roles = project_data.get('member_roles', {})
-        except:
-            daily_updates = []
-            desc_text = project.description or ''
-            tasks = []
-            member_roles = {}
+        # Read under the row lock and write back only daily_updates, so tasks and chat stay current
+        project_data = _load_project_data(project)
+        daily_updates = project_data.get('daily_updates', [])
         
         # Add new update
         new_update = {
@@ -1469,56 +1832,29 @@ def post_daily_update(project_id):
         daily_updates = daily_updates[:50]
         
         # Save updated data
-        project.description = json.dumps({
-            'description': desc_text,
-            'tasks': tasks,
-            'member_roles': member_roles,
-            'daily_updates': daily_updates
-        })
-        
-        # Notify all project members
-        for member_email in members_list:
-            if member_email != user.email:
-                member_user = User.query.filter_by(email=member_email).first()
-                if member_user:
-                    mongodb_service.create_notification(
-                        user_id=member_user.firebase_uid,
-                        notification_type='daily_update',
-                        title='Project Update',
-                        message=f'{user.display_name or user.email} posted an update in "{project.name}"',
-                        link=f'/team?tab=projects&project={project_id}',
-                        metadata={
-                            'poster_id': user.id,
-                            'poster_email': user.email,
-                            'project_id': project_id,
-                            'project_name': project.name,
-                            'update_text': update_text[:100],
-                            'action': 'daily_update'
-                        }
-                    )
-        
-        # Also notify owner if not the poster
-        if project.owner_id != user.id:
-            owner = User.query.get(project.owner_id)
-            if owner:
-                mongodb_service.create_notification(
-                    user_id=owner.firebase_uid,
-                    notification_type='daily_update',
-                    title='Project Update',
-                    message=f'{user.display_name or user.email} posted an update in "{project.name}"',
-                    link=f'/team?tab=projects&project={project_id}',
-                    metadata={
-                        'poster_id': user.id,
-                        'poster_email': user.email,
-                        'project_id': project_id,
-                        'project_name': project.name,
-                        'update_text': update_text[:100],
-                        'action': 'daily_update'
-                    }
-                )
+        project_data['daily_updates'] = daily_updates
+        _save_project_data(project, project_data)
         
         db.session.commit()
         
+        # Notify all project members and the owner, except the poster
+        recipients = _project_recipients(project, members_list, user.id)
+        notification_dispatcher.dispatch(
+            user_ids=[recipient.firebase_uid for recipient in recipients],
+            notification_type='daily_update',
+            title='Project Update',
+            message=f'{user.display_name or user.email} posted an update in "{project.name}"',
+            link=f'/team?tab=projects&project={project_id}',
+            metadata={
+                'poster_id': user.id,
+                'poster_email': user.email,
+                'project_id': project_id,
+                'project_name': project.name,
+                'update_text': update_text[:100],
+                'action': 'daily_update'
+            }
+        )
+        
         return jsonify({
             'success': True,
             'message': 'Update posted successfully',
@@ -1595,7 +1931,7 @@ def generate_invitation_link(project_id):
             return jsonify({'error': 'User not found'}), 404
         
         # Get project
-        project = TeamProject.query.get(project_id)
+        project = TeamProject.query.options(defer(TeamProject.description)).filter_by(id=project_id).first()
         if not project:
             return jsonify({'success': False, 'error': 'Project not found'}), 404
         
@@ -1608,42 +1944,8 @@ def generate_invitation_link(project_id):
         if user.email not in members_list and project.owner_id != user.id:
             return jsonify({'success': False, 'error': 'Not authorized'}), 403
         
-        # Generate unique invitation token
-        invitation_token = str(uuid.uuid4())
-        
-        # Store invitation in project description
-        try:
-            project_data = json.loads(project.description) if project.description and project.description.startswith('{') else {}
-            desc_text = project_data.get('description', '')
-            tasks = project_data.get('tasks', [])
-            member_roles = project_data.get('member_roles', {})
-            daily_updates = project_data.get('daily_updates', [])
-            invitations = project_data.get('invitations', {})
-        except:
-            desc_text = project.description or ''
-            tasks = []
-            member_roles = {}
-            daily_updates = []
-            invitations = {}
-        
-        # Add new invitation
-        invitations[invitation_token] = {
-            'created_by': user.email,
-            'created_at': datetime.now(timezone.utc).isoformat(),
-            'expires_at': (datetime.now(timezone.utc) + timedelta(days=7)).isoformat(),
-            'uses': 0,
-            'max_uses': 10
-        }
-        
-        # Save
-        project.description = json.dumps({
-            'description': desc_text,
-            'tasks': tasks,
-            'member_roles': member_roles,
-            'daily_updates': daily_updates,
-            'invitations': invitations
-        })
-        
+        # Generate unique invitation token (only its hash is stored)
+        invitation_token, invitation = project_invitation_service.create(project.id, user)
         db.session.commit()
         
         # Generate invitation URL
@@ -1653,7 +1955,8 @@ def generate_invitation_link(project_id):
             'success': True,
             'invitation_url': invitation_url,
             'invitation_token': invitation_token,
-            'expires_at': invitations[invitation_token]['expires_at']
+            'expires_at': invitation.expires_at.isoformat(),
+            'max_uses': invitation.max_uses
         }), 200
         
     except Exception as e:
@@ -1682,50 +1985,34 @@ def join_project_via_link(project_id, invitation_token):
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Get project
-        project = TeamProject.query.get(project_id)
+        # Verify invitation (single lookup on the token hash)
+        invitation, error = project_invitation_service.validate(project_id, invitation_token)
+        if error:
+            status, message = error
+            return jsonify({'success': False, 'error': message}), status
+        
+        # The project blob (tasks, chat) is not needed to join
+        project = TeamProject.query.options(defer(TeamProject.description)).filter_by(id=project_id).with_for_update().first()
         if not project:
             return jsonify({'success': False, 'error': 'Project not found'}), 404
-        
-        # Parse project data
         try:
-            project_data = json.loads(project.description) if project.description and project.description.startswith('{') else {}
-            invitations = project_data.get('invitations', {})
             members_list = json.loads(project.members) if project.members else []
-        except:
-            return jsonify({'success': False, 'error': 'Invalid project data'}), 400
-        
-        # Verify invitation
-        if invitation_token not in invitations:
-            return jsonify({'success': False, 'error': 'Invalid invitation link'}), 404
-        
-        invitation = invitations[invitation_token]
-        
-        # Check expiration
-        expires_at = datetime.fromisoformat(invitation['expires_at'].replace('Z', '+00:00'))
-        if datetime.now(timezone.utc) > expires_at:
-            return jsonify({'success': False, 'error': 'Invitation link has expired'}), 400
-        
-        # Check max uses
-        if invitation['uses'] >= invitation['max_uses']:
-            return jsonify({'success': False, 'error': 'Invitation link has reached maximum uses'}), 400
+        except ValueError:
+            members_list = []
         
         # Check if already a member
         if user.email in members_list:
             return jsonify({'success': False, 'error': 'You are already a member of this project'}), 400
         
+        # Count the use atomically so concurrent joins cannot exceed max_uses
+        if not project_invitation_service.consume(invitation):
+            db.session.rollback()
+            return jsonify({'success': False, 'error': 'Invitation link has reached maximum uses'}), 400
+        
         # Add user to project
         members_list.append(user.email)
         project.members = json.dumps(members_list)
         
-        # Update invitation uses
-        invitation['uses'] += 1
-        invitations[invitation_token] = invitation
-        
-        # Save
-        project_data['invitations'] = invitations
-        project.description = json.dumps(project_data)
-        
         # Notify project owner
         owner = User.query.get(project.owner_id)
         if owner:
@@ -1760,7 +2047,13 @@ def join_project_via_link(project_id, invitation_token):
         return jsonify({
             'success': True,
             'message': f'Successfully joined project "{project.name}"!',
-            'project': project.to_dict()
+            'project': {
+                'id': project.id,
+                'owner_id': project.owner_id,
+                'name': project.name,
+                'status': project.status,
+                'members': members_list
+            }
         }), 200
         
     except Exception as e:
@@ -1787,67 +2080,15 @@ def get_project_report(project_id):
             return jsonify({'success': False, 'error': 'Project not found'}), 404
         
         # Verify user is owner or has leader role
-        try:
-            project_data = json.loads(project.description) if project.description and project.description.startswith('{') else {}
-            member_roles = project_data.get('member_roles', {})
-            tasks = project_data.get('tasks', [])
-            daily_updates = project_data.get('daily_updates', [])
-        except:
-            member_roles = {}
-            tasks = []
-            daily_updates = []
-        
+        project_data = _load_project_data(project)
         is_owner = project.owner_id == user.id
-        is_leader = member_roles.get(user.email) == 'leader'
+        is_leader = project_data.get('member_roles', {}).get(user.email) == 'leader'
         
         if not is_owner and not is_leader:
             return jsonify({'success': False, 'error': 'Only project leaders can view reports'}), 403
         
-        # Generate report
-        total_tasks = len(tasks)
-        completed_tasks = len([t for t in tasks if t.get('status') == 'done'])
-        in_progress_tasks = len([t for t in tasks if t.get('status') == 'doing'])
-        todo_tasks = len([t for t in tasks if t.get('status') == 'todo'])
-        
-        # Task submissions
-        submitted_tasks = [t for t in tasks if t.get('submission')]
-        
-        # Member statistics
-        members_list = json.loads(project.members) if project.members else []
-        member_stats = {}
-        
-        for member_email in members_list:
-            member_tasks = [t for t in tasks if t.get('assignee') == member_email]
-            member_stats[member_email] = {
-                'total_tasks': len(member_tasks),
-                'completed': len([t for t in member_tasks if t.get('status') == 'done']),
-                'in_progress': len([t for t in member_tasks if t.get('status') == 'doing']),
-                'todo': len([t for t in member_tasks if t.get('status') == 'todo']),
-                'role': member_roles.get(member_email, 'member')
-            }
-        
-        # Recent activity
-        recent_updates = daily_updates[:10] if daily_updates else []
-        
-        report = {
-            'project_id': project_id,
-            'project_name': project.name,
-            'owner_id': project.owner_id,
-            'created_at': project.created_at.isoformat() if project.created_at else None,
-            'summary': {
-                'total_members': len(members_list),
-                'total_tasks': total_tasks,
-                'completed_tasks': completed_tasks,
-                'in_progress_tasks': in_progress_tasks,
-                'todo_tasks': todo_tasks,
-                'completion_rate': round((completed_tasks / total_tasks * 100) if total_tasks > 0 else 0, 2)
-            },
-            'tasks': tasks,
-            'submitted_tasks': submitted_tasks,
-            'member_stats': member_stats,
-            'recent_updates': recent_updates,
-            'members': members_list
-        }
+        # Served from the cached report unless the project changed since it was built
+        report = project_stats_service.get_report(project, project_data)
         
         return jsonify({
             'success': True,
@@ -1924,7 +2165,7 @@ def send_project_chat_message(project_id):
             return jsonify({'error': 'User not found'}), 404
         
         # Get project
-        project = TeamProject.query.get(project_id)
+        project = TeamProject.query.filter_by(id=project_id).with_for_update().first()
         if not project:
             return jsonify({'success': False, 'error': 'Project not found'}), 404
         
@@ -1943,22 +2184,9 @@ def send_project_chat_message(project_id):
         if not message_text:
             return jsonify({'success': False, 'error': 'Message is required'}), 400
         
-        # Get project data
-        try:
-            project_data = json.loads(project.description) if project.description and project.description.startswith('{') else {}
-            chat_messages = project_data.get('chat_messages', [])
-            desc_text = project_data.get('description', '')
-            tasks = project_data.get('tasks', [])
-            member_roles = project_data.get('member_roles', {})
-            daily_updates = project_data.get('daily_updates', [])
-            invitations = project_data.get('invitations', {})
-        except:
-            chat_messages = []
-            desc_text = project.description or ''
-            tasks = []
-            member_roles = {}
-            daily_updates = []
-            invitations = {}
+        # Read under the row lock and write back only chat_messages, so tasks and updates stay current
+        project_data = _load_project_data(project)
+        chat_messages = project_data.get('chat_messages', [])
         
         # Add new message
         new_message = {
@@ -1976,58 +2204,35 @@ def send_project_chat_message(project_id):
         chat_messages = chat_messages[-500:]
         
         # Save
-        project.description = json.dumps({
-            'description': desc_text,
-            'tasks': tasks,
-            'member_roles': member_roles,
-            'daily_updates': daily_updates,
-            'invitations': invitations,
-            'chat_messages': chat_messages
-        })
-        
-        # Notify all project members except sender
-        for member_email in members_list:
-            if member_email != user.email:
-                member_user = User.query.filter_by(email=member_email).first()
-                if member_user:
-                    mongodb_service.create_notification(
-                        user_id=member_user.firebase_uid,
-                        notification_type='project_chat',
-                        title=f'New message in {project.name}',
-                        message=f'{user.display_name or user.email}: {message_text[:50]}...',
-                        link=f'/team?tab=projects&project={project_id}&chat=true',
-                        metadata={
-                            'sender_id': user.id,
-                            'sender_email': user.email,
-                            'project_id': project_id,
-                            'project_name': project.name,
-                            'message_preview': message_text[:100],
-                            'action': 'project_chat'
-                        }
-                    )
-        
-        # Also notify owner if not sender
-        if project.owner_id != user.id:
-            owner = User.query.get(project.owner_id)
-            if owner:
-                mongodb_service.create_notification(
-                    user_id=owner.firebase_uid,
-                    notification_type='project_chat',
-                    title=f'New message in {project.name}',
-                    message=f'{user.display_name or user.email}: {message_text[:50]}...',
-                    link=f'/team?tab=projects&project={project_id}&chat=true',
-                    metadata={
-                        'sender_id': user.id,
-                        'sender_email': user.email,
-                        'project_id': project_id,
-                        'project_name': project.name,
-                        'message_preview': message_text[:100],
-                        'action': 'project_chat'
-                    }
-                )
+        project_data['chat_messages'] = chat_messages
+        _save_project_data(project, project_data)
         
         db.session.commit()
         
+        # Notify all project members and the owner, except the sender
+        recipients = _project_recipients(project, members_list, user.id)
+        notification_dispatcher.dispatch(
+            user_ids=[recipient.firebase_uid for recipient in recipients],
+            notification_type='project_chat',
+            title=f'New message in {project.name}',
+            message=f'{user.display_name or user.email}: {message_text[:50]}...',
+            link=f'/team?tab=projects&project={project_id}&chat=true',
+            metadata={
+                'sender_id': user.id,
+                'sender_email': user.email,
+                'project_id': project_id,
+                'project_name': project.name,
+                'message_preview': message_text[:100],
+                'action': 'project_chat'
+            }
+        )
+        
+        event_bus.publish_to_users(
+            [user.id] + [recipient.id for recipient in recipients],
+            'project_chat.message',
+            {'project_id': project_id, **new_message}
+        )
+        
         return jsonify({
             'success': True,
             'message': new_message
@@ -2098,7 +2303,13 @@ def get_user_directory():
 @team_bp.route('/activity', methods=['GET'])
 @jwt_required()
 def get_team_activity():
-    """Get team activity feed with recent actions"""
+    """
+    Get the team activity feed, newest first
+
+    Query params:
+        limit: page size (default 50, max 200)
+        before: next_cursor from the previous page
+    """
     try:
         current_user_id = get_jwt_identity()
         current_user = User.query.get(current_user_id)
@@ -2106,113 +2317,22 @@ def get_team_activity():
         if not current_user:
             return jsonify({'success': False, 'error': 'User not found'}), 404
         
-        # Get limit from query params (default 50)
-        limit = request.args.get('limit', 50, type=int)
-        
-        activities = []
-        
-        # 1. Recent projects created
-        recent_projects = TeamProject.query.filter_by(owner_id=current_user.id).order_by(TeamProject.created_at.desc()).limit(10).all()
-        for project in recent_projects:
-            activities.append({
-                'id': f'project_{project.id}',
-                'type': 'project_created',
-                'icon': '📁',
-                'title': 'Project Created',
-                'description': f'Created project "{project.name}"',
-                'user': current_user.display_name or current_user.email,
-                'timestamp': project.created_at.isoformat() if project.created_at else None,
-                'metadata': {
-                    'project_id': project.id,
-                    'project_name': project.name
-                }
-            })
-        
-        # 2. Recent team members added
-        recent_members = TeamMember.query.filter_by(owner_id=current_user.id).order_by(TeamMember.created_at.desc()).limit(10).all()
-        for member in recent_members:
-            activities.append({
-                'id': f'member_{member.id}',
-                'type': 'member_added',
-                'icon': '👥',
-                'title': 'Team Member Added',
-                'description': f'Added {member.member_email} to the team',
-                'user': current_user.display_name or current_user.email,
-                'timestamp': member.created_at.isoformat() if member.created_at else None,
-                'metadata': {
-                    'member_email': member.member_email,
-                    'role': member.role
-                }
-            })
-        
-        # 3. Recent collaboration requests
-        recent_requests = CollaborationRequest.query.filter(
-            or_(
-                CollaborationRequest.from_user_id == current_user.id,
-                CollaborationRequest.to_user_id == current_user.id
-            )
-        ).order_by(CollaborationRequest.created_at.desc()).limit(10).all()
-        
-        for req in recent_requests:
-            if req.status == 'accepted':
-                icon = '✅'
-                title = 'Request Accepted'
-            elif req.status == 'rejected':
-                icon = '❌'
-                title = 'Request Rejected'
-            else:
-                icon = '📬'
-                title = 'Request Sent'
-            
-            activities.append({
-                'id': f'request_{req.id}',
-                'type': f'request_{req.status}',
-                'icon': icon,
-                'title': title,
-                'description': req.message or 'Collaboration request',
-                'user': current_user.display_name or current_user.email,
-                'timestamp': req.created_at.isoformat() if req.created_at else None,
-                'metadata': {
-                    'request_type': req.request_type,
-                    'status': req.status
-                }
-            })
-        
-        # 4. Recent chat messages
-        recent_chats = TeamChat.query.filter(
-            or_(
-                TeamChat.from_user_id == current_user.id,
-                TeamChat.to_user_id == current_user.id
-            )
-        ).order_by(TeamChat.created_at.desc()).limit(10).all()
-        
-        for chat in recent_chats:
-            other_user = User.query.get(chat.to_user_id if chat.from_user_id == current_user.id else chat.from_user_id)
-            if other_user:
-                activities.append({
-                    'id': f'chat_{chat.id}',
-                    'type': 'chat_message',
-                    'icon': '💬',
-                    'title': 'Chat Message',
-                    'description': f'Message with {other_user.display_name or other_user.email}',
-                    'user': current_user.display_name or current_user.email,
-                    'timestamp': chat.created_at.isoformat() if chat.created_at else None,
-                    'metadata': {
-                        'other_user': other_user.email,
-                        'message_preview': chat.message[:50] if chat.message else ''
-                    }
-                })
-        
-        # Sort all activities by timestamp (most recent first)
-        activities.sort(key=lambda x: x['timestamp'] or '', reverse=True)
+        try:
+            limit = min(max(int(request.args.get('limit', ACTIVITY_PAGE_SIZE)), 1), MAX_ACTIVITY_PAGE_SIZE)
+        except ValueError:
+            return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
         
-        # Limit results
-        activities = activities[:limit]
+        try:
+            activities, has_more = team_activity_service.feed(current_user.id, limit, request.args.get('before'))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
         
         return jsonify({
             'success': True,
-            'activities': activities,
-            'total': len(activities)
+            'activities': [activity.to_dict() for activity in activities],
+            'total': len(activities),
+            'has_more': has_more,
+            'next_cursor': team_activity_service.encode_cursor(activities[-1]) if has_more else None
         }), 200
         
     except Exception as e:
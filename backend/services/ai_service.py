@@ -1,10 +1,32 @@
 from groq import Groq
 import time
-import random
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from flask import current_app, has_app_context
+from services.model_router import model_router
+from services.template_engine import template_engine
 import json
 import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Process-wide cap on in-flight Groq completions (sized from GROQ_MAX_CONCURRENCY on first use)
+_groq_semaphore = None
+_groq_semaphore_lock = threading.Lock()
+
+def get_groq_concurrency() -> int:
+    """Maximum number of concurrent Groq completions for this process"""
+    if has_app_context():
+        return int(current_app.config.get('GROQ_MAX_CONCURRENCY', 8))
+    return int(os.environ.get('GROQ_MAX_CONCURRENCY', 8))
+
+def _get_groq_semaphore() -> threading.BoundedSemaphore:
+    global _groq_semaphore
+    if _groq_semaphore is None:
+        with _groq_semaphore_lock:
+            if _groq_semaphore is None:
+                _groq_semaphore = threading.BoundedSemaphore(get_groq_concurrency())
+    return _groq_semaphore
 
 class AIContentGenerator:
     def __init__(self):
@@ -31,9 +53,11 @@ class AIContentGenerator:
             if not self.client:
                 self._initialize_client()
                 
-            if self.client and (current_app.config.get('GROQ_API_KEY') if has_app_context() else os.environ.get('GROQ_API_KEY')):
-                content = self._generate_with_groq(prompt, content_type, tone, **kwargs)
-                model_used = "openai/gpt-oss-120b"
+            route = None
+            if self.client and self._has_api_key():
+                route = model_router.select(content_type, kwargs.get('word_count'), kwargs.get('user_tier', 'free'))
+                content = self._generate_with_groq(prompt, content_type, tone, route=route, **kwargs)
+                model_used = route['model']
             else:
                 content = self._generate_with_templates(prompt, content_type, tone, **kwargs)
                 model_used = "template-based"
@@ -44,6 +68,7 @@ class AIContentGenerator:
                 'success': True,
                 'content': content,
                 'model_used': model_used,
+                'route': route['route'] if route else None,
                 'generation_time': generation_time,
                 'word_count': len(content.split()),
                 'character_count': len(content)
@@ -60,8 +85,8 @@ class AIContentGenerator:
                 'generation_time': time.time() - start_time
             }
     
-    def _generate_with_groq(self, prompt: str, content_type: str, tone: str, **kwargs) -> str:
-        """Generate content using Groq API"""
+    def _generate_with_groq(self, prompt: str, content_type: str, tone: str, route: Dict[str, Any], **kwargs) -> str:
+        """Generate content using Groq API with the model configuration picked by the router"""
         
         # Create system message based on content type and tone
         system_message = self._create_system_message(content_type, tone)
@@ -102,33 +127,149 @@ class AIContentGenerator:
         # Chat needs higher temperature for more natural, varied responses
         default_temp = 0.9 if content_type == 'chat' else 0.7
         
-        # Significantly increased max tokens for better, more complete responses
-        # Chat: 4000 tokens (doubled), Content: 16000 tokens (doubled), Summarize: 12000 tokens
-        default_max_tokens = 4000 if content_type == 'chat' else 16000
-        
-        # Generate content using streaming
-        completion = self.client.chat.completions.create(
-            model="openai/gpt-oss-120b",
+        return self._stream_completion(
             messages=[
                 {"role": "system", "content": system_message},
                 {"role": "user", "content": user_message}
             ],
-            temperature=kwargs.get('temperature', default_temp),
-            max_completion_tokens=kwargs.get('max_tokens', default_max_tokens),
-            top_p=1,
-            reasoning_effort="medium",
-            stream=True,
-            stop=None
+            temperature=kwargs.get('temperature') if kwargs.get('temperature') is not None else default_temp,
+            route=route,
+            # An explicit max_tokens from the caller overrides the route's budget
+            max_tokens=kwargs.get('max_tokens')
         )
+    
+    def _stream_completion(self, messages: List[Dict[str, str]], temperature: float, route: Dict[str, Any], max_tokens: Optional[int] = None) -> str:
+        """Run a streaming chat completion against Groq and record latency/tokens for the route"""
+        start_time = time.time()
+        
+        request_args = {
+            'model': route['model'],
+            'messages': messages,
+            'temperature': temperature,
+            'max_completion_tokens': max_tokens or route['max_tokens'],
+            'top_p': 1,
+            'stream': True,
+            'stop': None
+        }
+        if route.get('reasoning_effort'):
+            request_args['reasoning_effort'] = route['reasoning_effort']
+        
+        try:
+            with _get_groq_semaphore():
+                completion = self.client.chat.completions.create(**request_args)
+                
+                # Collect the streamed response
+                content = ""
+                output_tokens = None
+                for chunk in completion:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        content += chunk.choices[0].delta.content
+                    # Groq reports usage on the final chunk
+                    usage = getattr(getattr(chunk, 'x_groq', None), 'usage', None)
+                    if usage is not None:
+                        output_tokens = usage.completion_tokens
+        except Exception:
+            model_router.record(route['route'], route['model'], time.time() - start_time, 0, success=False)
+            raise
         
-        # Collect the streamed response
-        content = ""
-        for chunk in completion:
-            if chunk.choices[0].delta.content:
-                content += chunk.choices[0].delta.content
+        if output_tokens is None:
+            output_tokens = len(content) // 4
+        model_router.record(route['route'], route['model'], time.time() - start_time, output_tokens)
         
         return content.strip()
     
+    def _has_api_key(self) -> bool:
+        """Check whether a Groq API key is configured"""
+        return bool(current_app.config.get('GROQ_API_KEY') if has_app_context() else os.environ.get('GROQ_API_KEY'))
+    
+    def generate_chat_reply(self, history: List[Dict[str, str]], tone: str = 'conversational', **kwargs) -> Dict[str, Any]:
+        """
+        Generate a chat reply from an already assembled conversation
+        
+        Args:
+            history: Ordered list of {'role', 'content'} messages ending with the user turn.
+                     System messages (e.g. a running summary) are passed through as-is.
+            tone: Tone for the chat persona
+            
+        Returns:
+            Same shape as generate_content
+        """
+        start_time = time.time()
+        
+        try:
+            if not self.client:
+                self._initialize_client()
+            
+            if self.client and self._has_api_key():
+                route = model_router.select('chat', tier=kwargs.get('user_tier', 'free'))
+                messages = [{"role": "system", "content": self._create_system_message('chat', tone)}] + history
+                content = self._stream_completion(
+                    messages=messages,
+                    temperature=kwargs.get('temperature', 0.9),
+                    route=route,
+                    max_tokens=kwargs.get('max_tokens')
+                )
+                model_used = route['model']
+            else:
+                last_user_message = next((m['content'] for m in reversed(history) if m['role'] == 'user'), '')
+                content = self._generate_with_templates(last_user_message, 'chat', tone)
+                model_used = "template-based"
+            
+            return {
+                'success': True,
+                'content': content,
+                'model_used': model_used,
+                'generation_time': time.time() - start_time,
+                'word_count': len(content.split()),
+                'character_count': len(content)
+            }
+        
+        except Exception as e:
+            if has_app_context():
+                current_app.logger.error(f"Chat reply error: {str(e)}")
+            else:
+                print(f"Chat reply error: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'generation_time': time.time() - start_time
+            }
+    
+    def summarize_chat(self, previous_summary: str, messages: List[Dict[str, str]], max_tokens: int = 400) -> str:
+        """
+        Fold older chat turns into a running summary
+        
+        Falls back to a truncated transcript when the Groq API is not available.
+        """
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        
+        if not self.client:
+            self._initialize_client()
+        
+        if self.client and self._has_api_key():
+            try:
+                user_message = (
+                    "Update the running summary of this conversation with the new turns below. "
+                    "Keep names, decisions, preferences and open questions. Reply with the summary only."
+                    f"\n\nCurrent summary:\n{previous_summary or '(none)'}\n\nNew turns:\n{transcript}"
+                )
+                return self._stream_completion(
+                    messages=[
+                        {"role": "system", "content": "You compress chat history into short, factual summaries."},
+                        {"role": "user", "content": user_message}
+                    ],
+                    temperature=0.2,
+                    route=model_router.select('chat-summary'),
+                    max_tokens=max_tokens
+                )
+            except Exception as e:
+                if has_app_context():
+                    current_app.logger.warning(f"Chat summarization failed, using truncated transcript: {str(e)}")
+        
+        # Keep the most recent part of the combined text within the summary budget (~4 chars per token)
+        combined = f"{previous_summary}\n{transcript}".strip()
+        return combined[-max_tokens * 4:]
+    
     def _create_system_message(self, content_type: str, tone: str) -> str:
         """Create system message for OpenAI based on content type and tone"""
         
@@ -166,60 +307,6 @@ class AIContentGenerator:
     def _generate_with_templates(self, prompt: str, content_type: str, tone: str, **kwargs) -> str:
         """Generate content using predefined templates (fallback when OpenAI is not available)"""
         
-        templates = {
-            'article': [
-                "# {title}\n\nIn today's rapidly evolving landscape, {topic} has become increasingly important. This comprehensive guide explores the key aspects that make {subject} essential for success.\n\n## Key Insights\n\n{topic} offers numerous benefits including improved efficiency, better outcomes, and enhanced user experience. By understanding these principles, you can leverage {subject} to achieve your goals.\n\n## Best Practices\n\n1. Start with a clear strategy\n2. Focus on user needs\n3. Measure and optimize results\n4. Stay updated with latest trends\n\n## Conclusion\n\nImplementing {topic} effectively requires dedication and the right approach. With these insights, you're well-equipped to succeed in your {subject} journey.",
-                
-                "# Understanding {title}\n\n{topic} represents a significant opportunity for growth and innovation. This article delves into the practical applications and benefits of {subject}.\n\n## The Current Landscape\n\nThe field of {topic} is experiencing unprecedented growth. Organizations worldwide are recognizing the value of {subject} in driving results.\n\n## Implementation Strategies\n\n- Define clear objectives\n- Develop a structured approach\n- Monitor progress regularly\n- Adapt based on feedback\n\n## Future Outlook\n\nAs we look ahead, {topic} will continue to evolve. Staying informed about {subject} trends will be crucial for long-term success."
-            ],
-            
-            'social-post': [
-                "🚀 Excited to share insights about {topic}! \n\n{subject} is transforming the way we approach challenges. Here are 3 key takeaways:\n\n✅ Innovation drives results\n✅ User experience matters most\n✅ Continuous learning is essential\n\nWhat's your experience with {topic}? Share your thoughts below! 👇\n\n#Innovation #Growth #Success",
-                
-                "💡 Quick tip about {topic}:\n\n{subject} can significantly impact your results when implemented correctly. The secret? Focus on value creation and user needs.\n\n🎯 Pro tip: Start small, measure everything, and scale what works.\n\nTry this approach and let me know how it goes! 🚀\n\n#Tips #Strategy #Results",
-                
-                "🌟 Just discovered something amazing about {topic}!\n\n{subject} is changing the game in ways we never imagined. The possibilities are endless when you combine creativity with strategy.\n\nWho else is excited about the future of {topic}? Let's discuss! 💬\n\n#Future #Innovation #Community"
-            ],
-            
-            'email': [
-                "Subject: Transform Your Approach to {title}\n\nHi there!\n\nI hope this email finds you well. I wanted to share some exciting insights about {subject} that could revolutionize your approach to {topic}.\n\nRecent developments show that organizations implementing {subject} see significant improvements in:\n\n• Efficiency and productivity\n• User satisfaction\n• Overall results\n\nThe key is understanding how to leverage {topic} effectively. Would you like to learn more about implementing these strategies?\n\nBest regards,\nThe ContentGenie Team",
-                
-                "Subject: Exclusive Insights on {title}\n\nDear Valued Reader,\n\nWe're thrilled to share the latest developments in {subject} that are making waves in the {topic} industry.\n\nOur research indicates that successful implementation of {subject} requires:\n\n1. Clear strategic vision\n2. User-centered approach\n3. Continuous optimization\n\nThese insights have helped countless professionals achieve remarkable results with {topic}.\n\nReady to take your {subject} strategy to the next level?\n\nWarm regards,\nYour Content Team"
-            ],
-            
-            'blog': [
-                "# The Complete Guide to {title}\n\nWelcome to our comprehensive exploration of {subject}. In this detailed post, we'll uncover the strategies that successful professionals use to master {topic}.\n\n## Table of Contents\n1. Introduction to {subject}\n2. Key Benefits and Applications\n3. Implementation Best Practices\n4. Common Challenges and Solutions\n5. Future Trends and Opportunities\n\n## Introduction\n\n{topic} has emerged as a critical factor in achieving success. Understanding {subject} is no longer optional—it's essential for staying competitive.\n\n## Key Benefits\n\nImplementing {subject} effectively can lead to:\n- Improved efficiency\n- Better user experience\n- Increased ROI\n- Competitive advantage\n\n## Best Practices\n\nSuccessful {topic} implementation requires a structured approach. Here are the proven strategies that deliver results...\n\n*[Continue reading for detailed implementation guide]*",
-                
-                "# Why {title} Matters More Than Ever\n\nIn an increasingly competitive landscape, understanding {subject} has become crucial for professionals looking to stay ahead.\n\n## The Current State of {topic}\n\nThe field of {topic} is evolving rapidly. Organizations that embrace {subject} are seeing remarkable improvements in their outcomes.\n\n## What Makes {subject} Effective?\n\nOur analysis reveals three critical factors:\n\n### 1. Strategic Alignment\nSuccessful {topic} initiatives align with broader business objectives.\n\n### 2. User-Centric Design\nThe best {subject} solutions prioritize user needs and experience.\n\n### 3. Continuous Improvement\nTop performers constantly refine their {topic} approach based on data and feedback.\n\n## Getting Started\n\nReady to implement {subject} in your organization? Here's your roadmap..."
-            ],
-            
-            'caption': [
-                "Capturing the essence of {topic} ✨\n\nWhen {subject} meets creativity, magic happens! This moment perfectly represents the power of innovation and dedication.\n\n#ContentCreation #{topic} #Innovation #Success #Inspiration",
-                
-                "Behind the scenes of {topic} 📸\n\nThe journey of {subject} continues to inspire and amaze. Every detail matters when you're passionate about excellence.\n\nWhat's your favorite part about {topic}? Drop a comment below! 👇\n\n#{topic} #BehindTheScenes #Passion #Excellence",
-                
-                "Sunday vibes with {topic} 🌟\n\n{subject} reminds us that great things happen when we combine vision with action. Grateful for this incredible journey!\n\n#SundayMotivation #{topic} #Grateful #Journey #Success"
-            ],
-            
-            'script': [
-                "[INTRO]\nHey everyone! Welcome back to our channel. Today we're diving deep into {topic}, and I'm excited to share some incredible insights about {subject} with you.\n\n[HOOK]\nBut first, let me ask you this: Have you ever wondered how {topic} could transform your approach to {subject}? Well, you're about to find out!\n\n[MAIN CONTENT]\nLet's start with the basics. {subject} is revolutionizing the way we think about {topic}. Here are the three key points you need to know:\n\nFirst, {topic} offers unprecedented opportunities for growth...\nSecond, the implementation of {subject} requires strategic thinking...\nThird, the results speak for themselves...\n\n[CALL TO ACTION]\nIf you found this valuable, make sure to like this video and subscribe for more content about {topic}. And don't forget to share your thoughts about {subject} in the comments below!\n\n[OUTRO]\nThanks for watching, and I'll see you in the next video!",
-                
-                "[OPENING SCENE]\nImagine a world where {topic} is no longer a challenge but an opportunity. That world is closer than you think, thanks to {subject}.\n\n[PROBLEM SETUP]\nFor too long, people have struggled with {topic}. The traditional approaches to {subject} simply weren't delivering the results we needed.\n\n[SOLUTION REVEAL]\nBut what if I told you there's a better way? A method that transforms how we approach {topic} and makes {subject} not just possible, but profitable?\n\n[DEMONSTRATION]\nLet me show you exactly how this works...\n\n[RESULTS]\nThe results are remarkable. Users report significant improvements in their {topic} outcomes after implementing these {subject} strategies.\n\n[CLOSING]\nReady to transform your approach to {topic}? The journey starts now."
-            ],
-            
-            'ad-copy': [
-                "🚀 Transform Your {title} Today!\n\nDiscover how {subject} can revolutionize your approach to {topic}. Join thousands who've already experienced remarkable results.\n\n✅ Proven strategies\n✅ Expert guidance\n✅ Measurable results\n✅ 30-day guarantee\n\nDon't let another day pass without optimizing your {topic} strategy. Your success with {subject} starts here.\n\n👉 Click now to get started!\n\n*Limited time offer - Act fast!*",
-                
-                "Struggling with {topic}? You're Not Alone.\n\nThousands of professionals face the same {subject} challenges every day. But what if there was a proven solution?\n\nIntroducing our revolutionary approach to {topic}:\n\n• Streamlined {subject} processes\n• Expert-backed strategies\n• Real-world results\n• Step-by-step guidance\n\nStop wasting time on outdated {topic} methods. Upgrade to our {subject} solution and see the difference immediately.\n\n🎯 Get instant access now - Your success is guaranteed!",
-                
-                "BREAKTHROUGH: New {title} Method Gets Results in 30 Days!\n\nFinally, a {subject} solution that actually works. Our proven system has helped over 10,000 professionals master {topic}.\n\nWhat makes us different?\n\n→ Science-backed approach\n→ Personalized strategies\n→ 24/7 support\n→ Money-back guarantee\n\nReady to join the {topic} success stories? Your {subject} transformation begins today.\n\n⚡ Limited spots available - Reserve yours now!"
-            ]
-        }
-        
-        # Get templates for the content type
-        content_templates = templates.get(content_type, templates['article'])
-        template = random.choice(content_templates)
-        
         # Extract key information from prompt
         words = prompt.lower().split()
         topic = words[0] if words else 'innovation'
@@ -231,12 +318,21 @@ class AIContentGenerator:
         # Create subject (more detailed topic)
         subject = ' '.join(words[:3]) if len(words) >= 3 else prompt or 'digital innovation'
         
-        # Fill template with extracted information
-        content = template.format(
-            title=title,
-            topic=topic,
-            subject=subject
-        )
+        # Template variables: derived values, request context, then explicit overrides
+        values = {
+            'title': title,
+            'topic': topic,
+            'subject': subject,
+            'audience': kwargs.get('target_audience'),
+            'target_audience': kwargs.get('target_audience'),
+            'platform': kwargs.get('platform'),
+            'word_count': kwargs.get('word_count'),
+            'tone': tone
+        }
+        values.update(kwargs.get('template_variables') or {})
+        
+        # Fill a compiled template (ContentTemplate rows, falling back to built-ins)
+        content = template_engine.render(content_type, values)
         
         # Apply tone modifications
         content = self._apply_tone_modifications(content, tone)
@@ -334,4 +430,221 @@ class AIContentGenerator:
         if '?' not in content:
             content += "\n\nWhat are your thoughts on this? Share your experience in the comments!"
         
-        return content
\ No newline at end of file
+        return content
+    
+    def _add_hook(self, text: str, title: Optional[str]) -> str:
+        """Open a section with a question to the reader, after its heading line if it has one"""
+        topic = (title or '').strip().rstrip('.!?:')
+        hook = f"Ready to dive into {topic}?" if topic else "Ever wondered what you could be doing differently?"
+        
+        if text.startswith('#'):
+            heading, _, body = text.partition('\n')
+            return f"{heading}\n\n{hook} {body.lstrip()}".rstrip()
+        return f"{hook} {text}"
+    
+    # ==================== SECTION-LEVEL IMPROVEMENT ====================
+    
+    SECTION_INSTRUCTIONS = {
+        'seo': "Rewrite this section to rank better in search: use clear, specific, keyword-rich phrasing and a descriptive heading, without keyword stuffing.",
+        'readability': "Rewrite this section to be easier to read: shorter sentences, plain words, and bullet points where they help.",
+        'engagement': "Rewrite this section to be more engaging: a stronger hook, a direct question to the reader, or a clear call-to-action where it fits."
+    }
+    
+    WEAK_WORDS = re.compile(r'\b(good|nice|great|very|really|things|stuff)\b', re.IGNORECASE)
+    
+    def split_sections(self, content: str) -> List[Dict[str, Any]]:
+        """
+        Split markdown into sections at headings, or into paragraphs when there are none
+        
+        Sections are exact slices of the content, so joining their text gives the original back.
+        """
+        parts = [part for part in re.split(r'(?m)^(?=#{1,6}\s)', content) if part]
+        if len(parts) <= 1:
+            parts = [part for part in re.findall(r'.+?(?:\n[ \t]*\n\s*|\Z)', content, re.S) if part]
+        
+        sections = []
+        offset = 0
+        for index, text in enumerate(parts):
+            first_line = text.lstrip().split('\n', 1)[0]
+            sections.append({
+                'index': index,
+                'start': offset,
+                'end': offset + len(text),
+                'heading': first_line.lstrip('#').strip() if first_line.startswith('#') else None,
+                'text': text,
+                'word_count': len(text.split())
+            })
+            offset += len(text)
+        
+        return sections
+    
+    def flag_sections(self, sections: List[Dict[str, Any]], improvement_type: str) -> Dict[int, str]:
+        """Cheap local heuristic: which sections are worth sending to the model, and why"""
+        flagged = {}
+        
+        for section in sections:
+            body = section['text'].split('\n', 1)[1] if section['heading'] else section['text']
+            if not body.strip():
+                continue
+            
+            if improvement_type == 'readability':
+                sentences = [s for s in re.split(r'[.!?]+\s', body) if s.strip()]
+                if any(len(sentence.split()) > 30 for sentence in sentences):
+                    flagged[section['index']] = 'long sentences'
+                elif any(len(paragraph.split()) > 150 for paragraph in body.split('\n\n')):
+                    flagged[section['index']] = 'long paragraph'
+            
+            elif improvement_type == 'seo':
+                if self.WEAK_WORDS.search(body):
+                    flagged[section['index']] = 'vague wording'
+                elif section['heading'] and len(body.split()) < 40:
+                    flagged[section['index']] = 'thin section'
+            
+            elif improvement_type == 'engagement':
+                # The opening and closing sections carry the hook and the call-to-action
+                if section['index'] in (0, len(sections) - 1) and '?' not in body:
+                    flagged[section['index']] = 'no hook or call-to-action'
+        
+        return flagged
+    
+    def improve_sections(
+        self,
+        content: str,
+        improvement_type: str,
+        section_indexes: Optional[List[int]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Rewrite only selected sections of a document and splice them back in
+        
+        Args:
+            content: Markdown document
+            improvement_type: seo, readability or engagement
+            section_indexes: Sections chosen by the user; when omitted, the local heuristic picks them
+            
+        Returns:
+            Dict with 'changes' (character ranges in the original plus their replacement)
+            and the resulting 'improved_content'
+        """
+        start_time = time.time()
+        
+        try:
+            sections = self.split_sections(content)
+            flagged = self.flag_sections(sections, improvement_type)
+            
+            if section_indexes is None:
+                selected = sorted(flagged)
+            else:
+                selected = sorted({i for i in section_indexes if 0 <= i < len(sections)})
+            
+            if not self.client:
+                self._initialize_client()
+            use_groq = bool(self.client and self._has_api_key())
+            
+            title = next((section['heading'] for section in sections if section['heading']), None)
+            
+            if use_groq and selected:
+                app = current_app._get_current_object() if has_app_context() else None
+                
+                def rewrite(index):
+                    if app:
+                        with app.app_context():
+                            return self._rewrite_section(sections[index], improvement_type, title, **kwargs)
+                    return self._rewrite_section(sections[index], improvement_type, title, **kwargs)
+                
+                with ThreadPoolExecutor(max_workers=min(len(selected), get_groq_concurrency())) as executor:
+                    results = list(executor.map(rewrite, selected))
+                rewritten = [text for text, _ in results]
+                model_used = ', '.join(sorted({model for _, model in results}))
+            else:
+                improvers = {
+                    'seo': self._improve_seo,
+                    'readability': self._improve_readability,
+                    'engagement': self._improve_engagement
+                }
+                improver = improvers.get(improvement_type, lambda text: text)
+                rewritten = []
+                for position, index in enumerate(selected):
+                    text = sections[index]['text']
+                    # The call-to-action closes the document, so only the last selected section gets it;
+                    # the opening section gets a hook instead
+                    if improvement_type == 'engagement' and position < len(selected) - 1:
+                        if index == 0:
+                            text = self._keep_surrounding_whitespace(text, self._add_hook(text.strip(), title))
+                        rewritten.append(text)
+                        continue
+                    rewritten.append(self._keep_surrounding_whitespace(text, improver(text.strip())))
+                model_used = 'template-based'
+            
+            changes = []
+            for index, replacement in zip(selected, rewritten):
+                section = sections[index]
+                if replacement != section['text']:
+                    changes.append({
+                        'index': index,
+                        'start': section['start'],
+                        'end': section['end'],
+                        'original': section['text'],
+                        'replacement': replacement,
+                        'reason': flagged.get(index, 'selected')
+                    })
+            
+            # Splice replacements back in from the end so earlier offsets stay valid
+            improved_content = content
+            for change in reversed(changes):
+                improved_content = improved_content[:change['start']] + change['replacement'] + improved_content[change['end']:]
+            
+            return {
+                'success': True,
+                'improvement_type': improvement_type,
+                'sections_total': len(sections),
+                'sections_selected': selected,
+                'sections_changed': [change['index'] for change in changes],
+                'changes': changes,
+                'improved_content': improved_content,
+                'model_used': model_used,
+                'generation_time': time.time() - start_time
+            }
+            
+        except Exception as e:
+            if has_app_context():
+                current_app.logger.error(f"Section improvement error: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    def _rewrite_section(self, section: Dict[str, Any], improvement_type: str, title: Optional[str], **kwargs) -> Tuple[str, str]:
+        """Send one section to the model; returns the rewrite (original surrounding whitespace kept) and the model used"""
+        text = section['text']
+        stripped = text.strip()
+        
+        route = model_router.select('section', max(section['word_count'] * 2, 50), kwargs.get('user_tier', 'free'))
+        
+        user_message = self.SECTION_INSTRUCTIONS.get(improvement_type, self.SECTION_INSTRUCTIONS['readability'])
+        if title:
+            user_message += f"\nThe section belongs to a document titled: {title}"
+        if section['heading']:
+            user_message += "\nKeep the markdown heading line and its level."
+        user_message += f"\nReply with the rewritten section only.\n\n{stripped}"
+        
+        improved = self._stream_completion(
+            messages=[
+                {"role": "system", "content": "You are an expert editor who improves one section of a document at a time without changing its meaning."},
+                {"role": "user", "content": user_message}
+            ],
+            temperature=0.5,
+            route=route
+        )
+        
+        if not improved:
+            return text, route['model']
+        
+        return self._keep_surrounding_whitespace(text, improved), route['model']
+    
+    @staticmethod
+    def _keep_surrounding_whitespace(original: str, improved: str) -> str:
+        """Put the original section's leading and trailing whitespace around a rewrite, so the next heading stays on its own line"""
+        leading = original[:len(original) - len(original.lstrip())]
+        trailing = original[len(original.rstrip()):]
+        return f"{leading}{improved.strip()}{trailing}"
@@ -0,0 +1,98 @@
+"""Chat Context Service - Builds the model context for Alex chat turns server-side"""
+
+from flask import current_app, has_app_context
+from services.mongodb_service import mongodb_service
+from typing import Dict, List, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rough token estimate used for budgeting (Groq models average ~4 characters per token)
+CHARS_PER_TOKEN = 4
+
+
+class ChatContextService:
+    """Keeps chat prompts within a token budget using a running summary of older turns"""
+
+    DEFAULT_TOKEN_BUDGET = 3000
+    DEFAULT_SUMMARY_TOKENS = 400
+
+    def _config(self, key: str, default: int) -> int:
+        if has_app_context():
+            return int(current_app.config.get(key, default))
+        return default
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Estimate the token count of a piece of text"""
+        if not text:
+            return 0
+        return len(text) // CHARS_PER_TOKEN + 1
+
+    def build_context(self, user_id: str, conversation: Dict[str, Any], user_content: str, ai_generator) -> Dict[str, Any]:
+        """
+        Assemble the messages to send for a new user turn
+
+        Only messages newer than the conversation's summary are loaded. When they no
+        longer fit the budget, the oldest ones are folded into the summary; recent turns
+        are trimmed to half the budget so compaction does not run on every turn.
+
+        Returns:
+            Dict with the 'messages' to send and the 'summary'/'summarized_count' to persist
+        """
+        budget = self._config('CHAT_CONTEXT_TOKEN_BUDGET', self.DEFAULT_TOKEN_BUDGET)
+        summary_tokens = self._config('CHAT_SUMMARY_MAX_TOKENS', self.DEFAULT_SUMMARY_TOKENS)
+
+        summary = conversation.get('summary', '')
+        summarized_count = conversation.get('summarized_count', 0)
+
+        history = mongodb_service.get_chat_messages(user_id, conversation['id'], skip=summarized_count)
+
+        fixed_tokens = self.estimate_tokens(summary) + self.estimate_tokens(user_content)
+        history_tokens = sum(self.estimate_tokens(m['content']) for m in history)
+
+        summary_changed = False
+        if history and fixed_tokens + history_tokens > budget:
+            keep_from = self._split_point(history, max(budget // 2 - fixed_tokens, 0))
+            overflow = history[:keep_from]
+            history = history[keep_from:]
+
+            if overflow:
+                summary = ai_generator.summarize_chat(
+                    summary,
+                    [{'role': m['role'], 'content': m['content']} for m in overflow],
+                    max_tokens=summary_tokens
+                )
+                summarized_count += len(overflow)
+                summary_changed = True
+                logger.info(f'Compacted {len(overflow)} chat messages into summary for conversation {conversation["id"]}')
+
+        messages: List[Dict[str, str]] = []
+        if summary:
+            messages.append({'role': 'system', 'content': f'Summary of the earlier conversation:\n{summary}'})
+        messages.extend({'role': m['role'], 'content': m['content']} for m in history)
+        messages.append({'role': 'user', 'content': user_content})
+
+        return {
+            'messages': messages,
+            'summary': summary,
+            'summarized_count': summarized_count,
+            'summary_changed': summary_changed,
+            'context_tokens': sum(self.estimate_tokens(m['content']) for m in messages)
+        }
+
+    def _split_point(self, history: List[Dict[str, Any]], token_allowance: int) -> int:
+        """Index of the oldest message that still fits, walking back from the newest"""
+        used = 0
+        index = len(history)
+        while index > 0:
+            tokens = self.estimate_tokens(history[index - 1]['content'])
+            if used + tokens > token_allowance:
+                break
+            used += tokens
+            index -= 1
+        return index
+
+
+# Global instance
+chat_context_service = ChatContextService()
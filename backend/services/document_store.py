@@ -0,0 +1,810 @@
+"""Document Store - SQLite-backed stand-in for MongoDB when no server is reachable"""
+
+from pymongo.errors import DuplicateKeyError, BulkWriteError, OperationFailure
+from pymongo.results import InsertOneResult, InsertManyResult, UpdateResult, DeleteResult
+from bson.objectid import ObjectId
+from contextlib import contextmanager
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+import copy
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+BAD_VALUE_ERROR = 2
+
+# How often expired documents are removed for TTL indexes (MongoDB's TTL monitor also runs every 60s)
+TTL_MONITOR_INTERVAL = 60
+
+NUMERIC_TYPES = ('integer', 'real')
+
+
+class UnsupportedOperation(OperationFailure):
+    """
+    A query, update or aggregation uses an operator the embedded store does not implement
+
+    An OperationFailure like the one MongoDB raises for an unknown operator, so
+    callers handle both backends the same way.
+    """
+
+    def __init__(self, message: str):
+        super().__init__(message, code=BAD_VALUE_ERROR)
+
+
+# ==================== ENCODING ====================
+
+def _encode(value):
+    """Python value -> JSON-safe value; dates and ObjectIds use MongoDB extended JSON"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        # BSON dates have millisecond precision; fixed-width ISO text keeps them ordered
+        value = value.replace(microsecond=value.microsecond // 1000 * 1000)
+        return {'$date': value.isoformat(timespec='microseconds')}
+    if isinstance(value, ObjectId):
+        return {'$oid': str(value)}
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if len(value) == 1 and '$date' in value:
+            return datetime.fromisoformat(value['$date'])
+        if len(value) == 1 and '$oid' in value:
+            return ObjectId(value['$oid'])
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+def _dumps(value) -> str:
+    return json.dumps(_encode(value), separators=(',', ':'), ensure_ascii=False)
+
+
+def _sql_value(value):
+    """Bind parameter comparable with json_extract() output for the same value"""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (datetime, ObjectId, dict, list, tuple)):
+        return _dumps(value)
+    return value
+
+
+def _json_types(value) -> Optional[Tuple[str, ...]]:
+    """json_type() results a range comparison against value may match (MongoDB compares within a type)"""
+    if isinstance(value, bool):
+        return ('true', 'false')
+    if isinstance(value, (int, float)):
+        return NUMERIC_TYPES
+    if isinstance(value, str):
+        return ('text',)
+    if isinstance(value, (datetime, ObjectId)):
+        return ('object',)
+    return None
+
+
+def _from_sql(value, json_type: Optional[str]):
+    """Value selected with json_extract() back to Python, using its json_type()"""
+    if json_type in ('object', 'array'):
+        return _decode(json.loads(value))
+    if json_type == 'true':
+        return True
+    if json_type == 'false':
+        return False
+    return value
+
+
+def _path(field: str) -> str:
+    return '$' + ''.join(f'."{part}"' for part in field.split('.'))
+
+
+def _regexp(pattern, flags, value):
+    if not isinstance(value, str):
+        return 0
+    return 1 if re.search(pattern, value, flags) else 0
+
+
+# ==================== UPDATE OPERATORS ====================
+
+def _get_path(document: Dict, field: str):
+    value = document
+    for part in field.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _set_path(document: Dict, field: str, value):
+    parts = field.split('.')
+    for part in parts[:-1]:
+        document = document.setdefault(part, {})
+    document[parts[-1]] = value
+
+
+def _unset_path(document: Dict, field: str):
+    parts = field.split('.')
+    for part in parts[:-1]:
+        document = document.get(part)
+        if not isinstance(document, dict):
+            return
+    document.pop(parts[-1], None)
+
+
+def _apply_update(document: Dict, update: Dict, inserting: bool = False) -> Dict:
+    """Apply $set/$unset/$inc/$setOnInsert/$push/$addToSet/$pull/$min/$max to a document in place"""
+    for op, fields in update.items():
+        if op == '$setOnInsert':
+            if inserting:
+                for field, value in fields.items():
+                    _set_path(document, field, copy.deepcopy(value))
+            continue
+        for field, value in fields.items():
+            if field == '_id':
+                continue
+            current = _get_path(document, field)
+            if op == '$set':
+                _set_path(document, field, copy.deepcopy(value))
+            elif op == '$unset':
+                _unset_path(document, field)
+            elif op == '$inc':
+                _set_path(document, field, (current or 0) + value)
+            elif op in ('$push', '$addToSet'):
+                items = value['$each'] if isinstance(value, dict) and '$each' in value else [value]
+                result = list(current or [])
+                for item in items:
+                    if op == '$push' or item not in result:
+                        result.append(copy.deepcopy(item))
+                _set_path(document, field, result)
+            elif op == '$pull':
+                _set_path(document, field, [item for item in (current or []) if item != value])
+            elif op == '$min':
+                if current is None or value < current:
+                    _set_path(document, field, value)
+            elif op == '$max':
+                if current is None or value > current:
+                    _set_path(document, field, value)
+            else:
+                raise UnsupportedOperation(f'Unsupported update operator: {op}')
+    return document
+
+
+def _upsert_seed(query: Dict) -> Dict:
+    """New document for an upsert, seeded with the query's equality fields like MongoDB does"""
+    document = {}
+    for field, condition in query.items():
+        if field.startswith('$'):
+            continue
+        if isinstance(condition, dict) and condition and all(op.startswith('$') for op in condition):
+            if '$eq' not in condition:
+                continue
+            condition = condition['$eq']
+        _set_path(document, field, copy.deepcopy(condition))
+    return document
+
+
+def _check_update(update: Dict):
+    if not update or not all(op.startswith('$') for op in update):
+        raise ValueError('update only works with $ operators')
+
+
+# ==================== AGGREGATION (after the SQL stages) ====================
+
+def _sort_key(value):
+    # None sorts first, like missing fields in MongoDB
+    return (value is not None, value)
+
+
+def _run_stage(documents: List[Dict], stage: Dict) -> List[Dict]:
+    (name, spec), = stage.items()
+    if name == '$sort':
+        for field, direction in reversed(list(spec.items())):
+            documents = sorted(documents, key=lambda doc: _sort_key(_get_path(doc, field)), reverse=direction == -1)
+        return documents
+    if name == '$skip':
+        return documents[spec:]
+    if name == '$limit':
+        return documents[:spec]
+    if name == '$count':
+        return [{spec: len(documents)}] if documents else []
+    if name == '$project':
+        projected = []
+        for doc in documents:
+            result = {'_id': doc.get('_id')} if spec.get('_id', 1) else {}
+            excluding = all(not value for key, value in spec.items() if key != '_id')
+            if excluding:
+                result = {key: value for key, value in doc.items() if spec.get(key, 1)}
+            else:
+                for key, value in spec.items():
+                    if key == '_id':
+                        continue
+                    if isinstance(value, str) and value.startswith('$'):
+                        result[key] = _get_path(doc, value[1:])
+                    elif value:
+                        result[key] = _get_path(doc, key)
+            projected.append(result)
+        return projected
+    raise UnsupportedOperation(f'Unsupported aggregation stage after $group: {name}')
+
+
+# ==================== STORE ====================
+
+class DocumentCursor:
+    """Lazy find() cursor supporting sort/skip/limit/batch_size chaining"""
+
+    def __init__(self, collection: 'DocumentCollection', query: Optional[Dict], projection: Optional[Dict] = None):
+        self._collection = collection
+        self._query = query or {}
+        self._projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+        self._batch_size = 0
+
+    def sort(self, key_or_list, direction=None):
+        if isinstance(key_or_list, str):
+            self._sort = [(key_or_list, direction or 1)]
+        else:
+            self._sort = list(key_or_list)
+        return self
+
+    def skip(self, count: int):
+        self._skip = count
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def batch_size(self, count: int):
+        self._batch_size = count
+        return self
+
+    def __iter__(self):
+        if not self._batch_size:
+            rows = self._collection._select(self._query, self._sort, self._skip, self._limit)
+            for key, body in rows:
+                yield self._collection._load(key, body, self._projection)
+            return
+
+        # Read one batch per query so large results are never held at once
+        # (nor the store lock kept while the caller consumes them)
+        offset, remaining = self._skip, self._limit or None
+        while remaining is None or remaining > 0:
+            count = self._batch_size if remaining is None else min(self._batch_size, remaining)
+            rows = self._collection._select(self._query, self._sort, offset, count)
+            for key, body in rows:
+                yield self._collection._load(key, body, self._projection)
+            if len(rows) < count:
+                return
+            offset += len(rows)
+            if remaining is not None:
+                remaining -= len(rows)
+
+
+class DocumentCollection:
+    """
+    One collection stored as a SQLite table of (_key, doc JSON)
+
+    Query filters and sorts are translated to SQL over json_extract(), so the
+    expression indexes created by create_index() serve them. Supported subset:
+    equality, $eq/$ne/$in/$nin/$gt/$gte/$lt/$lte/$exists/$regex/$all/$size,
+    $and/$or; updates with $set/$unset/$inc/$setOnInsert/$push/$addToSet/$pull/$min/$max;
+    aggregation with $match, $group ($sum/$avg/$min/$max/$count), $facet and
+    $sort/$skip/$limit/$project/$count. Equality on an array field compares the
+    whole array (use $all for membership). Text indexes are accepted but not
+    built, and $text queries are not supported.
+    """
+
+    def __init__(self, store: 'DocumentStore', name: str):
+        self._store = store
+        self.name = name
+        self._table = '"' + name.replace('"', '""') + '"'
+        self._ttl = {}
+        self._last_expiry = None
+        with self._store._lock:
+            self._store._conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {self._table} (_key TEXT PRIMARY KEY, doc TEXT NOT NULL)'
+            )
+
+    # ---------- SQL helpers ----------
+
+    @staticmethod
+    def _expr(field: str) -> str:
+        if field == '_id':
+            return '_key'
+        return f"json_extract(doc, '{_path(field)}')"
+
+    def _where(self, query: Dict) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        for field, condition in query.items():
+            if field in ('$and', '$or'):
+                parts = [self._where(sub_query) for sub_query in condition]
+                joined = (' AND ' if field == '$and' else ' OR ').join(f'({sql or 1})' for sql, _ in parts)
+                clauses.append(f'({joined})')
+                for _, sub_params in parts:
+                    params.extend(sub_params)
+                continue
+            if field.startswith('$'):
+                raise UnsupportedOperation(f'Unsupported query operator: {field}')
+
+            if isinstance(condition, re.Pattern):
+                condition = {'$regex': condition}
+            if isinstance(condition, dict) and condition and all(op.startswith('$') for op in condition):
+                for op, operand in condition.items():
+                    if op == '$options':
+                        continue
+                    clause = self._operator(field, op, operand, condition.get('$options', ''), params)
+                    clauses.append(clause)
+            else:
+                clauses.append(self._operator(field, '$eq', condition, '', params))
+        return ' AND '.join(clauses), params
+
+    def _operator(self, field: str, op: str, operand, options: str, params: List[Any]) -> str:
+        expr = self._expr(field)
+        to_sql = _dumps if field == '_id' else _sql_value
+        json_type = f"json_type(doc, '{_path(field)}')"
+
+        if op == '$eq':
+            if operand is None:
+                return f'{expr} IS NULL'
+            params.append(to_sql(operand))
+            return f'{expr} = ?'
+        if op == '$ne':
+            if operand is None:
+                return f'{expr} IS NOT NULL'
+            params.append(to_sql(operand))
+            return f'({expr} IS NULL OR {expr} != ?)'
+        if op in ('$in', '$nin'):
+            values = [value for value in operand if value is not None]
+            params.extend(to_sql(value) for value in values)
+            placeholders = ', '.join('?' for _ in values)
+            if op == '$in':
+                parts = [f'{expr} IN ({placeholders})'] if values else []
+                if len(values) < len(operand):
+                    parts.append(f'{expr} IS NULL')
+                return f"({' OR '.join(parts)})" if parts else '0'
+            not_in = f'{expr} NOT IN ({placeholders})' if values else '1'
+            if len(values) < len(operand):
+                return f'({expr} IS NOT NULL AND {not_in})'
+            return f'({expr} IS NULL OR {not_in})'
+        if op in ('$gt', '$gte', '$lt', '$lte'):
+            symbol = {'$gt': '>', '$gte': '>=', '$lt': '<', '$lte': '<='}[op]
+            params.append(to_sql(operand))
+            types = _json_types(operand)
+            if field == '_id' or not types:
+                return f'{expr} {symbol} ?'
+            type_list = ', '.join(f"'{t}'" for t in types)
+            return f'({json_type} IN ({type_list}) AND {expr} {symbol} ?)'
+        if op == '$exists':
+            if field == '_id':
+                return '1' if operand else '0'
+            return f"{json_type} IS {'NOT ' if operand else ''}NULL"
+        if op == '$regex':
+            pattern, flags = operand, 0
+            if isinstance(operand, re.Pattern):
+                pattern, flags = operand.pattern, operand.flags & re.IGNORECASE
+            if 'i' in options:
+                flags |= re.IGNORECASE
+            params.extend([pattern, int(flags)])
+            return f'doc_regexp(?, ?, {expr})'
+        if op == '$all':
+            values = list(dict.fromkeys(_sql_value(value) for value in operand))
+            if not values:
+                return '0'
+            params.extend(values)
+            placeholders = ', '.join('?' for _ in values)
+            return (f"(SELECT COUNT(DISTINCT value) FROM json_each(doc, '{_path(field)}') "
+                    f"WHERE value IN ({placeholders})) = {len(values)}")
+        if op == '$size':
+            params.append(operand)
+            return f"json_array_length(doc, '{_path(field)}') = ?"
+        raise UnsupportedOperation(f'Unsupported query operator: {op}')
+
+    def _order_by(self, sort) -> str:
+        if not sort:
+            return ''
+        return ' ORDER BY ' + ', '.join(
+            f"{self._expr(field)}{' DESC' if direction == -1 else ''}" for field, direction in sort
+        )
+
+    def _select(self, query: Dict, sort=None, skip: int = 0, limit: int = 0) -> List[Tuple[str, str]]:
+        where, params = self._where(query or {})
+        sql = f'SELECT _key, doc FROM {self._table}'
+        if where:
+            sql += f' WHERE {where}'
+        sql += self._order_by(sort)
+        if limit or skip:
+            sql += ' LIMIT ? OFFSET ?'
+            params = params + [limit or -1, skip]
+        with self._store._lock:
+            self._expire()
+            return self._store._conn.execute(sql, params).fetchall()
+
+    def _load(self, key: str, body: str, projection: Optional[Dict] = None) -> Dict:
+        document = {'_id': _decode(json.loads(key)), **_decode(json.loads(body))}
+        if not projection:
+            return document
+        if all(not value for field, value in projection.items() if field != '_id'):
+            return {field: value for field, value in document.items() if projection.get(field, 1)}
+        included = {field for field, value in projection.items() if value}
+        if projection.get('_id', 1):
+            included.add('_id')
+        return {field: value for field, value in document.items() if field in included}
+
+    @staticmethod
+    def _dump(document: Dict) -> Tuple[str, str]:
+        body = {field: value for field, value in document.items() if field != '_id'}
+        return _dumps(document['_id']), _dumps(body)
+
+    def _duplicate_key(self, error: sqlite3.IntegrityError) -> DuplicateKeyError:
+        return DuplicateKeyError(f'E11000 duplicate key error collection: {self.name} ({error})', DUPLICATE_KEY_ERROR)
+
+    def _write(self, key: str, document: Dict):
+        try:
+            self._store._conn.execute(
+                f'UPDATE {self._table} SET doc = ? WHERE _key = ?', (self._dump(document)[1], key)
+            )
+        except sqlite3.IntegrityError as e:
+            raise self._duplicate_key(e)
+
+    def _insert(self, document: Dict):
+        if '_id' not in document:
+            document['_id'] = ObjectId()
+        try:
+            self._store._conn.execute(f'INSERT INTO {self._table} (_key, doc) VALUES (?, ?)', self._dump(document))
+        except sqlite3.IntegrityError as e:
+            raise self._duplicate_key(e)
+
+    def _expire(self, force: bool = False):
+        """Remove documents past their TTL index expiry, at most every TTL_MONITOR_INTERVAL seconds"""
+        if not self._ttl:
+            return
+        now = time.monotonic()
+        if not force and self._last_expiry is not None and now - self._last_expiry < TTL_MONITOR_INTERVAL:
+            return
+        self._last_expiry = now
+        for field, seconds in self._ttl.items():
+            cutoff = _dumps(datetime.utcnow() - timedelta(seconds=seconds))
+            self._store._conn.execute(
+                f"DELETE FROM {self._table} WHERE json_type(doc, '{_path(field)}') = 'object' "
+                f"AND {self._expr(field)} < ?", (cutoff,)
+            )
+
+    # ---------- pymongo Collection API ----------
+
+    def create_index(self, keys, unique: bool = False, name: Optional[str] = None,
+                     partialFilterExpression: Optional[Dict] = None,
+                     expireAfterSeconds: Optional[int] = None, **kwargs) -> str:
+        """Create a SQLite expression index over the same json_extract() terms queries use"""
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        name = name or '_'.join(f'{field}_{direction}' for field, direction in keys)
+        if any(direction == 'text' for _, direction in keys):
+            # No $text support here, so a text index has nothing to serve
+            return name
+        columns = ', '.join(
+            f"{self._expr(field)}{' DESC' if direction == -1 else ''}" for field, direction in keys
+        )
+        where = ''
+        if partialFilterExpression:
+            sql, params = self._where(partialFilterExpression)
+            # Index definitions cannot take bound parameters
+            for param in params:
+                literal = 'NULL' if param is None else (
+                    str(param) if isinstance(param, (int, float)) else "'" + str(param).replace("'", "''") + "'"
+                )
+                sql = sql.replace('?', literal, 1)
+            where = f' WHERE {sql}'
+        index_name = '"' + f'{self.name}__{name}'.replace('"', '""') + '"'
+        with self._store._lock:
+            self._store._conn.execute(
+                f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {index_name} "
+                f"ON {self._table} ({columns}){where}"
+            )
+        if expireAfterSeconds is not None:
+            self._ttl[keys[0][0]] = expireAfterSeconds
+        return name
+
+    def drop_index(self, index_or_name):
+        """Drop an index by name or key list (missing indexes are ignored)"""
+        if not isinstance(index_or_name, str):
+            index_or_name = '_'.join(f'{field}_{direction}' for field, direction in index_or_name)
+        index_name = '"' + f'{self.name}__{index_or_name}'.replace('"', '""') + '"'
+        with self._store._lock:
+            self._store._conn.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+    def insert_one(self, document: Dict) -> InsertOneResult:
+        with self._store._lock:
+            self._insert(document)
+        return InsertOneResult(document['_id'], True)
+
+    def insert_many(self, documents, ordered: bool = True) -> InsertManyResult:
+        documents = list(documents)
+        if not documents:
+            raise TypeError('documents must be a non-empty list')
+        errors = []
+        with self._transaction():
+            for index, document in enumerate(documents):
+                try:
+                    self._insert(document)
+                except DuplicateKeyError as e:
+                    errors.append({'index': index, 'code': DUPLICATE_KEY_ERROR, 'errmsg': str(e), 'op': document})
+                    if ordered:
+                        break
+        if errors:
+            raise BulkWriteError({
+                'writeErrors': errors,
+                'writeConcernErrors': [],
+                'nInserted': (errors[0]['index'] if ordered else len(documents) - len(errors)),
+                'nUpserted': 0,
+                'nMatched': 0,
+                'nModified': 0,
+                'nRemoved': 0,
+                'upserted': []
+            })
+        return InsertManyResult([document['_id'] for document in documents], True)
+
+    def find(self, query: Optional[Dict] = None, projection: Optional[Dict] = None,
+             sort=None, skip: int = 0, limit: int = 0) -> DocumentCursor:
+        cursor = DocumentCursor(self, query, projection).skip(skip).limit(limit)
+        if sort:
+            cursor.sort(sort)
+        return cursor
+
+    def find_one(self, query: Optional[Dict] = None, projection: Optional[Dict] = None, sort=None) -> Optional[Dict]:
+        return next(iter(self.find(query, projection, sort=sort, limit=1)), None)
+
+    def count_documents(self, query: Dict, **kwargs) -> int:
+        where, params = self._where(query or {})
+        sql = f'SELECT COUNT(*) FROM {self._table}' + (f' WHERE {where}' if where else '')
+        with self._store._lock:
+            self._expire()
+            return self._store._conn.execute(sql, params).fetchone()[0]
+
+    def distinct(self, field: str, query: Optional[Dict] = None) -> List[Any]:
+        values = []
+        for document in self.find(query, {field: 1}):
+            value = _get_path(document, field)
+            for item in (value if isinstance(value, list) else [value]):
+                if item is not None and item not in values:
+                    values.append(item)
+        return values
+
+    def _update(self, query: Dict, update: Dict, upsert: bool, multi: bool) -> UpdateResult:
+        _check_update(update)
+        with self._transaction():
+            rows = self._select(query, limit=0 if multi else 1)
+            modified = 0
+            for key, body in rows:
+                document = self._load(key, body)
+                updated = _apply_update(copy.deepcopy(document), update)
+                if _dumps(updated) != _dumps(document):
+                    self._write(key, updated)
+                    modified += 1
+            raw_result = {'n': len(rows), 'nModified': modified}
+            if not rows and upsert:
+                document = _apply_update(_upsert_seed(query), update, inserting=True)
+                self._insert(document)
+                raw_result = {'n': 1, 'nModified': 0, 'upserted': document['_id']}
+        return UpdateResult(raw_result, True)
+
+    def update_one(self, query: Dict, update: Dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        return self._update(query, update, upsert, multi=False)
+
+    def update_many(self, query: Dict, update: Dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        return self._update(query, update, upsert, multi=True)
+
+    def find_one_and_update(self, query: Dict, update: Dict, projection: Optional[Dict] = None, sort=None,
+                            upsert: bool = False, return_document: bool = False, **kwargs) -> Optional[Dict]:
+        """return_document: ReturnDocument.BEFORE (False) or ReturnDocument.AFTER (True)"""
+        _check_update(update)
+        with self._transaction():
+            rows = self._select(query, sort, limit=1)
+            if rows:
+                key, body = rows[0]
+                before = self._load(key, body)
+                after = _apply_update(copy.deepcopy(before), update)
+                if _dumps(after) != _dumps(before):
+                    self._write(key, after)
+                result = after if return_document else before
+            elif upsert:
+                after = _apply_update(_upsert_seed(query), update, inserting=True)
+                self._insert(after)
+                result = after if return_document else None
+            else:
+                result = None
+        if result is None or not projection:
+            return result
+        key, body = self._dump(result)
+        return self._load(key, body, projection)
+
+    def find_one_and_delete(self, query: Dict, projection: Optional[Dict] = None, sort=None, **kwargs) -> Optional[Dict]:
+        with self._transaction():
+            rows = self._select(query, sort, limit=1)
+            if not rows:
+                return None
+            key, body = rows[0]
+            self._store._conn.execute(f'DELETE FROM {self._table} WHERE _key = ?', (key,))
+        return self._load(key, body, projection)
+
+    def _delete(self, query: Dict, limit: Optional[int]) -> DeleteResult:
+        where, params = self._where(query or {})
+        condition = f' WHERE {where}' if where else ''
+        if limit:
+            sql = (f'DELETE FROM {self._table} WHERE _key IN '
+                   f'(SELECT _key FROM {self._table}{condition} LIMIT {int(limit)})')
+        else:
+            sql = f'DELETE FROM {self._table}{condition}'
+        with self._store._lock:
+            self._expire()
+            deleted = self._store._conn.execute(sql, params).rowcount
+        return DeleteResult({'n': deleted}, True)
+
+    def delete_one(self, query: Dict, **kwargs) -> DeleteResult:
+        return self._delete(query, 1)
+
+    def delete_many(self, query: Dict, **kwargs) -> DeleteResult:
+        return self._delete(query, None)
+
+    def aggregate(self, pipeline: List[Dict], **kwargs):
+        """
+        Run an aggregation pipeline
+
+        Leading $match stages become the SQL WHERE clause; a following $group
+        runs as SQL GROUP BY and $facet runs each sub-pipeline the same way.
+        Later stages are applied in Python to the (small) grouped result.
+        """
+        stages = list(pipeline)
+        matches = []
+        while stages and '$match' in stages[0]:
+            matches.append(stages.pop(0)['$match'])
+        query = matches[0] if len(matches) == 1 else ({'$and': matches} if matches else {})
+
+        if stages and '$facet' in stages[0]:
+            facets = stages.pop(0)['$facet']
+            prefix = [{'$match': query}] if query else []
+            documents = [{name: list(self.aggregate(prefix + list(sub_pipeline))) for name, sub_pipeline in facets.items()}]
+        elif stages and '$group' in stages[0]:
+            documents = self._group(query, stages.pop(0)['$group'])
+        else:
+            cursor = self.find(query)
+            while stages and set(stages[0]) & {'$sort', '$skip', '$limit'}:
+                (name, spec), = stages.pop(0).items()
+                if name == '$sort':
+                    cursor.sort(list(spec.items()))
+                elif name == '$skip':
+                    cursor.skip(spec)
+                else:
+                    cursor.limit(spec)
+            documents = list(cursor)
+
+        for stage in stages:
+            documents = _run_stage(documents, stage)
+        return iter(documents)
+
+    def _group(self, query: Dict, spec: Dict) -> List[Dict]:
+        group_id = spec['_id']
+        if group_id is None:
+            keys = []
+        elif isinstance(group_id, str) and group_id.startswith('$'):
+            keys = [(None, group_id[1:])]
+        elif isinstance(group_id, dict) and all(isinstance(v, str) and v.startswith('$') for v in group_id.values()):
+            keys = [(name, ref[1:]) for name, ref in group_id.items()]
+        else:
+            raise UnsupportedOperation(f'Unsupported $group _id: {group_id!r}')
+
+        columns = []
+        for _, field in keys:
+            columns += [self._expr(field), f"json_type(doc, '{_path(field)}')"]
+        accumulators = []
+        for name, accumulator in spec.items():
+            if name == '_id':
+                continue
+            (op, argument), = accumulator.items()
+            if op == '$count' or (op == '$sum' and isinstance(argument, (int, float)) and not isinstance(argument, bool)):
+                columns.append(f'COUNT(*) * {1 if op == "$count" else argument!r}')
+            elif op in ('$sum', '$avg', '$min', '$max') and isinstance(argument, str) and argument.startswith('$'):
+                field = argument[1:]
+                value = self._expr(field)
+                if op in ('$sum', '$avg'):
+                    value = f"CASE WHEN json_type(doc, '{_path(field)}') IN ('integer', 'real') THEN {value} END"
+                sql_function = {'$sum': 'SUM', '$avg': 'AVG', '$min': 'MIN', '$max': 'MAX'}[op]
+                column = f'{sql_function}({value})'
+                columns.append(f'COALESCE({column}, 0)' if op == '$sum' else column)
+            else:
+                raise UnsupportedOperation(f'Unsupported $group accumulator: {op}')
+            accumulators.append(name)
+
+        if not keys:
+            # A $group over no documents yields no result at all, not a zero row
+            columns.append('COUNT(*)')
+        where, params = self._where(query)
+        sql = f"SELECT {', '.join(columns)} FROM {self._table}"
+        if where:
+            sql += f' WHERE {where}'
+        if keys:
+            sql += ' GROUP BY ' + ', '.join(self._expr(field) for _, field in keys)
+        with self._store._lock:
+            self._expire()
+            rows = self._store._conn.execute(sql, params).fetchall()
+        if not keys:
+            rows = [row[:-1] for row in rows if row[-1]]
+
+        documents = []
+        for row in rows:
+            key_values = [_from_sql(row[2 * i], row[2 * i + 1]) for i in range(len(keys))]
+            if not keys:
+                document = {'_id': None}
+            elif keys[0][0] is None:
+                document = {'_id': key_values[0]}
+            else:
+                document = {'_id': {name: value for (name, _), value in zip(keys, key_values)}}
+            for name, value in zip(accumulators, row[2 * len(keys):]):
+                # MIN/MAX over dates come back as their extended JSON text
+                if isinstance(value, str) and value.startswith(('{"$date"', '{"$oid"')):
+                    value = _decode(json.loads(value))
+                document[name] = value
+            documents.append(document)
+        return documents
+
+    @contextmanager
+    def _transaction(self):
+        with self._store._lock:
+            connection = self._store._conn
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+
+
+class DocumentStore:
+    """A SQLite file holding one table per collection; indexed like the MongoDB collections it stands in for"""
+
+    def __init__(self, path: str):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA busy_timeout=5000')
+        self._conn.create_function('doc_regexp', 3, _regexp, deterministic=True)
+        self._collections = {}
+
+    def __getitem__(self, name: str) -> DocumentCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = DocumentCollection(self, name)
+            return self._collections[name]
+
+    def list_collection_names(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def drop_collection(self, name: str):
+        with self._lock:
+            self._collections.pop(name, None)
+            self._conn.execute('DROP TABLE IF EXISTS "' + name.replace('"', '""') + '"')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
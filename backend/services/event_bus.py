@@ -0,0 +1,252 @@
+"""Event Bus - In-process pub/sub for pushing real-time events to clients over Server-Sent Events"""
+
+from flask import current_app, has_app_context
+from collections import defaultdict, deque
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+import itertools
+import threading
+import queue
+import json
+import time
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Redis is optional; without it events only reach clients connected to the same worker
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+REDIS_CHANNEL_PREFIX = 'contentgenei:events:'
+
+# Events buffered per subscriber before new ones are dropped for that client
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+def user_channel(user_id: str) -> str:
+    """Channel name for events addressed to one user"""
+    return f'user:{user_id}'
+
+
+def _event_key(event_id: str) -> Tuple[int, int]:
+    """Sortable key of an event id ("<epoch ms>-<sequence>")"""
+    try:
+        millis, seq = event_id.split('-', 1)
+        return int(millis), int(seq)
+    except (AttributeError, ValueError):
+        return 0, 0
+
+
+class EventBus:
+    """
+    Publishes events to per-channel subscribers and keeps a short replay history
+
+    Each worker delivers events to the SSE streams it holds. When REDIS_URL is
+    configured, publishes go through Redis pub/sub so every worker receives them.
+    """
+
+    DEFAULT_HISTORY_SIZE = 100
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._history = {}
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+        self._redis = None
+        self._redis_checked = False
+        self._app = None
+        # Events older than this were published before the worker started and cannot be replayed
+        self._started_key = (int(time.time() * 1000), 0)
+
+    def init_app(self, app):
+        """Bind the bus to the app so threads without an app context read its config, and connect to Redis"""
+        self._app = app
+        self._get_redis()
+
+    def _config(self, key: str, default: Any) -> Any:
+        if has_app_context():
+            return current_app.config.get(key, default)
+        if self._app is not None:
+            return self._app.config.get(key, default)
+        return os.environ.get(key, default)
+
+    def _next_id(self) -> str:
+        return f'{int(time.time() * 1000)}-{next(self._sequence)}'
+
+    def _get_redis(self):
+        """Connect to Redis on first use when REDIS_URL is configured"""
+        if self._redis_checked:
+            return self._redis
+
+        with self._lock:
+            if self._redis_checked:
+                return self._redis
+
+            redis_url = self._config('REDIS_URL', None)
+            if not redis_url:
+                # Only trust "no Redis" when it came from the app config, not a bare environment lookup
+                if has_app_context() or self._app is not None:
+                    self._redis_checked = True
+                return None
+            self._redis_checked = True
+            if not REDIS_AVAILABLE:
+                logger.warning('REDIS_URL is set but the redis package is not installed - events stay in-process')
+                return None
+
+            try:
+                client = redis.Redis.from_url(redis_url)
+                client.ping()
+                self._start_redis_listener(client)
+                self._redis = client
+                logger.info('✅ Event bus connected to Redis pub/sub')
+            except Exception as e:
+                logger.warning(f'⚠️ Redis unavailable, events stay in-process: {str(e)}')
+
+        return self._redis
+
+    def _start_redis_listener(self, client):
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(f'{REDIS_CHANNEL_PREFIX}*')
+
+        def listen():
+            while True:
+                try:
+                    for message in pubsub.listen():
+                        self._deliver(json.loads(message['data']))
+                except Exception as e:
+                    logger.error(f'Redis event listener error: {str(e)}')
+                    time.sleep(1)
+
+        threading.Thread(target=listen, name='event-bus-redis', daemon=True).start()
+
+    def publish(self, channel: str, event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Publish an event to every subscriber of a channel"""
+        event = {
+            'id': self._next_id(),
+            'channel': channel,
+            'type': event_type,
+            'data': data
+        }
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                client.publish(f'{REDIS_CHANNEL_PREFIX}{channel}', json.dumps(event, default=str))
+                return event
+            except Exception as e:
+                logger.error(f'Redis publish failed, delivering locally: {str(e)}')
+
+        self._deliver(event)
+        return event
+
+    def publish_to_users(self, user_ids: Iterable[str], event_type: str, data: Dict[str, Any]):
+        """Publish the same event to several users"""
+        for user_id in set(filter(None, user_ids)):
+            self.publish(user_channel(user_id), event_type, data)
+
+    def _deliver(self, event: Dict[str, Any]):
+        channel = event['channel']
+        with self._lock:
+            history = self._history.get(channel)
+            if history is None:
+                history = deque(maxlen=int(self._config('EVENT_HISTORY_SIZE', self.DEFAULT_HISTORY_SIZE)))
+                self._history[channel] = history
+            history.append(event)
+            subscribers = list(self._subscribers.get(channel, ()))
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                logger.warning(f'Dropping event {event["id"]} for a slow subscriber on {channel}')
+
+    def subscribe(self, channels: List[str]) -> queue.Queue:
+        """Register a queue that receives events for the given channels"""
+        self._get_redis()
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, channels: List[str], subscriber: queue.Queue):
+        with self._lock:
+            for channel in channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def replay(self, channels: List[str], last_event_id: str) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Events published after last_event_id on the given channels
+
+        Returns:
+            (events, complete) - complete is False when the history no longer reaches
+            back to last_event_id, in which case the client should refetch its state
+        """
+        last_key = _event_key(last_event_id)
+        complete = last_key >= self._started_key
+        events = []
+
+        with self._lock:
+            for channel in channels:
+                history = self._history.get(channel)
+                if not history:
+                    continue
+                if len(history) == history.maxlen and _event_key(history[0]['id']) > last_key:
+                    complete = False
+                events.extend(e for e in history if _event_key(e['id']) > last_key)
+
+        events.sort(key=lambda e: _event_key(e['id']))
+        return events, complete
+
+    def stream(self, channels: List[str], last_event_id: Optional[str] = None,
+               heartbeat: float = 15, max_duration: float = 55):
+        """
+        Generate Server-Sent Events for the given channels
+
+        The stream closes after max_duration so long-lived connections do not pin a
+        worker forever; EventSource reconnects and resumes from Last-Event-ID.
+        """
+        subscriber = self.subscribe(channels)
+        try:
+            yield 'retry: 3000\n\n'
+
+            replayed = set()
+            if last_event_id:
+                events, complete = self.replay(channels, last_event_id)
+                if not complete:
+                    # History does not reach back far enough; the client refetches instead
+                    yield self.format_event({'type': 'resync', 'data': {}})
+                    events = []
+                for event in events:
+                    replayed.add(event['id'])
+                    yield self.format_event(event)
+
+            deadline = time.time() + max_duration
+            while time.time() < deadline:
+                try:
+                    event = subscriber.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                if event['id'] in replayed:
+                    continue
+                yield self.format_event(event)
+        finally:
+            self.unsubscribe(channels, subscriber)
+
+    @staticmethod
+    def format_event(event: Dict[str, Any]) -> str:
+        data = json.dumps(event['data'], default=str)
+        event_id = f"id: {event['id']}\n" if event.get('id') else ''
+        return f"{event_id}event: {event['type']}\ndata: {data}\n\n"
+
+
+# Global instance
+event_bus = EventBus()
@@ -0,0 +1,83 @@
+"""Extension Token Cache - In-process cache of verified LinkoGenei extension tokens"""
+
+from flask import current_app, has_app_context
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+import hashlib
+import threading
+import time
+
+
+class ExtensionTokenCache:
+    """Maps verified tokens to their user_id so repeat extension calls skip the lookup
+
+    An entry lives until the token's own expires_at, but at most
+    EXTENSION_TOKEN_CACHE_TTL seconds, which bounds how long another worker
+    keeps accepting a token deleted elsewhere. Deletes in this process
+    invalidate immediately. Only successful verifications are cached, and
+    tokens are keyed by their hash.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # token hash -> (user_id, valid until as epoch seconds)
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _config(key: str, default: int) -> int:
+        if has_app_context():
+            return int(current_app.config.get(key, default))
+        return default
+
+    def get(self, token: str) -> Optional[str]:
+        """user_id of a cached, still-valid token, or None"""
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user_id, valid_until = entry
+            if time.time() >= valid_until:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return user_id
+
+    def put(self, token: str, user_id: str, expires_at: datetime):
+        ttl = self._config('EXTENSION_TOKEN_CACHE_TTL', 300)
+        if ttl <= 0:
+            return
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        valid_until = min(expires_at.timestamp(), time.time() + ttl)
+        max_entries = self._config('EXTENSION_TOKEN_CACHE_SIZE', 10000)
+        with self._lock:
+            self._entries[self._key(token)] = (user_id, valid_until)
+            self._entries.move_to_end(self._key(token))
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str):
+        with self._lock:
+            self._entries.pop(self._key(token), None)
+
+    def purge_expired(self) -> int:
+        """Drop entries past their validity; returns how many were removed"""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, valid_until) in self._entries.items() if now >= valid_until]
+            for key in expired:
+                del self._entries[key]
+        return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Global instance
+extension_token_cache = ExtensionTokenCache()
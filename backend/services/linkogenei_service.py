@@ -1,13 +1,31 @@
 """LinkoGenei Service - SQLite-based storage for saved posts"""
 
-from models import db, ExtensionToken, SavedPost, SavedPostCategory
+from models import db, ExtensionToken, SavedPost, SavedPostCategory, SavedPostStat
+from services.extension_token_cache import extension_token_cache
+from services.post_search_service import PostSearchService
+from services.metadata_enricher import post_metadata_enricher
+from utils.search import normalize_tags
+from utils.canonical_url import url_hash, merge_duplicate_posts
+from sqlalchemy import case, or_, and_
+from sqlalchemy.exc import IntegrityError
+from collections import Counter
 from datetime import datetime, timezone
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Iterator
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+SYNC_PAGE_SIZE = 200
+
+# Rows fetched per round trip when streaming exports
+EXPORT_BATCH_SIZE = 500
+
+TOKEN_SWEEP_BATCH_SIZE = 1000
+
+# Counter row holding a user's total; its presence means the user's counters are maintained
+STAT_TOTAL = ('total', '')
+
 class LinkoGeneiService:
     """Service for managing LinkoGenei extension data"""
     
@@ -32,6 +50,7 @@ class LinkoGeneiService:
                 db.session.add(new_token)
             
             db.session.commit()
+            extension_token_cache.invalidate(token)
             return {'success': True, 'message': 'Token stored successfully'}
             
         except Exception as e:
@@ -42,16 +61,24 @@ class LinkoGeneiService:
     @staticmethod
     def verify_extension_token(token: str) -> Dict[str, Any]:
         """Verify extension token and return user_id if valid"""
+        user_id = extension_token_cache.get(token)
+        if user_id:
+            return {'success': True, 'user_id': user_id}
+        
         try:
             token_obj = ExtensionToken.query.filter_by(token=token).first()
             
             if not token_obj:
                 return {'success': False, 'error': 'Token not found'}
             
-            # Check if expired
-            if token_obj.expires_at < datetime.now(timezone.utc):
+            # Check if expired (the column comes back naive; it holds UTC)
+            expires_at = token_obj.expires_at
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if expires_at < datetime.now(timezone.utc):
                 return {'success': False, 'error': 'Token expired'}
             
+            extension_token_cache.put(token, token_obj.user_id, expires_at)
             return {
                 'success': True,
                 'user_id': token_obj.user_id
@@ -61,15 +88,49 @@ class LinkoGeneiService:
             logger.error(f"Failed to verify token: {str(e)}")
             return {'success': False, 'error': str(e)}
     
+    @staticmethod
+    def delete_extension_token(token: str) -> Dict[str, Any]:
+        """Delete (revoke) an extension token"""
+        try:
+            deleted = ExtensionToken.query.filter_by(token=token).delete(synchronize_session=False)
+            db.session.commit()
+            extension_token_cache.invalidate(token)
+            
+            if deleted:
+                return {'success': True, 'message': 'Token deleted'}
+            return {'success': False, 'error': 'Token not found'}
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to delete token: {str(e)}")
+            return {'success': False, 'error': str(e)}
+    
+    @staticmethod
+    def sweep_expired_tokens(batch_size: int = TOKEN_SWEEP_BATCH_SIZE) -> int:
+        """Delete expired extension tokens in batches, committing each; returns how many were removed"""
+        removed = 0
+        now = datetime.now(timezone.utc)
+        while True:
+            ids = [
+                token_id for (token_id,) in db.session.query(ExtensionToken.id)
+                .filter(ExtensionToken.expires_at < now)
+                .limit(batch_size)
+            ]
+            if not ids:
+                break
+            removed += ExtensionToken.query.filter(ExtensionToken.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+        extension_token_cache.purge_expired()
+        logger.info(f"Swept {removed} expired extension tokens")
+        return removed
+    
     @staticmethod
     def save_post(user_id: str, post_data: Dict[str, Any]) -> Dict[str, Any]:
         """Save a post"""
         try:
-            # Check if post already exists
-            existing = SavedPost.query.filter_by(
-                user_id=user_id,
-                url=post_data['url']
-            ).first()
+            # Check if post already exists (under any form of its URL)
+            key = url_hash(post_data['url'])
+            existing = SavedPost.query.filter_by(user_id=user_id, url_hash=key).first()
             
             if existing:
                 return {
@@ -78,22 +139,17 @@ class LinkoGeneiService:
                 }
             
             # Create new post
-            post = SavedPost(
-                user_id=user_id,
-                url=post_data['url'],
-                platform=post_data.get('platform', 'Unknown'),
-                title=post_data.get('title', ''),
-                image_url=post_data.get('image_url', ''),
-                category=post_data.get('category', 'Uncategorized'),
-                notes=post_data.get('notes', ''),
-                tags=json.dumps(post_data.get('tags', []))
-            )
+            post = LinkoGeneiService._new_post(user_id, post_data, key, datetime.now(timezone.utc))
             
             db.session.add(post)
+            db.session.flush()
+            PostSearchService.index_posts([post])
+            LinkoGeneiService._apply_stat_deltas(user_id, LinkoGeneiService._stat_deltas(post, 1))
             db.session.commit()
             
             # Update category count
             LinkoGeneiService._update_category_count(user_id, post.category)
+            post_metadata_enricher.enqueue([post])
             
             return {
                 'success': True,
@@ -109,6 +165,181 @@ class LinkoGeneiService:
                 'error': str(e)
             }
     
+    @staticmethod
+    def _new_post(user_id: str, post_data: Dict[str, Any], key: str, created_at: datetime) -> SavedPost:
+        """Build a SavedPost for single and batch saves; key is the already computed url_hash"""
+        return SavedPost(
+            user_id=user_id,
+            url=post_data['url'],
+            url_hash=key,
+            platform=post_data.get('platform', 'Unknown'),
+            title=post_data.get('title', ''),
+            image_url=post_data.get('image_url', ''),
+            category=post_data.get('category', 'Uncategorized'),
+            notes=post_data.get('notes', ''),
+            tags=json.dumps(normalize_tags(post_data.get('tags', []))),
+            created_at=created_at,
+            updated_at=created_at
+        )
+    
+    @staticmethod
+    def save_posts_batch(user_id: str, posts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Save many posts at once
+        
+        Already-saved URLs (and repeats within the batch) are reported as
+        duplicates with the existing post id, so re-sending a batch whose
+        response was lost is harmless. URLs are compared in canonical form.
+        
+        Returns:
+            {'results': [...], 'saved': n, 'duplicates': n, 'failed': n, 'cursor': str}
+            with one result per input item, in order
+        """
+        results = []
+        hashes = []
+        first_seen = {}  # url hash -> index of the first item carrying it
+        for index, item in enumerate(posts):
+            item = item if isinstance(item, dict) else {}
+            result = {'index': index, 'client_id': item.get('client_id')}
+            url = item.get('url')
+            key = url_hash(url) if isinstance(url, str) and url.strip() else None
+            if key is None:
+                result.update(status='error', error='URL is required')
+            elif key in first_seen:
+                result['status'] = 'duplicate'
+            else:
+                first_seen[key] = index
+            hashes.append(key)
+            results.append(result)
+        
+        pending = dict(first_seen)
+        try:
+            for _ in range(2):
+                existing = db.session.query(SavedPost.url_hash, SavedPost.id).filter(
+                    SavedPost.user_id == user_id,
+                    SavedPost.url_hash.in_(list(pending))
+                ).all() if pending else []
+                for key, post_id in existing:
+                    results[pending.pop(key)].update(status='duplicate', post_id=post_id)
+                
+                now = datetime.now(timezone.utc)
+                new_posts = [LinkoGeneiService._new_post(user_id, posts[index], key, now) for key, index in pending.items()]
+                try:
+                    with db.session.begin_nested():
+                        db.session.add_all(new_posts)
+                    break
+                except IntegrityError:
+                    # A concurrent save took some of these URLs; look them up again
+                    continue
+            else:
+                raise RuntimeError('Posts kept conflicting with concurrent saves')
+            
+            for post in new_posts:
+                results[pending[post.url_hash]].update(status='saved', post_id=post.id, post=post.to_dict())
+            
+            PostSearchService.index_posts(new_posts)
+            LinkoGeneiService._apply_category_deltas(user_id, Counter(post.category for post in new_posts))
+            stat_deltas = Counter()
+            for post in new_posts:
+                stat_deltas.update(LinkoGeneiService._stat_deltas(post, 1))
+            LinkoGeneiService._apply_stat_deltas(user_id, stat_deltas)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to save post batch: {str(e)}")
+            return {'success': False, 'error': str(e)}
+        
+        post_metadata_enricher.enqueue(new_posts)
+        
+        # Repeats within the batch point at the post their first occurrence resolved to
+        for result in results:
+            if result['status'] == 'duplicate' and 'post_id' not in result:
+                result['post_id'] = results[first_seen[hashes[result['index']]]].get('post_id')
+        
+        statuses = Counter(result['status'] for result in results)
+        return {
+            'success': True,
+            'results': results,
+            'saved': statuses['saved'],
+            'duplicates': statuses['duplicate'],
+            'failed': statuses['error'],
+            'cursor': LinkoGeneiService.latest_cursor(user_id)
+        }
+    
+    @staticmethod
+    def _apply_category_deltas(user_id: str, deltas: Counter):
+        """Add post count deltas to many categories with one UPDATE, creating missing ones"""
+        if not deltas:
+            return
+        updated = SavedPostCategory.query.filter(
+            SavedPostCategory.user_id == user_id,
+            SavedPostCategory.name.in_(list(deltas))
+        ).update({
+            SavedPostCategory.post_count: db.func.coalesce(SavedPostCategory.post_count, 0) + case(
+                deltas, value=SavedPostCategory.name, else_=0
+            )
+        }, synchronize_session=False)
+        if updated == len(deltas):
+            return
+        
+        existing = {
+            name for (name,) in db.session.query(SavedPostCategory.name).filter(
+                SavedPostCategory.user_id == user_id, SavedPostCategory.name.in_(list(deltas))
+            )
+        }
+        for name in set(deltas) - existing:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(SavedPostCategory(user_id=user_id, name=name, color='#667eea', post_count=deltas[name]))
+            except IntegrityError:
+                SavedPostCategory.query.filter_by(user_id=user_id, name=name).update(
+                    {SavedPostCategory.post_count: SavedPostCategory.post_count + deltas[name]},
+                    synchronize_session=False
+                )
+    
+    @staticmethod
+    def encode_cursor(post: SavedPost) -> str:
+        return f'{post.created_at.isoformat()}|{post.id}'
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+        created_at, post_id = cursor.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), post_id
+    
+    @staticmethod
+    def latest_cursor(user_id: str) -> Optional[str]:
+        """Cursor positioned after the user's newest saved post"""
+        latest = SavedPost.query.with_entities(SavedPost.id, SavedPost.created_at).filter_by(
+            user_id=user_id
+        ).order_by(SavedPost.created_at.desc(), SavedPost.id.desc()).first()
+        return LinkoGeneiService.encode_cursor(latest) if latest else None
+    
+    @staticmethod
+    def get_changes(user_id: str, cursor: Optional[str] = None, limit: int = SYNC_PAGE_SIZE) -> Dict[str, Any]:
+        """
+        Posts saved after a sync cursor, oldest first
+        
+        Lets the extension learn which URLs are already saved (from the web
+        app or another browser) and drop them from its offline queue.
+        """
+        query = SavedPost.query.with_entities(SavedPost.id, SavedPost.url, SavedPost.created_at).filter(
+            SavedPost.user_id == user_id
+        )
+        if cursor:
+            created_at, post_id = LinkoGeneiService.decode_cursor(cursor)
+            query = query.filter(or_(
+                SavedPost.created_at > created_at,
+                and_(SavedPost.created_at == created_at, SavedPost.id > post_id)
+            ))
+        rows = query.order_by(SavedPost.created_at.asc(), SavedPost.id.asc()).limit(limit + 1).all()
+        page = rows[:limit]
+        return {
+            'success': True,
+            'posts': [{'id': row.id, 'url': row.url, 'created_at': row.created_at.isoformat()} for row in page],
+            'cursor': LinkoGeneiService.encode_cursor(page[-1]) if page else cursor,
+            'has_more': len(rows) > limit
+        }
+    
     @staticmethod
     def get_posts(
         user_id: str,
@@ -119,19 +350,13 @@ class LinkoGeneiService:
     ) -> Dict[str, Any]:
         """Get saved posts"""
         try:
-            query = SavedPost.query.filter_by(user_id=user_id)
-            
-            if category and category != 'all':
-                query = query.filter_by(category=category)
-            
-            if platform and platform != 'all':
-                query = query.filter_by(platform=platform)
+            query = LinkoGeneiService._posts_query(user_id, category, platform)
             
             # Get total count
             total = query.count()
             
             # Get posts with pagination
-            posts = query.order_by(SavedPost.created_at.desc()).offset(skip).limit(limit).all()
+            posts = query.order_by(SavedPost.created_at.desc(), SavedPost.id.desc()).offset(skip).limit(limit).all()
             
             return {
                 'success': True,
@@ -149,6 +374,46 @@ class LinkoGeneiService:
                 'posts': []
             }
     
+    @staticmethod
+    def _posts_query(user_id: str, category: Optional[str] = None, platform: Optional[str] = None):
+        query = SavedPost.query.filter_by(user_id=user_id)
+        
+        if category and category != 'all':
+            query = query.filter_by(category=category)
+        
+        if platform and platform != 'all':
+            query = query.filter_by(platform=platform)
+        
+        return query
+    
+    @staticmethod
+    def iter_posts(
+        user_id: str,
+        category: Optional[str] = None,
+        platform: Optional[str] = None,
+        batch_size: int = EXPORT_BATCH_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        """All matching posts, newest first, read through a server-side cursor batch_size rows at a time"""
+        query = LinkoGeneiService._posts_query(user_id, category, platform)
+        for post in query.order_by(SavedPost.created_at.desc(), SavedPost.id.desc()).yield_per(batch_size):
+            yield post.to_dict()
+    
+    @staticmethod
+    def search_posts(
+        user_id: str,
+        query: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Ranked full-text and tag search (see PostSearchService.search)"""
+        try:
+            return PostSearchService.search(user_id, query, tags, limit, cursor)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to search posts: {str(e)}")
+            return {'success': False, 'error': str(e), 'posts': []}
+    
     @staticmethod
     def get_post_by_id(user_id: str, post_id: str) -> Optional[Dict[str, Any]]:
         """Get a single post by ID"""
@@ -177,12 +442,19 @@ class LinkoGeneiService:
             if 'notes' in update_data:
                 post.notes = update_data['notes']
             if 'tags' in update_data:
-                post.tags = json.dumps(update_data['tags'])
+                post.tags = json.dumps(normalize_tags(update_data['tags']))
             if 'title' in update_data:
                 post.title = update_data['title']
             
             post.updated_at = datetime.now(timezone.utc)
-            
+            if update_data.keys() & {'notes', 'tags', 'title'}:
+                PostSearchService.index_posts([post])
+            
+            if post.category != old_category:
+                LinkoGeneiService._apply_stat_deltas(user_id, Counter({
+                    ('category', old_category): -1,
+                    ('category', post.category): 1
+                }))
             db.session.commit()
             
             # Update category counts if category changed
@@ -208,7 +480,9 @@ class LinkoGeneiService:
             
             category = post.category
             
+            PostSearchService.remove_posts([post.id])
             db.session.delete(post)
+            LinkoGeneiService._apply_stat_deltas(user_id, LinkoGeneiService._stat_deltas(post, -1))
             db.session.commit()
             
             # Update category count
@@ -262,33 +536,32 @@ class LinkoGeneiService:
     
     @staticmethod
     def get_stats(user_id: str) -> Dict[str, Any]:
-        """Get statistics"""
+        """Get statistics from the user's maintained counters (built on first read)"""
         try:
-            total_posts = SavedPost.query.filter_by(user_id=user_id).count()
-            
-            # Get posts by platform
-            platforms = db.session.query(
-                SavedPost.platform,
-                db.func.count(SavedPost.id)
-            ).filter_by(user_id=user_id).group_by(SavedPost.platform).all()
-            
-            # Get posts by category
-            categories = db.session.query(
-                SavedPost.category,
-                db.func.count(SavedPost.id)
-            ).filter_by(user_id=user_id).group_by(SavedPost.category).all()
-            
+            rows = SavedPostStat.query.filter_by(user_id=user_id).all()
+            counts = Counter({(row.dimension, row.name): row.count for row in rows})
+            if STAT_TOTAL not in counts:
+                counts = LinkoGeneiService.rebuild_stats(user_id)
+                try:
+                    db.session.commit()
+                except IntegrityError:
+                    # Another request built them first
+                    db.session.rollback()
+            
+            platforms = {name: count for (dimension, name), count in counts.items() if dimension == 'platform' and count > 0}
+            categories = {name: count for (dimension, name), count in counts.items() if dimension == 'category' and count > 0}
             return {
                 'success': True,
                 'stats': {
-                    'total_posts': total_posts,
+                    'total_posts': counts[STAT_TOTAL],
                     'total_categories': len(categories),
-                    'platforms': {p[0]: p[1] for p in platforms},
-                    'categories': {c[0]: c[1] for c in categories}
+                    'platforms': platforms,
+                    'categories': categories
                 }
             }
             
         except Exception as e:
+            db.session.rollback()
             logger.error(f"Failed to get stats: {str(e)}")
             return {
                 'success': False,
@@ -296,6 +569,150 @@ class LinkoGeneiService:
                 'stats': {}
             }
     
+    @staticmethod
+    def _stat_deltas(post: SavedPost, sign: int) -> Counter:
+        return Counter({
+            STAT_TOTAL: sign,
+            ('platform', post.platform or 'Unknown'): sign,
+            ('category', post.category or 'Uncategorized'): sign
+        })
+    
+    @staticmethod
+    def _apply_stat_deltas(user_id: str, deltas: Counter):
+        """Stage counter changes on the session (the caller commits)
+        
+        Users without counters yet are skipped; their counters are built from
+        their posts on the next read.
+        """
+        deltas = {key: value for key, value in deltas.items() if value}
+        if not deltas or not SavedPostStat.query.filter_by(
+            user_id=user_id, dimension=STAT_TOTAL[0], name=STAT_TOTAL[1]
+        ).count():
+            return
+        
+        for (dimension, name), value in deltas.items():
+            increment = {SavedPostStat.count: SavedPostStat.count + value}
+            updated = SavedPostStat.query.filter_by(
+                user_id=user_id, dimension=dimension, name=name
+            ).update(increment, synchronize_session=False)
+            if updated:
+                continue
+            try:
+                with db.session.begin_nested():
+                    db.session.add(SavedPostStat(user_id=user_id, dimension=dimension, name=name, count=value))
+            except IntegrityError:
+                SavedPostStat.query.filter_by(
+                    user_id=user_id, dimension=dimension, name=name
+                ).update(increment, synchronize_session=False)
+    
+    @staticmethod
+    def rebuild_stats(user_id: str) -> Counter:
+        """Recompute a user's counters from their posts in one grouped scan (the caller commits)"""
+        counts = Counter({STAT_TOTAL: 0})
+        rows = db.session.query(
+            SavedPost.platform, SavedPost.category, db.func.count(SavedPost.id)
+        ).filter_by(user_id=user_id).group_by(SavedPost.platform, SavedPost.category)
+        for platform, category, count in rows:
+            counts[STAT_TOTAL] += count
+            counts[('platform', platform or 'Unknown')] += count
+            counts[('category', category or 'Uncategorized')] += count
+        
+        SavedPostStat.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+        db.session.add_all([
+            SavedPostStat(user_id=user_id, dimension=dimension, name=name, count=count)
+            for (dimension, name), count in counts.items()
+        ])
+        return counts
+    
+    @staticmethod
+    def reconcile_stats(user_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        Rebuild counters and category post counts that drifted from the posts
+        
+        Checks one user, or every user with posts or counters; commits per user.
+        """
+        if user_id:
+            user_ids = [user_id]
+        else:
+            user_ids = sorted(
+                {row[0] for row in db.session.query(SavedPost.user_id).distinct()} |
+                {row[0] for row in db.session.query(SavedPostStat.user_id).distinct()}
+            )
+        
+        result = {'users': len(user_ids), 'repaired': 0, 'categories_repaired': 0}
+        for current_user_id in user_ids:
+            stored = Counter({
+                (row.dimension, row.name): row.count
+                for row in SavedPostStat.query.filter_by(user_id=current_user_id)
+            })
+            counts = LinkoGeneiService.rebuild_stats(current_user_id)
+            if +stored != +counts or STAT_TOTAL not in stored:
+                result['repaired'] += 1
+            
+            for category in SavedPostCategory.query.filter_by(user_id=current_user_id):
+                expected = counts[('category', category.name)]
+                if category.post_count != expected:
+                    category.post_count = expected
+                    result['categories_repaired'] += 1
+            db.session.commit()
+        
+        logger.info(f"Reconciled LinkoGenei stats: {result}")
+        return result
+    
+    @staticmethod
+    def backfill_url_hashes(user_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        Set url_hash on posts that predate it, merging posts that share a canonical URL
+        
+        Within each group the oldest post is kept and absorbs the others'
+        notes, tags and missing title/image; the rest are deleted. Commits
+        per user and recounts the user's stats when posts were merged.
+        """
+        if user_id:
+            user_ids = [user_id]
+        else:
+            user_ids = sorted({row[0] for row in db.session.query(SavedPost.user_id).distinct()})
+        
+        result = {'users': len(user_ids), 'hashed': 0, 'merged': 0}
+        for current_user_id in user_ids:
+            groups = {}
+            for post in SavedPost.query.filter_by(user_id=current_user_id).order_by(
+                SavedPost.created_at.asc(), SavedPost.id.asc()
+            ):
+                groups.setdefault(url_hash(post.url), []).append(post)
+            
+            changed, merged = [], []
+            for key, (keeper, *duplicates) in groups.items():
+                if duplicates:
+                    fields = merge_duplicate_posts(
+                        keeper.to_dict(),
+                        [duplicate.to_dict() for duplicate in duplicates]
+                    )
+                    keeper.title, keeper.image_url, keeper.notes = fields['title'], fields['image_url'], fields['notes']
+                    keeper.tags = json.dumps(normalize_tags(fields['tags']))
+                    merged += duplicates
+                if keeper.url_hash != key or duplicates:
+                    changed.append((keeper, key))
+            
+            if merged:
+                PostSearchService.remove_posts([post.id for post in merged])
+                for post in merged:
+                    db.session.delete(post)
+                # Free the hashes before the keepers take them
+                db.session.flush()
+            for keeper, key in changed:
+                keeper.url_hash = key
+            PostSearchService.index_posts([keeper for keeper, _ in changed])
+            db.session.commit()
+            
+            result['hashed'] += len(changed)
+            result['merged'] += len(merged)
+            if merged:
+                LinkoGeneiService.reconcile_stats(current_user_id)
+        
+        logger.info(f"Backfilled saved post URL hashes: {result}")
+        return result
+    
     @staticmethod
     def _update_category_count(user_id: str, category_name: str):
         """Update post count for a category"""
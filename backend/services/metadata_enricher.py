@@ -0,0 +1,221 @@
+"""Metadata Enricher - Fills in missing titles and images of saved posts from the pages they link to"""
+
+from flask import current_app, has_app_context
+from concurrent.futures import ThreadPoolExecutor
+from models import db, SavedPost, UrlMetadata
+from services.url_service import url_service
+from services.post_search_service import PostSearchService
+from utils.canonical_url import canonicalize_url, url_hash
+from sqlalchemy import bindparam, case, or_
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PostMetadataEnricher:
+    """
+    Background worker that fetches og:title/og:image/description for new saves
+
+    Saved posts are queued after their save commits. One worker thread takes
+    them off the queue in batches, looks their canonical URLs up in the
+    shared url_metadata cache, fetches the misses on a bounded pool and
+    fills the posts' empty title/image with one UPDATE per batch. Fields the
+    user already set are never overwritten. When the queue is full, posts
+    are skipped; enrich_saved_posts.py picks them up later.
+    """
+
+    BATCH_SIZE = 20
+    FLUSH_INTERVAL = 2.0  # seconds to wait for a batch to fill
+    MAX_QUEUE_SIZE = 1000
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=self.MAX_QUEUE_SIZE)
+        self._executor = None
+        self._worker = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _config(key: str, default):
+        if has_app_context():
+            return current_app.config.get(key, default)
+        return default
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=max(int(self._config('POST_ENRICHMENT_CONCURRENCY', 4)), 1),
+                        thread_name_prefix='metadata-fetch'
+                    )
+        return self._executor
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, args=(current_app._get_current_object(),),
+                    name='metadata-enricher', daemon=True
+                )
+                self._worker.start()
+
+    def enqueue(self, posts: List[SavedPost]):
+        """Queue committed posts that lack a title or image (call inside the app context)"""
+        jobs = [(post.id, post.url) for post in posts if not post.title or not post.image_url]
+        if not jobs or not self._config('POST_ENRICHMENT_ENABLED', True):
+            return
+        if not self._config('POST_ENRICHMENT_ASYNC', True):
+            try:
+                self.enrich(jobs)
+            except Exception as e:
+                # The posts are saved either way
+                db.session.rollback()
+                logger.error(f"Metadata enrichment failed for {len(jobs)} posts: {str(e)}")
+            return
+
+        self._ensure_worker()
+        for index, job in enumerate(jobs):
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                logger.warning(f"Metadata enrichment queue full; skipped {len(jobs) - index} posts")
+                break
+
+    def _run(self, app):
+        while True:
+            jobs = [self._queue.get()]
+            deadline = time.monotonic() + self.FLUSH_INTERVAL
+            while len(jobs) < self.BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    jobs.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            with app.app_context():
+                try:
+                    self.enrich(jobs)
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Metadata enrichment failed for {len(jobs)} posts: {str(e)}")
+                finally:
+                    db.session.remove()
+
+    def enrich(self, jobs: List[Tuple[str, str]]) -> Dict[str, int]:
+        """
+        Enrich (post_id, url) pairs now and commit
+
+        Returns:
+            {'posts': n, 'cache_hits': n, 'fetched': n, 'updated': n}
+        """
+        keys = {post_id: url_hash(url) for post_id, url in jobs}
+        # Pages are fetched as saved (the canonical form assumes https), once per canonical URL
+        urls = {}
+        for _, url in jobs:
+            urls.setdefault(url_hash(url), url)
+
+        metadata = self._cached(list(urls))
+        missing = {key: url for key, url in urls.items() if key not in metadata}
+        if missing:
+            fetched = self._fetch(missing)
+            self._store(fetched)
+            metadata.update(fetched)
+
+        updates = {
+            post_id: metadata[key] for post_id, key in keys.items()
+            if key in metadata and metadata[key]['status'] == 'ok'
+        }
+        updated = self._write_back(updates)
+        db.session.commit()
+
+        result = {'posts': len(jobs), 'cache_hits': len(urls) - len(missing), 'fetched': len(missing), 'updated': updated}
+        logger.info(f"Enriched saved posts: {result}")
+        return result
+
+    def _cached(self, keys: List[str]) -> Dict[str, Dict]:
+        """Fresh cache entries by url hash; failed fetches count as fresh until their retry time"""
+        now = datetime.now(timezone.utc)
+        ok_after = now - timedelta(seconds=int(self._config('URL_METADATA_TTL', 7 * 86400)))
+        failed_after = now - timedelta(seconds=int(self._config('URL_METADATA_RETRY_AFTER', 3600)))
+        rows = UrlMetadata.query.filter(UrlMetadata.url_hash.in_(keys)).all()
+        cached = {}
+        for row in rows:
+            fetched_at = row.fetched_at
+            if fetched_at.tzinfo is None:
+                fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+            if fetched_at > (ok_after if row.status == 'ok' else failed_after):
+                cached[row.url_hash] = {**row.to_dict(), 'url_hash': row.url_hash}
+        return cached
+
+    def _fetch(self, urls: Dict[str, str]) -> Dict[str, Dict]:
+        """Fetch pages on the bounded pool; returns cache entries by url hash"""
+        keys = list(urls)
+        results = self._get_executor().map(url_service.extract_metadata, [urls[key] for key in keys])
+        fetched = {}
+        for key, result in zip(keys, results):
+            fetched[key] = {
+                'url_hash': key,
+                'url': canonicalize_url(urls[key])[:500],
+                'title': (result.get('title') or '')[:500],
+                'description': result.get('description') or '',
+                'image_url': (result.get('image_url') or '')[:500],
+                'status': 'ok' if result.get('success') else 'failed'
+            }
+        return fetched
+
+    def _store(self, entries: Dict[str, Dict]):
+        now = datetime.now(timezone.utc)
+        for key, entry in entries.items():
+            values = {field: entry[field] for field in ('url', 'title', 'description', 'image_url', 'status')}
+            updated = UrlMetadata.query.filter_by(url_hash=key).update(
+                {**values, 'fetched_at': now}, synchronize_session=False
+            )
+            if updated:
+                continue
+            try:
+                with db.session.begin_nested():
+                    db.session.add(UrlMetadata(url_hash=key, fetched_at=now, **values))
+            except IntegrityError:
+                # Another worker cached it first; theirs is as fresh as ours
+                pass
+
+    @staticmethod
+    def _write_back(updates: Dict[str, Dict]) -> int:
+        """Fill empty titles/images of many posts with one executemany UPDATE (the caller commits)"""
+        updates = {post_id: entry for post_id, entry in updates.items() if entry['title'] or entry['image_url']}
+        if not updates:
+            return 0
+
+        table = SavedPost.__table__
+        blank_title = or_(table.c.title.is_(None), table.c.title == '')
+        blank_image = or_(table.c.image_url.is_(None), table.c.image_url == '')
+        statement = table.update().where(
+            table.c.id == bindparam('post_id'),
+            or_(blank_title, blank_image)
+        ).values(
+            title=case((blank_title, bindparam('new_title')), else_=table.c.title),
+            image_url=case((blank_image, bindparam('new_image_url')), else_=table.c.image_url)
+        )
+        db.session.execute(statement, [
+            {'post_id': post_id, 'new_title': entry['title'], 'new_image_url': entry['image_url']}
+            for post_id, entry in updates.items()
+        ])
+
+        # Titles are searchable, so reindex what changed
+        posts = SavedPost.query.filter(SavedPost.id.in_(list(updates))).execution_options(populate_existing=True).all()
+        PostSearchService.index_posts(posts)
+        return len(posts)
+
+
+# Global instance
+post_metadata_enricher = PostMetadataEnricher()
@@ -0,0 +1,273 @@
+"""Model Router - Picks the Groq model, reasoning effort and token budget for each generation"""
+
+from flask import current_app, has_app_context
+from collections import deque
+from typing import Dict, List, Any, Optional
+import threading
+import random
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Output tokens per requested word, used to size budgets from word_count
+TOKENS_PER_WORD = 1.5
+
+# Routes are matched top to bottom; the first one whose content_types, tiers and
+# max_word_count all match is used. `traffic` optionally splits a route across
+# several models by weight so operators can shift load gradually.
+DEFAULT_ROUTES: List[Dict[str, Any]] = [
+    {
+        'name': 'chat',
+        'content_types': ['chat'],
+        'model': 'openai/gpt-oss-20b',
+        'reasoning_effort': 'low',
+        'max_tokens': 1024,
+    },
+    {
+        'name': 'chat-summary',
+        'content_types': ['chat-summary'],
+        'model': 'openai/gpt-oss-20b',
+        'reasoning_effort': 'low',
+        'max_tokens': 600,
+    },
+    {
+        'name': 'short-form',
+        'content_types': ['caption', 'social-post', 'ad-copy'],
+        'model': 'openai/gpt-oss-20b',
+        'reasoning_effort': 'low',
+        'max_tokens': 2048,
+    },
+    {
+        'name': 'short-request',
+        'content_types': '*',
+        'max_word_count': 300,
+        'model': 'openai/gpt-oss-20b',
+        'reasoning_effort': 'low',
+        'max_tokens': 2048,
+    },
+    {
+        'name': 'long-form-premium',
+        'content_types': '*',
+        'tiers': ['premium'],
+        'model': 'openai/gpt-oss-120b',
+        'reasoning_effort': 'medium',
+        'max_tokens': 16000,
+    },
+    {
+        'name': 'long-form',
+        'content_types': '*',
+        'model': 'openai/gpt-oss-120b',
+        'reasoning_effort': 'medium',
+        'max_tokens': 8000,
+    },
+]
+
+# Fields operators may change at runtime through the admin API
+MUTABLE_ROUTE_FIELDS = ('model', 'reasoning_effort', 'max_tokens', 'traffic')
+
+# Number of recent latencies kept per (route, model) for percentiles
+LATENCY_WINDOW = 200
+
+REASONING_EFFORTS = ('low', 'medium', 'high')
+
+# Upper bound on a route's completion budget
+MAX_ROUTE_TOKENS = 65536
+
+
+def _check_route_field(field: str, value: Any):
+    """Raise ValueError when a route field has the wrong type or range (None clears traffic)"""
+    if field == 'model':
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError('model must be a non-empty string')
+    elif field == 'reasoning_effort':
+        if value is not None and value not in REASONING_EFFORTS:
+            raise ValueError(f"reasoning_effort must be one of: {', '.join(REASONING_EFFORTS)}")
+    elif field == 'max_tokens':
+        if isinstance(value, bool) or not isinstance(value, int) or not 0 < value <= MAX_ROUTE_TOKENS:
+            raise ValueError(f'max_tokens must be an integer between 1 and {MAX_ROUTE_TOKENS}')
+    elif field == 'traffic':
+        if value is None:
+            return
+        if not isinstance(value, dict) or not value or any(
+                not isinstance(model, str) or not model.strip() or isinstance(weight, bool)
+                or not isinstance(weight, (int, float)) or weight < 0
+                for model, weight in value.items()):
+            raise ValueError('traffic must map model names to non-negative weights')
+        if not sum(value.values()) > 0:
+            raise ValueError('traffic needs at least one model with a positive weight')
+
+
+def validate_route(route: Any) -> Dict[str, Any]:
+    """Check a configured route; raises ValueError naming the problem"""
+    if not isinstance(route, dict):
+        raise ValueError('each route must be an object')
+    if not isinstance(route.get('name'), str) or not route['name'].strip():
+        raise ValueError(f'route without a name: {route!r}')
+    for field in ('model', 'max_tokens'):
+        if field not in route:
+            raise ValueError(f"route {route['name']} has no {field}")
+    for field in MUTABLE_ROUTE_FIELDS:
+        if field in route:
+            try:
+                _check_route_field(field, route[field])
+            except ValueError as e:
+                raise ValueError(f"route {route['name']}: {str(e)}")
+    return dict(route)
+
+
+class ModelRouter:
+    """Routes generation requests to a model configuration and tracks observed performance"""
+
+    def __init__(self):
+        self._routes = None
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _load_routes(self) -> List[Dict[str, Any]]:
+        """Load the route table from AI_MODEL_ROUTES (JSON) or fall back to the defaults"""
+        if has_app_context():
+            raw = current_app.config.get('AI_MODEL_ROUTES')
+        else:
+            raw = os.environ.get('AI_MODEL_ROUTES')
+
+        if raw:
+            try:
+                routes = json.loads(raw) if isinstance(raw, str) else raw
+                if not isinstance(routes, list) or not routes:
+                    raise ValueError('expected a non-empty list of routes')
+                routes = [validate_route(route) for route in routes]
+                logger.info(f'Loaded {len(routes)} AI model routes from configuration')
+                return routes
+            except (ValueError, TypeError) as e:
+                logger.error(f'Invalid AI_MODEL_ROUTES, using defaults: {str(e)}')
+
+        return [dict(route) for route in DEFAULT_ROUTES]
+
+    @property
+    def routes(self) -> List[Dict[str, Any]]:
+        if self._routes is None:
+            with self._lock:
+                if self._routes is None:
+                    self._routes = self._load_routes()
+        return self._routes
+
+    def select(self, content_type: str, word_count: Optional[Any] = None, tier: str = 'free') -> Dict[str, Any]:
+        """
+        Pick the model configuration for a request
+
+        Returns:
+            Dict with route name, model, reasoning_effort and max_tokens
+        """
+        try:
+            words = int(word_count) if word_count else None
+        except (TypeError, ValueError):
+            words = None
+
+        route = self._match(content_type, words, tier)
+
+        max_tokens = route['max_tokens']
+        if words:
+            # Leave headroom for reasoning tokens, which count against the completion budget
+            headroom = 256 if route.get('reasoning_effort') == 'low' else 1024
+            max_tokens = min(max_tokens, int(words * TOKENS_PER_WORD) + headroom)
+
+        return {
+            'route': route['name'],
+            'model': self._pick_model(route),
+            'reasoning_effort': route.get('reasoning_effort'),
+            'max_tokens': max_tokens
+        }
+
+    def _match(self, content_type: str, words: Optional[int], tier: str) -> Dict[str, Any]:
+        for route in self.routes:
+            content_types = route.get('content_types', '*')
+            if content_types != '*' and content_type not in content_types:
+                continue
+            tiers = route.get('tiers', '*')
+            if tiers != '*' and tier not in tiers:
+                continue
+            max_word_count = route.get('max_word_count')
+            if max_word_count is not None and (words is None or words > max_word_count):
+                continue
+            return route
+        return self.routes[-1]
+
+    @staticmethod
+    def _pick_model(route: Dict[str, Any]) -> str:
+        traffic = route.get('traffic')
+        if not traffic:
+            return route['model']
+        models = list(traffic.keys())
+        return random.choices(models, weights=[traffic[m] for m in models])[0]
+
+    def update_route(self, name: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Change a route at runtime (model, reasoning_effort, max_tokens or traffic split)
+
+        Changes are held in process memory; set AI_MODEL_ROUTES to make them permanent.
+        Raises ValueError (and changes nothing) when a value has the wrong type or range.
+        """
+        for field in MUTABLE_ROUTE_FIELDS:
+            if field in changes:
+                _check_route_field(field, changes[field])
+
+        routes = self.routes  # load outside the lock; the loader takes it too
+        with self._lock:
+            for route in routes:
+                if route['name'] == name:
+                    for field in MUTABLE_ROUTE_FIELDS:
+                        if field in changes:
+                            if changes[field] is not None:
+                                route[field] = changes[field]
+                            elif field == 'traffic':
+                                route.pop(field, None)
+                    logger.info(f'AI model route {name} updated: {changes}')
+                    return dict(route)
+        return None
+
+    def record(self, route: str, model: str, latency: float, output_tokens: int, success: bool = True):
+        """Record the observed latency and output tokens of a generation"""
+        with self._lock:
+            stats = self._stats.get((route, model))
+            if stats is None:
+                stats = {
+                    'requests': 0,
+                    'errors': 0,
+                    'total_latency': 0.0,
+                    'total_output_tokens': 0,
+                    'latencies': deque(maxlen=LATENCY_WINDOW)
+                }
+                self._stats[(route, model)] = stats
+
+            stats['requests'] += 1
+            if not success:
+                stats['errors'] += 1
+                return
+            stats['total_latency'] += latency
+            stats['total_output_tokens'] += output_tokens
+            stats['latencies'].append(latency)
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """Observed performance per (route, model)"""
+        with self._lock:
+            results = []
+            for (route, model), stats in self._stats.items():
+                successes = stats['requests'] - stats['errors']
+                latencies = sorted(stats['latencies'])
+                results.append({
+                    'route': route,
+                    'model': model,
+                    'requests': stats['requests'],
+                    'errors': stats['errors'],
+                    'avg_latency': round(stats['total_latency'] / successes, 3) if successes else None,
+                    'p95_latency': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3) if latencies else None,
+                    'avg_output_tokens': round(stats['total_output_tokens'] / successes) if successes else None,
+                    'tokens_per_second': round(stats['total_output_tokens'] / stats['total_latency'], 1) if stats['total_latency'] else None
+                })
+            return results
+
+
+# Global instance
+model_router = ModelRouter()
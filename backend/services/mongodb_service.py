@@ -1,228 +1,234 @@
 """MongoDB Service for LinkoGenei - Handles saved posts storage"""
 
-from pymongo import MongoClient, ASCENDING, DESCENDING
-from pymongo.errors import ConnectionFailure, DuplicateKeyError
-from datetime import datetime
-from typing import Dict, List, Any, Optional
+from pymongo import MongoClient, ASCENDING, DESCENDING, TEXT, ReturnDocument
+from pymongo.errors import ConnectionFailure, DuplicateKeyError, BulkWriteError
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Iterator
+from collections import Counter
+from services.event_bus import event_bus, user_channel
+from services.document_store import DocumentStore
+from services.extension_token_cache import extension_token_cache
+from utils.canonical_url import url_hash, merge_duplicate_posts
+from utils.search import (
+    FIELD_WEIGHTS, SEARCH_PAGE_SIZE, url_host, normalize_tags, search_terms,
+    encode_search_cursor, decode_search_cursor
+)
 import os
+import re
+import threading
+import time
 import logging
 
 # Enable logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-class MockCollection:
-    """Mock collection for when MongoDB is unavailable"""
-    def __init__(self, name):
-        self.name = name
-        self._counter = 0
-        self._data = {}  # Store data in memory
-    
-    def insert_one(self, document):
-        from bson.objectid import ObjectId
-        self._counter += 1
-        doc_id = ObjectId()
-        self._data[str(doc_id)] = {**document, '_id': doc_id}
-        class MockResult:
-            inserted_id = doc_id
-        return MockResult()
-    
-    def find_one(self, query):
-        # Simple query matching for token verification
-        if 'token' in query:
-            for doc in self._data.values():
-                if doc.get('token') == query['token']:
-                    return doc
-        if '_id' in query:
-            return self._data.get(str(query['_id']))
-        return None
-    
-    def find(self, query=None):
-        """Return a MockCursor that supports chaining"""
-        if query is None:
-            results = list(self._data.values())
-        else:
-            # Simple filtering
-            results = []
-            for doc in self._data.values():
-                match = True
-                for key, value in query.items():
-                    if doc.get(key) != value:
-                        match = False
-                        break
-                if match:
-                    results.append(doc)
-        return MockCursor(results)
-    
-    def update_one(self, query, update, upsert=False):
-        # Find document
-        doc = self.find_one(query)
-        if doc:
-            # Update existing
-            if '$set' in update:
-                doc.update(update['$set'])
-            if '$inc' in update:
-                for key, value in update['$inc'].items():
-                    doc[key] = doc.get(key, 0) + value
-            class MockResult:
-                modified_count = 1
-            return MockResult()
-        elif upsert:
-            # Insert new
-            new_doc = {}
-            if '$set' in update:
-                new_doc.update(update['$set'])
-            if '$setOnInsert' in update:
-                new_doc.update(update['$setOnInsert'])
-            self.insert_one(new_doc)
-            class MockResult:
-                modified_count = 1
-            return MockResult()
-        else:
-            class MockResult:
-                modified_count = 0
-            return MockResult()
-    
-    def delete_one(self, query):
-        doc = self.find_one(query)
-        if doc:
-            del self._data[str(doc['_id'])]
-            class MockResult:
-                deleted_count = 1
-            return MockResult()
-        class MockResult:
-            deleted_count = 0
-        return MockResult()
-    
-    def delete_many(self, query):
-        docs = list(self.find(query))
-        count = 0
-        for doc in docs:
-            del self._data[str(doc['_id'])]
-            count += 1
-        class MockResult:
-            deleted_count = count
-        return MockResult()
-    
-    def count_documents(self, query):
-        return len(list(self.find(query)))
-    
-    def create_index(self, *args, **kwargs):
-        pass
-    
-    def aggregate(self, pipeline):
-        return []
+# Notification types whose unread notifications collapse per (user, type, project/link)
+COALESCED_NOTIFICATION_TYPES = ('project_chat', 'daily_update')
 
+# Read notifications are removed by a TTL index this long after they were read
+NOTIFICATION_READ_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_READ_RETENTION_DAYS') or 30)
 
-class MockCursor:
-    """Mock cursor that supports MongoDB cursor methods"""
-    def __init__(self, results):
-        self._results = results
-        self._sort_key = None
-        self._sort_direction = None
-        self._skip_count = 0
-        self._limit_count = None
-    
-    def sort(self, key, direction=1):
-        """Sort results by key and direction"""
-        self._sort_key = key
-        self._sort_direction = direction
-        return self
-    
-    def skip(self, count):
-        """Skip first N results"""
-        self._skip_count = count
-        return self
-    
-    def limit(self, count):
-        """Limit results to N items"""
-        self._limit_count = count
-        return self
-    
-    def __iter__(self):
-        """Make cursor iterable"""
-        results = self._results.copy()
-        
-        # Apply sorting
-        if self._sort_key:
-            reverse = (self._sort_direction == -1)
-            try:
-                results.sort(key=lambda x: x.get(self._sort_key, ''), reverse=reverse)
-            except Exception:
-                pass  # If sorting fails, return unsorted
-        
-        # Apply skip
-        if self._skip_count:
-            results = results[self._skip_count:]
-        
-        # Apply limit
-        if self._limit_count:
-            results = results[:self._limit_count]
-        
-        return iter(results)
+# Saved post fields update_post may change
+EDITABLE_POST_FIELDS = ('category', 'notes', 'tags', 'title')
+
+# Posts per page of the extension's sync feed (same as the SQL backend)
+SYNC_PAGE_SIZE = 200
+
+# Documents fetched per round trip when streaming exports
+EXPORT_BATCH_SIZE = 500
+
+MONGODB_DB_NAME = os.environ.get('MONGODB_DB_NAME', 'linkogenei')
+
+# Connection pool per worker process; waitQueueTimeoutMS bounds how long a request waits for a free connection
+MONGODB_MAX_POOL_SIZE = int(os.environ.get('MONGODB_MAX_POOL_SIZE') or 50)
+MONGODB_MIN_POOL_SIZE = int(os.environ.get('MONGODB_MIN_POOL_SIZE') or 0)
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGODB_WAIT_QUEUE_TIMEOUT_MS') or 2000)
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGODB_SERVER_SELECTION_TIMEOUT_MS') or 3000)
+
+# Seconds between reconnection attempts while on the embedded store (doubles up to the max; 0 disables)
+MONGODB_RECONNECT_INTERVAL = float(os.environ.get('MONGODB_RECONNECT_INTERVAL') or 15)
+MONGODB_RECONNECT_MAX_INTERVAL = float(os.environ.get('MONGODB_RECONNECT_MAX_INTERVAL') or 300)
+
+# Embedded store used when no MongoDB server is reachable
+DEFAULT_DOCUMENT_STORE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'linkogenei_documents.db'
+)
+
+def _stats_key(name: str) -> str:
+    """Platform/category name as a field name ('.' and '$' are not allowed in field paths)"""
+    return str(name).replace('$', '\uff04').replace('.', '\uff0e')
+
+
+def _decode_stats_key(key: str) -> str:
+    return key.replace('\uff04', '$').replace('\uff0e', '.')
 
-class MockDatabase:
-    """Mock database for when MongoDB is unavailable"""
-    def __init__(self):
-        self._collections = {}
-    
-    def __getitem__(self, name):
-        if name not in self._collections:
-            self._collections[name] = MockCollection(name)
-        return self._collections[name]
 
 class MongoDBService:
-    """Service for managing saved posts in MongoDB"""
+    """Service for managing saved posts in MongoDB
+
+    The connection is opened on first use rather than at import, so worker
+    startup never waits on MongoDB. If the server is unreachable the service
+    serves from the embedded document store and a background thread keeps
+    retrying; once MongoDB answers, new requests go to it.
+    """
     
-    def __init__(self):
+    def __init__(self, database=None):
+        """database: serve from this pymongo Database or DocumentStore instead of connecting (tests, benchmarks)"""
         self.client = None
-        self.db = None
-        self.posts_collection = None
-        self.categories_collection = None
-        self.chat_conversations_collection = None
-        self.chat_messages_collection = None
-        self.notifications_collection = None
-        self._connect()
+        self._db = None
+        self._embedded_store = None
+        self._lock = threading.RLock()
+        self._reconnect_thread = None
+        self._health = {
+            'backend': None,
+            'connected': False,
+            'last_error': None,
+            'last_attempt_at': None,
+            'connected_at': None,
+            'reconnect_attempts': 0
+        }
+        if database is not None:
+            self._db = database
+            self._create_indexes()
+            self._health['backend'] = 'embedded' if isinstance(database, DocumentStore) else 'mongodb'
+    
+    @property
+    def db(self):
+        if self._db is None:
+            self._connect()
+        return self._db
+    
+    @property
+    def posts_collection(self):
+        return self.db['saved_posts']
+    
+    @property
+    def categories_collection(self):
+        return self.db['categories']
+    
+    @property
+    def chat_conversations_collection(self):
+        return self.db['chat_conversations']
+    
+    @property
+    def chat_messages_collection(self):
+        return self.db['chat_messages']
+    
+    @property
+    def notifications_collection(self):
+        return self.db['notifications']
+    
+    @property
+    def notification_counters_collection(self):
+        return self.db['notification_counters']
+    
+    @property
+    def extension_tokens_collection(self):
+        return self.db['extension_tokens']
+    
+    @property
+    def post_stats_collection(self):
+        return self.db['post_stats']
     
     def _connect(self):
-        """Connect to MongoDB with logging"""
+        """Connect to MongoDB on first use, falling back to the embedded store"""
+        with self._lock:
+            if self._db is not None:
+                return
+            try:
+                self._use_client(self._open_client())
+            except Exception as e:
+                logger.warning(f'⚠️ MongoDB unavailable: {str(e)}')
+                self._health['last_error'] = str(e)
+                self._use_embedded_store()
+                self._start_reconnect()
+    
+    def _open_client(self) -> MongoClient:
+        """Create a pooled client and check the server answers"""
+        mongo_uri = os.environ.get('MONGODB_URI', 'mongodb://localhost:27017/')
+        logger.info(f'Connecting to MongoDB: {MONGODB_DB_NAME}...')
+        self._health['last_attempt_at'] = datetime.utcnow().isoformat()
+        
+        client = MongoClient(
+            mongo_uri,
+            maxPoolSize=MONGODB_MAX_POOL_SIZE,
+            minPoolSize=MONGODB_MIN_POOL_SIZE,
+            waitQueueTimeoutMS=MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+            serverSelectionTimeoutMS=MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            connectTimeoutMS=3000,
+            socketTimeoutMS=3000,
+            connect=False
+        )
         try:
-            mongo_uri = os.environ.get('MONGODB_URI', 'mongodb://localhost:27017/')
-            db_name = os.environ.get('MONGODB_DB_NAME', 'linkogenei')
-            
-            logger.info(f'Connecting to MongoDB: {db_name}...')
-            
-            self.client = MongoClient(
-                mongo_uri,
-                serverSelectionTimeoutMS=3000,
-                connectTimeoutMS=3000,
-                socketTimeoutMS=3000
-            )
-            
-            self.client.admin.command('ping')
-            
-            self.db = self.client[db_name]
-            self.posts_collection = self.db['saved_posts']
-            self.categories_collection = self.db['categories']
-            self.chat_conversations_collection = self.db['chat_conversations']
-            self.chat_messages_collection = self.db['chat_messages']
-            self.notifications_collection = self.db['notifications']
-            
-            self._create_indexes()
-            
-            logger.info('✅ MongoDB connected successfully')
-            
-        except Exception as e:
-            logger.warning(f'⚠️ MongoDB unavailable: {str(e)}')
-            logger.info('Using in-memory mock database (data will not persist)')
-            
-            # Use mock database
-            self.db = MockDatabase()
-            self.posts_collection = self.db['saved_posts']
-            self.categories_collection = self.db['categories']
-            self.chat_conversations_collection = self.db['chat_conversations']
-            self.chat_messages_collection = self.db['chat_messages']
-            self.notifications_collection = self.db['notifications']
+            client.admin.command('ping')
+        except Exception:
+            client.close()
+            raise
+        return client
+    
+    def _use_client(self, client: MongoClient):
+        self.client = client
+        self._db = client[MONGODB_DB_NAME]
+        self._create_indexes()
+        self._health.update({
+            'backend': 'mongodb',
+            'connected': True,
+            'last_error': None,
+            'connected_at': datetime.utcnow().isoformat()
+        })
+        logger.info('✅ MongoDB connected successfully')
+    
+    def _use_embedded_store(self):
+        # Use the embedded document store, indexed like the real collections
+        if self._embedded_store is None:
+            store_path = os.environ.get('DOCUMENT_STORE_PATH', DEFAULT_DOCUMENT_STORE_PATH)
+            logger.info(f'Using embedded document store: {store_path}')
+            self._embedded_store = DocumentStore(store_path)
+        self.client = None
+        self._db = self._embedded_store
+        self._create_indexes()
+        self._health.update({'backend': 'embedded', 'connected': False})
+    
+    def _start_reconnect(self):
+        if MONGODB_RECONNECT_INTERVAL <= 0:
+            return
+        if self._reconnect_thread is not None and self._reconnect_thread.is_alive():
+            return
+        self._reconnect_thread = threading.Thread(
+            target=self._reconnect_loop, name='mongodb-reconnect', daemon=True
+        )
+        self._reconnect_thread.start()
+    
+    def _reconnect_loop(self):
+        """Retry MongoDB with backoff until it answers, then switch over to it"""
+        delay = MONGODB_RECONNECT_INTERVAL
+        while True:
+            time.sleep(delay)
+            self._health['reconnect_attempts'] += 1
+            try:
+                client = self._open_client()
+            except Exception as e:
+                self._health['last_error'] = str(e)
+                delay = min(delay * 2, MONGODB_RECONNECT_MAX_INTERVAL)
+                continue
+            with self._lock:
+                self._use_client(client)
+            # Documents written while degraded stay in the embedded store
+            logger.warning('MongoDB reconnected; data saved to the embedded store meanwhile was not copied over')
+            return
+    
+    def health(self) -> Dict[str, Any]:
+        """Connection state for health checks; does not open a connection itself"""
+        return {
+            **self._health,
+            'pool': {
+                'max_pool_size': MONGODB_MAX_POOL_SIZE,
+                'min_pool_size': MONGODB_MIN_POOL_SIZE,
+                'wait_queue_timeout_ms': MONGODB_WAIT_QUEUE_TIMEOUT_MS
+            },
+            'reconnecting': self._reconnect_thread is not None and self._reconnect_thread.is_alive()
+        }
     
     def _create_indexes(self):
         """Create database indexes with logging"""
@@ -234,10 +240,13 @@ class MongoDBService:
                 ('created_at', DESCENDING)
             ])
             
+            # One post per canonical URL; partial so posts not yet backfilled
+            # by migrate_canonical_urls.py (no url_hash) don't collide
             self.posts_collection.create_index([
                 ('user_id', ASCENDING),
-                ('url', ASCENDING)
-            ], unique=True)
+                ('url_hash', ASCENDING)
+            ], unique=True, name='user_url_hash_unique',
+               partialFilterExpression={'url_hash': {'$exists': True}})
             
             self.posts_collection.create_index([
                 ('user_id', ASCENDING),
@@ -249,6 +258,23 @@ class MongoDBService:
                 ('platform', ASCENDING)
             ])
             
+            # Search: tags is an array, so this is a multikey index
+            self.posts_collection.create_index([
+                ('user_id', ASCENDING),
+                ('tags', ASCENDING)
+            ])
+            self.posts_collection.create_index([
+                ('title', TEXT),
+                ('notes', TEXT),
+                ('tags', TEXT),
+                ('url_host', TEXT)
+            ], name='posts_text', weights={
+                'title': FIELD_WEIGHTS['title'],
+                'notes': FIELD_WEIGHTS['notes'],
+                'tags': FIELD_WEIGHTS['tags'],
+                'url_host': FIELD_WEIGHTS['host']
+            })
+            
             self.categories_collection.create_index([
                 ('user_id', ASCENDING),
                 ('name', ASCENDING)
@@ -275,6 +301,22 @@ class MongoDBService:
                 ('user_id', ASCENDING),
                 ('read', ASCENDING)
             ])
+            # At most one unread coalesced notification per group; keeps concurrent upserts from duplicating it
+            self.notifications_collection.create_index([
+                ('user_id', ASCENDING),
+                ('group_key', ASCENDING)
+            ], unique=True, name='unread_group_unique',
+               partialFilterExpression={'read': False, 'group_key': {'$exists': True}})
+            # Retention: read notifications expire after NOTIFICATION_READ_RETENTION_DAYS (unread ones have no read_at)
+            self.notifications_collection.create_index(
+                'read_at',
+                name='read_at_ttl',
+                expireAfterSeconds=NOTIFICATION_READ_RETENTION_DAYS * 86400
+            )
+            
+            self.extension_tokens_collection.create_index('token', unique=True)
+            self.extension_tokens_collection.create_index([('user_id', ASCENDING)])
+            self.extension_tokens_collection.create_index([('expires_at', ASCENDING)])
             
             logger.info('✅ MongoDB indexes created')
             
@@ -296,18 +338,7 @@ class MongoDBService:
             logger.info(f'Saving post for user {user_id}: {post_data.get("url")}')
             
             # Prepare document
-            document = {
-                'user_id': user_id,
-                'url': post_data['url'],
-                'platform': post_data.get('platform', 'Unknown'),
-                'title': post_data.get('title', ''),
-                'image_url': post_data.get('image_url', ''),
-                'category': post_data.get('category', 'Uncategorized'),
-                'notes': post_data.get('notes', ''),
-                'tags': post_data.get('tags', []),
-                'created_at': datetime.utcnow(),
-                'updated_at': datetime.utcnow()
-            }
+            document = self._new_post_document(user_id, post_data, datetime.utcnow())
             
             logger.info(f'Document prepared: {document}')
             
@@ -319,6 +350,7 @@ class MongoDBService:
             
             # Update category count
             self._update_category_count(user_id, document['category'])
+            self._adjust_post_stats(user_id, document, 1)
             
             logger.info(f'✅ Post saved successfully: {post_data.get("url")}')
             
@@ -343,6 +375,153 @@ class MongoDBService:
                 'error': str(e)
             }
     
+    @staticmethod
+    def _new_post_document(user_id: str, post_data: Dict[str, Any], created_at: datetime) -> Dict[str, Any]:
+        # BSON dates keep milliseconds; truncate up front so sync cursors match what is stored
+        created_at = created_at.replace(microsecond=created_at.microsecond // 1000 * 1000)
+        return {
+            'user_id': user_id,
+            'url': post_data['url'],
+            'url_hash': url_hash(post_data['url']),
+            'platform': post_data.get('platform', 'Unknown'),
+            'title': post_data.get('title', ''),
+            'image_url': post_data.get('image_url', ''),
+            'category': post_data.get('category', 'Uncategorized'),
+            'notes': post_data.get('notes', ''),
+            'tags': normalize_tags(post_data.get('tags', [])),
+            'url_host': url_host(post_data['url']),
+            'created_at': created_at,
+            'updated_at': created_at
+        }
+    
+    def save_posts_batch(self, user_id: str, posts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Save many posts at once
+        
+        Same contract as LinkoGeneiService.save_posts_batch: already-saved
+        URLs (and repeats within the batch) are reported as duplicates with
+        the existing post id, compared in canonical form.
+        
+        Returns:
+            {'results': [...], 'saved': n, 'duplicates': n, 'failed': n, 'cursor': str}
+            with one result per input item, in order
+        """
+        results = []
+        hashes = []
+        first_seen = {}  # url hash -> index of the first item carrying it
+        for index, item in enumerate(posts):
+            item = item if isinstance(item, dict) else {}
+            result = {'index': index, 'client_id': item.get('client_id')}
+            url = item.get('url')
+            key = url_hash(url) if isinstance(url, str) and url.strip() else None
+            if key is None:
+                result.update(status='error', error='URL is required')
+            elif key in first_seen:
+                result['status'] = 'duplicate'
+            else:
+                first_seen[key] = index
+            hashes.append(key)
+            results.append(result)
+        
+        pending = dict(first_seen)
+        try:
+            if pending:
+                for doc in self.posts_collection.find(
+                    {'user_id': user_id, 'url_hash': {'$in': list(pending)}}, {'url_hash': 1}
+                ):
+                    results[pending.pop(doc['url_hash'])].update(status='duplicate', post_id=str(doc['_id']))
+            
+            now = datetime.utcnow()
+            documents = [self._new_post_document(user_id, posts[index], now) for index in pending.values()]
+            conflicted = set()
+            if documents:
+                try:
+                    self.posts_collection.insert_many(documents, ordered=False)
+                except BulkWriteError as e:
+                    for error in e.details.get('writeErrors', []):
+                        if error.get('code') != 11000:
+                            raise
+                        conflicted.add(documents[error['index']]['url_hash'])
+            
+            # A concurrent save took these URLs first
+            for key in conflicted:
+                existing = self.posts_collection.find_one({'user_id': user_id, 'url_hash': key}, {'_id': 1})
+                results[pending[key]].update(status='duplicate', post_id=str(existing['_id']) if existing else None)
+            
+            saved = [document for document in documents if document['url_hash'] not in conflicted]
+            for document in saved:
+                results[pending[document['url_hash']]].update(
+                    status='saved', post_id=str(document['_id']), post=self._serialize_post(document)
+                )
+            
+            for category, count in Counter(document['category'] for document in saved).items():
+                self._update_category_count(user_id, category, count)
+            self._apply_post_stats(user_id, Counter(
+                key for document in saved for key in self._post_stats_keys(document)
+            ))
+        except Exception as e:
+            logger.error(f"Failed to save post batch: {str(e)}")
+            return {'success': False, 'error': str(e)}
+        
+        # Repeats within the batch point at the post their first occurrence resolved to
+        for result in results:
+            if result['status'] == 'duplicate' and 'post_id' not in result:
+                result['post_id'] = results[first_seen[hashes[result['index']]]].get('post_id')
+        
+        statuses = Counter(result['status'] for result in results)
+        return {
+            'success': True,
+            'results': results,
+            'saved': statuses['saved'],
+            'duplicates': statuses['duplicate'],
+            'failed': statuses['error'],
+            'cursor': self.latest_cursor(user_id)
+        }
+    
+    @staticmethod
+    def encode_cursor(post: Dict[str, Any]) -> str:
+        return f"{post['created_at'].isoformat()}|{post['_id']}"
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        """(created_at, ObjectId) of a sync cursor; raises ValueError when malformed"""
+        from bson.objectid import ObjectId
+        
+        created_at, post_id = cursor.rsplit('|', 1)
+        if not ObjectId.is_valid(post_id):
+            raise ValueError(f'Invalid post id in cursor: {post_id}')
+        return datetime.fromisoformat(created_at), ObjectId(post_id)
+    
+    def latest_cursor(self, user_id: str) -> Optional[str]:
+        """Cursor positioned after the user's newest saved post"""
+        latest = self.posts_collection.find_one(
+            {'user_id': user_id}, {'created_at': 1},
+            sort=[('created_at', DESCENDING), ('_id', DESCENDING)]
+        )
+        return self.encode_cursor(latest) if latest else None
+    
+    def get_changes(self, user_id: str, cursor: Optional[str] = None, limit: int = SYNC_PAGE_SIZE) -> Dict[str, Any]:
+        """Posts saved after a sync cursor, oldest first (see LinkoGeneiService.get_changes)"""
+        query = {'user_id': user_id}
+        if cursor:
+            created_at, post_id = self.decode_cursor(cursor)
+            query['$or'] = [
+                {'created_at': {'$gt': created_at}},
+                {'created_at': created_at, '_id': {'$gt': post_id}}
+            ]
+        rows = list(
+            self.posts_collection.find(query, {'url': 1, 'created_at': 1})
+            .sort([('created_at', ASCENDING), ('_id', ASCENDING)])
+            .limit(limit + 1)
+        )
+        page = rows[:limit]
+        return {
+            'success': True,
+            'posts': [{'id': str(row['_id']), 'url': row['url'], 'created_at': row['created_at'].isoformat()} for row in page],
+            'cursor': self.encode_cursor(page[-1]) if page else cursor,
+            'has_more': len(rows) > limit
+        }
+    
     def get_posts(
         self, 
         user_id: str, 
@@ -368,18 +547,14 @@ class MongoDBService:
             logger.info(f'Getting posts for user {user_id}: category={category}, platform={platform}')
             
             # Build query
-            query = {'user_id': user_id}
-            
-            if category and category != 'all':
-                query['category'] = category
-            
-            if platform and platform != 'all':
-                query['platform'] = platform
+            query = self._posts_filter(user_id, category, platform)
             
             logger.info(f'Query: {query}')
             
             # Get posts
-            cursor = self.posts_collection.find(query).sort('created_at', DESCENDING).skip(skip).limit(limit)
+            cursor = self.posts_collection.find(query).sort(
+                [('created_at', DESCENDING), ('_id', DESCENDING)]
+            ).skip(skip).limit(limit)
             posts = [self._serialize_post(post) for post in cursor]
             
             logger.info(f'Found {len(posts)} posts')
@@ -405,11 +580,188 @@ class MongoDBService:
                 'posts': []
             }
     
+    @staticmethod
+    def _posts_filter(user_id: str, category: Optional[str] = None, platform: Optional[str] = None) -> Dict[str, Any]:
+        query = {'user_id': user_id}
+        
+        if category and category != 'all':
+            query['category'] = category
+        
+        if platform and platform != 'all':
+            query['platform'] = platform
+        
+        return query
+    
+    def iter_posts(
+        self,
+        user_id: str,
+        category: Optional[str] = None,
+        platform: Optional[str] = None,
+        batch_size: int = EXPORT_BATCH_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        """All matching posts, newest first, fetched batch_size documents at a time"""
+        cursor = self.posts_collection.find(self._posts_filter(user_id, category, platform)).sort(
+            [('created_at', DESCENDING), ('_id', DESCENDING)]
+        ).batch_size(batch_size)
+        for post in cursor:
+            yield self._serialize_post(post)
+    
+    def search_posts(
+        self,
+        user_id: str,
+        query: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        limit: int = SEARCH_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Search saved posts by title, notes, tags and URL host
+        
+        With a query, posts matching any term come back by text score (the
+        posts_text index) with a 'score' field; with only tags, posts
+        carrying all of them come back newest first (the user_id/tags
+        multikey index). Pass the returned cursor back for the next page.
+        """
+        try:
+            from bson.objectid import ObjectId
+            
+            terms = search_terms(query)
+            tags = normalize_tags(tags or [])
+            if not terms and not tags:
+                return {'success': True, 'posts': [], 'cursor': None, 'has_more': False}
+            
+            match = {'user_id': user_id}
+            if tags:
+                match['tags'] = {'$all': tags}
+            
+            if not terms:
+                if cursor:
+                    created_at, post_id = cursor.rsplit('|', 1)
+                    created_at = datetime.fromisoformat(created_at)
+                    match['$or'] = [
+                        {'created_at': {'$lt': created_at}},
+                        {'created_at': created_at, '_id': {'$lt': ObjectId(post_id)}}
+                    ]
+                posts = list(
+                    self.posts_collection.find(match)
+                    .sort([('created_at', DESCENDING), ('_id', DESCENDING)])
+                    .limit(limit + 1)
+                )
+                page = posts[:limit]
+                return {
+                    'success': True,
+                    'posts': [self._serialize_post(post) for post in page],
+                    'cursor': f"{page[-1]['created_at'].isoformat()}|{page[-1]['_id']}" if page else cursor,
+                    'has_more': len(posts) > limit
+                }
+            
+            after = None
+            if cursor:
+                after_score, after_id = decode_search_cursor(cursor)
+                after = (after_score, ObjectId(after_id))
+            
+            if isinstance(self.db, DocumentStore):
+                ranked = [
+                    (post, score) for post, score in self._rank_posts_embedded(match, terms)
+                    if after is None or (-score, post['_id']) > (-after[0], after[1])
+                ][:limit + 1]
+            else:
+                match['$text'] = {'$search': ' '.join(terms)}
+                pipeline = [{'$match': match}, {'$addFields': {'score': {'$meta': 'textScore'}}}]
+                if after:
+                    pipeline.append({'$match': {'$or': [
+                        {'score': {'$lt': after[0]}},
+                        {'score': after[0], '_id': {'$gt': after[1]}}
+                    ]}})
+                pipeline += [{'$sort': {'score': -1, '_id': 1}}, {'$limit': limit + 1}]
+                ranked = [(post, post.pop('score')) for post in self.posts_collection.aggregate(pipeline)]
+            
+            page = ranked[:limit]
+            return {
+                'success': True,
+                'posts': [{**self._serialize_post(post), 'score': score} for post, score in page],
+                'cursor': encode_search_cursor(page[-1][1], str(page[-1][0]['_id'])) if page else cursor,
+                'has_more': len(ranked) > limit
+            }
+            
+        except Exception as e:
+            logger.error(f"Failed to search posts: {str(e)}")
+            return {'success': False, 'error': str(e), 'posts': []}
+    
+    def backfill_post_search_fields(self) -> int:
+        """Set url_host and normalized tags on posts saved before search; returns how many were updated"""
+        updated = 0
+        for post in self.posts_collection.find({'url_host': {'$exists': False}}):
+            self.posts_collection.update_one({'_id': post['_id']}, {'$set': {
+                'url_host': url_host(post.get('url')),
+                'tags': normalize_tags(post.get('tags', []))
+            }})
+            updated += 1
+        logger.info(f'Backfilled search fields on {updated} posts')
+        return updated
+    
+    def backfill_url_hashes(self) -> Dict[str, int]:
+        """
+        Set url_hash on posts that predate it, merging posts that share a canonical URL
+        
+        The oldest post of each group is kept and absorbs the others' notes,
+        tags and missing title/image; the rest are deleted and the user's
+        stats recounted.
+        """
+        result = {'users': 0, 'hashed': 0, 'merged': 0}
+        for user_id in sorted(self.posts_collection.distinct('user_id')):
+            result['users'] += 1
+            groups = {}
+            for post in self.posts_collection.find({'user_id': user_id}).sort([('created_at', ASCENDING), ('_id', ASCENDING)]):
+                groups.setdefault(url_hash(post['url']), []).append(post)
+            
+            merged = 0
+            for key, (keeper, *duplicates) in groups.items():
+                update = {'url_hash': key}
+                if duplicates:
+                    fields = merge_duplicate_posts(keeper, duplicates)
+                    update.update(fields, tags=normalize_tags(fields['tags']))
+                    # Free the hash before the keeper takes it
+                    self.posts_collection.delete_many({'_id': {'$in': [post['_id'] for post in duplicates]}})
+                    merged += len(duplicates)
+                elif keeper.get('url_hash') == key:
+                    continue
+                self.posts_collection.update_one({'_id': keeper['_id']}, {'$set': update})
+                result['hashed'] += 1
+            
+            result['merged'] += merged
+            if merged:
+                self.reconcile_post_stats(user_id)
+        
+        logger.info(f'Backfilled post URL hashes: {result}')
+        return result
+    
+    def _rank_posts_embedded(self, match: Dict[str, Any], terms: List[str]) -> List[tuple]:
+        """Text search for the embedded store, which has no $text: regex match, weighted term counts"""
+        fields = (('title', 'title'), ('notes', 'notes'), ('tags', 'tags'), ('url_host', 'host'))
+        match = {**match, '$or': [
+            {field: {'$regex': re.escape(term), '$options': 'i'}}
+            for term in terms for field, _ in fields
+        ]}
+        ranked = []
+        for post in self.posts_collection.find(match):
+            score = 0.0
+            for field, weight_key in fields:
+                value = post.get(field) or ''
+                value = (' '.join(value) if isinstance(value, list) else str(value)).lower()
+                score += FIELD_WEIGHTS[weight_key] * sum(value.count(term) for term in terms)
+            ranked.append((post, score))
+        ranked.sort(key=lambda item: (-item[1], item[0]['_id']))
+        return ranked
+    
     def get_post_by_id(self, user_id: str, post_id: str) -> Optional[Dict[str, Any]]:
         """Get a single post by ID"""
         try:
             from bson.objectid import ObjectId
             
+            if not ObjectId.is_valid(post_id):
+                return None
+            
             post = self.posts_collection.find_one({
                 '_id': ObjectId(post_id),
                 'user_id': user_id
@@ -428,6 +780,14 @@ class MongoDBService:
         try:
             from bson.objectid import ObjectId
             
+            if not ObjectId.is_valid(post_id):
+                return {'success': False, 'error': 'Post not found'}
+            
+            # Only user-editable fields; url, owner and timestamps stay as saved
+            update_data = {field: update_data[field] for field in EDITABLE_POST_FIELDS if field in update_data}
+            if 'tags' in update_data:
+                update_data['tags'] = normalize_tags(update_data['tags'])
+            
             # Prepare update
             update = {
                 '$set': {
@@ -436,22 +796,25 @@ class MongoDBService:
                 }
             }
             
-            # Update document
-            result = self.posts_collection.update_one(
+            # Update document, keeping the previous version to adjust counters
+            before = self.posts_collection.find_one_and_update(
                 {'_id': ObjectId(post_id), 'user_id': user_id},
-                update
+                update,
+                return_document=ReturnDocument.BEFORE
             )
             
-            if result.modified_count > 0:
-                # If category changed, update counts
-                if 'category' in update_data:
-                    post = self.get_post_by_id(user_id, post_id)
-                    if post:
-                        self._update_category_count(user_id, update_data['category'])
-                
-                return {'success': True, 'message': 'Post updated successfully'}
-            else:
-                return {'success': False, 'error': 'Post not found or no changes made'}
+            if before is None:
+                return {'success': False, 'error': 'Post not found'}
+            
+            # If category changed, update counts
+            old_category = before.get('category', 'Uncategorized')
+            if 'category' in update_data and update_data['category'] != old_category:
+                self._decrement_category_count(user_id, old_category)
+                self._update_category_count(user_id, update_data['category'])
+                self._adjust_post_stats(user_id, before, -1, fields=('category',))
+                self._adjust_post_stats(user_id, update_data, 1, fields=('category',))
+            
+            return {'success': True, 'message': 'Post updated successfully'}
                 
         except Exception as e:
             logger.error(f"Failed to update post: {str(e)}")
@@ -462,23 +825,22 @@ class MongoDBService:
         try:
             from bson.objectid import ObjectId
             
-            # Get post before deleting to update category count
-            post = self.get_post_by_id(user_id, post_id)
+            if not ObjectId.is_valid(post_id):
+                return {'success': False, 'error': 'Post not found'}
             
-            # Delete document
-            result = self.posts_collection.delete_one({
+            # Delete document, keeping it to update the counts
+            post = self.posts_collection.find_one_and_delete({
                 '_id': ObjectId(post_id),
                 'user_id': user_id
             })
             
-            if result.deleted_count > 0:
-                # Update category count
-                if post:
-                    self._decrement_category_count(user_id, post['category'])
-                
-                return {'success': True, 'message': 'Post deleted successfully'}
-            else:
+            if post is None:
                 return {'success': False, 'error': 'Post not found'}
+            
+            self._decrement_category_count(user_id, post.get('category', 'Uncategorized'))
+            self._adjust_post_stats(user_id, post, -1)
+            
+            return {'success': True, 'message': 'Post deleted successfully'}
                 
         except Exception as e:
             logger.error(f"Failed to delete post: {str(e)}")
@@ -519,31 +881,27 @@ class MongoDBService:
             return {'success': False, 'error': str(e)}
     
     def get_stats(self, user_id: str) -> Dict[str, Any]:
-        """Get statistics for a user"""
+        """Get statistics for a user from their stats document (built on first read)"""
         try:
-            total_posts = self.posts_collection.count_documents({'user_id': user_id})
-            
-            # Get posts by platform
-            platform_pipeline = [
-                {'$match': {'user_id': user_id}},
-                {'$group': {'_id': '$platform', 'count': {'$sum': 1}}}
-            ]
-            platforms = list(self.posts_collection.aggregate(platform_pipeline))
-            
-            # Get posts by category
-            category_pipeline = [
-                {'$match': {'user_id': user_id}},
-                {'$group': {'_id': '$category', 'count': {'$sum': 1}}}
-            ]
-            categories = list(self.posts_collection.aggregate(category_pipeline))
-            
+            stats = self.post_stats_collection.find_one({'_id': user_id})
+            if stats is None:
+                # First read for this user: aggregate once and start maintaining the document
+                stats = self._aggregate_post_stats(user_id)
+                self.post_stats_collection.update_one(
+                    {'_id': user_id},
+                    {'$setOnInsert': stats},
+                    upsert=True
+                )
+            
+            platforms = {_decode_stats_key(k): v for k, v in stats.get('platforms', {}).items() if v > 0}
+            categories = {_decode_stats_key(k): v for k, v in stats.get('categories', {}).items() if v > 0}
             return {
                 'success': True,
                 'stats': {
-                    'total_posts': total_posts,
+                    'total_posts': max(stats.get('total', 0), 0),
                     'total_categories': len(categories),
-                    'platforms': {p['_id']: p['count'] for p in platforms},
-                    'categories': {c['_id']: c['count'] for c in categories}
+                    'platforms': platforms,
+                    'categories': categories
                 }
             }
             
@@ -555,13 +913,87 @@ class MongoDBService:
                 'stats': {}
             }
     
-    def _update_category_count(self, user_id: str, category: str):
+    def _aggregate_post_stats(self, user_id: str) -> Dict[str, Any]:
+        """Total, per-platform and per-category counts in a single $facet pass"""
+        result = next(self.posts_collection.aggregate([
+            {'$match': {'user_id': user_id}},
+            {'$facet': {
+                'total': [{'$count': 'count'}],
+                'platforms': [{'$group': {'_id': '$platform', 'count': {'$sum': 1}}}],
+                'categories': [{'$group': {'_id': '$category', 'count': {'$sum': 1}}}]
+            }}
+        ]), {})
+        total = result.get('total') or [{'count': 0}]
+        return {
+            'total': total[0]['count'],
+            'platforms': {_stats_key(p['_id'] or 'Unknown'): p['count'] for p in result.get('platforms', [])},
+            'categories': {_stats_key(c['_id'] or 'Uncategorized'): c['count'] for c in result.get('categories', [])}
+        }
+    
+    @staticmethod
+    def _post_stats_keys(post: Dict[str, Any], fields=('total', 'platform', 'category')) -> List[str]:
+        """Fields of the stats document a post counts towards"""
+        keys = []
+        if 'total' in fields:
+            keys.append('total')
+        if 'platform' in fields:
+            keys.append(f"platforms.{_stats_key(post.get('platform') or 'Unknown')}")
+        if 'category' in fields:
+            keys.append(f"categories.{_stats_key(post.get('category') or 'Uncategorized')}")
+        return keys
+    
+    def _adjust_post_stats(self, user_id: str, post: Dict[str, Any], delta: int,
+                           fields=('total', 'platform', 'category')):
+        """Apply a post's +1/-1 to the user's stats document (created lazily on first read)"""
+        self._apply_post_stats(user_id, {key: delta for key in self._post_stats_keys(post, fields)})
+    
+    def _apply_post_stats(self, user_id: str, increments: Dict[str, int]):
+        if not increments:
+            return
+        try:
+            self.post_stats_collection.update_one({'_id': user_id}, {'$inc': dict(increments)})
+        except Exception as e:
+            logger.error(f"Failed to update post stats: {str(e)}")
+    
+    def reconcile_post_stats(self, user_id: Optional[str] = None) -> Dict[str, int]:
+        """Rewrite stats documents (and category post counts) that drifted from the posts"""
+        if user_id:
+            user_ids = [user_id]
+        else:
+            user_ids = sorted(
+                set(self.posts_collection.distinct('user_id')) |
+                set(self.post_stats_collection.distinct('_id'))
+            )
+        
+        result = {'users': len(user_ids), 'repaired': 0, 'categories_repaired': 0}
+        for current_user_id in user_ids:
+            expected = self._aggregate_post_stats(current_user_id)
+            stored = self.post_stats_collection.find_one({'_id': current_user_id}) or {}
+            stored_counts = {
+                'total': stored.get('total', 0),
+                'platforms': {k: v for k, v in stored.get('platforms', {}).items() if v},
+                'categories': {k: v for k, v in stored.get('categories', {}).items() if v}
+            }
+            if stored_counts != expected or not stored:
+                self.post_stats_collection.update_one({'_id': current_user_id}, {'$set': expected}, upsert=True)
+                result['repaired'] += 1
+            
+            for category in self.categories_collection.find({'user_id': current_user_id}):
+                count = expected['categories'].get(_stats_key(category['name']), 0)
+                if category.get('post_count', 0) != count:
+                    self.categories_collection.update_one({'_id': category['_id']}, {'$set': {'post_count': count}})
+                    result['categories_repaired'] += 1
+        
+        logger.info(f'Reconciled post stats: {result}')
+        return result
+    
+    def _update_category_count(self, user_id: str, category: str, count: int = 1):
         """Update post count for a category"""
         try:
             self.categories_collection.update_one(
                 {'user_id': user_id, 'name': category},
                 {
-                    '$inc': {'post_count': 1},
+                    '$inc': {'post_count': count},
                     '$setOnInsert': {
                         'user_id': user_id,
                         'name': category,
@@ -578,7 +1010,7 @@ class MongoDBService:
         """Decrement post count for a category"""
         try:
             self.categories_collection.update_one(
-                {'user_id': user_id, 'name': category},
+                {'user_id': user_id, 'name': category, 'post_count': {'$gt': 0}},
                 {'$inc': {'post_count': -1}}
             )
         except Exception:
@@ -588,6 +1020,7 @@ class MongoDBService:
         """Convert MongoDB document to JSON-serializable dict"""
         return {
             'id': str(post['_id']),
+            'user_id': post.get('user_id'),
             'url': post['url'],
             'platform': post['platform'],
             'title': post.get('title', ''),
@@ -623,22 +1056,110 @@ class MongoDBService:
             logger.error(f"Failed to get chat conversations: {str(e)}")
             return []
     
-    def get_chat_messages(self, user_id: str, conversation_id: str) -> List[Dict[str, Any]]:
-        """Get messages for a specific conversation"""
+    def get_chat_messages(self, user_id: str, conversation_id: str, skip: int = 0) -> List[Dict[str, Any]]:
+        """Get messages for a specific conversation, optionally skipping the oldest `skip` messages"""
         try:
             from bson.objectid import ObjectId
             
-            messages = list(
-                self.chat_messages_collection.find({
-                    'user_id': user_id,
-                    'conversation_id': ObjectId(conversation_id)
-                }).sort('created_at', ASCENDING)
-            )
-            return [self._serialize_message(msg) for msg in messages]
+            cursor = self.chat_messages_collection.find({
+                'user_id': user_id,
+                'conversation_id': ObjectId(conversation_id)
+            }).sort('created_at', ASCENDING)
+            
+            if skip:
+                cursor = cursor.skip(skip)
+            
+            return [self._serialize_message(msg) for msg in cursor]
         except Exception as e:
             logger.error(f"Failed to get chat messages: {str(e)}")
             return []
     
+    def get_chat_conversation(self, user_id: str, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single conversation including its running context summary"""
+        try:
+            from bson.objectid import ObjectId
+            
+            conversation = self.chat_conversations_collection.find_one({
+                '_id': ObjectId(conversation_id),
+                'user_id': user_id
+            })
+            
+            if not conversation:
+                return None
+            
+            return {
+                **self._serialize_conversation(conversation),
+                'summary': conversation.get('summary', ''),
+                'summarized_count': conversation.get('summarized_count', 0)
+            }
+        except Exception as e:
+            logger.error(f"Failed to get chat conversation: {str(e)}")
+            return None
+    
+    def save_chat_turn(
+        self,
+        user_id: str,
+        conversation_id: str,
+        user_content: str,
+        assistant_content: str,
+        summary: Optional[str] = None,
+        summarized_count: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Save a user message and the assistant reply together
+        
+        Both messages are written with a single insert_many and the conversation
+        counters (plus the running summary, when it changed) with a single update.
+        """
+        try:
+            from bson.objectid import ObjectId
+            
+            now = datetime.utcnow()
+            documents = [
+                {
+                    'user_id': user_id,
+                    'conversation_id': ObjectId(conversation_id),
+                    'role': 'user',
+                    'content': user_content,
+                    'created_at': now
+                },
+                {
+                    'user_id': user_id,
+                    'conversation_id': ObjectId(conversation_id),
+                    'role': 'assistant',
+                    'content': assistant_content,
+                    # Keep the reply strictly after the user turn when sorting by created_at
+                    'created_at': now + timedelta(milliseconds=1)
+                }
+            ]
+            
+            result = self.chat_messages_collection.insert_many(documents)
+            for document, inserted_id in zip(documents, result.inserted_ids):
+                document['_id'] = inserted_id
+            
+            conversation_set = {'updated_at': datetime.utcnow()}
+            if summary is not None:
+                conversation_set['summary'] = summary
+            if summarized_count is not None:
+                conversation_set['summarized_count'] = summarized_count
+            
+            self.chat_conversations_collection.update_one(
+                {'_id': ObjectId(conversation_id), 'user_id': user_id},
+                {
+                    '$inc': {'message_count': len(documents)},
+                    '$set': conversation_set
+                }
+            )
+            
+            return {
+                'success': True,
+                'user_message': self._serialize_message(documents[0]),
+                'assistant_message': self._serialize_message(documents[1])
+            }
+        except Exception as e:
+            logger.error(f"Failed to save chat turn: {str(e)}")
+            return {'success': False, 'error': str(e)}
+    
     def create_chat_conversation(self, user_id: str, title: str) -> Dict[str, Any]:
         """Create a new chat conversation"""
         try:
@@ -757,6 +1278,64 @@ class MongoDBService:
     
     # ==================== NOTIFICATION METHODS ====================
     
+    def _adjust_unread_counter(self, user_ids: List[str], delta: int):
+        """
+        Apply a delta to cached unread counters
+
+        Increments create missing counters first (at 0, then $inc), so the first
+        notification of a user is counted like every later one. Counters of users
+        whose notifications predate them are backfilled by reconcile_unread_counters.
+        """
+        if not user_ids or not delta:
+            return
+        try:
+            if delta > 0:
+                existing = set(self.notification_counters_collection.distinct('_id', {'_id': {'$in': user_ids}}))
+                missing = [user_id for user_id in dict.fromkeys(user_ids) if user_id not in existing]
+                if missing:
+                    try:
+                        self.notification_counters_collection.insert_many(
+                            [{'_id': user_id, 'unread': 0} for user_id in missing], ordered=False
+                        )
+                    except BulkWriteError:
+                        # A concurrent write created some of them first
+                        pass
+            if len(user_ids) == 1:
+                self.notification_counters_collection.update_one({'_id': user_ids[0]}, {'$inc': {'unread': delta}})
+            else:
+                self.notification_counters_collection.update_many({'_id': {'$in': user_ids}}, {'$inc': {'unread': delta}})
+        except Exception as e:
+            logger.error(f"Failed to update unread counters: {str(e)}")
+    
+    def reconcile_unread_counters(self, user_id: Optional[str] = None) -> Dict[str, int]:
+        """Rewrite unread counters that drifted from the notifications (and create missing ones)"""
+        match = {'read': False}
+        if user_id:
+            match['user_id'] = user_id
+        expected = {
+            row['_id']: row['unread'] for row in self.notifications_collection.aggregate([
+                {'$match': match},
+                {'$group': {'_id': '$user_id', 'unread': {'$sum': 1}}}
+            ])
+        }
+        stored = {
+            counter['_id']: counter.get('unread', 0)
+            for counter in self.notification_counters_collection.find({'_id': user_id} if user_id else {})
+        }
+        
+        user_ids = sorted(set(expected) | set(stored))
+        result = {'users': len(user_ids), 'repaired': 0}
+        for current_user_id in user_ids:
+            unread = expected.get(current_user_id, 0)
+            if stored.get(current_user_id) != unread:
+                self.notification_counters_collection.update_one(
+                    {'_id': current_user_id}, {'$set': {'unread': unread}}, upsert=True
+                )
+                result['repaired'] += 1
+        
+        logger.info(f'Reconciled unread notification counters: {result}')
+        return result
+    
     def get_notifications(self, user_id: str, unread_only: bool = False, limit: int = 50) -> List[Dict[str, Any]]:
         """Get notifications for a user"""
         try:
@@ -775,8 +1354,14 @@ class MongoDBService:
             return []
     
     def get_unread_notification_count(self, user_id: str) -> int:
-        """Get count of unread notifications"""
+        """Get count of unread notifications from the cached counter"""
         try:
+            counter = self.notification_counters_collection.find_one({'_id': user_id})
+            if counter is not None:
+                return max(counter.get('unread', 0), 0)
+            
+            # No notification since counters were introduced (or never reconciled): count directly.
+            # The counter is only created by writes, so a read cannot race an increment
             return self.notifications_collection.count_documents({
                 'user_id': user_id,
                 'read': False
@@ -791,11 +1376,14 @@ class MongoDBService:
             from bson.objectid import ObjectId
             
             result = self.notifications_collection.update_one(
-                {'_id': ObjectId(notification_id), 'user_id': user_id},
-                {'$set': {'read': True}}
+                {'_id': ObjectId(notification_id), 'user_id': user_id, 'read': False},
+                {'$set': {'read': True, 'read_at': datetime.utcnow()}}
             )
             
             if result.modified_count > 0:
+                self._adjust_unread_counter([user_id], -1)
+                return {'success': True, 'message': 'Notification marked as read'}
+            if self.notifications_collection.count_documents({'_id': ObjectId(notification_id), 'user_id': user_id}):
                 return {'success': True, 'message': 'Notification marked as read'}
             return {'success': False, 'error': 'Notification not found'}
         except Exception as e:
@@ -807,8 +1395,9 @@ class MongoDBService:
         try:
             result = self.notifications_collection.update_many(
                 {'user_id': user_id, 'read': False},
-                {'$set': {'read': True}}
+                {'$set': {'read': True, 'read_at': datetime.utcnow()}}
             )
+            self._adjust_unread_counter([user_id], -result.modified_count)
             
             return {
                 'success': True,
@@ -823,12 +1412,14 @@ class MongoDBService:
         try:
             from bson.objectid import ObjectId
             
-            result = self.notifications_collection.delete_one({
+            deleted = self.notifications_collection.find_one_and_delete({
                 '_id': ObjectId(notification_id),
                 'user_id': user_id
             })
             
-            if result.deleted_count > 0:
+            if deleted is not None:
+                if not deleted.get('read', False):
+                    self._adjust_unread_counter([user_id], -1)
                 return {'success': True, 'message': 'Notification deleted'}
             return {'success': False, 'error': 'Notification not found'}
         except Exception as e:
@@ -838,49 +1429,159 @@ class MongoDBService:
     def clear_all_notifications(self, user_id: str) -> Dict[str, Any]:
         """Clear all notifications"""
         try:
+            unread = self.notifications_collection.delete_many({'user_id': user_id, 'read': False})
+            self._adjust_unread_counter([user_id], -unread.deleted_count)
             result = self.notifications_collection.delete_many({'user_id': user_id})
             
             return {
                 'success': True,
-                'message': f'{result.deleted_count} notifications cleared'
+                'message': f'{unread.deleted_count + result.deleted_count} notifications cleared'
             }
         except Exception as e:
             logger.error(f"Failed to clear notifications: {str(e)}")
             return {'success': False, 'error': str(e)}
     
-    def create_notification(
+    def _store_notifications(
         self,
-        user_id: str,
+        user_ids: List[str],
         notification_type: str,
         title: str,
         message: str,
-        link: Optional[str] = None,
-        metadata: Optional[Dict] = None
-    ) -> Dict[str, Any]:
-        """Create a notification"""
-        try:
-            document = {
+        link: Optional[str],
+        metadata: Optional[Dict]
+    ) -> List[Dict]:
+        """
+        Write one notification per user and return the resulting documents
+
+        Types in COALESCED_NOTIFICATION_TYPES fold into the user's existing unread
+        notification for the same project/link: its count is bumped and the preview
+        replaced. Costs one find, one update_many and one insert_many regardless of
+        the number of recipients.
+        """
+        now = datetime.utcnow()
+        metadata = dict(metadata or {})
+        group_key = None
+        if notification_type in COALESCED_NOTIFICATION_TYPES:
+            group_key = f"{notification_type}:{metadata.get('project_id') or link or ''}"
+        
+        documents = []
+        pending = user_ids
+        changes = {'title': title, 'message': message, 'link': link, 'metadata': metadata, 'created_at': now}
+        
+        if group_key:
+            existing = {
+                doc['user_id']: dict(doc) for doc in self.notifications_collection.find({
+                    'user_id': {'$in': user_ids},
+                    'group_key': group_key,
+                    'read': False
+                })
+            }
+            if existing:
+                self.notifications_collection.update_many(
+                    {'_id': {'$in': [doc['_id'] for doc in existing.values()]}},
+                    {'$set': changes, '$inc': {'count': 1}}
+                )
+                for doc in existing.values():
+                    doc.update(changes)
+                    doc['count'] = doc.get('count', 1) + 1
+                documents.extend(existing.values())
+            pending = [user_id for user_id in user_ids if user_id not in existing]
+        
+        new_documents = [
+            {
                 'user_id': user_id,
                 'type': notification_type,
                 'title': title,
                 'message': message,
                 'link': link,
-                'metadata': metadata or {},
+                'metadata': dict(metadata),
                 'read': False,
-                'created_at': datetime.utcnow()
+                'count': 1,
+                'created_at': now,
+                **({'group_key': group_key} if group_key else {})
             }
+            for user_id in pending
+        ]
+        
+        if new_documents:
+            # Unordered so one bad document does not stop the rest of the batch
+            failed = set()
+            try:
+                result = self.notifications_collection.insert_many(new_documents, ordered=False)
+                for document, inserted_id in zip(new_documents, result.inserted_ids):
+                    document['_id'] = inserted_id
+            except BulkWriteError as e:
+                write_errors = e.details.get('writeErrors', [])
+                failed = {error['index'] for error in write_errors}
+                logger.error(f"Bulk notification insert: {len(failed)} of {len(new_documents)} failed")
+                
+                # A concurrent write created the group's unread notification first; fold into it
+                for error in write_errors:
+                    if group_key and error.get('code') == 11000:
+                        merged = self.notifications_collection.find_one_and_update(
+                            {'user_id': new_documents[error['index']]['user_id'], 'group_key': group_key, 'read': False},
+                            {'$set': changes, '$inc': {'count': 1}},
+                            return_document=ReturnDocument.AFTER
+                        )
+                        if merged is not None:
+                            documents.append(merged)
+            
+            inserted = [doc for index, doc in enumerate(new_documents) if index not in failed and '_id' in doc]
+            self._adjust_unread_counter([doc['user_id'] for doc in inserted], 1)
+            documents.extend(inserted)
+        
+        return documents
+    
+    def create_notification(
+        self,
+        user_id: str,
+        notification_type: str,
+        title: str,
+        message: str,
+        link: Optional[str] = None,
+        metadata: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Create a notification (or fold it into a matching unread one)"""
+        try:
+            documents = self._store_notifications([user_id], notification_type, title, message, link, metadata)
+            if not documents:
+                return {'success': False, 'error': 'Failed to store notification'}
             
-            result = self.notifications_collection.insert_one(document)
-            document['_id'] = result.inserted_id
+            notification = self._serialize_notification(documents[0])
+            event_bus.publish(user_channel(user_id), 'notification', notification)
             
             return {
                 'success': True,
-                'notification': self._serialize_notification(document)
+                'notification': notification
             }
         except Exception as e:
             logger.error(f"Failed to create notification: {str(e)}")
             return {'success': False, 'error': str(e)}
     
+    def create_notifications_bulk(
+        self,
+        user_ids: List[str],
+        notification_type: str,
+        title: str,
+        message: str,
+        link: Optional[str] = None,
+        metadata: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Create the same notification for many users with a constant number of round trips"""
+        try:
+            user_ids = list(dict.fromkeys(filter(None, user_ids)))
+            if not user_ids:
+                return {'success': True, 'created': 0, 'failed': 0}
+            
+            documents = self._store_notifications(user_ids, notification_type, title, message, link, metadata)
+            for document in documents:
+                event_bus.publish(user_channel(document['user_id']), 'notification', self._serialize_notification(document))
+            
+            return {'success': True, 'created': len(documents), 'failed': len(user_ids) - len(documents)}
+        except Exception as e:
+            logger.error(f"Failed to create notifications: {str(e)}")
+            return {'success': False, 'error': str(e)}
+    
     def _serialize_notification(self, notification: Dict) -> Dict[str, Any]:
         """Convert notification document to JSON-serializable dict"""
         return {
@@ -891,6 +1592,7 @@ class MongoDBService:
             'link': notification.get('link'),
             'metadata': notification.get('metadata', {}),
             'read': notification.get('read', False),
+            'count': notification.get('count', 1),
             'created_at': notification['created_at'].isoformat()
         }
     
@@ -899,17 +1601,6 @@ class MongoDBService:
     def store_extension_token(self, user_id: str, token: str, expires_at: datetime) -> Dict[str, Any]:
         """Store extension token in MongoDB"""
         try:
-            # Create extension_tokens collection if not exists
-            if not hasattr(self, 'extension_tokens_collection'):
-                self.extension_tokens_collection = self.db['extension_tokens']
-                # Create indexes
-                try:
-                    self.extension_tokens_collection.create_index('token', unique=True)
-                    self.extension_tokens_collection.create_index([('user_id', ASCENDING)])
-                    self.extension_tokens_collection.create_index([('expires_at', ASCENDING)])
-                except Exception:
-                    pass
-            
             document = {
                 'user_id': user_id,
                 'token': token,
@@ -923,6 +1614,7 @@ class MongoDBService:
                 {'$set': document},
                 upsert=True
             )
+            extension_token_cache.invalidate(token)
             
             return {'success': True, 'message': 'Token stored successfully'}
             
@@ -931,11 +1623,11 @@ class MongoDBService:
     
     def verify_extension_token(self, token: str) -> Dict[str, Any]:
         """Verify extension token and return user_id if valid"""
+        user_id = extension_token_cache.get(token)
+        if user_id:
+            return {'success': True, 'user_id': user_id}
+        
         try:
-            # Create collection if not exists
-            if not hasattr(self, 'extension_tokens_collection'):
-                self.extension_tokens_collection = self.db['extension_tokens']
-            
             # Find token
             token_doc = self.extension_tokens_collection.find_one({'token': token})
             
@@ -946,6 +1638,8 @@ class MongoDBService:
             if token_doc.get('expires_at') and token_doc['expires_at'] < datetime.utcnow():
                 return {'success': False, 'error': 'Token expired'}
             
+            if token_doc.get('expires_at'):
+                extension_token_cache.put(token, token_doc['user_id'], token_doc['expires_at'])
             return {
                 'success': True,
                 'user_id': token_doc['user_id']
@@ -957,10 +1651,8 @@ class MongoDBService:
     def delete_extension_token(self, token: str) -> Dict[str, Any]:
         """Delete extension token"""
         try:
-            if not hasattr(self, 'extension_tokens_collection'):
-                self.extension_tokens_collection = self.db['extension_tokens']
-            
             result = self.extension_tokens_collection.delete_one({'token': token})
+            extension_token_cache.invalidate(token)
             
             if result.deleted_count > 0:
                 return {'success': True, 'message': 'Token deleted'}
@@ -969,6 +1661,21 @@ class MongoDBService:
         except Exception as e:
             logger.error(f"Failed to delete extension token: {str(e)}")
             return {'success': False, 'error': str(e)}
+    
+    def sweep_expired_extension_tokens(self, batch_size: int = 1000) -> int:
+        """Delete expired extension token documents in batches; returns how many were removed"""
+        removed = 0
+        now = datetime.utcnow()
+        while True:
+            ids = [doc['_id'] for doc in self.extension_tokens_collection.find(
+                {'expires_at': {'$lt': now}}, {'_id': 1}
+            ).limit(batch_size)]
+            if not ids:
+                break
+            removed += self.extension_tokens_collection.delete_many({'_id': {'$in': ids}}).deleted_count
+        extension_token_cache.purge_expired()
+        logger.info(f'Swept {removed} expired extension token documents')
+        return removed
 
 # Global instance
 mongodb_service = MongoDBService()
@@ -0,0 +1,76 @@
+"""Notification Dispatcher - Fans notifications out to many users off the request thread"""
+
+from flask import current_app, has_app_context
+from concurrent.futures import ThreadPoolExecutor
+from services.mongodb_service import mongodb_service
+from typing import Dict, List, Optional
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationDispatcher:
+    """Queues bulk notification inserts on a small background pool"""
+
+    MAX_WORKERS = 2
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.MAX_WORKERS,
+                        thread_name_prefix='notification-fanout'
+                    )
+        return self._executor
+
+    def _async_enabled(self) -> bool:
+        if has_app_context():
+            return bool(current_app.config.get('NOTIFICATION_FANOUT_ASYNC', True))
+        return True
+
+    def dispatch(
+        self,
+        user_ids: List[str],
+        notification_type: str,
+        title: str,
+        message: str,
+        link: Optional[str] = None,
+        metadata: Optional[Dict] = None
+    ):
+        """
+        Create a notification for each user
+
+        Call after the triggering change is committed; with NOTIFICATION_FANOUT_ASYNC
+        the insert runs in the background and the request returns immediately.
+        """
+        if not user_ids:
+            return
+
+        args = (list(user_ids), notification_type, title, message, link, metadata)
+        if self._async_enabled():
+            self._get_executor().submit(self._fan_out, *args)
+        else:
+            self._fan_out(*args)
+
+    @staticmethod
+    def _fan_out(user_ids, notification_type, title, message, link, metadata):
+        result = mongodb_service.create_notifications_bulk(
+            user_ids=user_ids,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            link=link,
+            metadata=metadata
+        )
+        if not result['success']:
+            logger.error(f"Notification fan-out failed for {len(user_ids)} users: {result.get('error')}")
+
+
+# Global instance
+notification_dispatcher = NotificationDispatcher()
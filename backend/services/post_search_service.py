@@ -0,0 +1,276 @@
+"""Post Search Service - Full-text and tag search over LinkoGenei saved posts"""
+
+from models import db, SavedPost, SavedPostTag
+from utils.search import (
+    FIELD_WEIGHTS, SEARCH_PAGE_SIZE, url_host, normalize_tags, search_terms,
+    encode_search_cursor, decode_search_cursor
+)
+from sqlalchemy import text, case, or_, and_
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+import weakref
+import logging
+
+logger = logging.getLogger(__name__)
+
+# SQLite keeps the search text in an FTS5 table keyed by an integer id from
+# saved_post_search_ids; FTS rowids must be integers and saved_posts has
+# string ids (its implicit rowid is not stable across VACUUM)
+FTS_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS saved_post_search_ids ('
+    'id INTEGER PRIMARY KEY, post_id TEXT NOT NULL UNIQUE)',
+    'CREATE VIRTUAL TABLE IF NOT EXISTS saved_posts_fts USING fts5('
+    "user_id UNINDEXED, title, notes, tags, host, tokenize = 'unicode61 remove_diacritics 2')",
+)
+
+# bm25() takes one weight per FTS column, in declaration order
+BM25_WEIGHTS = ', '.join(str(weight) for weight in (
+    0.0, FIELD_WEIGHTS['title'], FIELD_WEIGHTS['notes'], FIELD_WEIGHTS['tags'], FIELD_WEIGHTS['host']
+))
+
+_fts_ready = weakref.WeakSet()  # engines whose FTS tables are known to exist
+
+
+class PostSearchService:
+    """
+    Search index for SQL saved posts
+
+    Tags are kept in saved_post_tags for indexed tag filters. On SQLite the
+    title, notes, tags and URL host are also indexed in an FTS5 table and
+    ranked with bm25(); other databases fall back to a weighted LIKE score.
+    The index is written in the caller's transaction, so it commits or rolls
+    back with the post itself.
+    """
+
+    @staticmethod
+    def _uses_fts() -> bool:
+        return db.engine.dialect.name == 'sqlite'
+
+    @staticmethod
+    def ensure_fts():
+        """Create the FTS5 tables if this database does not have them yet"""
+        if db.engine in _fts_ready:
+            return
+        for statement in FTS_SCHEMA:
+            db.session.execute(text(statement))
+        _fts_ready.add(db.engine)
+
+    @staticmethod
+    def index_posts(posts: Iterable[SavedPost]):
+        """(Re)index posts; ids must be assigned, so flush new posts first (the caller commits)"""
+        posts = list(posts)
+        if not posts:
+            return
+        post_ids = [post.id for post in posts]
+        SavedPostTag.query.filter(SavedPostTag.post_id.in_(post_ids)).delete(synchronize_session=False)
+        db.session.add_all([
+            SavedPostTag(post_id=post.id, user_id=post.user_id, tag=tag)
+            for post in posts for tag in normalize_tags(post.tags)
+        ])
+        if not PostSearchService._uses_fts():
+            return
+
+        PostSearchService.ensure_fts()
+        db.session.execute(
+            text('INSERT INTO saved_post_search_ids (post_id) VALUES (:post_id) ON CONFLICT (post_id) DO NOTHING'),
+            [{'post_id': post_id} for post_id in post_ids]
+        )
+        rowids = PostSearchService._rowids(post_ids)
+        db.session.execute(
+            text('DELETE FROM saved_posts_fts WHERE rowid = :rowid'),
+            [{'rowid': rowid} for rowid in rowids.values()]
+        )
+        db.session.execute(
+            text('INSERT INTO saved_posts_fts (rowid, user_id, title, notes, tags, host) '
+                 'VALUES (:rowid, :user_id, :title, :notes, :tags, :host)'),
+            [{
+                'rowid': rowids[post.id],
+                'user_id': post.user_id,
+                'title': post.title or '',
+                'notes': post.notes or '',
+                'tags': ' '.join(normalize_tags(post.tags)),
+                'host': url_host(post.url)
+            } for post in posts]
+        )
+
+    @staticmethod
+    def remove_posts(post_ids: Iterable[str]):
+        """Drop posts from the index (the caller commits)"""
+        post_ids = list(post_ids)
+        if not post_ids:
+            return
+        SavedPostTag.query.filter(SavedPostTag.post_id.in_(post_ids)).delete(synchronize_session=False)
+        if not PostSearchService._uses_fts():
+            return
+
+        PostSearchService.ensure_fts()
+        rowids = list(PostSearchService._rowids(post_ids).values())
+        if rowids:
+            db.session.execute(text('DELETE FROM saved_posts_fts WHERE rowid = :rowid'), [{'rowid': r} for r in rowids])
+            db.session.execute(text('DELETE FROM saved_post_search_ids WHERE id = :rowid'), [{'rowid': r} for r in rowids])
+
+    @staticmethod
+    def _rowids(post_ids: List[str]) -> Dict[str, int]:
+        params = {f'p{i}': post_id for i, post_id in enumerate(post_ids)}
+        rows = db.session.execute(
+            text(f"SELECT post_id, id FROM saved_post_search_ids WHERE post_id IN ({', '.join(':' + k for k in params)})"),
+            params
+        )
+        return {post_id: rowid for post_id, rowid in rows}
+
+    @staticmethod
+    def _tag_filter(user_id: str, tags: List[str]):
+        """Subquery of post ids carrying every one of the tags"""
+        return db.session.query(SavedPostTag.post_id).filter(
+            SavedPostTag.user_id == user_id,
+            SavedPostTag.tag.in_(tags)
+        ).group_by(SavedPostTag.post_id).having(db.func.count(SavedPostTag.tag) == len(tags))
+
+    @staticmethod
+    def search(
+        user_id: str,
+        query: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        limit: int = SEARCH_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Search a user's saved posts
+
+        With a query, posts matching any term (by prefix on SQLite) are
+        returned best match first and each post carries its 'score'; with
+        only tags, posts carrying all of them are returned newest first.
+        Pass the returned cursor back to get the next page.
+        """
+        terms = search_terms(query)
+        tags = normalize_tags(tags or [])
+        if not terms and not tags:
+            return {'success': True, 'posts': [], 'cursor': None, 'has_more': False}
+
+        if not terms:
+            return PostSearchService._search_tags(user_id, tags, limit, cursor)
+        if PostSearchService._uses_fts():
+            rows = PostSearchService._rank_fts(user_id, terms, tags, limit, cursor)
+        else:
+            rows = PostSearchService._rank_like(user_id, terms, tags, limit, cursor)
+
+        page = rows[:limit]
+        posts_by_id = {
+            post.id: post for post in SavedPost.query.filter(SavedPost.id.in_([post_id for post_id, _ in page]))
+        }
+        posts = []
+        for post_id, score in page:
+            if post_id in posts_by_id:
+                posts.append({**posts_by_id[post_id].to_dict(), 'score': score})
+        return {
+            'success': True,
+            'posts': posts,
+            'cursor': encode_search_cursor(page[-1][1], page[-1][0]) if page else cursor,
+            'has_more': len(rows) > limit
+        }
+
+    @staticmethod
+    def _rank_fts(user_id: str, terms: List[str], tags: List[str], limit: int,
+                  cursor: Optional[str]) -> List[Tuple[str, float]]:
+        PostSearchService.ensure_fts()
+        params = {
+            'match': ' OR '.join(f'"{term}"*' for term in terms),
+            'user_id': user_id,
+            'limit': limit + 1
+        }
+        conditions = []
+        if tags:
+            params.update({f't{i}': tag for i, tag in enumerate(tags)})
+            conditions.append(
+                f"post_id IN (SELECT post_id FROM saved_post_tags WHERE user_id = :user_id "
+                f"AND tag IN ({', '.join(f':t{i}' for i in range(len(tags)))}) "
+                f"GROUP BY post_id HAVING COUNT(tag) = {len(tags)})"
+            )
+        if cursor:
+            params['after_score'], params['after_id'] = decode_search_cursor(cursor)
+            conditions.append('(score < :after_score OR (score = :after_score AND post_id > :after_id))')
+
+        # bm25() is lower-is-better; negate it so scores sort like the other backends
+        rows = db.session.execute(text(
+            f'SELECT post_id, score FROM ('
+            f'SELECT ids.post_id AS post_id, -bm25(saved_posts_fts, {BM25_WEIGHTS}) AS score '
+            f'FROM saved_posts_fts JOIN saved_post_search_ids AS ids ON ids.id = saved_posts_fts.rowid '
+            f'WHERE saved_posts_fts MATCH :match AND saved_posts_fts.user_id = :user_id'
+            f') {"WHERE " + " AND ".join(conditions) if conditions else ""} '
+            f'ORDER BY score DESC, post_id ASC LIMIT :limit'
+        ), params)
+        return [(post_id, score) for post_id, score in rows]
+
+    @staticmethod
+    def _rank_like(user_id: str, terms: List[str], tags: List[str], limit: int,
+                   cursor: Optional[str]) -> List[Tuple[str, float]]:
+        # Host matches are approximated by the URL, and tags by their JSON text
+        fields = (
+            (SavedPost.title, FIELD_WEIGHTS['title']),
+            (SavedPost.tags, FIELD_WEIGHTS['tags']),
+            (SavedPost.url, FIELD_WEIGHTS['host']),
+            (SavedPost.notes, FIELD_WEIGHTS['notes'])
+        )
+        matches, score = [], 0.0
+        for term in terms:
+            for column, weight in fields:
+                match = db.func.lower(column).contains(term, autoescape=True)
+                matches.append(match)
+                score = score + case((match, weight), else_=0.0)
+        score = score.label('score')
+
+        ranked = db.session.query(SavedPost.id.label('post_id'), score).filter(
+            SavedPost.user_id == user_id, or_(*matches)
+        )
+        if tags:
+            ranked = ranked.filter(SavedPost.id.in_(PostSearchService._tag_filter(user_id, tags)))
+        ranked = ranked.subquery()
+
+        query = db.session.query(ranked.c.post_id, ranked.c.score)
+        if cursor:
+            after_score, after_id = decode_search_cursor(cursor)
+            query = query.filter(or_(
+                ranked.c.score < after_score,
+                and_(ranked.c.score == after_score, ranked.c.post_id > after_id)
+            ))
+        rows = query.order_by(ranked.c.score.desc(), ranked.c.post_id.asc()).limit(limit + 1)
+        return [(post_id, float(score)) for post_id, score in rows]
+
+    @staticmethod
+    def _search_tags(user_id: str, tags: List[str], limit: int, cursor: Optional[str]) -> Dict[str, Any]:
+        query = SavedPost.query.filter(
+            SavedPost.user_id == user_id,
+            SavedPost.id.in_(PostSearchService._tag_filter(user_id, tags))
+        )
+        if cursor:
+            created_at, post_id = cursor.rsplit('|', 1)
+            created_at = datetime.fromisoformat(created_at)
+            query = query.filter(or_(
+                SavedPost.created_at < created_at,
+                and_(SavedPost.created_at == created_at, SavedPost.id < post_id)
+            ))
+        rows = query.order_by(SavedPost.created_at.desc(), SavedPost.id.desc()).limit(limit + 1).all()
+        page = rows[:limit]
+        return {
+            'success': True,
+            'posts': [post.to_dict() for post in page],
+            'cursor': f'{page[-1].created_at.isoformat()}|{page[-1].id}' if page else cursor,
+            'has_more': len(rows) > limit
+        }
+
+    @staticmethod
+    def rebuild_index(batch_size: int = 500) -> int:
+        """Index every saved post, committing per batch; returns how many were indexed"""
+        indexed, last_id = 0, ''
+        while True:
+            posts = SavedPost.query.filter(SavedPost.id > last_id).order_by(SavedPost.id).limit(batch_size).all()
+            if not posts:
+                break
+            PostSearchService.index_posts(posts)
+            db.session.commit()
+            indexed += len(posts)
+            last_id = posts[-1].id
+        return indexed
+
+# Create singleton instance
+post_search_service = PostSearchService()
@@ -16,15 +16,12 @@ except ImportError:
     logger.warning("bson module not available - MongoDB features will be limited")
 
 class ProfileService:
-    def __init__(self):
-        # Use the mongodb_service's db attribute to get the collection
-        # If MongoDB is not available, this will be None
-        if mongodb_service.db is not None:
-            self.collection = mongodb_service.db['user_profiles']
-        else:
-            self.collection = None
-            logger.warning("Profile service initialized without MongoDB - features will be limited")
-    
+    @property
+    def collection(self):
+        # Resolved per use: mongodb_service connects lazily and may switch
+        # from the embedded store to MongoDB once the server comes back
+        return mongodb_service.db['user_profiles']
+
     def get_profile(self, user_id):
         """Get user profile from MongoDB"""
         if self.collection is None:
@@ -0,0 +1,103 @@
+"""Project Invitation Service - Issues and redeems hashed project invitation tokens"""
+
+from flask import current_app, has_app_context
+from models import db, ProjectInvitation
+from typing import Optional, Tuple
+from datetime import datetime, timezone, timedelta
+import hashlib
+import secrets
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectInvitationService:
+    """Invitation links live in project_invitations, looked up by the token's hash
+
+    The raw token is only returned once, when the link is generated.
+    """
+
+    @staticmethod
+    def hash_token(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _config(key: str, default: int) -> int:
+        if has_app_context():
+            return current_app.config.get(key, default)
+        return default
+
+    @staticmethod
+    def create(project_id: str, user, ttl_days: Optional[int] = None, max_uses: Optional[int] = None) -> Tuple[str, ProjectInvitation]:
+        """Stage a new invitation (the caller commits) and return its raw token"""
+        if ttl_days is None:
+            ttl_days = ProjectInvitationService._config('PROJECT_INVITATION_TTL_DAYS', 7)
+        if max_uses is None:
+            max_uses = ProjectInvitationService._config('PROJECT_INVITATION_MAX_USES', 10)
+
+        token = secrets.token_urlsafe(32)
+        now = datetime.now(timezone.utc)
+        invitation = ProjectInvitation(
+            project_id=project_id,
+            token_hash=ProjectInvitationService.hash_token(token),
+            created_by=user.id,
+            created_by_email=user.email,
+            uses=0,
+            max_uses=max_uses,
+            created_at=now,
+            expires_at=now + timedelta(days=ttl_days)
+        )
+        db.session.add(invitation)
+        return token, invitation
+
+    @staticmethod
+    def validate(project_id: str, token: str) -> Tuple[Optional[ProjectInvitation], Optional[Tuple[int, str]]]:
+        """
+        Look up a usable invitation for a project
+
+        Returns:
+            (invitation, error) - error is (status, message) or None
+        """
+        invitation = ProjectInvitation.query.filter_by(
+            token_hash=ProjectInvitationService.hash_token(token)
+        ).first()
+        if not invitation or invitation.project_id != project_id:
+            return None, (404, 'Invalid invitation link')
+
+        expires_at = invitation.expires_at
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if datetime.now(timezone.utc) > expires_at:
+            return None, (400, 'Invitation link has expired')
+        if invitation.uses >= invitation.max_uses:
+            return None, (400, 'Invitation link has reached maximum uses')
+        return invitation, None
+
+    @staticmethod
+    def consume(invitation: ProjectInvitation) -> bool:
+        """Count one use; False when concurrent joins used the last one first"""
+        updated = ProjectInvitation.query.filter(
+            ProjectInvitation.id == invitation.id,
+            ProjectInvitation.uses < ProjectInvitation.max_uses
+        ).update({ProjectInvitation.uses: ProjectInvitation.uses + 1}, synchronize_session=False)
+        return updated > 0
+
+    @staticmethod
+    def delete_project(project_id: str):
+        """Drop all invitations of a deleted project"""
+        ProjectInvitation.query.filter_by(project_id=project_id).delete(synchronize_session=False)
+
+    @staticmethod
+    def sweep() -> int:
+        """Delete expired and used-up invitations; returns how many were removed"""
+        removed = ProjectInvitation.query.filter(
+            (ProjectInvitation.expires_at < datetime.now(timezone.utc)) |
+            (ProjectInvitation.uses >= ProjectInvitation.max_uses)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        logger.info(f"Swept {removed} project invitations")
+        return removed
+
+
+# Create singleton instance
+project_invitation_service = ProjectInvitationService()
@@ -0,0 +1,242 @@
+"""Project Stats Service - Maintains task counters and cached leader report counts for team projects"""
+
+from models import db, ProjectTaskCounter, ProjectReport
+from sqlalchemy.exc import IntegrityError
+from collections import defaultdict
+from typing import Dict, List, Any, Optional
+from datetime import datetime, timezone
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Counter row holding the whole-project totals
+PROJECT_TOTAL = ''
+
+# Task statuses written by the board and the review flow, mapped to counter fields
+STATUS_COUNTERS = {
+    'todo': 'todo',
+    'doing': 'doing',
+    'in-progress': 'doing',
+    'done': 'done'
+}
+
+
+class ProjectStatsService:
+    """Keeps ProjectTaskCounter rows in step with task writes and serves cached reports"""
+
+    @staticmethod
+    def task_counters(task: Optional[Dict[str, Any]]) -> List[str]:
+        """Counter fields a task currently contributes to"""
+        if not task:
+            return []
+        fields = []
+        status_field = STATUS_COUNTERS.get(task.get('status', 'todo'))
+        if status_field:
+            fields.append(status_field)
+        if task.get('submission'):
+            fields.append('submitted')
+        if (task.get('review') or {}).get('action') == 'approve':
+            fields.append('reviewed')
+        return fields
+
+    @staticmethod
+    def _deltas(old_tasks: List[Dict[str, Any]], new_tasks: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+        """Per-member counter changes between two versions of a task list"""
+        deltas = defaultdict(lambda: defaultdict(int))
+        old_by_id = {task.get('id'): task for task in old_tasks if task.get('id')}
+        new_by_id = {task.get('id'): task for task in new_tasks if task.get('id')}
+
+        for task_id in set(old_by_id) | set(new_by_id):
+            old_task = old_by_id.get(task_id)
+            new_task = new_by_id.get(task_id)
+            if old_task == new_task:
+                continue
+            for task, sign in ((old_task, -1), (new_task, 1)):
+                for field in ProjectStatsService.task_counters(task):
+                    deltas[PROJECT_TOTAL][field] += sign
+                    if task.get('assignee'):
+                        deltas[task['assignee']][field] += sign
+
+        return {
+            member: {field: value for field, value in fields.items() if value}
+            for member, fields in deltas.items()
+            if any(fields.values())
+        }
+
+    @staticmethod
+    def apply_task_changes(
+        project_id: str,
+        old_tasks: List[Dict[str, Any]],
+        new_tasks: List[Dict[str, Any]],
+        all_tasks: Optional[List[Dict[str, Any]]] = None
+    ):
+        """
+        Update counters for a task write (staged on the session; the caller commits)
+
+        Only tasks that changed are looked at. Projects without counters yet are
+        rebuilt from all_tasks instead (the new task list when not given, which
+        suits whole-list writes).
+        """
+        if not ProjectTaskCounter.query.filter_by(project_id=project_id, member_email=PROJECT_TOTAL).count():
+            ProjectStatsService.rebuild(project_id, new_tasks if all_tasks is None else all_tasks)
+            return
+
+        deltas = ProjectStatsService._deltas(old_tasks, new_tasks)
+        if deltas:
+            ProjectStatsService._bump_version(project_id)
+
+        for member_email, fields in deltas.items():
+            increments = {
+                getattr(ProjectTaskCounter, field): getattr(ProjectTaskCounter, field) + value
+                for field, value in fields.items()
+            }
+            updated = ProjectTaskCounter.query.filter_by(
+                project_id=project_id, member_email=member_email
+            ).update(increments, synchronize_session=False)
+            if updated:
+                continue
+            try:
+                with db.session.begin_nested():
+                    db.session.add(ProjectTaskCounter(project_id=project_id, member_email=member_email, **fields))
+            except IntegrityError:
+                ProjectTaskCounter.query.filter_by(
+                    project_id=project_id, member_email=member_email
+                ).update(increments, synchronize_session=False)
+
+    @staticmethod
+    def _bump_version(project_id: str):
+        """Mark the cached report stale: counters of the project are about to change"""
+        increment = {ProjectReport.counters_version: ProjectReport.counters_version + 1}
+        if ProjectReport.query.filter_by(project_id=project_id).update(increment, synchronize_session=False):
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.add(ProjectReport(project_id=project_id, counters_version=1))
+        except IntegrityError:
+            ProjectReport.query.filter_by(project_id=project_id).update(increment, synchronize_session=False)
+
+    @staticmethod
+    def rebuild(project_id: str, tasks: List[Dict[str, Any]]):
+        """Recompute every counter row of a project from its task list"""
+        ProjectStatsService._bump_version(project_id)
+        ProjectTaskCounter.query.filter_by(project_id=project_id).delete(synchronize_session=False)
+        deltas = ProjectStatsService._deltas([], tasks)
+        deltas.setdefault(PROJECT_TOTAL, {})
+        db.session.add_all([
+            ProjectTaskCounter(project_id=project_id, member_email=member_email, **fields)
+            for member_email, fields in deltas.items()
+        ])
+        db.session.flush()
+
+    @staticmethod
+    def delete_project(project_id: str):
+        """Drop counters and cached report of a deleted project"""
+        ProjectTaskCounter.query.filter_by(project_id=project_id).delete(synchronize_session=False)
+        ProjectReport.query.filter_by(project_id=project_id).delete(synchronize_session=False)
+
+    @staticmethod
+    def get_counters(project_id: str, tasks: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+        """Counters keyed by member email ('' for the project), building them on first use"""
+        rows = ProjectTaskCounter.query.filter_by(project_id=project_id).all()
+        if not any(row.member_email == PROJECT_TOTAL for row in rows):
+            ProjectStatsService.rebuild(project_id, tasks)
+            db.session.commit()
+            rows = ProjectTaskCounter.query.filter_by(project_id=project_id).all()
+        return {row.member_email: row.to_dict() for row in rows}
+
+    @staticmethod
+    def _cached_counts(project, tasks: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+        """
+        Counters keyed by member email, from the cached report while no task counter changed since
+
+        The cache is keyed on counters_version, which only task writes bump, so chat
+        messages and daily updates (which touch the project row) leave it valid. The
+        version is read before the counters: a write racing a rebuild leaves the
+        cache one version behind, never ahead.
+        """
+        cached = ProjectReport.query.get(project.id)
+        if cached is not None and cached.report and cached.source_version == cached.counters_version:
+            return json.loads(cached.report)
+
+        version = cached.counters_version if cached is not None else 0
+        counters = ProjectStatsService.get_counters(project.id, tasks)
+
+        if cached is None:
+            # get_counters may have created the row while building the counters
+            cached = ProjectReport.query.get(project.id)
+        if cached is None:
+            cached = ProjectReport(project_id=project.id, counters_version=version)
+            db.session.add(cached)
+        cached.report = json.dumps(counters)
+        cached.source_version = version
+        cached.generated_at = datetime.now(timezone.utc)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A task write or another request created the row first
+            db.session.rollback()
+
+        return counters
+
+    @staticmethod
+    def get_report(project, project_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Leader report for a project
+
+        Task counts come from the maintained counters (cached per counters_version);
+        members, roles, recent updates and submitted tasks are read from the project
+        data the caller already loaded, so they are never cached.
+
+        total_tasks is todo + doing + done. Tasks sent back by a rejected review
+        ('in-progress') count as in progress; before the counters they were only
+        part of the total.
+        """
+        tasks = project_data.get('tasks', [])
+        member_roles = project_data.get('member_roles', {})
+        daily_updates = project_data.get('daily_updates', [])
+        members_list = json.loads(project.members) if project.members else []
+
+        counters = ProjectStatsService._cached_counts(project, tasks)
+        empty = {field: 0 for field in ProjectTaskCounter.COUNTER_FIELDS}
+        totals = counters.get(PROJECT_TOTAL, empty)
+        total_tasks = totals['todo'] + totals['doing'] + totals['done']
+
+        member_stats = {}
+        for member_email in members_list:
+            member = counters.get(member_email, empty)
+            member_stats[member_email] = {
+                'total_tasks': member['todo'] + member['doing'] + member['done'],
+                'completed': member['done'],
+                'in_progress': member['doing'],
+                'todo': member['todo'],
+                'submitted': member['submitted'],
+                'reviewed': member['reviewed'],
+                'role': member_roles.get(member_email, 'member')
+            }
+
+        return {
+            'project_id': project.id,
+            'project_name': project.name,
+            'owner_id': project.owner_id,
+            'created_at': project.created_at.isoformat() if project.created_at else None,
+            'summary': {
+                'total_members': len(members_list),
+                'total_tasks': total_tasks,
+                'completed_tasks': totals['done'],
+                'in_progress_tasks': totals['doing'],
+                'todo_tasks': totals['todo'],
+                'submitted': totals['submitted'],
+                'reviewed': totals['reviewed'],
+                'completion_rate': round((totals['done'] / total_tasks * 100) if total_tasks > 0 else 0, 2)
+            },
+            'tasks': tasks,
+            'submitted_tasks': [t for t in tasks if t.get('submission')],
+            'member_stats': member_stats,
+            'recent_updates': daily_updates[:10],
+            'members': members_list
+        }
+
+
+# Create singleton instance
+project_stats_service = ProjectStatsService()
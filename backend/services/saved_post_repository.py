@@ -0,0 +1,215 @@
+"""Saved Post Repository - One interface over the SQL and MongoDB stores of LinkoGenei data"""
+
+from flask import current_app, has_app_context
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+import logging
+
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKENDS = ('sql', 'mongodb')
+
+
+class SavedPostRepository(ABC):
+    """
+    Storage of saved posts, their categories and the extension tokens
+
+    Both backends keep the same contract, checked by
+    test_saved_post_repository.py: URLs are deduplicated per user by their
+    canonical form, tags are normalized, category and stats counters follow
+    every save/move/delete (never below zero), unknown or malformed post ids
+    are simply not found, and update_post only changes category, notes,
+    tags and title. Methods report failures as {'success': False, 'error': ...}
+    like the services they wrap.
+    """
+
+    name = None
+
+    # ---------- extension tokens ----------
+
+    @abstractmethod
+    def store_extension_token(self, user_id: str, token: str, expires_at: datetime) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def verify_extension_token(self, token: str) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def delete_extension_token(self, token: str) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def sweep_expired_tokens(self) -> int:
+        pass
+
+    # ---------- posts ----------
+
+    @abstractmethod
+    def save_post(self, user_id: str, post_data: Dict[str, Any]) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def save_posts_batch(self, user_id: str, posts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def get_posts(self, user_id: str, category: Optional[str] = None, platform: Optional[str] = None,
+                  limit: int = 50, skip: int = 0) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def iter_posts(self, user_id: str, category: Optional[str] = None,
+                   platform: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Every post get_posts would list, newest first, without loading them all at once"""
+
+    @abstractmethod
+    def get_post_by_id(self, user_id: str, post_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def update_post(self, user_id: str, post_id: str, update_data: Dict[str, Any]) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def delete_post(self, user_id: str, post_id: str) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def search_posts(self, user_id: str, query: Optional[str] = None, tags: Optional[List[str]] = None,
+                     limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        pass
+
+    # ---------- extension sync ----------
+
+    @abstractmethod
+    def decode_cursor(self, cursor: str) -> Tuple[datetime, Any]:
+        """Parse a sync cursor; raises ValueError when it is malformed"""
+
+    @abstractmethod
+    def get_changes(self, user_id: str, cursor: Optional[str] = None, limit: int = 200) -> Dict[str, Any]:
+        pass
+
+    # ---------- categories and stats ----------
+
+    @abstractmethod
+    def get_categories(self, user_id: str) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def create_category(self, user_id: str, name: str, color: str = '#667eea') -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def get_stats(self, user_id: str) -> Dict[str, Any]:
+        pass
+
+
+class ServiceSavedPostRepository(SavedPostRepository):
+    """
+    Repository that forwards to a storage service with the same method names
+
+    Both LinkoGeneiService and MongoDBService implement the contract directly;
+    only the token sweep is named differently (sweep_method).
+    """
+
+    sweep_method = 'sweep_expired_tokens'
+
+    def __init__(self, service):
+        self._service = service
+
+    def store_extension_token(self, user_id, token, expires_at):
+        return self._service.store_extension_token(user_id, token, expires_at)
+
+    def verify_extension_token(self, token):
+        return self._service.verify_extension_token(token)
+
+    def delete_extension_token(self, token):
+        return self._service.delete_extension_token(token)
+
+    def sweep_expired_tokens(self):
+        return getattr(self._service, self.sweep_method)()
+
+    def save_post(self, user_id, post_data):
+        return self._service.save_post(user_id, post_data)
+
+    def save_posts_batch(self, user_id, posts):
+        return self._service.save_posts_batch(user_id, posts)
+
+    def get_posts(self, user_id, category=None, platform=None, limit=50, skip=0):
+        return self._service.get_posts(user_id, category=category, platform=platform, limit=limit, skip=skip)
+
+    def iter_posts(self, user_id, category=None, platform=None):
+        return self._service.iter_posts(user_id, category=category, platform=platform)
+
+    def get_post_by_id(self, user_id, post_id):
+        return self._service.get_post_by_id(user_id, post_id)
+
+    def update_post(self, user_id, post_id, update_data):
+        return self._service.update_post(user_id, post_id, update_data)
+
+    def delete_post(self, user_id, post_id):
+        return self._service.delete_post(user_id, post_id)
+
+    def search_posts(self, user_id, query=None, tags=None, limit=20, cursor=None):
+        return self._service.search_posts(user_id, query, tags, limit, cursor)
+
+    def decode_cursor(self, cursor):
+        return self._service.decode_cursor(cursor)
+
+    def get_changes(self, user_id, cursor=None, limit=200):
+        return self._service.get_changes(user_id, cursor, limit)
+
+    def get_categories(self, user_id):
+        return self._service.get_categories(user_id)
+
+    def create_category(self, user_id, name, color='#667eea'):
+        return self._service.create_category(user_id, name, color)
+
+    def get_stats(self, user_id):
+        return self._service.get_stats(user_id)
+
+
+class SQLSavedPostRepository(ServiceSavedPostRepository):
+    """Saved posts in the app database (LinkoGeneiService)"""
+
+    name = 'sql'
+
+    def __init__(self):
+        from services.linkogenei_service import LinkoGeneiService
+        super().__init__(LinkoGeneiService)
+
+
+class MongoSavedPostRepository(ServiceSavedPostRepository):
+    """Saved posts in MongoDB, or the embedded document store while it is unreachable (MongoDBService)"""
+
+    name = 'mongodb'
+    sweep_method = 'sweep_expired_extension_tokens'
+
+    def __init__(self, service=None):
+        if service is None:
+            from services.mongodb_service import mongodb_service as service
+        super().__init__(service)
+
+
+_repositories = {}
+
+
+def get_saved_post_repository(backend: Optional[str] = None) -> SavedPostRepository:
+    """
+    Repository for the configured backend (LINKOGENEI_STORAGE_BACKEND, default 'sql')
+
+    Raises ValueError for an unknown backend name.
+    """
+    if backend is None:
+        backend = current_app.config.get('LINKOGENEI_STORAGE_BACKEND', 'sql') if has_app_context() else 'sql'
+    backend = (backend or 'sql').lower()
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown LinkoGenei storage backend '{backend}' (expected one of: {', '.join(STORAGE_BACKENDS)})")
+
+    repository = _repositories.get(backend)
+    if repository is None:
+        repository = SQLSavedPostRepository() if backend == 'sql' else MongoSavedPostRepository()
+        _repositories[backend] = repository
+    return repository
@@ -0,0 +1,147 @@
+"""Team Activity Service - Append-only activity log behind the team activity feed"""
+
+from flask import current_app, has_app_context
+from models import db, TeamActivity
+from sqlalchemy import or_, and_
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime, timezone, timedelta
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_ICONS = {
+    'project_created': '📁',
+    'member_added': '👥',
+    'request_pending': '📬',
+    'request_accepted': '✅',
+    'request_rejected': '❌',
+    'chat_message': '💬'
+}
+
+COMPACT_BATCH_SIZE = 1000
+
+
+class TeamActivityService:
+    """Writes activity events as team state changes and reads them back as a paged feed
+
+    record() only stages rows on the current session; the caller commits them
+    together with the change they describe.
+    """
+
+    @staticmethod
+    def record(
+        user_ids: List[str],
+        activity_type: str,
+        title: str,
+        description: str = '',
+        actor=None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """Stage one event row for each user whose feed should show it"""
+        now = datetime.now(timezone.utc)
+        details = json.dumps(metadata) if metadata else None
+        db.session.add_all([
+            TeamActivity(
+                user_id=user_id,
+                actor_id=actor.id if actor else None,
+                actor_name=(actor.display_name or actor.email) if actor else None,
+                activity_type=activity_type,
+                icon=ACTIVITY_ICONS.get(activity_type),
+                title=title,
+                description=description,
+                details=details,
+                created_at=now
+            )
+            for user_id in dict.fromkeys(user_ids) if user_id
+        ])
+
+    @staticmethod
+    def encode_cursor(activity: TeamActivity) -> str:
+        """Opaque position of a row; stays valid after the row itself is compacted away"""
+        return f'{activity.created_at.isoformat()}|{activity.id}'
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        created_at, activity_id = cursor.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(activity_id)
+
+    @staticmethod
+    def feed(user_id: str, limit: int, before: Optional[str] = None) -> Tuple[List[TeamActivity], bool]:
+        """
+        Newest-first page of a user's feed
+
+        Returns:
+            (activities, has_more)
+        """
+        query = TeamActivity.query.filter(TeamActivity.user_id == user_id)
+        if before:
+            created_at, activity_id = TeamActivityService.decode_cursor(before)
+            query = query.filter(or_(
+                TeamActivity.created_at < created_at,
+                and_(TeamActivity.created_at == created_at, TeamActivity.id < activity_id)
+            ))
+        activities = query.order_by(
+            TeamActivity.created_at.desc(), TeamActivity.id.desc()
+        ).limit(limit + 1).all()
+        return activities[:limit], len(activities) > limit
+
+    @staticmethod
+    def compact(older_than_days: Optional[int] = None) -> Dict[str, int]:
+        """
+        Fold events older than the horizon into one row per user, type and day
+
+        Commits as it goes. Groups holding a single event are left as they are,
+        so running this again only touches days that gained new old events.
+        """
+        if older_than_days is None:
+            older_than_days = 90
+            if has_app_context():
+                older_than_days = current_app.config.get('TEAM_ACTIVITY_COMPACT_AFTER_DAYS', 90)
+        horizon = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+
+        user_ids = [
+            row.user_id for row in db.session.query(TeamActivity.user_id)
+            .filter(TeamActivity.created_at < horizon).distinct()
+        ]
+
+        stats = {'users': len(user_ids), 'removed': 0, 'summaries': 0}
+        for user_id in user_ids:
+            groups = {}
+            old_rows = TeamActivity.query.filter(
+                TeamActivity.user_id == user_id, TeamActivity.created_at < horizon
+            ).order_by(TeamActivity.created_at.asc(), TeamActivity.id.asc()).yield_per(COMPACT_BATCH_SIZE)
+            for row in old_rows:
+                key = (row.activity_type, row.created_at.date())
+                groups.setdefault(key, []).append(
+                    (row.id, row.count or 1, row.created_at, row.icon, row.title, row.details)
+                )
+
+            for (activity_type, day), rows in groups.items():
+                if len(rows) < 2:
+                    continue
+                total = sum(count for _, count, _, _, _, _ in rows)
+                _, _, last_at, icon, title, _ = rows[-1]
+                TeamActivity.query.filter(
+                    TeamActivity.id.in_([row_id for row_id, _, _, _, _, _ in rows])
+                ).delete(synchronize_session=False)
+                db.session.add(TeamActivity(
+                    user_id=user_id,
+                    activity_type=activity_type,
+                    icon=icon,
+                    title=title,
+                    description=f'{total} × {title} on {day.isoformat()}',
+                    details=json.dumps({'compacted': True, 'day': day.isoformat()}),
+                    count=total,
+                    created_at=last_at
+                ))
+                stats['removed'] += len(rows)
+                stats['summaries'] += 1
+            db.session.commit()
+
+        logger.info(f"Compacted team activity: {stats}")
+        return stats
+
+
+# Create singleton instance
+team_activity_service = TeamActivityService()
@@ -0,0 +1,112 @@
+"""Team Chat Service - Maintains per-pair conversation summaries for team direct messages"""
+
+from models import db, TeamChat, TeamConversation
+from sqlalchemy.exc import IntegrityError
+from typing import Dict, Any
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TeamChatService:
+    """Keeps TeamConversation rows in step with TeamChat messages
+
+    Methods only stage changes on the current session; the caller commits them
+    together with the message write so both stay consistent.
+    """
+
+    @staticmethod
+    def _unread_column(conversation_pair, user_id: str):
+        """The unread counter column belonging to user_id within a pair"""
+        user_a_id, _ = conversation_pair
+        return TeamConversation.unread_a if user_id == user_a_id else TeamConversation.unread_b
+
+    @staticmethod
+    def record_message(sender_id: str, receiver_id: str, message: str, sent_at: datetime):
+        """Update the pair summary for a newly sent message (creating it on first message)"""
+        pair = TeamConversation.pair(sender_id, receiver_id)
+        unread_column = TeamChatService._unread_column(pair, receiver_id)
+
+        values = {
+            TeamConversation.last_message: message,
+            TeamConversation.last_sender_id: sender_id,
+            TeamConversation.last_message_at: sent_at,
+            unread_column: unread_column + 1
+        }
+
+        updated = TeamConversation.query.filter_by(
+            user_a_id=pair[0], user_b_id=pair[1]
+        ).update(values, synchronize_session=False)
+
+        if updated:
+            return
+
+        try:
+            with db.session.begin_nested():
+                db.session.add(TeamConversation(
+                    user_a_id=pair[0],
+                    user_b_id=pair[1],
+                    last_message=message,
+                    last_sender_id=sender_id,
+                    last_message_at=sent_at,
+                    unread_a=1 if receiver_id == pair[0] else 0,
+                    unread_b=1 if receiver_id == pair[1] else 0
+                ))
+        except IntegrityError:
+            # Another request created the summary first; apply the increment to it
+            TeamConversation.query.filter_by(
+                user_a_id=pair[0], user_b_id=pair[1]
+            ).update(values, synchronize_session=False)
+
+    @staticmethod
+    def mark_read(reader_id: str, other_user_id: str) -> int:
+        """Reset the reader's unread counter; returns the number of summary rows changed"""
+        pair = TeamConversation.pair(reader_id, other_user_id)
+        unread_column = TeamChatService._unread_column(pair, reader_id)
+
+        return TeamConversation.query.filter(
+            TeamConversation.user_a_id == pair[0],
+            TeamConversation.user_b_id == pair[1],
+            unread_column > 0
+        ).update({unread_column: 0}, synchronize_session=False)
+
+    @staticmethod
+    def clear(user_id: str, other_user_id: str):
+        """Drop the pair summary after its messages are deleted"""
+        pair = TeamConversation.pair(user_id, other_user_id)
+        TeamConversation.query.filter_by(
+            user_a_id=pair[0], user_b_id=pair[1]
+        ).delete(synchronize_session=False)
+
+    @staticmethod
+    def backfill_conversations(batch_size: int = 1000) -> Dict[str, Any]:
+        """Rebuild every TeamConversation row from the existing team_chats rows
+
+        Streams messages oldest first, so the last message seen for a pair is its latest.
+        """
+        summaries = {}
+
+        query = TeamChat.query.order_by(TeamChat.created_at.asc()).yield_per(batch_size)
+        for chat in query:
+            pair = TeamConversation.pair(chat.sender_id, chat.receiver_id)
+            summary = summaries.setdefault(pair, {'unread_a': 0, 'unread_b': 0})
+            summary['last_message'] = chat.message
+            summary['last_sender_id'] = chat.sender_id
+            summary['last_message_at'] = chat.created_at
+            if not chat.is_read:
+                summary['unread_a' if chat.receiver_id == pair[0] else 'unread_b'] += 1
+
+        TeamConversation.query.delete(synchronize_session=False)
+        db.session.bulk_insert_mappings(TeamConversation, [
+            {'user_a_id': pair[0], 'user_b_id': pair[1], **summary}
+            for pair, summary in summaries.items()
+        ])
+        db.session.commit()
+
+        logger.info(f'Backfilled {len(summaries)} team conversation summaries')
+        return {'success': True, 'conversations': len(summaries)}
+
+
+# Create singleton instance
+team_chat_service = TeamChatService()
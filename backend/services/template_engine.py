@@ -0,0 +1,291 @@
+"""Template Engine - Compiled, DB-backed templates for offline content generation"""
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, bindparam
+from models import db, ContentTemplate
+from string import Formatter
+from typing import Dict, List, Any, Optional
+from collections import Counter
+import threading
+import atexit
+import random
+import json
+import ast
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Built-in templates, used for content types that have no active ContentTemplate rows
+DEFAULT_TEMPLATES: Dict[str, List[str]] = {
+    'article': [
+        "# {title}\n\nIn today's rapidly evolving landscape, {topic} has become increasingly important. This comprehensive guide explores the key aspects that make {subject} essential for success.\n\n## Key Insights\n\n{topic} offers numerous benefits including improved efficiency, better outcomes, and enhanced user experience. By understanding these principles, you can leverage {subject} to achieve your goals.\n\n## Best Practices\n\n1. Start with a clear strategy\n2. Focus on user needs\n3. Measure and optimize results\n4. Stay updated with latest trends\n\n## Conclusion\n\nImplementing {topic} effectively requires dedication and the right approach. With these insights, you're well-equipped to succeed in your {subject} journey.",
+        
+        "# Understanding {title}\n\n{topic} represents a significant opportunity for growth and innovation. This article delves into the practical applications and benefits of {subject}.\n\n## The Current Landscape\n\nThe field of {topic} is experiencing unprecedented growth. Organizations worldwide are recognizing the value of {subject} in driving results.\n\n## Implementation Strategies\n\n- Define clear objectives\n- Develop a structured approach\n- Monitor progress regularly\n- Adapt based on feedback\n\n## Future Outlook\n\nAs we look ahead, {topic} will continue to evolve. Staying informed about {subject} trends will be crucial for long-term success."
+    ],
+    
+    'social-post': [
+        "🚀 Excited to share insights about {topic}! \n\n{subject} is transforming the way we approach challenges. Here are 3 key takeaways:\n\n✅ Innovation drives results\n✅ User experience matters most\n✅ Continuous learning is essential\n\nWhat's your experience with {topic}? Share your thoughts below! 👇\n\n#Innovation #Growth #Success",
+        
+        "💡 Quick tip about {topic}:\n\n{subject} can significantly impact your results when implemented correctly. The secret? Focus on value creation and user needs.\n\n🎯 Pro tip: Start small, measure everything, and scale what works.\n\nTry this approach and let me know how it goes! 🚀\n\n#Tips #Strategy #Results",
+        
+        "🌟 Just discovered something amazing about {topic}!\n\n{subject} is changing the game in ways we never imagined. The possibilities are endless when you combine creativity with strategy.\n\nWho else is excited about the future of {topic}? Let's discuss! 💬\n\n#Future #Innovation #Community"
+    ],
+    
+    'email': [
+        "Subject: Transform Your Approach to {title}\n\nHi there!\n\nI hope this email finds you well. I wanted to share some exciting insights about {subject} that could revolutionize your approach to {topic}.\n\nRecent developments show that organizations implementing {subject} see significant improvements in:\n\n• Efficiency and productivity\n• User satisfaction\n• Overall results\n\nThe key is understanding how to leverage {topic} effectively. Would you like to learn more about implementing these strategies?\n\nBest regards,\nThe ContentGenie Team",
+        
+        "Subject: Exclusive Insights on {title}\n\nDear Valued Reader,\n\nWe're thrilled to share the latest developments in {subject} that are making waves in the {topic} industry.\n\nOur research indicates that successful implementation of {subject} requires:\n\n1. Clear strategic vision\n2. User-centered approach\n3. Continuous optimization\n\nThese insights have helped countless professionals achieve remarkable results with {topic}.\n\nReady to take your {subject} strategy to the next level?\n\nWarm regards,\nYour Content Team"
+    ],
+    
+    'blog': [
+        "# The Complete Guide to {title}\n\nWelcome to our comprehensive exploration of {subject}. In this detailed post, we'll uncover the strategies that successful professionals use to master {topic}.\n\n## Table of Contents\n1. Introduction to {subject}\n2. Key Benefits and Applications\n3. Implementation Best Practices\n4. Common Challenges and Solutions\n5. Future Trends and Opportunities\n\n## Introduction\n\n{topic} has emerged as a critical factor in achieving success. Understanding {subject} is no longer optional—it's essential for staying competitive.\n\n## Key Benefits\n\nImplementing {subject} effectively can lead to:\n- Improved efficiency\n- Better user experience\n- Increased ROI\n- Competitive advantage\n\n## Best Practices\n\nSuccessful {topic} implementation requires a structured approach. Here are the proven strategies that deliver results...\n\n*[Continue reading for detailed implementation guide]*",
+        
+        "# Why {title} Matters More Than Ever\n\nIn an increasingly competitive landscape, understanding {subject} has become crucial for professionals looking to stay ahead.\n\n## The Current State of {topic}\n\nThe field of {topic} is evolving rapidly. Organizations that embrace {subject} are seeing remarkable improvements in their outcomes.\n\n## What Makes {subject} Effective?\n\nOur analysis reveals three critical factors:\n\n### 1. Strategic Alignment\nSuccessful {topic} initiatives align with broader business objectives.\n\n### 2. User-Centric Design\nThe best {subject} solutions prioritize user needs and experience.\n\n### 3. Continuous Improvement\nTop performers constantly refine their {topic} approach based on data and feedback.\n\n## Getting Started\n\nReady to implement {subject} in your organization? Here's your roadmap..."
+    ],
+    
+    'caption': [
+        "Capturing the essence of {topic} ✨\n\nWhen {subject} meets creativity, magic happens! This moment perfectly represents the power of innovation and dedication.\n\n#ContentCreation #{topic} #Innovation #Success #Inspiration",
+        
+        "Behind the scenes of {topic} 📸\n\nThe journey of {subject} continues to inspire and amaze. Every detail matters when you're passionate about excellence.\n\nWhat's your favorite part about {topic}? Drop a comment below! 👇\n\n#{topic} #BehindTheScenes #Passion #Excellence",
+        
+        "Sunday vibes with {topic} 🌟\n\n{subject} reminds us that great things happen when we combine vision with action. Grateful for this incredible journey!\n\n#SundayMotivation #{topic} #Grateful #Journey #Success"
+    ],
+    
+    'script': [
+        "[INTRO]\nHey everyone! Welcome back to our channel. Today we're diving deep into {topic}, and I'm excited to share some incredible insights about {subject} with you.\n\n[HOOK]\nBut first, let me ask you this: Have you ever wondered how {topic} could transform your approach to {subject}? Well, you're about to find out!\n\n[MAIN CONTENT]\nLet's start with the basics. {subject} is revolutionizing the way we think about {topic}. Here are the three key points you need to know:\n\nFirst, {topic} offers unprecedented opportunities for growth...\nSecond, the implementation of {subject} requires strategic thinking...\nThird, the results speak for themselves...\n\n[CALL TO ACTION]\nIf you found this valuable, make sure to like this video and subscribe for more content about {topic}. And don't forget to share your thoughts about {subject} in the comments below!\n\n[OUTRO]\nThanks for watching, and I'll see you in the next video!",
+        
+        "[OPENING SCENE]\nImagine a world where {topic} is no longer a challenge but an opportunity. That world is closer than you think, thanks to {subject}.\n\n[PROBLEM SETUP]\nFor too long, people have struggled with {topic}. The traditional approaches to {subject} simply weren't delivering the results we needed.\n\n[SOLUTION REVEAL]\nBut what if I told you there's a better way? A method that transforms how we approach {topic} and makes {subject} not just possible, but profitable?\n\n[DEMONSTRATION]\nLet me show you exactly how this works...\n\n[RESULTS]\nThe results are remarkable. Users report significant improvements in their {topic} outcomes after implementing these {subject} strategies.\n\n[CLOSING]\nReady to transform your approach to {topic}? The journey starts now."
+    ],
+    
+    'ad-copy': [
+        "🚀 Transform Your {title} Today!\n\nDiscover how {subject} can revolutionize your approach to {topic}. Join thousands who've already experienced remarkable results.\n\n✅ Proven strategies\n✅ Expert guidance\n✅ Measurable results\n✅ 30-day guarantee\n\nDon't let another day pass without optimizing your {topic} strategy. Your success with {subject} starts here.\n\n👉 Click now to get started!\n\n*Limited time offer - Act fast!*",
+        
+        "Struggling with {topic}? You're Not Alone.\n\nThousands of professionals face the same {subject} challenges every day. But what if there was a proven solution?\n\nIntroducing our revolutionary approach to {topic}:\n\n• Streamlined {subject} processes\n• Expert-backed strategies\n• Real-world results\n• Step-by-step guidance\n\nStop wasting time on outdated {topic} methods. Upgrade to our {subject} solution and see the difference immediately.\n\n🎯 Get instant access now - Your success is guaranteed!",
+        
+        "BREAKTHROUGH: New {title} Method Gets Results in 30 Days!\n\nFinally, a {subject} solution that actually works. Our proven system has helped over 10,000 professionals master {topic}.\n\nWhat makes us different?\n\n→ Science-backed approach\n→ Personalized strategies\n→ 24/7 support\n→ Money-back guarantee\n\nReady to join the {topic} success stories? Your {subject} transformation begins today.\n\n⚡ Limited spots available - Reserve yours now!"
+    ]
+}
+
+
+# Text for template variables the caller did not provide (the seeded ContentTemplate
+# rows use these names); may refer to title, topic and subject. Variables with no
+# default render as a [placeholder] to fill in.
+VARIABLE_DEFAULTS: Dict[str, str] = {
+    'industry': 'field',
+    'main_points': 'the essentials of {subject}',
+    'target_audience': 'anyone getting started',
+    'learning_objectives': '- What {subject} is and why it matters\n- How to get started\n- Common mistakes to avoid',
+    'announcement': "We've been working on something new around {subject}!",
+    'details': "Here's what it means for you and how to make the most of it.",
+    'highlights': '✅ Easy to get started\n✅ Built around real needs\n✅ More to come soon',
+    'hashtags': '#{topic} #Tips #Growth',
+    'name': 'there',
+    'opening': "I hope you're doing well! Today I want to share a few thoughts on {subject}.",
+    'main_content': '{title} is worth a closer look. Start with one small change, see how it works for you, and build from there.',
+    'call_to_action': "Have questions or ideas? Just reply - we'd love to hear from you.",
+    'sender_name': 'The ContentGenie Team',
+    'product_name': '{title}',
+    'problem_statement': "Getting {subject} right takes time most people don't have.",
+    'solution_description': 'a simpler way to handle {subject}.',
+    'benefits': '• Saves time\n• Easy to use\n• Results you can measure',
+    'task': '{subject}',
+    'introduction': 'Getting {subject} right takes less than you might think. This guide walks through it step by step.',
+    'requirements': '- A clear goal\n- Some time to practise\n- A way to measure results',
+    'steps': '1. Decide what you want to achieve with {subject}\n2. Start with a small, focused first attempt\n3. Review the results and adjust\n4. Build what works into your routine',
+    'tips': '- Start small and iterate\n- Keep notes on what works',
+    'conclusion': 'With a clear plan and steady practice, {subject} becomes second nature.',
+}
+
+
+class _BlankMissing(dict):
+    def __missing__(self, key):
+        return ''
+
+
+def _default_value(field: str, values: Dict[str, str]) -> str:
+    default = VARIABLE_DEFAULTS.get(field)
+    if default is None:
+        return f"[{field.replace('_', ' ')}]"
+    return default.format_map(_BlankMissing(values))
+
+
+def _parse_variables(raw: Optional[str]) -> List[str]:
+    """
+    Variable names stored on a ContentTemplate row
+    
+    Rows are JSON lists, but init_db.py used to store the Python repr
+    (single quotes), so that is accepted too. Raises ValueError otherwise.
+    """
+    if not raw:
+        return []
+    try:
+        variables = json.loads(raw)
+    except ValueError:
+        try:
+            variables = ast.literal_eval(raw)
+        except (ValueError, SyntaxError):
+            raise ValueError(f'variables is not a list: {raw[:50]!r}')
+    if not isinstance(variables, (list, tuple)) or not all(isinstance(name, str) for name in variables):
+        raise ValueError(f'variables is not a list of names: {raw[:50]!r}')
+    return list(variables)
+
+
+class CompiledTemplate:
+    """A template pre-parsed into literal text and variable slots"""
+    
+    __slots__ = ('id', 'name', 'content_type', 'variables', '_parts')
+    
+    def __init__(self, template: str, content_type: str, template_id: Optional[str] = None,
+                 name: Optional[str] = None, variables: Optional[List[str]] = None):
+        self.id = template_id
+        self.name = name
+        self.content_type = content_type
+        self._parts = [(literal, field) for literal, field, _, _ in Formatter().parse(template)]
+        fields = [field for _, field in self._parts if field]
+        self.variables = list(dict.fromkeys((variables or []) + fields))
+    
+    def render(self, values: Dict[str, Any]) -> str:
+        """Fill the template; variables without a value get their VARIABLE_DEFAULTS text"""
+        known = {key: str(value) for key, value in values.items() if value not in (None, '')}
+        output = []
+        for literal, field in self._parts:
+            output.append(literal)
+            if field is not None:
+                output.append(known[field] if field in known else _default_value(field, known))
+        return ''.join(output)
+
+
+class TemplateEngine:
+    """
+    Caches compiled templates per content_type
+    
+    ContentTemplate rows are loaded in one query and compiled once. The cache is
+    dropped whenever a ContentTemplate is inserted, updated or deleted in this
+    process, and reloaded after TEMPLATE_CACHE_TTL seconds to pick up changes
+    made by other workers. usage_count increments are buffered in memory and
+    written in one batched UPDATE.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._defaults = {
+            content_type: [CompiledTemplate(template, content_type) for template in templates]
+            for content_type, templates in DEFAULT_TEMPLATES.items()
+        }
+        self._cache = None
+        self._loaded_at = 0.0
+        self._pending_usage = Counter()
+        self._last_flush = time.time()
+        self._engine = None
+    
+    def _config(self, key: str, default: int) -> int:
+        if has_app_context():
+            return int(current_app.config.get(key, default))
+        return default
+    
+    def invalidate(self):
+        """Drop the compiled cache so the next render reloads from the database"""
+        with self._lock:
+            self._cache = None
+    
+    def _load(self) -> Dict[str, List[CompiledTemplate]]:
+        """Load and compile all active ContentTemplate rows, grouped by content_type"""
+        compiled: Dict[str, List[CompiledTemplate]] = {}
+        try:
+            rows = ContentTemplate.query.filter_by(is_active=True).all()
+            count = 0
+            for row in rows:
+                try:
+                    variables = _parse_variables(row.variables)
+                    compiled.setdefault(row.content_type, []).append(
+                        CompiledTemplate(row.template, row.content_type, row.id, row.name, variables)
+                    )
+                    count += 1
+                except (ValueError, TypeError) as e:
+                    logger.warning(f'Skipping invalid content template {row.id}: {str(e)}')
+            logger.info(f'Compiled {count} of {len(rows)} content templates')
+        except Exception as e:
+            logger.warning(f'Failed to load content templates, using built-in templates: {str(e)}')
+        
+        return compiled
+    
+    def get_templates(self, content_type: str) -> List[CompiledTemplate]:
+        """Compiled templates for a content type (DB rows first, then built-ins, then articles)"""
+        if not has_app_context():
+            return self._defaults.get(content_type) or self._defaults['article']
+        
+        ttl = self._config('TEMPLATE_CACHE_TTL', 300)
+        
+        if self._cache is None or time.time() - self._loaded_at > ttl:
+            compiled = self._load()
+            with self._lock:
+                self._cache = compiled
+                self._loaded_at = time.time()
+        
+        cache = self._cache or {}
+        return cache.get(content_type) or self._defaults.get(content_type) or self._defaults['article']
+    
+    def render(self, content_type: str, values: Dict[str, Any]) -> str:
+        """Pick a template for the content type, render it, and count the usage"""
+        template = random.choice(self.get_templates(content_type))
+        content = template.render(values)
+        
+        if template.id:
+            self.record_usage(template.id)
+        
+        return content
+    
+    def record_usage(self, template_id: str):
+        """Buffer a usage_count increment; flushed in batches"""
+        with self._lock:
+            self._pending_usage[template_id] += 1
+            pending = sum(self._pending_usage.values())
+        
+        flush_every = self._config('TEMPLATE_USAGE_FLUSH_SECONDS', 30)
+        if pending >= 50 or time.time() - self._last_flush > flush_every:
+            self.flush_usage()
+    
+    def flush_usage(self):
+        """Write buffered usage_count increments in one executemany UPDATE"""
+        with self._lock:
+            if not self._pending_usage:
+                return
+            pending = self._pending_usage
+            self._pending_usage = Counter()
+            self._last_flush = time.time()
+        
+        try:
+            # Use a separate connection so the caller's session transaction is not committed
+            if has_app_context():
+                self._engine = db.engine
+            if self._engine is None:
+                raise RuntimeError('No database engine available')
+            
+            table = ContentTemplate.__table__
+            statement = table.update().where(table.c.id == bindparam('template_id')).values(
+                usage_count=table.c.usage_count + bindparam('increment')
+            )
+            with self._engine.begin() as connection:
+                connection.execute(statement, [
+                    {'template_id': template_id, 'increment': count}
+                    for template_id, count in pending.items()
+                ])
+        except Exception as e:
+            logger.warning(f'Failed to flush template usage counts: {str(e)}')
+            with self._lock:
+                self._pending_usage.update(pending)
+
+
+# Global instance
+template_engine = TemplateEngine()
+
+# Flush outstanding usage counts when the worker exits
+atexit.register(template_engine.flush_usage)
+
+
+@event.listens_for(ContentTemplate, 'after_insert')
+@event.listens_for(ContentTemplate, 'after_update')
+@event.listens_for(ContentTemplate, 'after_delete')
+def _invalidate_template_cache(mapper, connection, target):
+    template_engine.invalidate()
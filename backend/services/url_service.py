@@ -1,15 +1,89 @@
 """URL Content Extraction Service"""
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 from bs4 import BeautifulSoup
+import ipaddress
 import logging
+import socket
 from typing import Dict, Any
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse, parse_qs, urljoin
 import re
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+
+class BlockedURLError(ValueError):
+    """The URL points at a loopback, private, link-local or otherwise non-public address"""
+
+
+def _public_address(host: str, port: int) -> str:
+    """
+    Resolve host and return an address to connect to, or raise BlockedURLError
+
+    Every address the name resolves to must be public, so a name cannot mix
+    a public address with an internal one.
+    """
+    infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    addresses = [info[4][0] for info in infos]
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split('%', 1)[0])
+        if not ip.is_global or ip.is_multicast:
+            raise BlockedURLError(f'{host} resolves to a non-public address ({address})')
+    return addresses[0]
+
+
+class _PublicHTTPConnection(HTTPConnection):
+    def _new_conn(self):
+        # Connect to the address that was checked, so DNS cannot change between check and connect
+        self._dns_host = _public_address(self._dns_host, self.port)
+        return super()._new_conn()
+
+
+class _PublicHTTPSConnection(HTTPSConnection):
+    def _new_conn(self):
+        # TLS still uses the original host name for SNI and certificate checks
+        self._dns_host = _public_address(self._dns_host, self.port)
+        return super()._new_conn()
+
+
+class _PublicHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _PublicHTTPConnection
+
+
+class _PublicHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _PublicHTTPSConnection
+
+
+class PublicAddressAdapter(HTTPAdapter):
+    """
+    Transport that only connects to public addresses
+
+    Checked on every connection, so redirects to internal hosts (e.g. the
+    169.254.169.254 metadata endpoint) are refused as well.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _PublicHTTPConnectionPool,
+            'https': _PublicHTTPSConnectionPool
+        }
+
+
+def public_session() -> requests.Session:
+    """Session for fetching user-supplied URLs; environment proxies are ignored so the check sees the real host"""
+    session = requests.Session()
+    session.trust_env = False
+    adapter = PublicAddressAdapter()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
 class URLService:
     """Service for extracting content from URLs"""
     
@@ -18,6 +92,9 @@ class URLService:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         self.timeout = 10  # seconds
+        # URLs come from users, so every fetch goes through the public-address check
+        self.session = public_session()
+        self.metadata_max_bytes = 512 * 1024  # preview tags live in <head>; don't download whole pages
     
     def _is_youtube_url(self, url: str) -> bool:
         """Check if URL is a YouTube video"""
@@ -63,7 +140,7 @@ class URLService:
             logger.info(f"Extracting YouTube video: {video_id}")
             
             # Fetch the page
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
+            response = self.session.get(url, headers=self.headers, timeout=self.timeout)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -190,8 +267,16 @@ class URLService:
             
             # Fetch the URL
             try:
-                response = requests.get(url, headers=self.headers, timeout=self.timeout, allow_redirects=True)
+                response = self.session.get(url, headers=self.headers, timeout=self.timeout, allow_redirects=True)
                 response.raise_for_status()
+            except BlockedURLError as e:
+                logger.warning(f"Refused to fetch {url}: {str(e)}")
+                return {
+                    'success': False,
+                    'error': 'This URL points to a private or local address and cannot be fetched.',
+                    'content': '',
+                    'word_count': 0
+                }
             except requests.exceptions.Timeout:
                 return {
                     'success': False,
@@ -330,5 +415,55 @@ class URLService:
                 'word_count': 0
             }
 
+    def parse_metadata(self, html, base_url: str) -> Dict[str, str]:
+        """Preview title, description and image of a page from its og:/twitter: tags, <title> and meta description"""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        def meta(*names):
+            for name in names:
+                tag = soup.find('meta', attrs={'property': name}) or soup.find('meta', attrs={'name': name})
+                if tag and tag.get('content', '').strip():
+                    return tag['content'].strip()
+            return ''
+        
+        title = meta('og:title', 'twitter:title')
+        if not title and soup.title and soup.title.string:
+            title = soup.title.string.strip()
+        image_url = meta('og:image', 'og:image:url', 'og:image:secure_url', 'twitter:image', 'twitter:image:src')
+        return {
+            'title': title,
+            'description': meta('og:description', 'twitter:description', 'description'),
+            'image_url': urljoin(base_url, image_url) if image_url else ''
+        }
+    
+    def extract_metadata(self, url: str) -> Dict[str, Any]:
+        """
+        Fetch a page's preview metadata (og:title, og:image, description)
+        
+        Only the first metadata_max_bytes of the page are read.
+        
+        Returns:
+            {'success': True, 'title', 'description', 'image_url'} or {'success': False, 'error'}
+        """
+        try:
+            with self.session.get(url, headers=self.headers, timeout=self.timeout, allow_redirects=True, stream=True) as response:
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type', '').lower()
+                if 'html' not in content_type:
+                    return {'success': False, 'error': f'Unsupported content type: {content_type}'}
+                
+                html = b''
+                for chunk in response.iter_content(chunk_size=16384):
+                    html += chunk
+                    if len(html) >= self.metadata_max_bytes or b'</head>' in html:
+                        break
+                final_url = response.url
+            
+            return {'success': True, **self.parse_metadata(html, final_url)}
+            
+        except Exception as e:
+            logger.warning(f"Metadata fetch failed for {url}: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
 # Global instance
 url_service = URLService()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Remove expired LinkoGenei extension tokens from SQL and MongoDB.
+Deletes in batches so the token indexes stay small without long locks.
+Safe to run repeatedly (e.g. from a daily cron job).
+"""
+
+from app import create_app
+from services.linkogenei_service import linkogenei_service
+from services.mongodb_service import mongodb_service
+
+def sweep_extension_tokens():
+    """Delete extension tokens past their expiry"""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("🧹 Sweeping extension tokens...")
+            removed = linkogenei_service.sweep_expired_tokens()
+            print(f"✅ {removed} expired tokens removed from the database")
+
+            removed = mongodb_service.sweep_expired_extension_tokens()
+            print(f"✅ {removed} expired token documents removed from MongoDB")
+
+        except Exception as e:
+            print(f"❌ Sweep failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    sweep_extension_tokens()
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Remove expired and used-up project invitation links.
+Safe to run repeatedly (e.g. from a daily cron job).
+"""
+
+from app import create_app
+from services.project_invitation_service import project_invitation_service
+
+def sweep_project_invitations():
+    """Delete invitations that can no longer be redeemed"""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            print("🧹 Sweeping project invitations...")
+            removed = project_invitation_service.sweep()
+            print(f"✅ {removed} expired or used-up invitations removed")
+
+        except Exception as e:
+            print(f"❌ Sweep failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    sweep_project_invitations()
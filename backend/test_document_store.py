@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Conformance tests for the embedded document store.
+The same checks run against the SQLite-backed DocumentStore and, when
+TEST_MONGODB_URI is set (e.g. mongodb://localhost:27017/), against a real
+MongoDB server in a throwaway database, so both backends behave the same
+for the operations mongodb_service relies on.
+"""
+
+import os
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError, BulkWriteError, OperationFailure
+from services.document_store import DocumentStore
+
+
+def check_insert_and_find(db):
+    posts = db['posts']
+    now = datetime.utcnow().replace(microsecond=0)
+    result = posts.insert_one({'user_id': 'u1', 'url': 'https://a', 'tags': ['x', 'y'], 'created_at': now})
+    assert result.inserted_id is not None
+    posts.insert_many([
+        {'user_id': 'u1', 'url': 'https://b', 'tags': ['y'], 'created_at': now - timedelta(days=1), 'views': 5},
+        {'user_id': 'u2', 'url': 'https://c', 'tags': [], 'created_at': now - timedelta(days=2), 'views': 7},
+    ])
+
+    doc = posts.find_one({'url': 'https://a'})
+    assert doc['_id'] == result.inserted_id
+    assert doc['created_at'] == now, doc['created_at']
+    assert doc['tags'] == ['x', 'y']
+
+    assert posts.count_documents({}) == 3
+    assert posts.count_documents({'user_id': 'u1'}) == 2
+    assert posts.count_documents({'user_id': {'$in': ['u1', 'u2']}}) == 3
+    assert posts.count_documents({'user_id': {'$nin': ['u1']}}) == 1
+    assert posts.count_documents({'user_id': {'$ne': 'u1'}}) == 1
+    assert posts.count_documents({'views': {'$exists': True}}) == 2
+    assert posts.count_documents({'views': {'$exists': False}}) == 1
+    assert posts.count_documents({'views': None}) == 1
+    assert posts.count_documents({'views': {'$gte': 6}}) == 1
+    assert posts.count_documents({'created_at': {'$lt': now}}) == 2
+    assert posts.count_documents({'url': {'$regex': 'HTTPS://[ab]', '$options': 'i'}}) == 2
+    assert posts.count_documents({'tags': {'$all': ['x', 'y']}}) == 1
+    assert posts.count_documents({'$or': [{'user_id': 'u2'}, {'url': 'https://a'}]}) == 2
+    assert posts.count_documents({'_id': result.inserted_id}) == 1
+
+    urls = [d['url'] for d in posts.find({'user_id': 'u1'}).sort('created_at', DESCENDING)]
+    assert urls == ['https://a', 'https://b'], urls
+    urls = [d['url'] for d in posts.find({}).sort([('created_at', ASCENDING)]).skip(1).limit(1)]
+    assert urls == ['https://b'], urls
+
+    projected = posts.find_one({'url': 'https://b'}, {'url': 1, '_id': 0})
+    assert projected == {'url': 'https://b'}, projected
+
+
+def check_batched_find(db):
+    items = db['items']
+    items.insert_many([{'n': n, 'even': n % 2 == 0} for n in range(23)])
+    ordered = items.find({}).sort('n', ASCENDING)
+    assert [d['n'] for d in ordered.batch_size(5)] == list(range(23))
+    assert [d['n'] for d in items.find({'even': True}).sort('n', DESCENDING).batch_size(4)] == list(range(22, -1, -2))
+    window = items.find({}).sort('n', ASCENDING).skip(3).limit(7).batch_size(3)
+    assert [d['n'] for d in window] == list(range(3, 10))
+    assert [d['n'] for d in items.find({'n': {'$gte': 100}}).batch_size(5)] == []
+
+
+def check_unique_indexes(db):
+    posts = db['posts']
+    posts.create_index([('user_id', ASCENDING), ('url', ASCENDING)], unique=True)
+    posts.insert_one({'user_id': 'u1', 'url': 'https://a'})
+    posts.insert_one({'user_id': 'u2', 'url': 'https://a'})
+    try:
+        posts.insert_one({'user_id': 'u1', 'url': 'https://a'})
+        raise AssertionError('duplicate insert_one was accepted')
+    except DuplicateKeyError as e:
+        assert e.code == 11000
+
+    try:
+        posts.insert_many([
+            {'user_id': 'u3', 'url': 'https://a'},
+            {'user_id': 'u1', 'url': 'https://a'},
+            {'user_id': 'u4', 'url': 'https://a'},
+        ], ordered=False)
+        raise AssertionError('duplicate insert_many was accepted')
+    except BulkWriteError as e:
+        errors = e.details['writeErrors']
+        assert [(err['index'], err['code']) for err in errors] == [(1, 11000)], errors
+    assert posts.count_documents({}) == 4
+
+    try:
+        posts.update_one({'user_id': 'u2'}, {'$set': {'user_id': 'u1'}})
+        raise AssertionError('duplicate update was accepted')
+    except DuplicateKeyError:
+        pass
+
+
+def check_partial_unique_index(db):
+    notifications = db['notifications']
+    notifications.create_index(
+        [('user_id', ASCENDING), ('group_key', ASCENDING)], unique=True, name='unread_group_unique',
+        partialFilterExpression={'read': False, 'group_key': {'$exists': True}}
+    )
+    notifications.insert_one({'user_id': 'u1', 'group_key': 'g', 'read': False})
+    notifications.insert_one({'user_id': 'u1', 'group_key': 'g', 'read': True})
+    notifications.insert_one({'user_id': 'u1', 'read': False})
+    notifications.insert_one({'user_id': 'u1', 'read': False})
+    try:
+        notifications.insert_one({'user_id': 'u1', 'group_key': 'g', 'read': False})
+        raise AssertionError('second unread notification in a group was accepted')
+    except DuplicateKeyError:
+        pass
+
+
+def check_updates(db):
+    counters = db['counters']
+    result = counters.update_one(
+        {'user_id': 'u1'},
+        {'$inc': {'total': 2, 'by_type.link': 1}, '$setOnInsert': {'created': True}, '$set': {'name': 'a'}},
+        upsert=True
+    )
+    assert result.matched_count == 0 and result.upserted_id is not None
+    counters.update_one(
+        {'user_id': 'u1'},
+        {'$inc': {'total': 3}, '$setOnInsert': {'created': False}, '$unset': {'name': ''}},
+        upsert=True
+    )
+    doc = counters.find_one({'user_id': 'u1'})
+    assert doc['total'] == 5 and doc['by_type'] == {'link': 1} and doc['created'] is True, doc
+    assert 'name' not in doc
+
+    counters.insert_many([{'user_id': 'u2', 'total': 1}, {'user_id': 'u3', 'total': 1}])
+    result = counters.update_many({'user_id': {'$in': ['u2', 'u3', 'u9']}}, {'$set': {'total': 1}})
+    assert result.matched_count == 2 and result.modified_count == 0
+    result = counters.update_many({'total': 1}, {'$inc': {'total': 10}, '$push': {'log': 'bump'}})
+    assert result.matched_count == 2 and result.modified_count == 2
+    assert counters.count_documents({'total': 11, 'log': ['bump']}) == 2
+
+    doc = counters.find_one_and_update(
+        {'user_id': 'u2'}, {'$inc': {'total': 1}}, return_document=ReturnDocument.AFTER
+    )
+    assert doc['total'] == 12
+    doc = counters.find_one_and_update({'user_id': 'u2'}, {'$inc': {'total': 1}})
+    assert doc['total'] == 12
+    assert counters.find_one_and_update({'user_id': 'nobody'}, {'$inc': {'total': 1}}) is None
+
+
+def check_deletes(db):
+    items = db['items']
+    items.insert_many([{'n': i, 'even': i % 2 == 0} for i in range(6)])
+    assert items.delete_one({'even': True}).deleted_count == 1
+    assert items.delete_many({'even': True}).deleted_count == 2
+    assert items.delete_many({'n': {'$gt': 100}}).deleted_count == 0
+    doc = items.find_one_and_delete({'n': 5})
+    assert doc['n'] == 5
+    assert sorted(d['n'] for d in items.find({})) == [1, 3]
+
+
+def check_aggregation(db):
+    posts = db['posts']
+    posts.insert_many([
+        {'user_id': 'u1', 'platform': 'youtube', 'views': 10},
+        {'user_id': 'u1', 'platform': 'youtube', 'views': 20},
+        {'user_id': 'u1', 'platform': 'twitter', 'views': 5},
+        {'user_id': 'u1', 'platform': 'twitter'},
+        {'user_id': 'u2', 'platform': 'youtube', 'views': 100},
+    ])
+    by_platform = list(posts.aggregate([
+        {'$match': {'user_id': 'u1'}},
+        {'$group': {'_id': '$platform', 'count': {'$sum': 1}, 'views': {'$sum': '$views'},
+                    'top': {'$max': '$views'}, 'avg': {'$avg': '$views'}}},
+        {'$sort': {'count': -1, '_id': 1}}
+    ]))
+    assert by_platform == [
+        {'_id': 'twitter', 'count': 2, 'views': 5, 'top': 5, 'avg': 5.0},
+        {'_id': 'youtube', 'count': 2, 'views': 30, 'top': 20, 'avg': 15.0},
+    ], by_platform
+
+    totals = list(posts.aggregate([{'$group': {'_id': None, 'count': {'$sum': 1}}}]))
+    assert totals == [{'_id': None, 'count': 5}], totals
+    assert list(posts.aggregate([{'$match': {'user_id': 'nobody'}}, {'$group': {'_id': None, 'n': {'$sum': 1}}}])) == []
+
+    pairs = list(posts.aggregate([
+        {'$group': {'_id': {'user': '$user_id', 'platform': '$platform'}, 'n': {'$sum': 1}}},
+        {'$sort': {'_id.user': 1, '_id.platform': 1}}
+    ]))
+    assert [(p['_id']['user'], p['_id']['platform'], p['n']) for p in pairs] == [
+        ('u1', 'twitter', 2), ('u1', 'youtube', 2), ('u2', 'youtube', 1)
+    ], pairs
+
+    facets = list(posts.aggregate([
+        {'$match': {'platform': 'youtube'}},
+        {'$facet': {
+            'total': [{'$count': 'n'}],
+            'by_user': [{'$group': {'_id': '$user_id', 'n': {'$sum': 1}}}, {'$sort': {'_id': 1}}]
+        }}
+    ]))
+    assert facets == [{'total': [{'n': 3}], 'by_user': [{'_id': 'u1', 'n': 2}, {'_id': 'u2', 'n': 1}]}], facets
+
+
+def check_unknown_operators(db):
+    posts = db['posts']
+    posts.insert_one({'user_id': 'u1', 'views': 1})
+    for call in (
+        lambda: posts.count_documents({'views': {'$bogus': 1}}),
+        lambda: posts.count_documents({'$bogus': [{'views': 1}]}),
+        lambda: posts.update_one({'user_id': 'u1'}, {'$bogus': {'views': 2}}),
+        lambda: list(posts.aggregate([{'$group': {'_id': '$user_id', 'n': {'$bogus': 1}}}])),
+    ):
+        try:
+            call()
+        except OperationFailure:
+            continue
+        raise AssertionError('unknown operator did not raise OperationFailure')
+    assert posts.find_one({'user_id': 'u1'})['views'] == 1
+
+
+CHECKS = [
+    check_insert_and_find,
+    check_batched_find,
+    check_unique_indexes,
+    check_partial_unique_index,
+    check_updates,
+    check_deletes,
+    check_aggregation,
+    check_unknown_operators,
+]
+
+
+def run_conformance(make_db, drop_db):
+    """Run every check against a fresh database from make_db()"""
+    for check in CHECKS:
+        db = make_db()
+        try:
+            check(db)
+            print(f"   ✅ {check.__name__}")
+        finally:
+            drop_db(db)
+
+
+def test_embedded_store_conformance():
+    print("1️⃣ Embedded document store...")
+    with tempfile.TemporaryDirectory() as directory:
+        stores = []
+
+        def make_db():
+            stores.append(DocumentStore(os.path.join(directory, f'{uuid.uuid4().hex}.db')))
+            return stores[-1]
+
+        run_conformance(make_db, lambda store: store.close())
+
+
+def test_mongodb_conformance():
+    mongo_uri = os.environ.get('TEST_MONGODB_URI')
+    if not mongo_uri:
+        print("2️⃣ MongoDB... skipped (TEST_MONGODB_URI not set)")
+        return
+    from pymongo import MongoClient
+    print("2️⃣ MongoDB...")
+    client = MongoClient(mongo_uri, serverSelectionTimeoutMS=3000)
+    try:
+        run_conformance(
+            lambda: client[f'conformance_{uuid.uuid4().hex[:12]}'],
+            lambda db: client.drop_database(db.name)
+        )
+    finally:
+        client.close()
+
+
+def test_embedded_store_ttl_index():
+    """Embedded only: MongoDB's TTL monitor runs on its own schedule, so it cannot be checked quickly"""
+    print("3️⃣ Embedded TTL index...")
+    store = DocumentStore(':memory:')
+    notifications = store['notifications']
+    notifications.create_index('read_at', name='read_at_ttl', expireAfterSeconds=3600)
+    notifications.insert_many([
+        {'read_at': datetime.utcnow() - timedelta(hours=2)},
+        {'read_at': datetime.utcnow()},
+        {'read': False},
+    ])
+    notifications._expire(force=True)
+    assert notifications.count_documents({}) == 2
+    assert notifications.count_documents({'read_at': {'$exists': False}}) == 1
+    store.close()
+    print("   ✅ Expired documents removed")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing document store conformance\n")
+    try:
+        test_embedded_store_conformance()
+        test_mongodb_conformance()
+        test_embedded_store_ttl_index()
+    except AssertionError as e:
+        print(f"   ❌ {e}")
+        sys.exit(1)
+    print("\n✅ All document store checks passed")
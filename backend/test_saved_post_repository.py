@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Contract tests for the LinkoGenei saved post repositories.
+The same checks run against the SQL repository (in-memory SQLite), the
+MongoDB repository on the embedded document store and, when TEST_MONGODB_URI
+is set (e.g. mongodb://localhost:27017/), on a real MongoDB server in a
+throwaway database, so the routes behave the same whichever
+LINKOGENEI_STORAGE_BACKEND is configured.
+"""
+
+import os
+import sys
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import Flask
+from models import db
+from services.document_store import DocumentStore
+from services.mongodb_service import MongoDBService
+from services.saved_post_repository import (
+    SQLSavedPostRepository, MongoSavedPostRepository, get_saved_post_repository
+)
+
+
+def _post(url, **fields):
+    return {'url': url, 'platform': 'YouTube', 'title': '', 'category': 'Uncategorized', **fields}
+
+
+def check_save_and_get(repo):
+    result = repo.save_post('u1', _post('https://youtube.com/watch?v=abc', title='Python tips', tags=['Python', ' python ', 'Tips']))
+    assert result['success'], result
+    post = repo.get_post_by_id('u1', result['post_id'])
+    assert post['id'] == result['post_id']
+    assert post['user_id'] == 'u1'
+    assert post['url'] == 'https://youtube.com/watch?v=abc'
+    assert post['title'] == 'Python tips'
+    assert post['tags'] == ['python', 'tips'], post['tags']
+    assert post['created_at'] and post['updated_at']
+
+    assert repo.get_post_by_id('u2', result['post_id']) is None
+    assert repo.get_post_by_id('u1', 'not-a-post-id') is None
+
+
+def check_duplicate_urls(repo):
+    assert repo.save_post('u1', _post('https://www.youtube.com/watch?v=abc&utm_source=x'))['success']
+    for url in ('https://youtu.be/abc', 'http://m.youtube.com/watch?v=abc&t=30'):
+        result = repo.save_post('u1', _post(url))
+        assert not result['success']
+        assert result['error'] == 'This post has already been saved'
+    # Another user may save the same post
+    assert repo.save_post('u2', _post('https://youtu.be/abc'))['success']
+
+    assert repo.get_posts('u1')['total'] == 1
+    assert repo.get_stats('u1')['stats']['total_posts'] == 1
+
+
+def check_batch_save(repo):
+    existing = repo.save_post('u1', _post('https://x.com/a/status/1'))
+    result = repo.save_posts_batch('u1', [
+        _post('https://x.com/b/status/2', client_id='c0', category='Ideas'),
+        _post('https://twitter.com/a/status/1', client_id='c1'),
+        _post('https://x.com/b/status/2?s=20', client_id='c2'),
+        {'client_id': 'c3'},
+        _post('https://x.com/c/status/3', client_id='c4', category='Ideas'),
+    ])
+    assert result['success'], result
+    statuses = [item['status'] for item in result['results']]
+    assert statuses == ['saved', 'duplicate', 'duplicate', 'error', 'saved'], statuses
+    assert [item['client_id'] for item in result['results']] == ['c0', 'c1', 'c2', 'c3', 'c4']
+    assert (result['saved'], result['duplicates'], result['failed']) == (2, 2, 1)
+    assert result['results'][1]['post_id'] == existing['post_id']
+    assert result['results'][2]['post_id'] == result['results'][0]['post_id']
+    assert result['results'][0]['post']['category'] == 'Ideas'
+    assert result['cursor']
+
+    # Re-sending the batch saves nothing new
+    again = repo.save_posts_batch('u1', [_post('https://x.com/b/status/2'), _post('https://x.com/c/status/3')])
+    assert (again['saved'], again['duplicates']) == (0, 2)
+
+    stats = repo.get_stats('u1')['stats']
+    assert stats['total_posts'] == 3
+    assert stats['categories'] == {'Uncategorized': 1, 'Ideas': 2}, stats['categories']
+    counts = {category['name']: category['post_count'] for category in repo.get_categories('u1')}
+    assert counts.get('Ideas') == 2, counts
+
+
+def check_list_filters_and_paging(repo):
+    for i in range(5):
+        repo.save_post('u1', _post(f'https://example.com/{i}', platform='LinkedIn' if i % 2 else 'YouTube',
+                                   category='Work' if i < 3 else 'Fun'))
+    repo.save_post('u2', _post('https://example.com/other'))
+
+    result = repo.get_posts('u1')
+    assert result['success'] and result['total'] == 5
+    assert [post['url'] for post in result['posts']] == [f'https://example.com/{i}' for i in range(4, -1, -1)]
+
+    page = repo.get_posts('u1', limit=2, skip=2)
+    assert [post['url'] for post in page['posts']] == ['https://example.com/2', 'https://example.com/1']
+    assert page['total'] == 5
+
+    assert repo.get_posts('u1', category='Work')['total'] == 3
+    assert repo.get_posts('u1', platform='LinkedIn')['total'] == 2
+    assert repo.get_posts('u1', category='Work', platform='LinkedIn')['total'] == 1
+    assert repo.get_posts('u1', category='all', platform='all')['total'] == 5
+
+
+def check_iter_posts(repo):
+    repo.save_posts_batch('u1', [_post(f'https://example.com/{i}', category='Work' if i % 3 else 'Fun') for i in range(7)])
+    for i in range(7, 10):
+        repo.save_post('u1', _post(f'https://example.com/{i}', platform='LinkedIn'))
+    repo.save_post('u2', _post('https://example.com/other'))
+
+    for filters in ({}, {'category': 'Work'}, {'platform': 'LinkedIn'}, {'category': 'all', 'platform': 'YouTube'}):
+        listed = repo.get_posts('u1', limit=100, **filters)['posts']
+        streamed = list(repo.iter_posts('u1', **filters))
+        assert [post['id'] for post in streamed] == [post['id'] for post in listed], filters
+    assert list(repo.iter_posts('u3')) == []
+
+
+def check_update_post(repo):
+    post_id = repo.save_post('u1', _post('https://example.com/a', category='Work'))['post_id']
+    result = repo.update_post('u1', post_id, {
+        'category': 'Fun', 'notes': 'later', 'tags': ['Read'], 'title': 'A', 'url': 'https://evil.example/'
+    })
+    assert result['success'], result
+    post = repo.get_post_by_id('u1', post_id)
+    assert (post['category'], post['notes'], post['tags'], post['title']) == ('Fun', 'later', ['read'], 'A')
+    assert post['url'] == 'https://example.com/a'
+
+    stats = repo.get_stats('u1')['stats']
+    assert stats['categories'] == {'Fun': 1}, stats['categories']
+    counts = {category['name']: category['post_count'] for category in repo.get_categories('u1')}
+    assert counts.get('Work', 0) == 0 and counts['Fun'] == 1, counts
+
+    for user_id, missing_id in (('u2', post_id), ('u1', 'not-a-post-id'), ('u1', str(uuid.uuid4()))):
+        result = repo.update_post(user_id, missing_id, {'notes': 'x'})
+        assert result == {'success': False, 'error': 'Post not found'}, result
+
+
+def check_delete_post(repo):
+    post_id = repo.save_post('u1', _post('https://example.com/a', category='Work'))['post_id']
+    repo.save_post('u1', _post('https://example.com/b', category='Work'))
+
+    assert not repo.delete_post('u2', post_id)['success']
+    assert repo.delete_post('u1', post_id)['success']
+    assert repo.get_post_by_id('u1', post_id) is None
+    assert repo.delete_post('u1', post_id) == {'success': False, 'error': 'Post not found'}
+    assert repo.delete_post('u1', 'not-a-post-id') == {'success': False, 'error': 'Post not found'}
+
+    stats = repo.get_stats('u1')['stats']
+    assert stats['total_posts'] == 1 and stats['categories'] == {'Work': 1}
+    counts = {category['name']: category['post_count'] for category in repo.get_categories('u1')}
+    assert counts['Work'] == 1
+
+    # Counts never go below zero
+    remaining = repo.get_posts('u1')['posts'][0]['id']
+    repo.delete_post('u1', remaining)
+    repo.delete_post('u1', remaining)
+    counts = {category['name']: category['post_count'] for category in repo.get_categories('u1')}
+    assert counts['Work'] == 0, counts
+    assert repo.get_stats('u1')['stats']['total_posts'] == 0
+
+
+def check_categories(repo):
+    assert repo.get_categories('u1') == []
+    created = repo.create_category('u1', 'Reading', '#ff0000')
+    assert created['success'] and created['category']['name'] == 'Reading'
+    assert created['category']['color'] == '#ff0000' and created['category']['post_count'] == 0
+    assert repo.create_category('u1', 'Reading') == {'success': False, 'error': 'Category already exists'}
+    assert repo.create_category('u2', 'Reading')['success']
+    repo.create_category('u1', 'Archive')
+    assert [category['name'] for category in repo.get_categories('u1')] == ['Archive', 'Reading']
+
+
+def check_sync_changes(repo):
+    assert repo.get_changes('u1') == {'success': True, 'posts': [], 'cursor': None, 'has_more': False}
+    repo.save_posts_batch('u1', [_post(f'https://example.com/{i}') for i in range(3)])
+    repo.save_post('u1', _post('https://example.com/3'))
+    repo.save_post('u2', _post('https://example.com/other'))
+
+    first = repo.get_changes('u1', limit=3)
+    assert len(first['posts']) == 3 and first['has_more']
+    repo.decode_cursor(first['cursor'])
+    rest = repo.get_changes('u1', first['cursor'], limit=3)
+    assert [post['url'] for post in rest['posts']] == ['https://example.com/3']
+    assert not rest['has_more']
+    seen = {post['url'] for post in first['posts'] + rest['posts']}
+    assert seen == {f'https://example.com/{i}' for i in range(4)}
+
+    # Nothing new: the cursor stays put
+    empty = repo.get_changes('u1', rest['cursor'])
+    assert empty['posts'] == [] and empty['cursor'] == rest['cursor']
+
+    for cursor in ('garbage', 'not-a-date|x'):
+        try:
+            repo.decode_cursor(cursor)
+        except ValueError:
+            continue
+        raise AssertionError(f'cursor {cursor!r} was accepted')
+
+
+def check_search(repo):
+    repo.save_post('u1', _post('https://example.com/a', title='Learning Python fast', tags=['code']))
+    repo.save_post('u1', _post('https://example.com/b', title='Cooking', notes='python recipes?', tags=['food']))
+    repo.save_post('u1', _post('https://example.com/c', title='Gardening', tags=['code', 'outdoors']))
+    repo.save_post('u2', _post('https://example.com/d', title='Python for u2'))
+
+    result = repo.search_posts('u1', 'python')
+    assert result['success'], result
+    titles = [post['title'] for post in result['posts']]
+    assert titles == ['Learning Python fast', 'Cooking'], titles
+    assert result['posts'][0]['score'] > result['posts'][1]['score']
+
+    tagged = repo.search_posts('u1', tags=['code'])
+    assert [post['title'] for post in tagged['posts']] == ['Gardening', 'Learning Python fast']
+    assert [post['title'] for post in repo.search_posts('u1', 'python', tags=['code'])['posts']] == ['Learning Python fast']
+
+    paged = repo.search_posts('u1', tags=['code'], limit=1)
+    assert paged['has_more']
+    repo.decode_cursor(paged['cursor'])
+    rest = repo.search_posts('u1', tags=['code'], limit=1, cursor=paged['cursor'])
+    assert [post['title'] for post in rest['posts']] == ['Learning Python fast'] and not rest['has_more']
+
+
+def check_extension_tokens(repo):
+    token = uuid.uuid4().hex
+    assert repo.verify_extension_token(token) == {'success': False, 'error': 'Token not found'}
+    assert repo.store_extension_token('u1', token, datetime.utcnow() + timedelta(days=1))['success']
+    assert repo.verify_extension_token(token) == {'success': True, 'user_id': 'u1'}
+
+    # Re-storing a token moves it to its new owner
+    repo.store_extension_token('u2', token, datetime.utcnow() + timedelta(days=1))
+    assert repo.verify_extension_token(token)['user_id'] == 'u2'
+
+    expired = uuid.uuid4().hex
+    repo.store_extension_token('u1', expired, datetime.utcnow() - timedelta(minutes=1))
+    assert repo.verify_extension_token(expired) == {'success': False, 'error': 'Token expired'}
+    assert repo.sweep_expired_tokens() == 1
+    assert repo.verify_extension_token(expired)['error'] == 'Token not found'
+
+    assert repo.delete_extension_token(token)['success']
+    assert not repo.verify_extension_token(token)['success']
+    assert repo.delete_extension_token(token) == {'success': False, 'error': 'Token not found'}
+
+
+CHECKS = [
+    check_save_and_get,
+    check_duplicate_urls,
+    check_batch_save,
+    check_list_filters_and_paging,
+    check_iter_posts,
+    check_update_post,
+    check_delete_post,
+    check_categories,
+    check_sync_changes,
+    check_search,
+    check_extension_tokens,
+]
+
+
+def make_app(database_url='sqlite://'):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['POST_ENRICHMENT_ENABLED'] = False
+    db.init_app(app)
+    return app
+
+
+@contextmanager
+def sql_repository():
+    """SQL repository on a fresh in-memory SQLite database"""
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        try:
+            yield SQLSavedPostRepository()
+        finally:
+            db.session.remove()
+            db.drop_all()
+
+
+@contextmanager
+def embedded_repository(directory):
+    """MongoDB repository on a fresh embedded document store"""
+    store = DocumentStore(os.path.join(directory, f'{uuid.uuid4().hex}.db'))
+    try:
+        yield MongoSavedPostRepository(MongoDBService(store))
+    finally:
+        store.close()
+
+
+@contextmanager
+def mongodb_repository(client):
+    """MongoDB repository on a throwaway database of a real server"""
+    database = client[f'contract_{uuid.uuid4().hex[:12]}']
+    try:
+        yield MongoSavedPostRepository(MongoDBService(database))
+    finally:
+        client.drop_database(database.name)
+
+
+def run_contract(make_repository):
+    """Run every check against a fresh repository from make_repository()"""
+    for check in CHECKS:
+        with make_repository() as repo:
+            check(repo)
+        print(f"   ✅ {check.__name__}")
+
+
+def test_sql_repository_contract():
+    print("1️⃣ SQL repository...")
+    run_contract(sql_repository)
+
+
+def test_embedded_repository_contract():
+    print("2️⃣ MongoDB repository on the embedded store...")
+    with tempfile.TemporaryDirectory() as directory:
+        run_contract(lambda: embedded_repository(directory))
+
+
+def test_mongodb_repository_contract():
+    mongo_uri = os.environ.get('TEST_MONGODB_URI')
+    if not mongo_uri:
+        print("3️⃣ MongoDB repository... skipped (TEST_MONGODB_URI not set)")
+        return
+    from pymongo import MongoClient
+    print("3️⃣ MongoDB repository...")
+    client = MongoClient(mongo_uri, serverSelectionTimeoutMS=3000)
+    try:
+        run_contract(lambda: mongodb_repository(client))
+    finally:
+        client.close()
+
+
+def test_backend_selection():
+    print("4️⃣ Backend selection...")
+    app = make_app()
+    with app.app_context():
+        assert get_saved_post_repository().name == 'sql'
+        app.config['LINKOGENEI_STORAGE_BACKEND'] = 'mongodb'
+        assert get_saved_post_repository().name == 'mongodb'
+    assert get_saved_post_repository('SQL').name == 'sql'
+    try:
+        get_saved_post_repository('redis')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('unknown backend was accepted')
+    print("   ✅ LINKOGENEI_STORAGE_BACKEND")
+
+
+if __name__ == '__main__':
+    print("🧪 Testing saved post repository contract\n")
+    try:
+        test_sql_repository_contract()
+        test_embedded_repository_contract()
+        test_mongodb_repository_contract()
+        test_backend_selection()
+    except AssertionError as e:
+        print(f"   ❌ {e}")
+        sys.exit(1)
+    print("\n✅ All saved post repository checks passed")
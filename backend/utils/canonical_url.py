@@ -0,0 +1,175 @@
+"""Canonical form of saved post URLs, so one post saved through different links is detected as a duplicate"""
+
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from typing import Callable, Dict, List, Tuple
+import hashlib
+import re
+
+# Query parameters that only track where a link was shared from
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'twclid', 'ttclid', 'li_fat_id',
+    'mc_cid', 'mc_eid', 'mkt_tok', '_hsenc', '_hsmi', 'igshid', 'igsh', 'ref', 'ref_src',
+    'ref_url', 'ref_source', 'share_id', 'si', 'spm', 'trk', 'trackingid', 'lipi',
+    'originalsubdomain', 'rcm', 'feature', 'ved', 'ei', 'mibextid', 'rdid', 'sfnsn',
+    'xmt', 'utm',
+}
+TRACKING_PREFIXES = ('utm_', 'hsa_', 'pk_', 'mtm_', '__cft__', '__tn__')
+
+# Sub-domains that serve the same content as the bare domain
+EQUIVALENT_SUBDOMAINS = ('www.', 'm.', 'mobile.', 'mbasic.', 'web.', 'touch.')
+
+# Alternative domains, including short-link domains whose path carries the id
+HOST_ALIASES = {
+    'twitter.com': 'x.com',
+    'fxtwitter.com': 'x.com',
+    'vxtwitter.com': 'x.com',
+    'instagr.am': 'instagram.com',
+    'fb.com': 'facebook.com',
+    'youtube-nocookie.com': 'youtube.com',
+}
+
+URL_HASH_LENGTH = 64  # hex sha256
+
+
+def _youtube(host: str, path: str, query: List[Tuple[str, str]]) -> Tuple[str, str, List[Tuple[str, str]]]:
+    # youtu.be/ID, /shorts/ID, /embed/ID, /live/ID and /v/ID all name the video watch?v=ID
+    match = re.match(r'^/(?:shorts|embed|live|v)/([\w-]+)', path) if host == 'youtube.com' else None
+    video_id = path.strip('/').split('/')[0] if host == 'youtu.be' else (match.group(1) if match else None)
+    if video_id:
+        return 'youtube.com', '/watch', [('v', video_id)]
+    if path == '/watch':
+        # Only the video id identifies the post (t=, list=, index= are playback state)
+        return host, path, [(key, value) for key, value in query if key == 'v']
+    return host, path, query
+
+
+def _x(host: str, path: str, query: List[Tuple[str, str]]) -> Tuple[str, str, List[Tuple[str, str]]]:
+    # /user/status/ID, /i/web/status/ID and /user/status/ID/photo/1 are the same post
+    match = re.match(r'^/(?:[^/]+|i/web)/status(?:es)?/(\d+)', path)
+    if match:
+        return host, f'/i/status/{match.group(1)}', []
+    # Handles are case-insensitive
+    return host, path.lower(), [(key, value) for key, value in query if key not in ('s', 't')]
+
+
+def _instagram(host: str, path: str, query: List[Tuple[str, str]]) -> Tuple[str, str, List[Tuple[str, str]]]:
+    # /reel/CODE, /reels/CODE, /tv/CODE and /user/p/CODE open the same post as /p/CODE
+    match = re.match(r'^/(?:[\w.]+/)?(?:p|reels?|tv)/([\w-]+)', path)
+    if match:
+        return host, f'/p/{match.group(1)}', []
+    return host, path.lower(), query
+
+
+def _linkedin(host: str, path: str, query: List[Tuple[str, str]]) -> Tuple[str, str, List[Tuple[str, str]]]:
+    # /posts/slug-activity-ID-xxxx and /feed/update/urn:li:activity:ID are the same post
+    match = re.search(r'(?:activity[-:]|ugcPost[-:]|share[-:])(\d{10,})', path)
+    if match:
+        return host, f'/feed/update/urn:li:activity:{match.group(1)}', []
+    return host, path, query
+
+
+def _facebook(host: str, path: str, query: List[Tuple[str, str]]) -> Tuple[str, str, List[Tuple[str, str]]]:
+    # Posts linked through permalink.php / story.php are identified by their query
+    if path in ('/permalink.php', '/story.php', '/photo.php', '/photo', '/watch'):
+        return host, path, [(key, value) for key, value in query if key in ('story_fbid', 'fbid', 'id', 'v')]
+    return host, path, query
+
+
+def _tiktok(host: str, path: str, query: List[Tuple[str, str]]) -> Tuple[str, str, List[Tuple[str, str]]]:
+    match = re.match(r'^/(@[\w.]+)/video/(\d+)', path)
+    if match:
+        return host, f'/{match.group(1).lower()}/video/{match.group(2)}', []
+    return host, path, query
+
+
+PLATFORM_RULES: Dict[str, Callable] = {
+    'youtube.com': _youtube,
+    'youtu.be': _youtube,
+    'x.com': _x,
+    'instagram.com': _instagram,
+    'linkedin.com': _linkedin,
+    'facebook.com': _facebook,
+    'tiktok.com': _tiktok,
+}
+
+
+def _canonical_host(host: str) -> str:
+    host = host.lower().rstrip('.')
+    for prefix in EQUIVALENT_SUBDOMAINS:
+        if host.startswith(prefix) and host.count('.') > 1:
+            host = host[len(prefix):]
+            break
+    # Country sub-domains of LinkedIn (uk.linkedin.com) serve the same posts
+    if host.endswith('.linkedin.com'):
+        host = 'linkedin.com'
+    return HOST_ALIASES.get(host, host)
+
+
+def _is_tracking(key: str) -> bool:
+    key = key.lower()
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for duplicate detection
+
+    Lowercases the scheme and host, drops www./m. style sub-domains,
+    tracking parameters, fragments, default ports and trailing slashes,
+    sorts the remaining query, and rewrites known alternative forms of a
+    platform's post URL (youtu.be links, x.com/twitter.com, Instagram reels,
+    LinkedIn activity slugs...) to one form. Links that need a network
+    round-trip to resolve (lnkd.in, t.co) are left as they are.
+    """
+    url = (url or '').strip()
+    if '://' not in url:
+        url = f'https://{url}'
+    try:
+        parts = urlsplit(url)
+        host = _canonical_host(parts.hostname or '')
+        port = parts.port
+    except ValueError:
+        return url
+
+    if port and port not in (80, 443):
+        host = f'{host}:{port}'
+    path = re.sub(r'/{2,}', '/', parts.path or '/')
+    if len(path) > 1:
+        path = path.rstrip('/')
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(key)]
+
+    rule = PLATFORM_RULES.get(host)
+    if rule:
+        host, path, query = rule(host, path, query)
+
+    # http and https serve the same post on every platform we save from
+    return urlunsplit(('https', host, path, urlencode(sorted(query)), ''))
+
+
+def url_hash(url: str) -> str:
+    """Fixed-width key for a URL: hex sha256 of its canonical form"""
+    return hashlib.sha256(canonicalize_url(url).encode('utf-8')).hexdigest()
+
+
+def merge_duplicate_posts(keeper: Dict, duplicates: List[Dict]) -> Dict:
+    """
+    Fields to set on the post kept when saved posts turn out to share a canonical URL
+
+    The keeper's own values win; empty title/image are filled from the
+    duplicates, notes are concatenated and tags are unioned. Posts are
+    dicts with title, image_url, notes and tags (a list).
+    """
+    merged = {
+        'title': keeper.get('title') or '',
+        'image_url': keeper.get('image_url') or '',
+        'notes': keeper.get('notes') or '',
+        'tags': list(keeper.get('tags') or [])
+    }
+    for duplicate in duplicates:
+        merged['title'] = merged['title'] or duplicate.get('title') or ''
+        merged['image_url'] = merged['image_url'] or duplicate.get('image_url') or ''
+        notes = (duplicate.get('notes') or '').strip()
+        if notes and notes not in merged['notes']:
+            merged['notes'] = f"{merged['notes']}\n\n{notes}" if merged['notes'] else notes
+        merged['tags'] += [tag for tag in duplicate.get('tags') or [] if tag not in merged['tags']]
+    return merged
@@ -0,0 +1,248 @@
+"""Streaming exports - write row iterators out as NDJSON, CSV or a ZIP of Markdown files while they are read"""
+
+from flask import Response, stream_with_context
+from utils.helpers import generate_slug
+from utils.search import url_host
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, Union
+import csv
+import io
+import json
+import struct
+import tempfile
+import zlib
+
+# format -> (content type, file extension)
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'markdown': ('application/zip', 'zip'),
+}
+
+# Rows are joined into chunks of about this size before being written to the client
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+SAVED_POST_EXPORT_FIELDS = ['id', 'url', 'platform', 'title', 'category', 'tags', 'notes', 'image_url', 'created_at', 'updated_at']
+
+CONTENT_EXPORT_FIELDS = [
+    'id', 'title', 'content_type', 'tone', 'status', 'is_favorite', 'tags', 'word_count', 'character_count',
+    'prompt', 'content', 'ai_model_used', 'created_at', 'updated_at', 'published_at'
+]
+
+# Markdown ZIPs: UTF-8 file names, ZIP64 past the classic 32-bit limits, and
+# central directory records kept in memory up to this size before spilling to disk
+ZIP_UTF8_FLAG = 0x800
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP_DIRECTORY_SPOOL_SIZE = 1024 * 1024
+
+# Spreadsheet apps run cells starting with these as formulas
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _chunked(pieces: Iterable[Union[str, bytes]], size: int = EXPORT_CHUNK_SIZE) -> Iterator[Union[str, bytes]]:
+    """Join small pieces into chunks of about size, so each row is not its own write"""
+    pending, length = [], 0
+    for piece in pieces:
+        if not piece:
+            continue
+        pending.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield pending[0][:0].join(pending)
+            pending, length = [], 0
+    if pending:
+        yield pending[0][:0].join(pending)
+
+
+def ndjson_stream(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    return _chunked(json.dumps(row, ensure_ascii=False, default=str) + '\n' for row in rows)
+
+
+def _csv_cell(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        value = ', '.join(str(item) for item in value)
+    value = str(value)
+    if value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_stream(rows: Iterable[Dict[str, Any]], fields: List[str]) -> Iterator[str]:
+    def lines():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow([_csv_cell(row.get(field)) for field in fields])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    # The header goes out with the first rows
+    return _chunked(lines())
+
+
+def _dos_datetime(moment: datetime) -> Tuple[int, int]:
+    return (
+        (moment.hour << 11) | (moment.minute << 5) | (moment.second // 2),
+        ((moment.year - 1980) << 9) | (moment.month << 5) | moment.day
+    )
+
+
+class _StreamingZip:
+    """
+    Deflated ZIP written entry by entry, without holding its central directory
+
+    zipfile keeps a ZipInfo per entry until close(), which grows with the
+    export; here the central directory records are spooled to a temporary
+    file and copied out at the end. Each entry is a whole (small) Markdown
+    file, so its CRC and sizes are known before its header is written.
+    ZIP64 end records are added once the archive outgrows the classic
+    limits (65535 entries or 4 GiB).
+    """
+
+    def __init__(self):
+        self._offset = 0
+        self._count = 0
+        self._directory = tempfile.SpooledTemporaryFile(max_size=ZIP_DIRECTORY_SPOOL_SIZE)
+        self._dos_time, self._dos_date = _dos_datetime(datetime.now())
+
+    def add(self, path: str, text: str) -> bytes:
+        """Local header and deflated data of one file"""
+        name, data = path.encode('utf-8'), text.encode('utf-8')
+        crc = zlib.crc32(data)
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        compressed = compressor.compress(data) + compressor.flush()
+
+        local_header = struct.pack(
+            '<IHHHHHIIIHH', 0x04034b50, 20, ZIP_UTF8_FLAG, zlib.DEFLATED,
+            self._dos_time, self._dos_date, crc, len(compressed), len(data), len(name), 0
+        )
+        extra, offset, version = b'', self._offset, 20
+        if offset >= ZIP64_LIMIT:
+            extra, offset, version = struct.pack('<HHQ', 1, 8, self._offset), ZIP64_LIMIT, 45
+        self._directory.write(struct.pack(
+            '<IHHHHHHIIIHHHHHII', 0x02014b50, (3 << 8) | version, version, ZIP_UTF8_FLAG, zlib.DEFLATED,
+            self._dos_time, self._dos_date, crc, len(compressed), len(data), len(name), len(extra),
+            0, 0, 0, 0o644 << 16, offset
+        ) + name + extra)
+
+        self._offset += len(local_header) + len(name) + len(compressed)
+        self._count += 1
+        return local_header + name + compressed
+
+    def finish(self) -> Iterator[bytes]:
+        """The central directory and end records"""
+        directory_offset, directory_size = self._offset, self._directory.tell()
+        self._directory.seek(0)
+        for chunk in iter(lambda: self._directory.read(EXPORT_CHUNK_SIZE), b''):
+            yield chunk
+
+        end = b''
+        if self._count >= 0xFFFF or directory_offset >= ZIP64_LIMIT or directory_size >= ZIP64_LIMIT:
+            end += struct.pack(
+                '<IQHHIIQQQQ', 0x06064b50, 44, 45, 45, 0, 0,
+                self._count, self._count, directory_size, directory_offset
+            )
+            end += struct.pack('<IIQI', 0x07064b50, 0, directory_offset + directory_size, 1)
+        end += struct.pack(
+            '<IHHHHIIH', 0x06054b50, 0, 0, min(self._count, 0xFFFF), min(self._count, 0xFFFF),
+            min(directory_size, ZIP64_LIMIT), min(directory_offset, ZIP64_LIMIT), 0
+        )
+        yield end
+
+    def close(self):
+        self._directory.close()
+
+
+def markdown_zip_stream(rows: Iterable[Dict[str, Any]], render: Callable[[Dict[str, Any]], Tuple[str, str]]) -> Iterator[bytes]:
+    """A ZIP with one Markdown file per row, rendered as (path, text) by render"""
+    def entries():
+        archive = _StreamingZip()
+        try:
+            for row in rows:
+                yield archive.add(*render(row))
+            yield from archive.finish()
+        finally:
+            archive.close()
+
+    return _chunked(entries())
+
+
+def _front_matter(fields: Dict[str, Any]) -> str:
+    # JSON scalars and lists are valid YAML, and quote whatever needs quoting
+    lines = [f'{key}: {json.dumps(value, ensure_ascii=False, default=str)}' for key, value in fields.items()]
+    return '---\n' + '\n'.join(lines) + '\n---\n\n'
+
+
+def saved_post_markdown(post: Dict[str, Any]) -> Tuple[str, str]:
+    """(path, text) of a saved post; files are grouped by category"""
+    title = post.get('title') or post['url']
+    front_matter = _front_matter({
+        'id': post['id'],
+        'url': post['url'],
+        'platform': post.get('platform'),
+        'category': post.get('category'),
+        'tags': post.get('tags') or [],
+        'saved_at': post.get('created_at')
+    })
+    body = f"# {title}\n\n<{post['url']}>\n"
+    if post.get('notes'):
+        body += f"\n{post['notes']}\n"
+    folder = generate_slug(post.get('category') or '') or 'uncategorized'
+    name = generate_slug(post.get('title') or url_host(post['url'])) or 'post'
+    return f"{folder}/{name}-{post['id']}.md", front_matter + body
+
+
+def content_item_markdown(item: Dict[str, Any]) -> Tuple[str, str]:
+    """(path, text) of a content library item; files are grouped by content type"""
+    front_matter = _front_matter({
+        'id': item['id'],
+        'content_type': item.get('content_type'),
+        'tone': item.get('tone'),
+        'status': item.get('status'),
+        'tags': item.get('tags') or [],
+        'word_count': item.get('word_count'),
+        'is_favorite': item.get('is_favorite'),
+        'prompt': item.get('prompt'),
+        'created_at': item.get('created_at'),
+        'published_at': item.get('published_at')
+    })
+    body = f"# {item.get('title') or 'Untitled'}\n\n{item.get('content') or ''}\n"
+    folder = generate_slug(item.get('content_type') or '') or 'content'
+    name = generate_slug(item.get('title') or '') or 'content'
+    return f"{folder}/{name}-{item['id']}.md", front_matter + body
+
+
+def export_response(
+    rows: Iterable[Dict[str, Any]],
+    export_format: str,
+    filename: str,
+    fields: List[str],
+    render_markdown: Callable[[Dict[str, Any]], Tuple[str, str]]
+) -> Response:
+    """
+    Streaming attachment of rows in one of EXPORT_FORMATS
+
+    rows should be lazy (a generator over a server-side cursor): they are
+    read while the response is written, inside the request context, so
+    memory stays flat however many there are. Raises ValueError for an
+    unknown format.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}' (expected one of: {', '.join(EXPORT_FORMATS)})")
+    content_type, extension = EXPORT_FORMATS[export_format]
+
+    if export_format == 'ndjson':
+        body = ndjson_stream(rows)
+    elif export_format == 'csv':
+        body = csv_stream(rows, fields)
+    else:
+        body = markdown_zip_stream(rows, render_markdown)
+
+    response = Response(stream_with_context(body), content_type=content_type)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
@@ -0,0 +1,52 @@
+"""Search helpers shared by the SQL and MongoDB saved-post backends"""
+
+from urllib.parse import urlparse
+from typing import Any, List, Optional, Tuple
+import json
+import re
+
+SEARCH_PAGE_SIZE = 20
+
+MAX_SEARCH_TERMS = 10
+MAX_TAG_LENGTH = 50
+
+# Relative weight of a match in each searched field
+FIELD_WEIGHTS = {'title': 4.0, 'tags': 3.0, 'host': 2.0, 'notes': 1.0}
+
+
+def url_host(url: Optional[str]) -> str:
+    """Host of a saved URL without a leading www."""
+    if not url:
+        return ''
+    try:
+        host = urlparse(url if '://' in url else f'http://{url}').hostname or ''
+    except ValueError:
+        return ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def normalize_tags(tags: Any) -> List[str]:
+    """Trimmed, lowercase, de-duplicated tags from a list or its JSON text"""
+    if isinstance(tags, str):
+        try:
+            tags = json.loads(tags) if tags else []
+        except ValueError:
+            tags = [tags]
+    if not isinstance(tags, (list, tuple)):
+        return []
+    normalized = (str(tag).strip().lower()[:MAX_TAG_LENGTH] for tag in tags if tag is not None)
+    return list(dict.fromkeys(tag for tag in normalized if tag))
+
+
+def search_terms(query: Optional[str]) -> List[str]:
+    """Lowercase word terms of a search query (punctuation and operators are dropped)"""
+    return list(dict.fromkeys(re.findall(r'\w+', (query or '').lower())))[:MAX_SEARCH_TERMS]
+
+
+def encode_search_cursor(score: float, post_id: str) -> str:
+    return f'{score!r}|{post_id}'
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, str]:
+    score, post_id = cursor.rsplit('|', 1)
+    return float(score), post_id
@@ -29,45 +29,193 @@ chrome.runtime.onMessage.addListener((message, sender, sendResponse) => {
   }
 });
 
+// Offline save queue: posts are queued in storage and flushed in batches,
+// so bursts of saves become one request and saves made offline are kept
+const BATCH_SIZE = 50;        // must not exceed the backend's LINKOGENEI_BATCH_MAX_POSTS
+const FLUSH_DELAY_MS = 400;   // gathers a burst of saves into one batch
+const QUEUE_KEY = 'linkoGeneiQueue';
+const CURSOR_KEY = 'linkoGeneiSyncCursor';
+
+const pendingSaves = new Map(); // client_id -> { resolve, reject } for saves made in this worker
+let flushTimer = null;
+let flushing = null;
+let queueLock = Promise.resolve();
+
+// Read-modify-write of the stored queue, one at a time: saves, flushes and prunes
+// interleave across awaits and would otherwise overwrite each other's changes
+function updateQueue(mutate) {
+  const run = queueLock.then(async () => {
+    const { [QUEUE_KEY]: queue = [] } = await chrome.storage.local.get([QUEUE_KEY]);
+    const next = mutate(queue);
+    await chrome.storage.local.set({ [QUEUE_KEY]: next });
+    return next;
+  });
+  queueLock = run.catch(() => {});
+  return run;
+}
+
+function removeFromQueue(items) {
+  const ids = new Set(items.map(item => item.client_id));
+  return updateQueue(queue => queue.filter(item => !ids.has(item.client_id)));
+}
+
+// 4xx other than auth, timeout and rate limiting: the backend rejected the posts themselves
+function isRejected(error) {
+  return error.status >= 400 && error.status < 500 && ![401, 408, 429].includes(error.status);
+}
+
 // Handle post saving
 async function handleSavePost(postData) {
-  console.log('Background: Saving post...', postData);
-  
-  const result = await chrome.storage.local.get(['linkoGeneiToken', 'selectedBackend']);
-  const token = result.linkoGeneiToken;
-  const backend = result.selectedBackend || 'aws';
-  const apiUrl = BACKEND_URLS[backend];
+  console.log('Background: Queueing post...', postData);
 
-  if (!token) {
+  const { linkoGeneiToken } = await chrome.storage.local.get(['linkoGeneiToken']);
+  if (!linkoGeneiToken) {
     throw new Error('No authentication token found');
   }
 
-  console.log('Background: Using backend:', backend, 'URL:', apiUrl);
+  const clientId = crypto.randomUUID();
+  const result = new Promise((resolve, reject) => pendingSaves.set(clientId, { resolve, reject }));
+  try {
+    await updateQueue(queue => [...queue, { ...postData, client_id: clientId }]);
+  } catch (error) {
+    pendingSaves.delete(clientId);
+    throw error;
+  }
+  scheduleFlush();
+  return result;
+}
+
+function scheduleFlush(delay = FLUSH_DELAY_MS) {
+  clearTimeout(flushTimer);
+  flushTimer = setTimeout(() => { flushQueue(); }, delay);
+}
+
+async function apiRequest(path, options = {}) {
+  const { linkoGeneiToken, selectedBackend } = await chrome.storage.local.get(['linkoGeneiToken', 'selectedBackend']);
+  const apiUrl = BACKEND_URLS[selectedBackend || 'aws'];
+  if (!linkoGeneiToken) {
+    throw new Error('No authentication token found');
+  }
 
-  const response = await fetch(`${apiUrl}/linkogenei/save-post`, {
-    method: 'POST',
+  const response = await fetch(`${apiUrl}/linkogenei${path}`, {
+    ...options,
     headers: {
       'Content-Type': 'application/json',
-      'Authorization': `Bearer ${token}`
-    },
-    body: JSON.stringify(postData)
+      'Authorization': `Bearer ${linkoGeneiToken}`
+    }
   });
 
-  console.log('Background: Response status:', response.status);
-
   if (!response.ok) {
     const errorText = await response.text();
     console.error('Background: Error response:', errorText);
-    throw new Error(`HTTP ${response.status}: ${errorText}`);
+    const error = new Error(`HTTP ${response.status}: ${errorText}`);
+    error.status = response.status;
+    throw error;
+  }
+  return response.json();
+}
+
+// Drop queued posts the backend already has (saved from the web app or another browser)
+async function pruneQueue() {
+  let { [CURSOR_KEY]: cursor = null } = await chrome.storage.local.get([CURSOR_KEY]);
+  const saved = new Map();
+  let hasMore = true;
+  while (hasMore) {
+    const page = await apiRequest(`/sync${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''}`);
+    page.posts.forEach(post => saved.set(post.url, post));
+    cursor = page.cursor;
+    hasMore = page.has_more;
   }
+  await chrome.storage.local.set({ [CURSOR_KEY]: cursor });
+  if (saved.size === 0) return;
+
+  await updateQueue(queue => queue.filter(item => {
+    const post = saved.get(item.url);
+    if (post) settle(item.client_id, { status: 'duplicate', post_id: post.id });
+    return !post;
+  }));
+}
+
+function settle(clientId, result, error) {
+  const pending = pendingSaves.get(clientId);
+  if (!pending) return;
+  pendingSaves.delete(clientId);
+  if (error) pending.reject(error);
+  else pending.resolve(result);
+}
+
+async function flushQueue() {
+  if (flushing) return flushing;
+  flushing = (async () => {
+    try {
+      const { [CURSOR_KEY]: cursor } = await chrome.storage.local.get([CURSOR_KEY]);
+      if (!cursor) {
+        // First flush on this browser: learn what is already saved
+        await pruneQueue();
+      }
+
+      let batchSize = BATCH_SIZE;
+      while (true) {
+        const { [QUEUE_KEY]: queue = [] } = await chrome.storage.local.get([QUEUE_KEY]);
+        if (queue.length === 0) break;
+        const batch = queue.slice(0, batchSize);
+
+        let data;
+        try {
+          data = await apiRequest('/save-posts', {
+            method: 'POST',
+            body: JSON.stringify({ posts: batch })
+          });
+        } catch (error) {
+          if (!isRejected(error)) throw error;
+          if (batch.length > 1) {
+            // Send the rest one at a time so only the offending posts are dropped
+            batchSize = 1;
+            continue;
+          }
+          // Retrying cannot fix a rejected post; drop it and tell the caller
+          await removeFromQueue(batch);
+          settle(batch[0].client_id, null, error);
+          continue;
+        }
+        console.log(`Background: Batch saved (${data.saved} saved, ${data.duplicates} duplicates, ${data.failed} failed)`);
 
-  const data = await response.json();
-  console.log('Background: Success!', data);
-  return data;
+        // Remove only what was sent: saves queued while the request was in flight must survive
+        await removeFromQueue(batch);
+        await chrome.storage.local.set({ [CURSOR_KEY]: data.cursor });
+
+        data.results.forEach(result => {
+          if (result.status === 'error') settle(result.client_id, null, new Error(result.error));
+          else settle(result.client_id, result);
+        });
+      }
+    } catch (error) {
+      console.error('Background: Flush failed:', error);
+      if (error.status === 401 || error.message.includes('No authentication token')) {
+        // Saves cannot succeed until the token is fixed; report instead of queueing silently
+        pendingSaves.forEach((_, clientId) => settle(clientId, null, error));
+      } else {
+        // Offline or server error: keep the queue and tell callers their save is pending
+        pendingSaves.forEach((_, clientId) => settle(clientId, { status: 'queued' }));
+        scheduleFlush(30000);
+      }
+    } finally {
+      flushing = null;
+    }
+  })();
+  return flushing;
 }
 
+// Retry queued saves when the browser comes back online or starts
+self.addEventListener('online', () => flushQueue());
+chrome.runtime.onStartup.addListener(() => flushQueue());
+
 // Badge management
 chrome.storage.onChanged.addListener((changes, namespace) => {
+  if (changes.linkoGeneiToken) {
+    // A new token may belong to another account; resync from scratch
+    chrome.storage.local.remove(CURSOR_KEY);
+  }
   if (changes.linkoGeneiActive) {
     if (changes.linkoGeneiActive.newValue) {
       chrome.action.setBadgeText({ text: 'ON' });
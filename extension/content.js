@@ -565,7 +565,14 @@ async function savePost(url, platform, button, postElement) {
         <span>Saved!</span>
       `;
       button.classList.add('saved');
-      showNotification(`Post saved successfully!`, 'success');
+      const status = response.data && response.data.status;
+      if (status === 'queued') {
+        showNotification('You are offline - the post will be saved when you reconnect', 'success');
+      } else if (status === 'duplicate') {
+        showNotification('Post was already saved', 'success');
+      } else {
+        showNotification(`Post saved successfully!`, 'success');
+      }
     } else {
       throw new Error(response.error || 'Failed to save post');
     }
@@ -57,6 +57,7 @@ const TeamCollaboration = () => {
   })
   
   const titleRef = useRef(null)
+  const lastChatMessageIdRef = useRef(null)
   const cardsRef = useRef([])
   const chatEndRef = useRef(null)
 
@@ -224,16 +225,27 @@ const TeamCollaboration = () => {
       // Load messages immediately
       loadChatMessages(selectedChat.user_id)
       
-      // Set up polling every 3 seconds
+      // New messages are pushed over the event stream; polling is only a fallback
+      const source = api.openEventStream()
+      if (source) {
+        source.addEventListener('team_chat.message', (event) => {
+          const message = JSON.parse(event.data)
+          if (message.sender_id !== selectedChat.user_id && message.receiver_id !== selectedChat.user_id) return
+          setChatMessages(prev => prev.some(m => m.id === message.id) ? prev : [...prev, message])
+          lastChatMessageIdRef.current = message.id
+        })
+      }
+      
       const interval = setInterval(() => {
         loadChatMessages(selectedChat.user_id, true) // silent reload
-      }, 3000)
+      }, source ? 15000 : 3000)
       
       setChatPollingInterval(interval)
       
       // Cleanup on unmount or when chat changes
       return () => {
         if (interval) clearInterval(interval)
+        if (source) source.close()
       }
     } else {
       // Clear interval when leaving chat
@@ -283,9 +295,24 @@ const TeamCollaboration = () => {
 
   const loadChatMessages = async (userId, silent = false) => {
     try {
-      const response = await api.getChatMessages(userId)
+      // Silent polls only fetch messages newer than the last one we have
+      const since = silent ? lastChatMessageIdRef.current : null
+      const response = await api.getChatMessages(userId, since ? { since } : {})
       if (response.success) {
-        setChatMessages(response.messages || [])
+        const messages = response.messages || []
+        // reset means our cursor message was deleted and this is the latest page, not a delta
+        if (since && !response.reset) {
+          if (messages.length > 0) {
+            setChatMessages(prev => [...prev, ...messages.filter(m => !prev.some(p => p.id === m.id))])
+          }
+        } else {
+          setChatMessages(messages)
+        }
+        if (messages.length > 0) {
+          lastChatMessageIdRef.current = messages[messages.length - 1].id
+        } else if (!since || response.reset) {
+          lastChatMessageIdRef.current = null
+        }
         if (!silent) {
           // Reload conversations to update unread count
           loadConversations()
@@ -311,6 +338,7 @@ const TeamCollaboration = () => {
       if (response.success) {
         // Add message to local state immediately for instant feedback
         setChatMessages([...chatMessages, response.message])
+        lastChatMessageIdRef.current = response.message.id
         setNewMessage('')
         // Reload conversations to update last message
         loadConversations()
@@ -726,6 +754,17 @@ const TeamCollaboration = () => {
     }
   }
 
+  // Another member changed the task first: show their version instead of ours
+  const handleTaskConflict = (error, taskId) => {
+    if (error.status !== 409) return false
+    const current = error.data?.task
+    setProjectTasks(prev => current
+      ? prev.map(t => String(t.id) === String(taskId) ? current : t)
+      : prev.filter(t => String(t.id) !== String(taskId)))
+    alert('⚠️ This task was changed by someone else. The latest version is now shown.')
+    return true
+  }
+
   const handleCreateTask = async () => {
     if (!newTaskTitle.trim() || !newTaskAssignee) {
       alert('⚠️ Please enter task title and select an assignee')
@@ -734,41 +773,21 @@ const TeamCollaboration = () => {
     
     if (!selectedProject) return
     
-    const newTask = {
-      id: Date.now(),
-      title: newTaskTitle.trim(),
-      assignee: newTaskAssignee,
-      status: 'todo', // 'todo', 'doing', 'done'
-      createdBy: currentUser?.email || 'you',
-      createdAt: new Date().toISOString(),
-      updatedAt: new Date().toISOString()
-    }
-    
-    const updatedTasks = [...projectTasks, newTask]
-    
     try {
-      const response = await api.updateProjectTasks(selectedProject.id, updatedTasks)
+      const response = await api.createProjectTask(selectedProject.id, {
+        title: newTaskTitle.trim(),
+        assignee: newTaskAssignee,
+        status: 'todo' // 'todo', 'doing', 'done'
+      })
       
       if (response.success) {
-        setProjectTasks(updatedTasks)
+        setProjectTasks(prev => [...prev, response.task])
         setNewTaskTitle('')
         setNewTaskAssignee('')
         
-        // Send notification to assignee (only if not assigning to yourself)
-        if (newTaskAssignee !== currentUser?.email) {
-          try {
-            await api.sendTaskNotification(
-              newTaskAssignee,
-              newTask.title,
-              selectedProject.name,
-              selectedProject.id,
-              'task_assigned'
-            )
-            alert(`✅ Task created and ${newTaskAssignee} has been notified!`)
-          } catch (notifErr) {
-            console.warn('Could not send notification:', notifErr)
-            alert('✅ Task created successfully!')
-          }
+        // The backend notifies the assignee when the leader assigns a task
+        if (newTaskAssignee !== currentUser?.email && isProjectLeader(selectedProject)) {
+          alert(`✅ Task created and ${newTaskAssignee} has been notified!`)
         } else {
           alert('✅ Task created successfully!')
         }
@@ -787,58 +806,15 @@ const TeamCollaboration = () => {
   const handleUpdateTaskStatus = async (taskId, newStatus) => {
     if (!selectedProject) return
     
-    const taskIndex = projectTasks.findIndex(t => t.id === taskId)
-    if (taskIndex === -1) return
-    
-    const updatedTasks = [...projectTasks]
-    const task = { ...updatedTasks[taskIndex] }
-    const oldStatus = task.status
-    
-    task.status = newStatus
-    task.updatedAt = new Date().toISOString()
-    
-    // Add completion info when marking as done
-    if (newStatus === 'done' && oldStatus !== 'done') {
-      task.completedBy = currentUser?.email
-      task.completedAt = new Date().toISOString()
-    }
-    
-    updatedTasks[taskIndex] = task
+    const task = projectTasks.find(t => t.id === taskId)
+    if (!task) return
     
     try {
-      const response = await api.updateProjectTasks(selectedProject.id, updatedTasks)
+      // Completion info and the leader notification are handled by the backend
+      const response = await api.moveProjectTask(selectedProject.id, taskId, task.version || 0, newStatus)
       
       if (response.success) {
-        setProjectTasks(updatedTasks)
-        
-        // If task marked as done and user is NOT the leader, notify the leader
-        if (newStatus === 'done' && oldStatus !== 'done' && !isProjectLeader(selectedProject)) {
-          const projectData = projects.find(p => p.id === selectedProject.id)
-          if (projectData) {
-            // Get leader email - need to find owner
-            try {
-              // The project owner_id is the leader, get their email
-              const leaderRes = await api.getTeamMembers()
-              // Find the owner in team members or use project owner
-              const ownerMember = leaderRes.members?.find(m => m.owner_id === projectData.owner_id && m.is_owner)
-              
-              if (ownerMember) {
-                await api.sendTaskNotification(
-                  ownerMember.member_email,
-                  task.title,
-                  selectedProject.name,
-                  selectedProject.id,
-                  'task_completed'
-                )
-              } else {
-                // Fallback: notify via backend user lookup
-                console.log('Notifying project owner about task completion')
-              }
-            } catch (err) {
-              console.warn('Could not notify leader:', err)
-            }
-          }
-        }
+        setProjectTasks(prev => prev.map(t => t.id === taskId ? response.task : t))
         
         const statusText = newStatus === 'todo' ? 'To Do' : newStatus === 'doing' ? 'In Progress' : 'Completed'
         console.log(`✅ Task "${task.title}" moved to ${statusText}`)
@@ -850,6 +826,7 @@ const TeamCollaboration = () => {
         alert(`⚠️ ${response.error || 'Failed to update task'}`)
       }
     } catch (error) {
+      if (handleTaskConflict(error, taskId)) return
       alert(`⚠️ ${error.message || 'Failed to update task'}`)
     }
   }
@@ -874,13 +851,14 @@ const TeamCollaboration = () => {
     
     if (!selectedProject) return
     
-    const updatedTasks = projectTasks.filter(t => t.id !== taskId)
+    const task = projectTasks.find(t => t.id === taskId)
+    if (!task) return
     
     try {
-      const response = await api.updateProjectTasks(selectedProject.id, updatedTasks)
+      const response = await api.deleteProjectTask(selectedProject.id, taskId, task.version || 0)
       
       if (response.success) {
-        setProjectTasks(updatedTasks)
+        setProjectTasks(prev => prev.filter(t => t.id !== taskId))
         alert('✅ Task deleted')
         
         // Reload projects
@@ -890,6 +868,7 @@ const TeamCollaboration = () => {
         alert(`⚠️ ${response.error || 'Failed to delete task'}`)
       }
     } catch (error) {
+      if (handleTaskConflict(error, taskId)) return
       alert(`⚠️ ${error.message || 'Failed to delete task'}`)
     }
   }
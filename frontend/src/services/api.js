@@ -90,7 +90,10 @@ class ApiService {
       const data = await response.json()
 
       if (!response.ok) {
-        throw new Error(data.error || `HTTP error! status: ${response.status}`)
+        const error = new Error(data.error || `HTTP error! status: ${response.status}`)
+        error.status = response.status
+        error.data = data
+        throw error
       }
 
       // Cache successful GET responses
@@ -341,8 +344,10 @@ class ApiService {
     return this.request('/team/chat/conversations')
   }
 
-  async getTeamChatMessages(otherUserId) {
-    return this.request(`/team/chat/${otherUserId}`)
+  async getTeamChatMessages(otherUserId, params = {}) {
+    const queryString = new URLSearchParams(params).toString()
+    const endpoint = queryString ? `/team/chat/${otherUserId}?${queryString}` : `/team/chat/${otherUserId}`
+    return this.request(endpoint)
   }
 
   async sendTeamChatMessage(otherUserId, message) {
@@ -362,6 +367,54 @@ class ApiService {
     return this.request(`/team/chat/${otherUserId}/export`)
   }
 
+  // ==================== REAL-TIME EVENTS ====================
+
+  // EventSource cannot send headers, so each connection is opened with a short-lived
+  // stream ticket. The server closes streams periodically and the ticket has expired by
+  // then, so reconnects fetch a new ticket and resume from the last event id.
+  // Returns an object with addEventListener/close, like an EventSource.
+  openEventStream() {
+    if (!localStorage.getItem('access_token') || typeof EventSource === 'undefined') return null
+
+    const stream = { source: null, closed: false, lastEventId: null, listeners: [] }
+
+    const connect = async () => {
+      try {
+        const { ticket } = await this.request('/events/ticket', { method: 'POST' })
+        if (stream.closed) return
+        const params = new URLSearchParams({ ticket })
+        if (stream.lastEventId) params.set('last_event_id', stream.lastEventId)
+
+        const source = new EventSource(`${this.baseURL}/api/events/stream?${params}`)
+        stream.listeners.forEach(([type, listener]) => source.addEventListener(type, listener))
+        source.onerror = () => {
+          source.close()
+          if (!stream.closed) setTimeout(connect, 3000)
+        }
+        stream.source = source
+      } catch (error) {
+        if (!stream.closed) setTimeout(connect, 15000)
+      }
+    }
+
+    connect()
+
+    return {
+      addEventListener(type, listener) {
+        const tracked = (event) => {
+          if (event.lastEventId) stream.lastEventId = event.lastEventId
+          listener(event)
+        }
+        stream.listeners.push([type, tracked])
+        if (stream.source) stream.source.addEventListener(type, tracked)
+      },
+      close() {
+        stream.closed = true
+        if (stream.source) stream.source.close()
+      }
+    }
+  }
+
   // ==================== LINKOGENEI ====================
   
   async generateLinkoGeneiToken() {
@@ -452,6 +505,14 @@ class ApiService {
     })
   }
 
+  // Sends a user turn; the backend builds the context and stores both messages
+  async sendAlexChatTurn(conversationId, content, tone = 'conversational') {
+    return this.request(`/chat/conversations/${conversationId}/turn`, {
+      method: 'POST',
+      body: JSON.stringify({ content, tone })
+    })
+  }
+
   async deleteAlexChatConversation(conversationId) {
     return this.request(`/chat/conversations/${conversationId}`, {
       method: 'DELETE'
@@ -529,6 +590,41 @@ class ApiService {
     })
   }
 
+  // Per-task operations; a stale version is rejected with 409 and the current task
+  async createProjectTask(projectId, task, position = null) {
+    return this.request(`/team/projects/${projectId}/tasks`, {
+      method: 'POST',
+      body: JSON.stringify({ task, position })
+    })
+  }
+
+  async updateProjectTask(projectId, taskId, version, changes) {
+    return this.request(`/team/projects/${projectId}/tasks/${taskId}`, {
+      method: 'PUT',
+      body: JSON.stringify({ version, changes })
+    })
+  }
+
+  async moveProjectTask(projectId, taskId, version, status, position = null) {
+    return this.request(`/team/projects/${projectId}/tasks/${taskId}/move`, {
+      method: 'POST',
+      body: JSON.stringify({ version, status, position })
+    })
+  }
+
+  async deleteProjectTask(projectId, taskId, version) {
+    return this.request(`/team/projects/${projectId}/tasks/${taskId}?version=${version}`, {
+      method: 'DELETE'
+    })
+  }
+
+  async applyProjectTaskOps(projectId, ops) {
+    return this.request(`/team/projects/${projectId}/tasks/ops`, {
+      method: 'POST',
+      body: JSON.stringify({ ops })
+    })
+  }
+
   // Send task notification
   async sendTaskNotification(assigneeEmail, taskTitle, projectName, projectId, notificationType) {
     return this.request('/team/notifications/task', {
@@ -548,8 +644,8 @@ class ApiService {
     return this.getTeamChatConversations()
   }
 
-  async getChatMessages(otherUserId) {
-    return this.getTeamChatMessages(otherUserId)
+  async getChatMessages(otherUserId, params = {}) {
+    return this.getTeamChatMessages(otherUserId, params)
   }
 
   async sendChatMessage(otherUserId, message) {
@@ -662,8 +758,10 @@ class ApiService {
   // ==================== TEAM ACTIVITY ====================
   
   // Get team activity feed
-  async getTeamActivity(limit = 50) {
-    return this.request(`/team/activity?limit=${limit}`)
+  async getTeamActivity(limit = 50, before = null) {
+    const params = new URLSearchParams({ limit })
+    if (before) params.set('before', before)
+    return this.request(`/team/activity?${params}`)
   }
 
   // ==================== ADMIN ENDPOINTS ====================